@@ -0,0 +1,117 @@
+"""
+Measures the cost of encoding and decoding one document with the KV serializers.
+
+The habits and the habit instances are encoded and decoded twice: with
+to_dict and from_dict one document at a time, reading the keys from their
+DataKeys on every call, and with the to_dicts and from_dicts batch methods,
+which read the keys once for the whole batch.
+
+Run from the root of the repository, with the package installed:
+
+    python benchmarks/kv_serializers.py --count 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+from pebble.application.serializers import HabitInstanceKVSerializer, HabitKVSerializer
+from pebble.domain.entities import Daily, Habit, HabitCategory, HabitInstance
+from pebble.domain.value_objects import Color
+
+
+def build_history(habits_count: int, count: int) -> List[HabitInstance]:
+    category = HabitCategory(
+        name="Health", description=None, color=Color.intern("#FF5733"), id="health"
+    )
+    habits = [
+        Habit(
+            name=f"Habit {index}",
+            recurrence=Daily(),
+            category=category,
+            color=Color.intern("#33FF57"),
+            id=str(index),
+        )
+        for index in range(habits_count)
+    ]
+    return [
+        HabitInstance(
+            habit=habits[index % habits_count],
+            date=date(2000, 1, 1) + timedelta(days=index // habits_count),
+            completed=index % 3 != 0,
+            id=str(index),
+        )
+        for index in range(count)
+    ]
+
+
+def cost(function: Callable[[], object], count: int, repeat: int) -> float:
+    """
+    Returns the best time of the function per document, in nanoseconds.
+    """
+    return min(timeit.repeat(function, number=1, repeat=repeat)) / count * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    arguments = parser.parse_args()
+
+    habit_instances = build_history(arguments.habits, arguments.count)
+    habits_by_id: Dict[str, Habit] = {
+        habit_instance.habit.id: habit_instance.habit
+        for habit_instance in habit_instances
+    }
+    habits = list(habits_by_id.values()) * (arguments.count // arguments.habits)
+    category = habits[0].category
+    categories = {category.id: category}
+    habits_data = HabitKVSerializer.to_dicts(habits)
+    habit_instances_data = HabitInstanceKVSerializer.to_dicts(habit_instances)
+
+    measures = {
+        "habit encode": (
+            lambda: [HabitKVSerializer.to_dict(habit) for habit in habits],
+            lambda: HabitKVSerializer.to_dicts(habits),
+        ),
+        "habit decode": (
+            lambda: [
+                HabitKVSerializer.from_dict(data, category) for data in habits_data
+            ],
+            lambda: HabitKVSerializer.from_dicts(habits_data, categories),
+        ),
+        "habit instance encode": (
+            lambda: [
+                HabitInstanceKVSerializer.to_dict(habit_instance)
+                for habit_instance in habit_instances
+            ],
+            lambda: HabitInstanceKVSerializer.to_dicts(habit_instances),
+        ),
+        "habit instance decode": (
+            lambda: [
+                HabitInstanceKVSerializer.from_dict(
+                    data, habits_by_id[data["habit_id"]]
+                )
+                for data in habit_instances_data
+            ],
+            lambda: HabitInstanceKVSerializer.from_dicts(
+                habit_instances_data, habits_by_id
+            ),
+        ),
+    }
+
+    print(f"{arguments.count} documents, nanoseconds per document")
+    print(f"{'':24}{'single':>10}{'batch':>10}")
+    for name, functions in measures.items():
+        single, batch = (
+            cost(function, arguments.count, arguments.repeat) for function in functions
+        )
+        print(f"{name:24}{single:10.0f}{batch:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
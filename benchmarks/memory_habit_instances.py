@@ -0,0 +1,126 @@
+"""
+Measures the memory used by a large in-memory history of habit instances.
+
+The habit instances are built twice, with a copy of the entities as they
+were before they were slotted, with a __dict__ per instance, and with the
+current slotted entities. The habits are built the same way, with a new
+color per habit before, and with the shared colors of Color.intern after.
+
+Run from the root of the repository, with the package installed:
+
+    python benchmarks/memory_habit_instances.py --count 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, List, Optional
+
+from pebble.domain.entities import Daily, Habit, HabitInstance
+from pebble.domain.value_objects import Color
+
+COLORS = ["#FF5733", "#33FF57", "#3357FF", "#F1C40F", "#8E44AD"]
+
+
+@dataclass
+class DictColor:
+    hex: str
+
+
+@dataclass
+class DictHabit:
+    name: str
+    recurrence: object
+    description: Optional[str] = None
+    category: Optional[object] = None
+    color: Optional[DictColor] = None
+    id: Optional[str] = None
+
+
+@dataclass
+class DictHabitInstance:
+    habit: object
+    date: date
+    completed: bool
+    note: Optional[str] = None
+    id: Optional[str] = None
+
+
+def build_before(habits_count: int, count: int) -> List[DictHabitInstance]:
+    recurrence = Daily()
+    habits = [
+        DictHabit(
+            name=f"Habit {index}",
+            recurrence=recurrence,
+            color=DictColor(COLORS[index % len(COLORS)]),
+            id=str(index),
+        )
+        for index in range(habits_count)
+    ]
+    return [
+        DictHabitInstance(
+            habit=habits[index % habits_count],
+            date=date(2000, 1, 1) + timedelta(days=index // habits_count),
+            completed=index % 3 != 0,
+            id=str(index),
+        )
+        for index in range(count)
+    ]
+
+
+def build_after(habits_count: int, count: int) -> List[HabitInstance]:
+    recurrence = Daily()
+    habits = [
+        Habit(
+            name=f"Habit {index}",
+            recurrence=recurrence,
+            color=Color.intern(COLORS[index % len(COLORS)]),
+            id=str(index),
+        )
+        for index in range(habits_count)
+    ]
+    return [
+        HabitInstance(
+            habit=habits[index % habits_count],
+            date=date(2000, 1, 1) + timedelta(days=index // habits_count),
+            completed=index % 3 != 0,
+            id=str(index),
+        )
+        for index in range(count)
+    ]
+
+
+def measure(build: Callable[[int, int], list], habits_count: int, count: int) -> int:
+    """
+    Returns the number of bytes still allocated after building the history.
+    """
+    gc.collect()
+    tracemalloc.start()
+    history = build(habits_count, count)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del history
+    return allocated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--habits", type=int, default=1_000)
+    arguments = parser.parse_args()
+
+    before = measure(build_before, arguments.habits, arguments.count)
+    after = measure(build_after, arguments.habits, arguments.count)
+
+    print(f"{arguments.count} habit instances of {arguments.habits} habits")
+    print(f"before: {before / arguments.count:8.1f} bytes per habit instance")
+    print(f"after:  {after / arguments.count:8.1f} bytes per habit instance")
+    print(f"saved:  {1 - after / before:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
-from typing import Set
+import functools
+from typing import FrozenSet, Optional, Set
 
 from pebble.domain.entities import (
     BiMonthly,
@@ -10,7 +11,8 @@ from pebble.domain.entities import (
     Weekly,
     Yearly,
 )
-from pebble.domain.value_objects import WeekDays
+from pebble.domain.services import CacheInfo
+from pebble.domain.value_objects import WeekDayMask
 
 
 class InvalidRecurrenceError(Exception):
@@ -20,28 +22,81 @@ class InvalidRecurrenceError(Exception):
 
 
 class RecurrenceFactory:
+    """
+    Builds the recurrences from their name and their days of the week.
+
+    The recurrences are immutable, the factory returns a single canonical
+    recurrence per name and days of the week. After the first habit with
+    a recurrence is built, building the same recurrence is a cache lookup,
+    the names of the days are not validated again.
+    """
+
     ALL_RECURRENCES = {Daily, Weekly, BiWeekly, Monthly, BiMonthly, Yearly, Quarterly}
     ALL_RECURRENCES_BY_NAME = {
         recurrence.name: recurrence for recurrence in ALL_RECURRENCES
     }
 
     @classmethod
-    def get_recurrence_from_strings(
-        cls, recurrence_name: str, days_of_week: Set[str]
+    def get_recurrence(
+        cls, recurrence_name: str, days_mask: Optional[int]
     ) -> Recurrence:
         # A daily recurrence is the default recurrence, no weekday is needed
         if recurrence_name.lower() == "daily":
-            return Daily()
+            return cls._canonical_recurrence(Daily.name, None)
 
-        # validate the days provided for recurrence
-        if days_of_week and not all(
-            WeekDays.valid_weekday(day) for day in days_of_week
-        ):
+        if days_mask is not None and not 0 <= days_mask <= WeekDayMask.ALL:
             raise InvalidRecurrenceError("Invalid days provided for recurrence")
 
-        # create a set of WeekDays objects from the days provided in the DTO
-        recurrence_days: Set[WeekDays] = (
-            {WeekDays(day) for day in days_of_week} if days_of_week else None
+        # a mask without any day is the same as days that are not set
+        return cls._canonical_recurrence(
+            recurrence_name, int(days_mask) if days_mask else None
         )
 
-        return cls.ALL_RECURRENCES_BY_NAME[recurrence_name](recurrence_days)
+    @classmethod
+    def get_recurrence_from_strings(
+        cls, recurrence_name: str, days_of_week: Set[str]
+    ) -> Recurrence:
+        return cls._recurrence_from_strings(
+            recurrence_name, frozenset(days_of_week or ())
+        )
+
+    # the caches are not bounded, only the valid names and days are cached
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _recurrence_from_strings(
+        cls, recurrence_name: str, days_of_week: FrozenSet[str]
+    ) -> Recurrence:
+        # validate the days provided for recurrence and pack them in a mask
+        try:
+            days_mask = WeekDayMask.from_names(days_of_week)
+        except ValueError:
+            raise InvalidRecurrenceError("Invalid days provided for recurrence")
+
+        return cls.get_recurrence(recurrence_name, days_mask)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _canonical_recurrence(
+        cls, recurrence_name: str, days_mask: Optional[int]
+    ) -> Recurrence:
+        if recurrence_name == Daily.name:
+            return Daily()
+
+        return cls.ALL_RECURRENCES_BY_NAME[recurrence_name](
+            WeekDayMask(days_mask) if days_mask else None
+        )
+
+    @classmethod
+    def cache_info(cls) -> CacheInfo:
+        """
+        Returns the hit and miss counters of the canonical recurrences.
+        """
+        return CacheInfo.from_lru_cache(cls._canonical_recurrence)
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """
+        Removes the canonical recurrences and the parsed days of the week.
+        """
+        cls._canonical_recurrence.cache_clear()
+        cls._recurrence_from_strings.cache_clear()
@@ -1 +1,7 @@
+from .async_habits_repository import AsyncHabitRepository as AsyncHabitRepository
+from .bulk_save_result import BulkSaveFailure as BulkSaveFailure
+from .bulk_save_result import BulkSaveResult as BulkSaveResult
 from .habits_repository import HabitRepository as HabitRepository
+from .identity_map import IdentityMap as IdentityMap
+from .lazy_habit_collection import HabitInstanceHistory as HabitInstanceHistory
+from .lazy_habit_collection import LazyHabitCollection as LazyHabitCollection
@@ -0,0 +1,35 @@
+from dataclasses import dataclass, field
+from typing import Generic, List, TypeVar
+
+Entity = TypeVar("Entity")
+
+
+@dataclass(frozen=True)
+class BulkSaveFailure(Generic[Entity]):
+    """
+    An entity that could not be saved by a bulk save.
+
+    Attributes:
+        entity: The entity that could not be saved, it has no new identifier.
+        error: The reason why the entity could not be saved.
+    """
+
+    entity: Entity
+    error: str
+
+
+@dataclass
+class BulkSaveResult(Generic[Entity]):
+    """
+    The result of saving several entities at once.
+
+    A failure to save one entity does not prevent the other entities
+    from being saved.
+
+    Attributes:
+        saved: The entities that were saved, with their identifier.
+        failed: The entities that could not be saved, with the reason.
+    """
+
+    saved: List[Entity] = field(default_factory=list)
+    failed: List[BulkSaveFailure[Entity]] = field(default_factory=list)
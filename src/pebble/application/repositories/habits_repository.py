@@ -1,8 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import Set, Union
+from datetime import date
+from typing import Iterator, List, Optional, Set, Tuple, Union
 
-from pebble.domain.entities import Habit, HabitCategory, HabitCollection, HabitInstance
-from pebble.domain.value_objects import ID
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+    HabitStreak,
+)
+from pebble.domain.value_objects import ID, WeekDayMask
+
+from .bulk_save_result import BulkSaveResult
 
 
 class HabitCreationError(Exception):
@@ -26,6 +36,21 @@ class HabitRepository(ABC):
             HabitCreationError: If the habit could not be created.
         """
 
+    @abstractmethod
+    def save_habits(self, habits: List[Habit]) -> BulkSaveResult[Habit]:
+        """
+        Saves several new habits in the repository at once.
+        Assigns a unique identifier to each saved habit.
+
+        A habit that cannot be saved does not prevent the others from being saved.
+
+        Args:
+            habits: The habits to be saved.
+
+        Returns:
+            The saved habits, with their identifier, and the habits that failed.
+        """
+
     @abstractmethod
     def get_habit_by_id(self, habit_id: ID) -> Union[Habit, None]:
         """
@@ -56,6 +81,20 @@ class HabitRepository(ABC):
             RepositoryError: If the habits could not be found.
         """
 
+    @abstractmethod
+    def get_habits_by_weekdays(self, weekdays: WeekDayMask) -> Set[Habit]:
+        """
+        Gets the habits recurring on any of some days of the week.
+
+        The habits whose days of the week are not set are not returned.
+
+        Args:
+            weekdays: The mask of the days of the week.
+
+        Returns:
+            The habits recurring on at least one of the days.
+        """
+
     @abstractmethod
     def save_habit_category(self, habit_category: HabitCategory) -> HabitCategory:
         """
@@ -72,6 +111,24 @@ class HabitRepository(ABC):
             RepositoryError: If the category could not be created.
         """
 
+    @abstractmethod
+    def save_habit_categories(
+        self, habit_categories: List[HabitCategory]
+    ) -> BulkSaveResult[HabitCategory]:
+        """
+        Saves several new habit categories in the repository at once.
+        Assigns a unique identifier to each saved category.
+
+        A category that cannot be saved does not prevent the others from being saved.
+
+        Args:
+            habit_categories: The categories to be saved.
+
+        Returns:
+            The saved categories, with their identifier, and the categories
+            that failed.
+        """
+
     @abstractmethod
     def get_habit_category_by_name(
         self, category_name: str
@@ -141,6 +198,58 @@ class HabitRepository(ABC):
             RepositoryError: If the habit collection could not be found.
         """
 
+    @abstractmethod
+    def open_habit_collection(
+        self, habit_collection_id: ID
+    ) -> Union[HabitCollection, None]:
+        """
+        Gets a habit collection by identifier from the repository,
+        without loading its habits and habit instances.
+
+        The habits are loaded when they are first accessed, the habit instances
+        are read by range of dates or by page through the history of a
+        LazyHabitCollection. A habit collection already in memory is returned
+        as is.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection to open.
+
+        Returns:
+            The habit collection with the provided identifier, if found, else None.
+        """
+
+    @abstractmethod
+    def habit_collection_exists(self, habit_collection_id: ID) -> bool:
+        """
+        Checks if a habit collection exists in the repository,
+        without loading its habits and habit instances.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection to check.
+
+        Returns:
+            True if the habit collection exists, else False.
+        """
+
+    @abstractmethod
+    def add_habit_instance_to_collection(
+        self, habit_collection_id: ID, habit_instance: HabitInstance
+    ) -> None:
+        """
+        Adds a saved habit instance to a habit collection.
+
+        Only the identifier of the habit instance is added, the habit collection
+        is not loaded nor rewritten. Adding the same habit instance twice has
+        no effect.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+            habit_instance: The habit instance to add, it must have an identifier.
+
+        Raises:
+            RepositoryError: If the habit collection could not be found.
+        """
+
     @abstractmethod
     def save_habit_instance(self, habit_instance: HabitInstance) -> HabitInstance:
         """
@@ -157,6 +266,46 @@ class HabitRepository(ABC):
             HabitCreationError: If the habit instance could not be created.
         """
 
+    @abstractmethod
+    def record_check_in(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Records the habit instance of a habit on a date, the check-in.
+
+        The habit instance is created if the habit has none on this date,
+        else the completion and the note of the existing habit instance are
+        replaced. Recording the same check-in again has no further effect,
+        a retried check-in never creates a second habit instance.
+
+        Args:
+            habit_instance: The habit instance to record, its habit must be saved.
+
+        Returns:
+            The recorded habit instance, with the identifier of the habit
+            instance of the habit on this date.
+
+        Raises:
+            RepositoryError: If the habit instance could not be recorded.
+        """
+
+    @abstractmethod
+    def save_habit_instances(
+        self, habit_instances: List[HabitInstance]
+    ) -> BulkSaveResult[HabitInstance]:
+        """
+        Saves several new habit instances in the repository at once.
+        Assigns a unique identifier to each saved habit instance.
+
+        A habit instance that cannot be saved does not prevent the others
+        from being saved.
+
+        Args:
+            habit_instances: The habit instances to be saved.
+
+        Returns:
+            The saved habit instances, with their identifier, and the habit
+            instances that failed.
+        """
+
     @abstractmethod
     def get_habit_instance_by_id(
         self, habit_instance_id: ID
@@ -173,3 +322,139 @@ class HabitRepository(ABC):
         Raises:
             RepositoryError: If the habit instance could not be found.
         """
+
+    @abstractmethod
+    def iter_habit_instances(
+        self,
+        habits_ids: Set[ID],
+        start_date: date,
+        end_date: date,
+        batch_size: int = 100,
+        after: Optional[Tuple[date, ID]] = None,
+    ) -> Iterator[HabitInstance]:
+        """
+        Iterates over the habit instances of habits between two dates, included.
+
+        The habit instances are fetched by batches while iterating,
+        the memory used does not depend on the length of the date range.
+        They are sorted by date and identifier, the date and identifier of
+        the last habit instance of a page is the position of the next page.
+
+        Args:
+            habits_ids: The identifiers of the habits.
+            start_date: The first date of the habit instances.
+            end_date: The last date of the habit instances.
+            batch_size: The number of habit instances fetched at once.
+            after: The date and identifier of the habit instance to continue
+            after, to iterate from the start of the date range if None.
+
+        Returns:
+            An iterator over the habit instances, sorted by date and identifier.
+        """
+
+    @abstractmethod
+    def get_habit_streak(self, habit_id: ID) -> Union[HabitStreak, None]:
+        """
+        Gets the streak of a habit from the repository.
+
+        Args:
+            habit_id: The identifier of the habit.
+
+        Returns:
+            The streak of the habit, None if no streak was saved for the habit.
+        """
+
+    @abstractmethod
+    def save_habit_streak(self, habit_streak: HabitStreak) -> HabitStreak:
+        """
+        Saves the streak of a habit in the repository, replacing the saved one.
+
+        Args:
+            habit_streak: The streak to save.
+
+        Returns:
+            The saved streak.
+        """
+
+    @abstractmethod
+    def save_habit_streak_if_unchanged(
+        self,
+        habit_streak: HabitStreak,
+        previous_habit_streak: Union[HabitStreak, None],
+    ) -> bool:
+        """
+        Saves the streak of a habit only if the saved streak is still the one
+        it was computed from, as a single atomic write: a streak updated by
+        another check-in since it was read is not overwritten.
+
+        Args:
+            habit_streak: The streak to save.
+            previous_habit_streak: The streak read before the update,
+            None if no streak was saved for the habit.
+
+        Returns:
+            True if the streak was saved, False if the saved streak changed.
+        """
+
+    @abstractmethod
+    def get_completion_calendar(
+        self, habit_id: ID, year: int
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Gets the completion calendar of a habit for a year from the repository.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+
+        Returns:
+            The completion calendar, None if no calendar was saved for the year.
+        """
+
+    @abstractmethod
+    def save_completion_calendar(
+        self, completion_calendar: CompletionCalendar
+    ) -> CompletionCalendar:
+        """
+        Saves the completion calendar of a habit for a year in the repository,
+        replacing the saved one.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            The saved completion calendar.
+        """
+
+    @abstractmethod
+    def save_completion_calendar_if_absent(
+        self, completion_calendar: CompletionCalendar
+    ) -> bool:
+        """
+        Saves the completion calendar of a habit for a year only if no calendar
+        was saved for the year, as a single atomic write: a calendar saved by
+        another check-in since it was read is not overwritten.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            True if the calendar was saved, False if a calendar was already saved.
+        """
+
+    @abstractmethod
+    def record_completion(
+        self, habit_instance: HabitInstance
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Records the completion and the note of a habit instance in the saved
+        completion calendar of its year, as a single atomic write: a check-in
+        of another day recorded at the same time is not lost.
+
+        Args:
+            habit_instance: The habit instance, its habit must be saved.
+
+        Returns:
+            The updated completion calendar, None if no calendar was saved
+            for the year.
+        """
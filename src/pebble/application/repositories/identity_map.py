@@ -0,0 +1,81 @@
+from typing import Dict, Optional, Tuple, Type, TypeVar
+
+from pebble.domain.value_objects import ID
+
+Entity = TypeVar("Entity")
+
+
+class IdentityMap:
+    """
+    Keeps a single in-memory object per stored entity.
+
+    A repository sharing an identity map returns the same object every time
+    an entity with the same identifier is loaded, instead of deserializing
+    a new copy, and can skip the data layer altogether when the entity
+    was already loaded.
+
+    An identity map is meant to live for one request or session,
+    the entities it holds are not refreshed from the data layer.
+
+    Attributes:
+        _entities: The entities loaded so far, indexed by type and identifier.
+    """
+
+    def __init__(self) -> None:
+        self._entities: Dict[Tuple[type, ID], object] = {}
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def get(self, entity_type: Type[Entity], entity_id: ID) -> Optional[Entity]:
+        """
+        Gets an entity from the identity map.
+
+        Args:
+            entity_type: The type of the entity to get.
+            entity_id: The identifier of the entity to get.
+
+        Returns:
+            The entity with the provided type and identifier, if loaded, else None.
+        """
+        if entity_id is None:
+            return None
+
+        return self._entities.get((entity_type, str(entity_id)))
+
+    def add(self, entity: Entity) -> Entity:
+        """
+        Adds an entity to the identity map.
+
+        If an entity with the same type and identifier is already in the map,
+        the entity already in the map is kept and returned.
+
+        Args:
+            entity: The entity to add, it must have an identifier.
+
+        Returns:
+            The entity held by the identity map for this identifier.
+
+        Raises:
+            ValueError: If the entity does not have an identifier.
+        """
+        if entity.id is None:
+            raise ValueError("Entity must have an ID to be added to the identity map.")
+
+        return self._entities.setdefault((type(entity), str(entity.id)), entity)
+
+    def remove(self, entity_type: type, entity_id: ID) -> None:
+        """
+        Removes an entity from the identity map, if it is in the map.
+
+        Args:
+            entity_type: The type of the entity to remove.
+            entity_id: The identifier of the entity to remove.
+        """
+        self._entities.pop((entity_type, str(entity_id)), None)
+
+    def clear(self) -> None:
+        """
+        Removes all the entities from the identity map.
+        """
+        self._entities.clear()
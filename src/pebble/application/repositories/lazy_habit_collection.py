@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from datetime import date
+from itertools import islice
+from typing import TYPE_CHECKING, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from pebble.domain.entities import (
+    Habit,
+    HabitCollection,
+    HabitInstance,
+    HabitInstanceTimeline,
+)
+from pebble.domain.value_objects import ID, Description, Name
+
+if TYPE_CHECKING:
+    from .habits_repository import HabitRepository
+
+
+class HabitInstanceHistory:
+    """
+    The habit instances of the habits of a collection, read from the
+    repository by range of dates or by page when they are needed.
+
+    Nothing is kept in memory, every read reaches the repository and
+    sees the habit instances saved since the collection was opened.
+
+    Attributes:
+        habits_ids: The identifiers of the habits of the collection.
+    """
+
+    __slots__ = ("_repository", "habits_ids")
+
+    def __init__(self, repository: HabitRepository, habits_ids: FrozenSet[ID]) -> None:
+        self._repository = repository
+        self.habits_ids = habits_ids
+
+    def between(self, start_date: date, end_date: date) -> HabitInstanceTimeline:
+        """
+        Reads the habit instances between two dates, included.
+
+        Args:
+            start_date: The first date of the habit instances.
+            end_date: The last date of the habit instances.
+
+        Returns:
+            The habit instances, sorted by date for each habit.
+        """
+        return HabitInstanceTimeline(self.iter(start_date, end_date))
+
+    def page(
+        self,
+        page_size: int,
+        after: Optional[Tuple[date, ID]] = None,
+        start_date: date = date.min,
+        end_date: date = date.max,
+    ) -> List[HabitInstance]:
+        """
+        Reads a page of habit instances, sorted by date and identifier.
+
+        Args:
+            page_size: The maximum number of habit instances of the page.
+            after: The date and identifier of the last habit instance
+            of the previous page, None for the first page.
+            start_date: The first date of the habit instances.
+            end_date: The last date of the habit instances.
+
+        Returns:
+            The habit instances of the page, the page is shorter than
+            page_size when it is the last one.
+        """
+        return list(
+            islice(
+                self._repository.iter_habit_instances(
+                    set(self.habits_ids), start_date, end_date, page_size, after
+                ),
+                page_size,
+            )
+        )
+
+    def iter(
+        self,
+        start_date: date = date.min,
+        end_date: date = date.max,
+        batch_size: int = 100,
+    ) -> Iterator[HabitInstance]:
+        """
+        Iterates over the habit instances between two dates, included,
+        fetched by batches from the repository.
+        """
+        return self._repository.iter_habit_instances(
+            set(self.habits_ids), start_date, end_date, batch_size
+        )
+
+    def __iter__(self) -> Iterator[HabitInstance]:
+        return self.iter()
+
+
+class LazyHabitCollection(HabitCollection):
+    """
+    A habit collection opened without its habits and its habit instances.
+
+    Opening the collection reads its name, its description and the
+    identifiers of its habits, whatever the length of its history.
+    The habits are loaded from the repository the first time they are
+    accessed. The habit instances are read through the history, by range
+    of dates or by page, accessing habits_instance loads the whole history.
+
+    Attributes:
+        habits_ids: The identifiers of the habits of the collection.
+        history: The habit instances of the habits of the collection.
+    """
+
+    __slots__ = ("habits_ids", "history", "_repository", "_habits", "_habits_instance")
+
+    def __init__(
+        self,
+        name: Name,
+        repository: HabitRepository,
+        habits_ids: Iterable[ID],
+        description: Optional[Description] = None,
+        id: Optional[ID] = None,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.id = id
+        self.habits_ids: FrozenSet[ID] = frozenset(str(i) for i in habits_ids)
+        self.history = HabitInstanceHistory(repository, self.habits_ids)
+        self._repository = repository
+        self._habits: Optional[set[Habit]] = None
+        self._habits_instance: Optional[HabitInstanceTimeline] = None
+
+    @property
+    def habits_loaded(self) -> bool:
+        return self._habits is not None
+
+    @property
+    def habits(self) -> set[Habit]:  # type: ignore[override]
+        if self._habits is None:
+            self._habits = set(self._repository.get_habits_by_ids(set(self.habits_ids)))
+        return self._habits
+
+    @habits.setter
+    def habits(self, habits: set[Habit]) -> None:
+        self._habits = habits
+
+    @property
+    def habits_instance(self) -> HabitInstanceTimeline:  # type: ignore[override]
+        if self._habits_instance is None:
+            self._habits_instance = HabitInstanceTimeline(self.history)
+        return self._habits_instance
+
+    @habits_instance.setter
+    def habits_instance(self, habits_instance: Iterable[HabitInstance]) -> None:
+        self._habits_instance = HabitInstanceTimeline(habits_instance)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, HabitCollection):
+            return NotImplemented
+
+        return (
+            self.id == other.id
+            and self.name == other.name
+            and self.description == other.description
+            and self.habits == other.habits
+            and self.habits_instance == other.habits_instance
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        # the habits and the habit instances are not loaded to be printed
+        return (
+            f"{type(self).__name__}(name={self.name!r}, "
+            f"description={self.description!r}, "
+            f"habits_ids={sorted(self.habits_ids)!r}, id={self.id!r})"
+        )
@@ -1,11 +1,17 @@
+from .completion_calendar_kv_serializer import CompletionCalendarKVSerializer
 from .habit_category_kv_serializer import HabitCategoryKVSerializer
 from .habit_collections_kv_serializer import HabitCollectionsKVSerializer
+from .habit_instance_bucket_kv_serializer import HabitInstanceBucketKVSerializer
 from .habit_instance_kv_serializer import HabitInstanceKVSerializer
 from .habit_kv_serializer import HabitKVSerializer
+from .habit_streak_kv_serializer import HabitStreakKVSerializer
 
 __all__ = [
+    "CompletionCalendarKVSerializer",
     "HabitKVSerializer",
     "HabitCategoryKVSerializer",
     "HabitCollectionsKVSerializer",
+    "HabitInstanceBucketKVSerializer",
     "HabitInstanceKVSerializer",
+    "HabitStreakKVSerializer",
 ]
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import ClassVar
+
+from pebble.application.serializers.kv_serializer import KVSerializer
+from pebble.domain.entities import CompletionCalendar
+from pebble.domain.value_objects import ID
+
+
+class CompletionCalendarKVSerializer(KVSerializer):
+    """
+    Class to serialize a CompletionCalendar object.
+
+    A habit has one calendar per year, stored under the identifier of the
+    habit and the year. The completions are stored in a single binary field
+    of 46 bytes, the notes by day of the year, as strings for the keys of
+    the data layer.
+    """
+
+    @dataclass(frozen=True)
+    class DataKeys:
+        """
+        This class contains the keys used to access the completion calendar data.
+
+        Attributes
+            ID: The key for the ID of the calendar, from the habit and the year.
+            HABIT_ID: The key for the ID of the habit of the calendar.
+            YEAR: The key for the year of the calendar.
+            COMPLETIONS: The key for the bitmap of the completions.
+            NOTES: The key for the notes by day of the year.
+            VERSION: The key for the version of the calendar, incremented
+            by every write of the data layer.
+        """
+
+        ID: ClassVar[str] = "_id"
+        HABIT_ID: ClassVar[str] = "habit_id"
+        YEAR: ClassVar[str] = "year"
+        COMPLETIONS: ClassVar[str] = "completions"
+        NOTES: ClassVar[str] = "notes"
+        VERSION: ClassVar[str] = "version"
+
+    @staticmethod
+    def calendar_id(habit_id: ID, year: int) -> str:
+        """
+        Returns the identifier of the calendar of a habit for a year.
+        """
+        return f"{habit_id}:{year}"
+
+    @classmethod
+    def to_dict(cls, completion_calendar: CompletionCalendar) -> dict:
+        """
+        Converts the completion calendar to a dictionary representation.
+
+        Returns:
+            The dictionary representation of the completion calendar.
+        """
+        return {
+            cls.DataKeys.ID: cls.calendar_id(
+                completion_calendar.habit_id, completion_calendar.year
+            ),
+            cls.DataKeys.HABIT_ID: str(completion_calendar.habit_id),
+            cls.DataKeys.YEAR: completion_calendar.year,
+            cls.DataKeys.COMPLETIONS: completion_calendar.to_bytes(),
+            cls.DataKeys.NOTES: {
+                str(day_of_year): note
+                for day_of_year, note in completion_calendar.notes.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> CompletionCalendar:
+        """
+        Converts a dictionary representation back to a CompletionCalendar object.
+
+        Args:
+            data: The dictionary representation of the completion calendar.
+
+        Returns:
+            A CompletionCalendar object created from the dictionary data.
+        """
+        return CompletionCalendar.from_bytes(
+            habit_id=str(data[cls.DataKeys.HABIT_ID]),
+            year=data[cls.DataKeys.YEAR],
+            data=bytes(data[cls.DataKeys.COMPLETIONS]),
+            notes={
+                int(day_of_year): note
+                for day_of_year, note in data.get(cls.DataKeys.NOTES, {}).items()
+            },
+        )
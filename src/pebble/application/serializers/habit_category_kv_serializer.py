@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import ClassVar, Dict, Union
+from typing import ClassVar, Dict, Iterable, List, Union
 
 from pebble.application.serializers.kv_serializer import KVSerializer
 from pebble.domain.entities import HabitCategory
@@ -14,7 +14,8 @@ class HabitCategoryKVSerializer(KVSerializer):
     HabitCategory objects to and from a key-value format.
 
     It provides methods to convert a HabitCategory object to a dictionary
-    and to create a HabitCategory object from a dictionary.
+    and to create a HabitCategory object from a dictionary, and their
+    to_dicts and from_dicts batch versions.
     """
 
     @dataclass(frozen=True)
@@ -52,6 +53,41 @@ class HabitCategoryKVSerializer(KVSerializer):
 
         return data
 
+    @classmethod
+    def to_dicts(cls, habit_categories: Iterable[HabitCategory]) -> List[dict]:
+        """
+        Converts habit categories to their dictionary representations, in a
+        single loop reading the keys once for all the habit categories.
+
+        Args:
+            habit_categories: The habit categories to convert.
+
+        Returns:
+            The dictionary representations, in the order of the habit categories.
+        """
+        name_key, description_key, color_hex_key, id_key = (
+            cls.DataKeys.NAME,
+            cls.DataKeys.DESCRIPTION,
+            cls.DataKeys.COLOR_HEX,
+            cls.DataKeys.ID,
+        )
+        habit_categories_data = []
+
+        for habit_category in habit_categories:
+            color = habit_category.color
+            data = {
+                name_key: habit_category.name,
+                description_key: habit_category.description,
+                color_hex_key: color.hex if color else None,
+            }
+
+            if habit_category.id:
+                data[id_key] = habit_category.id
+
+            habit_categories_data.append(data)
+
+        return habit_categories_data
+
     @classmethod
     def from_dict(cls, data: Dict[str, Union[str, int]]) -> HabitCategory:
         """
@@ -64,9 +100,50 @@ class HabitCategoryKVSerializer(KVSerializer):
         Returns:
             A HabitCategory object.
         """
+        color_hex = data[cls.DataKeys.COLOR_HEX]
+        habit_category_id = data.get(cls.DataKeys.ID)
         return HabitCategory(
             name=data[cls.DataKeys.NAME],
             description=data[cls.DataKeys.DESCRIPTION],
-            color=Color(data[cls.DataKeys.COLOR_HEX]),
-            id=str(data[cls.DataKeys.ID]) if cls.DataKeys.ID in data else None,
+            color=Color.intern(color_hex) if color_hex is not None else None,
+            id=str(habit_category_id) if habit_category_id is not None else None,
+        )
+
+    @classmethod
+    def from_dicts(
+        cls, habit_categories_data: Iterable[Dict[str, Union[str, int]]]
+    ) -> List[HabitCategory]:
+        """
+        Converts dictionary representations of habit categories to HabitCategory
+        objects, in a single loop reading the keys once for all the categories.
+
+        Args:
+            habit_categories_data: The dictionary representations
+            of the habit categories.
+
+        Returns:
+            The habit categories, in the order of the data.
+        """
+        name_key, description_key, color_hex_key, id_key = (
+            cls.DataKeys.NAME,
+            cls.DataKeys.DESCRIPTION,
+            cls.DataKeys.COLOR_HEX,
+            cls.DataKeys.ID,
         )
+        habit_categories = []
+
+        for data in habit_categories_data:
+            color_hex = data[color_hex_key]
+            habit_category_id = data.get(id_key)
+            habit_categories.append(
+                HabitCategory(
+                    name=data[name_key],
+                    description=data[description_key],
+                    color=Color.intern(color_hex) if color_hex is not None else None,
+                    id=str(habit_category_id)
+                    if habit_category_id is not None
+                    else None,
+                )
+            )
+
+        return habit_categories
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import ClassVar, Dict, List, Set, Union
+from typing import ClassVar, Dict, Iterable, List, Set, Union
 
 from pebble.application.serializers.kv_serializer import KVSerializer
-from pebble.domain.entities import Habit, HabitCollection, HabitInstance
+from pebble.domain.entities import (
+    Habit,
+    HabitCollection,
+    HabitInstance,
+    HabitInstanceTimeline,
+)
 from pebble.domain.value_objects import ID
 
 
@@ -77,7 +82,7 @@ class HabitCollectionsKVSerializer(KVSerializer):
             Union[str, List[ID]],
         ],
         habits: Set[Habit],
-        habits_instances: Set[HabitInstance],
+        habits_instances: Iterable[HabitInstance],
     ) -> HabitCollection:
         """
         Converts a dictionary to a HabitCollection object.
@@ -91,8 +96,9 @@ class HabitCollectionsKVSerializer(KVSerializer):
         Args:
             habit_collection_data: The dictionary containing the habit collection data.
             habits: A set of Habit objects that belong to the collection.
-            habits_instances: A set of HabitInstance objects that belong to
-            the collection.
+            habits_instances: The HabitInstance objects that belong to
+            the collection, they are sorted by date in the timeline of the
+            collection, in a single pass when they are already sorted.
 
         Returns:
             The deserialized HabitCollection object.
@@ -102,6 +108,6 @@ class HabitCollectionsKVSerializer(KVSerializer):
             name=habit_collection_data[cls.DataKeys.NAME],
             description=habit_collection_data.get(cls.DataKeys.DESCRIPTION),
             habits=habits,
-            habits_instance=habits_instances,
+            habits_instance=HabitInstanceTimeline(habits_instances),
             id=str(habit_collection_id) if habit_collection_id else None,
         )
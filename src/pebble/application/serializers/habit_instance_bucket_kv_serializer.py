@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass
+from typing import ClassVar, List, Optional, Tuple
+
+from pebble.application.serializers.kv_serializer import KVSerializer
+from pebble.domain.entities import Habit, HabitInstance
+from pebble.domain.value_objects import ID
+
+
+class HabitInstanceBucketKVSerializer(KVSerializer):
+    """
+    Class to serialize the habit instances of one habit and one month
+    to a single bucket.
+
+    A bucket holds the habit instances by day of the month, with compact
+    fields, there is at most one habit instance per habit and per day.
+    The identifier of a habit instance is derived from its habit and its date,
+    it is the same whatever the bucket it is stored in.
+    """
+
+    @dataclass(frozen=True)
+    class DataKeys:
+        """
+        This class contains the keys used to access the bucket data.
+
+        Attributes
+            ID: The key for the ID of the bucket, the habit ID and the month.
+            HABIT_ID: The key for the ID of the habit of the bucket.
+            MONTH: The key for the month of the bucket, as YYYY-MM.
+            DAYS: The key for the habit instances, by day of the month.
+            COMPLETED: The key for the completion of a habit instance.
+            NOTE: The key for the note of a habit instance.
+        """
+
+        ID: ClassVar[str] = "_id"
+        HABIT_ID: ClassVar[str] = "habit_id"
+        MONTH: ClassVar[str] = "month"
+        DAYS: ClassVar[str] = "days"
+        COMPLETED: ClassVar[str] = "c"
+        NOTE: ClassVar[str] = "n"
+
+    ID_SEPARATOR: ClassVar[str] = ":"
+
+    @classmethod
+    def month_key(cls, date: datetime.date) -> str:
+        """
+        Returns the month of a date, as stored in the buckets.
+        """
+        return f"{date.year:04d}-{date.month:02d}"
+
+    @classmethod
+    def day_key(cls, date: datetime.date) -> str:
+        """
+        Returns the day of a date, as stored in the days of the buckets.
+        """
+        return f"{date.day:02d}"
+
+    @classmethod
+    def day_field(cls, date: datetime.date) -> str:
+        """
+        Returns the path of the field holding the habit instance of a date.
+        """
+        return f"{cls.DataKeys.DAYS}.{cls.day_key(date)}"
+
+    @classmethod
+    def bucket_id(cls, habit_id: ID, date: datetime.date) -> str:
+        """
+        Returns the identifier of the bucket holding a habit instance.
+        """
+        return f"{habit_id}{cls.ID_SEPARATOR}{cls.month_key(date)}"
+
+    @classmethod
+    def habit_instance_id(cls, habit_id: ID, date: datetime.date) -> str:
+        """
+        Returns the identifier of the habit instance of a habit on a date.
+        """
+        return f"{habit_id}{cls.ID_SEPARATOR}{date.isoformat()}"
+
+    @classmethod
+    def parse_habit_instance_id(
+        cls, habit_instance_id: ID
+    ) -> Optional[Tuple[str, datetime.date]]:
+        """
+        Recovers the habit ID and the date from the identifier of a habit instance.
+
+        Returns:
+            The habit ID and the date, or None if the identifier
+            is not the identifier of a habit instance stored in a bucket.
+        """
+        habit_id, _, date = str(habit_instance_id).rpartition(cls.ID_SEPARATOR)
+        if not habit_id:
+            return None
+
+        try:
+            return habit_id, datetime.date.fromisoformat(date)
+        except ValueError:
+            return None
+
+    @classmethod
+    def to_dict(cls, habit_instance: HabitInstance) -> dict:
+        """
+        Converts the habit instance to the compact fields of its day in the bucket.
+
+        The note is only stored when there is one.
+
+        Returns:
+            The dictionary representation of the habit instance in the bucket.
+        """
+        data = {cls.DataKeys.COMPLETED: habit_instance.completed}
+
+        if habit_instance.note:
+            data[cls.DataKeys.NOTE] = habit_instance.note
+
+        return data
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: dict,
+        habit: Habit,
+        start_date: Optional[datetime.date] = None,
+        end_date: Optional[datetime.date] = None,
+    ) -> List[HabitInstance]:
+        """
+        Converts a bucket back to the HabitInstance objects it holds.
+
+        Args:
+            data: The dictionary representation of the bucket.
+            habit: The Habit object associated with the bucket.
+            start_date: The first date of the habit instances to keep, if any.
+            end_date: The last date of the habit instances to keep, if any.
+
+        Returns:
+            The habit instances of the bucket, sorted by date.
+        """
+        year, month = (int(part) for part in data[cls.DataKeys.MONTH].split("-"))
+        habit_instances: List[HabitInstance] = []
+
+        for day, day_data in sorted(data.get(cls.DataKeys.DAYS, {}).items()):
+            date = datetime.date(year, month, int(day))
+
+            if (start_date and date < start_date) or (end_date and date > end_date):
+                continue
+
+            habit_instances.append(
+                HabitInstance(
+                    id=cls.habit_instance_id(habit.id, date),
+                    habit=habit,
+                    date=date,
+                    completed=day_data[cls.DataKeys.COMPLETED],
+                    note=day_data.get(cls.DataKeys.NOTE),
+                )
+            )
+
+        return habit_instances
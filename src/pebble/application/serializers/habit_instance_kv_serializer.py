@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import datetime
 from dataclasses import dataclass
-from typing import ClassVar
+from typing import ClassVar, Iterable, List, Mapping, Union
 
 from pebble.application.serializers.kv_serializer import KVSerializer
 from pebble.domain.entities import Habit, HabitInstance
+from pebble.domain.value_objects import ID
 
 
 class HabitInstanceKVSerializer(KVSerializer):
@@ -16,7 +17,13 @@ class HabitInstanceKVSerializer(KVSerializer):
     the keys used to access the habit instance data.
 
     The to_dict method is used to convert the HabitInstance object
-    to a dictionary representation.
+    to a dictionary representation, the from_dict method builds it back
+    with its habit. The to_dicts and from_dicts methods convert several
+    habit instances at once.
+
+    The date is stored as a datetime at midnight, a native date for the
+    data layer that can be compared and grouped by range. The dates stored
+    as ISO strings by the previous versions are still read.
     """
 
     @dataclass(frozen=True)
@@ -36,6 +43,28 @@ class HabitInstanceKVSerializer(KVSerializer):
         NOTE: ClassVar[str] = "note"
         ID: ClassVar[str] = "_id"
 
+    @staticmethod
+    def date_to_value(date: datetime.date) -> datetime.datetime:
+        """
+        Returns the stored value of a date, the datetime at midnight of the date.
+        """
+        return datetime.datetime(date.year, date.month, date.day)
+
+    @staticmethod
+    def date_from_value(
+        value: Union[datetime.datetime, datetime.date, str],
+    ) -> datetime.date:
+        """
+        Returns the date of a stored value, a datetime or a legacy ISO string.
+        """
+        if isinstance(value, datetime.datetime):
+            return value.date()
+
+        if isinstance(value, datetime.date):
+            return value
+
+        return datetime.date.fromisoformat(value)
+
     @classmethod
     def to_dict(cls, habit_instance: HabitInstance) -> dict:
         """
@@ -48,7 +77,7 @@ class HabitInstanceKVSerializer(KVSerializer):
         """
         data = {
             cls.DataKeys.HABIT_ID: str(habit_instance.habit.id),
-            cls.DataKeys.DATE: habit_instance.date.isoformat(),
+            cls.DataKeys.DATE: cls.date_to_value(habit_instance.date),
             cls.DataKeys.COMPLETED: habit_instance.completed,
             cls.DataKeys.NOTE: habit_instance.note,
         }
@@ -58,6 +87,44 @@ class HabitInstanceKVSerializer(KVSerializer):
 
         return data
 
+    @classmethod
+    def to_dicts(cls, habit_instances: Iterable[HabitInstance]) -> List[dict]:
+        """
+        Converts habit instances to their dictionary representations, in a
+        single loop reading the keys once for all the habit instances.
+
+        Args:
+            habit_instances: The habit instances to convert.
+
+        Returns:
+            The dictionary representations, in the order of the habit instances.
+        """
+        habit_id_key, date_key, completed_key, note_key, id_key = (
+            cls.DataKeys.HABIT_ID,
+            cls.DataKeys.DATE,
+            cls.DataKeys.COMPLETED,
+            cls.DataKeys.NOTE,
+            cls.DataKeys.ID,
+        )
+        midnight = datetime.datetime
+        habit_instances_data = []
+
+        for habit_instance in habit_instances:
+            day = habit_instance.date
+            data = {
+                habit_id_key: str(habit_instance.habit.id),
+                date_key: midnight(day.year, day.month, day.day),
+                completed_key: habit_instance.completed,
+                note_key: habit_instance.note,
+            }
+
+            if habit_instance.id:
+                data[id_key] = str(habit_instance.id)
+
+            habit_instances_data.append(data)
+
+        return habit_instances_data
+
     @classmethod
     def from_dict(cls, data: dict, habit: Habit) -> HabitInstance:
         """
@@ -74,7 +141,50 @@ class HabitInstanceKVSerializer(KVSerializer):
         return HabitInstance(
             id=str(habit_instance_id) if habit_instance_id else None,
             habit=habit,
-            date=datetime.date.fromisoformat(data[cls.DataKeys.DATE]),
+            date=cls.date_from_value(data[cls.DataKeys.DATE]),
             completed=data[cls.DataKeys.COMPLETED],
             note=data.get(cls.DataKeys.NOTE, ""),
         )
+
+    @classmethod
+    def from_dicts(
+        cls, habit_instances_data: Iterable[dict], habits: Mapping[ID, Habit]
+    ) -> List[HabitInstance]:
+        """
+        Converts dictionary representations back to HabitInstance objects,
+        in a single loop reading the keys once for all the habit instances.
+
+        Args:
+            habit_instances_data: The dictionary representations
+            of the habit instances.
+            habits: The habits of the habit instances, by identifier.
+
+        Returns:
+            The habit instances, in the order of the data.
+        """
+        habit_id_key, date_key, completed_key, note_key, id_key = (
+            cls.DataKeys.HABIT_ID,
+            cls.DataKeys.DATE,
+            cls.DataKeys.COMPLETED,
+            cls.DataKeys.NOTE,
+            cls.DataKeys.ID,
+        )
+        midnight, date_from_value = datetime.datetime, cls.date_from_value
+        habit_instances = []
+
+        for data in habit_instances_data:
+            habit_instance_id, value = data.get(id_key), data[date_key]
+            habit_instances.append(
+                HabitInstance(
+                    id=str(habit_instance_id) if habit_instance_id else None,
+                    habit=habits.get(data.get(habit_id_key)),
+                    # the dates are stored as datetimes, except the legacy ones
+                    date=value.date()
+                    if value.__class__ is midnight
+                    else date_from_value(value),
+                    completed=data[completed_key],
+                    note=data.get(note_key, ""),
+                )
+            )
+
+        return habit_instances
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import ClassVar
+from typing import ClassVar, Iterable, List, Mapping, Optional, Union
 
+from pebble.application.factories import RecurrenceFactory
 from pebble.application.serializers.kv_serializer import KVSerializer
-from pebble.domain.entities import Habit
+from pebble.domain.entities import Habit, HabitCategory
+from pebble.domain.value_objects import ID, Color, WeekDayMask
 
 
 class HabitKVSerializer(KVSerializer):
@@ -14,9 +16,10 @@ class HabitKVSerializer(KVSerializer):
     Contains the class DataKeys which defines the keys used to access the habit data.
 
     The to_dict method is used to convert the Habit object
-    to a dictionary representation.
-
-    Converts the Habit object to a dictionary representation.
+    to a dictionary representation, the objects that are also stored
+    in the database are represented by id. The from_dict method builds
+    the habit back, with its category already loaded. The to_dicts and
+    from_dicts methods convert several habits at once.
     """
 
     @dataclass(frozen=True)
@@ -27,7 +30,8 @@ class HabitKVSerializer(KVSerializer):
         Attributes
             NAME: The key for the name of the habit.
             RECURRENCE: The key for the recurrence of the habit.
-            RECURRENCE_DAYS: The key for the days of the week for the habit.
+            RECURRENCE_DAYS: The key for the mask of the days of the week
+            for the habit.
             DESCRIPTION: The key for the description of the habit.
             CATEGORY_ID: The key for the category ID of the habit.
             COLOR_HEX: The key for the color hex code of the habit.
@@ -42,8 +46,30 @@ class HabitKVSerializer(KVSerializer):
         COLOR_HEX: ClassVar[str] = "color_hex"
         ID: ClassVar[str] = "_id"
 
+    @staticmethod
+    def days_to_value(days_mask: Optional[WeekDayMask]) -> Optional[int]:
+        """
+        Returns the stored value of the days of the week of a recurrence,
+        a 7-bit integer mask or None if the days are not set.
+        """
+        return int(days_mask) if days_mask is not None else None
+
+    @staticmethod
+    def days_from_value(value: Union[int, List[str], None]) -> Optional[int]:
+        """
+        Returns the mask of the days of the week of a stored value,
+        a mask or a legacy list of day names.
+
+        Raises:
+            ValueError: If a legacy day name is not a day of the week.
+        """
+        if value is None or isinstance(value, int):
+            return value
+
+        return WeekDayMask.from_names(value)
+
     @classmethod
-    def to_dict(cls, habit: Habit) -> dict[str, str | int | list[str] | None]:
+    def to_dict(cls, habit: Habit) -> dict[str, str | int | None]:
         """
         Converts the habit to a dictionary representation.
 
@@ -57,9 +83,7 @@ class HabitKVSerializer(KVSerializer):
         data = {
             cls.DataKeys.NAME: habit.name,
             cls.DataKeys.RECURRENCE: habit.recurrence.name,
-            cls.DataKeys.RECURRENCE_DAYS: [
-                d.value for d in habit.recurrence.days_of_week
-            ],
+            cls.DataKeys.RECURRENCE_DAYS: cls.days_to_value(habit.recurrence.days_mask),
             cls.DataKeys.DESCRIPTION: habit.description,
             cls.DataKeys.CATEGORY_ID: habit.category.id if habit.category else None,
             cls.DataKeys.COLOR_HEX: habit.color.hex if habit.color else None,
@@ -69,3 +93,131 @@ class HabitKVSerializer(KVSerializer):
             data[cls.DataKeys.ID] = habit.id
 
         return data
+
+    @classmethod
+    def to_dicts(cls, habits: Iterable[Habit]) -> List[dict]:
+        """
+        Converts habits to their dictionary representations, in a single
+        loop reading the keys once for all the habits.
+
+        Args:
+            habits: The habits to convert.
+
+        Returns:
+            The dictionary representations, in the order of the habits.
+        """
+        name_key, recurrence_key, recurrence_days_key = (
+            cls.DataKeys.NAME,
+            cls.DataKeys.RECURRENCE,
+            cls.DataKeys.RECURRENCE_DAYS,
+        )
+        description_key, category_id_key, color_hex_key, id_key = (
+            cls.DataKeys.DESCRIPTION,
+            cls.DataKeys.CATEGORY_ID,
+            cls.DataKeys.COLOR_HEX,
+            cls.DataKeys.ID,
+        )
+        habits_data = []
+
+        for habit in habits:
+            recurrence, category, color = habit.recurrence, habit.category, habit.color
+            days_mask = recurrence.days_mask
+            data = {
+                name_key: habit.name,
+                recurrence_key: recurrence.name,
+                recurrence_days_key: int(days_mask) if days_mask is not None else None,
+                description_key: habit.description,
+                category_id_key: category.id if category else None,
+                color_hex_key: color.hex if color else None,
+            }
+
+            if habit.id:
+                data[id_key] = habit.id
+
+            habits_data.append(data)
+
+        return habits_data
+
+    @classmethod
+    def from_dict(cls, data: dict, category: Optional[HabitCategory]) -> Habit:
+        """
+        Converts a dictionary representation back to a Habit object.
+
+        Args:
+            data: The dictionary representation of the habit.
+            category: The already loaded category of the habit, if any.
+
+        Returns:
+            A Habit object created from the dictionary data.
+
+        Raises:
+            ValueError: If a legacy day name is not a day of the week.
+        """
+        color_hex = data[cls.DataKeys.COLOR_HEX]
+        habit_id = data.get(cls.DataKeys.ID)
+        return Habit(
+            name=data[cls.DataKeys.NAME],
+            recurrence=RecurrenceFactory.get_recurrence(
+                data[cls.DataKeys.RECURRENCE],
+                cls.days_from_value(data[cls.DataKeys.RECURRENCE_DAYS]),
+            ),
+            description=data[cls.DataKeys.DESCRIPTION],
+            category=category,
+            color=Color.intern(color_hex) if color_hex is not None else None,
+            id=str(habit_id) if habit_id is not None else None,
+        )
+
+    @classmethod
+    def from_dicts(
+        cls,
+        habits_data: Iterable[dict],
+        categories: Mapping[ID, HabitCategory],
+    ) -> List[Habit]:
+        """
+        Converts dictionary representations back to Habit objects, in a single
+        loop reading the keys once for all the habits.
+
+        Args:
+            habits_data: The dictionary representations of the habits.
+            categories: The already loaded categories of the habits, by identifier.
+
+        Returns:
+            The habits, in the order of the data.
+
+        Raises:
+            ValueError: If a legacy day name is not a day of the week.
+        """
+        name_key, recurrence_key, recurrence_days_key = (
+            cls.DataKeys.NAME,
+            cls.DataKeys.RECURRENCE,
+            cls.DataKeys.RECURRENCE_DAYS,
+        )
+        description_key, category_id_key, color_hex_key, id_key = (
+            cls.DataKeys.DESCRIPTION,
+            cls.DataKeys.CATEGORY_ID,
+            cls.DataKeys.COLOR_HEX,
+            cls.DataKeys.ID,
+        )
+        get_recurrence, days_from_value = (
+            RecurrenceFactory.get_recurrence,
+            cls.days_from_value,
+        )
+        habits = []
+
+        for data in habits_data:
+            color_hex = data[color_hex_key]
+            habit_id = data.get(id_key)
+            habits.append(
+                Habit(
+                    name=data[name_key],
+                    recurrence=get_recurrence(
+                        data[recurrence_key], days_from_value(data[recurrence_days_key])
+                    ),
+                    description=data[description_key],
+                    category=categories.get(data[category_id_key]),
+                    color=Color.intern(color_hex) if color_hex is not None else None,
+                    id=str(habit_id) if habit_id is not None else None,
+                )
+            )
+
+        return habits
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import ClassVar
+
+from pebble.application.serializers.habit_instance_kv_serializer import (
+    HabitInstanceKVSerializer,
+)
+from pebble.application.serializers.kv_serializer import KVSerializer
+from pebble.domain.entities import HabitStreak
+
+
+class HabitStreakKVSerializer(KVSerializer):
+    """
+    Class to serialize a HabitStreak object.
+
+    The streak of a habit is stored under the identifier of the habit,
+    a habit has at most one streak. The last completed date is stored
+    as a datetime at midnight, like the dates of the habit instances.
+    """
+
+    @dataclass(frozen=True)
+    class DataKeys:
+        """
+        This class contains the keys used to access the habit streak data.
+
+        Attributes
+            HABIT_ID: The key for the ID of the habit of the streak.
+            CURRENT: The key for the current streak.
+            LONGEST: The key for the longest streak.
+            LAST_COMPLETED_DATE: The key for the last completed due date.
+        """
+
+        HABIT_ID: ClassVar[str] = "_id"
+        CURRENT: ClassVar[str] = "current"
+        LONGEST: ClassVar[str] = "longest"
+        LAST_COMPLETED_DATE: ClassVar[str] = "last_completed_date"
+
+    @classmethod
+    def to_dict(cls, habit_streak: HabitStreak) -> dict:
+        """
+        Converts the habit streak to a dictionary representation.
+
+        Returns:
+            The dictionary representation of the habit streak.
+        """
+        last_completed_date = habit_streak.last_completed_date
+        return {
+            cls.DataKeys.HABIT_ID: str(habit_streak.habit_id),
+            cls.DataKeys.CURRENT: habit_streak.current,
+            cls.DataKeys.LONGEST: habit_streak.longest,
+            cls.DataKeys.LAST_COMPLETED_DATE: HabitInstanceKVSerializer.date_to_value(
+                last_completed_date
+            )
+            if last_completed_date
+            else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> HabitStreak:
+        """
+        Converts a dictionary representation back to a HabitStreak object.
+
+        Args:
+            data: The dictionary representation of the habit streak.
+
+        Returns:
+            A HabitStreak object created from the dictionary data.
+        """
+        last_completed_date = data.get(cls.DataKeys.LAST_COMPLETED_DATE)
+        return HabitStreak(
+            habit_id=str(data[cls.DataKeys.HABIT_ID]),
+            current=data[cls.DataKeys.CURRENT],
+            longest=data[cls.DataKeys.LONGEST],
+            last_completed_date=HabitInstanceKVSerializer.date_from_value(
+                last_completed_date
+            )
+            if last_completed_date
+            else None,
+        )
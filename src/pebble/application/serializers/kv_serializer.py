@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import ClassVar
+from typing import ClassVar, Iterable, List
 
 
 class KVSerializer(ABC):
@@ -15,6 +15,10 @@ class KVSerializer(ABC):
 
     Implemented as a singleton to ensure that only one instance exists.
 
+    The to_dicts method converts several objects at once, the serializers of
+    the entities saved in bulk override it with a loop reading the keys once
+    for the whole batch.
+
     Attributes:
         _instance: The singleton instance of HabitSerializer.
     """
@@ -48,3 +52,16 @@ class KVSerializer(ABC):
         Returns:
             The dictionary representation of the object.
         """
+
+    @classmethod
+    def to_dicts(cls, objs: Iterable[object]) -> List[dict]:
+        """
+        Converts objects to their dictionary representations.
+
+        Args:
+            objs: The objects to convert.
+
+        Returns:
+            The dictionary representations, in the order of the objects.
+        """
+        return [cls.to_dict(obj) for obj in objs]
@@ -1,12 +1,42 @@
-from .create_habit import CreateHabit, CreateHabitDTO
-from .create_habit_category import CreateHabitCategory, CreateHabitCategoryDTO
-from .create_habit_instance import CreateHabitInstance, CreateHabitInstanceDTO
+from .create_habit import AsyncCreateHabit, CreateHabit, CreateHabitDTO
+from .create_habit_category import (
+    AsyncCreateHabitCategory,
+    CreateHabitCategory,
+    CreateHabitCategoryDTO,
+)
+from .create_habit_collection import (
+    AsyncCreateHabitCollection,
+    CreateHabitCollection,
+    CreateHabitCollectionDTO,
+)
+from .create_habit_instance import (
+    AsyncCreateHabitInstance,
+    CreateHabitInstance,
+    CreateHabitInstanceDTO,
+)
+from .get_completion_calendar import AsyncGetCompletionCalendar, GetCompletionCalendar
+from .recompute_habit_streak import (
+    AsyncRecomputeHabitStreak,
+    HabitStreakRecomputeError,
+    RecomputeHabitStreak,
+)
 
 __all__ = [
+    "AsyncCreateHabit",
+    "AsyncCreateHabitCategory",
+    "AsyncCreateHabitCollection",
+    "AsyncCreateHabitInstance",
+    "AsyncGetCompletionCalendar",
+    "AsyncRecomputeHabitStreak",
     "CreateHabitCategory",
     "CreateHabitCategoryDTO",
     "CreateHabit",
     "CreateHabitDTO",
+    "CreateHabitCollection",
+    "CreateHabitCollectionDTO",
     "CreateHabitInstance",
     "CreateHabitInstanceDTO",
+    "GetCompletionCalendar",
+    "HabitStreakRecomputeError",
+    "RecomputeHabitStreak",
 ]
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Optional, Union
 
 from pebble.application.factories import RecurrenceFactory
+from pebble.application.repositories import AsyncHabitRepository
 from pebble.application.repositories.habits_repository import HabitRepository
 from pebble.domain.entities import Habit, HabitCategory
 from pebble.domain.entities.recurrences import Recurrence
@@ -96,3 +97,70 @@ class CreateHabit:
         return RecurrenceFactory.get_recurrence_from_strings(
             dto.recurrence, dto.recurrence_days
         )
+
+
+class AsyncCreateHabit:
+    """
+    Use case to create a new habit entity, on an asynchronous repository.
+
+    It creates the habit like the CreateHabit use case,
+    awaiting the repository instead of blocking on it.
+
+    Attributes:
+        habit_repository: The repository used to save the habit
+    """
+
+    def __init__(self, habit_repository: AsyncHabitRepository) -> None:
+        """
+        Initializes the AsyncCreateHabit use case with the habit repository.
+
+        Args:
+            habit_repository: The repository used to access the data layer.
+        """
+        self.habit_repository: AsyncHabitRepository = habit_repository
+
+    async def execute(self, dto: CreateHabitDTO) -> Habit:
+        # create a recurrence object, there must be a recurrence provided
+        recurrence: Recurrence = CreateHabit._create_recurrence(dto)
+
+        # set the color to None if it is not provided, else create a Color object
+        color: Union[Color, None] = (
+            Color(hex=dto.habit_color) if dto.habit_color else None
+        )
+
+        # create a habit category object
+        habit_category: Union[HabitCategory, None] = (
+            await self._create_habit_category(dto) if dto.category_name else None
+        )
+
+        # create a new habit entity
+        habit: Habit = Habit(
+            name=dto.name,
+            description=dto.description,
+            recurrence=recurrence,
+            category=habit_category,
+            color=color,
+        )
+
+        # save the habit to the repository
+        # this will assign a unique identifier to the habit
+        return await self.habit_repository.save_habit(habit)
+
+    async def _create_habit_category(self, dto: CreateHabitDTO) -> HabitCategory:
+        # get the category by name if it exists
+        habit_category = await self.habit_repository.get_habit_category_by_name(
+            dto.category_name
+        )
+
+        # if the category does not exist, create a new one
+        if not habit_category:
+            habit_category: HabitCategory = HabitCategory(
+                name=dto.category_name,
+                description=dto.category_description,
+                color=Color(hex=dto.category_color) if dto.category_color else None,
+            )
+            habit_category = await self.habit_repository.save_habit_category(
+                habit_category
+            )
+
+        return habit_category
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Optional, Union
 
-from pebble.application.repositories import HabitRepository
+from pebble.application.repositories import AsyncHabitRepository, HabitRepository
 from pebble.domain.entities.habit_category import HabitCategory
 from pebble.domain.value_objects import Color
 
@@ -55,3 +55,45 @@ class CreateHabitCategory:
         )
 
         return self.habit_category_repository.save_habit_category(habit_category)
+
+
+class AsyncCreateHabitCategory:
+    """
+    Use case to create a new habit category entity, on an asynchronous repository.
+
+    It creates the habit category like the CreateHabitCategory use case,
+    awaiting the repository instead of blocking on it.
+
+    Attributes:
+        habit_category_repository: The repository used to save the habit category
+    """
+
+    def __init__(self, habit_category_repository: AsyncHabitRepository) -> None:
+        """
+        Initializes the AsyncCreateHabitCategory use case with the repository.
+
+        Args:
+            habit_category_repository: The repository used to access the data layer.
+        """
+        self.habit_category_repository: AsyncHabitRepository = habit_category_repository
+
+    async def execute(self, dto: CreateHabitCategoryDTO) -> HabitCategory:
+        """
+        Creates a new habit category entity based on the data provided in the DTO.
+
+        Args:
+            dto: The data transfer object containing the data to
+            create the habit category.
+
+        Returns:
+            The created habit category entity, with an ID.
+        """
+        color: Union[Color, None] = Color(dto.color) if dto.color else None
+
+        habit_category = HabitCategory(
+            name=dto.name,
+            description=dto.description,
+            color=color,
+        )
+
+        return await self.habit_category_repository.save_habit_category(habit_category)
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Optional, Set
 
-from pebble.application.repositories import HabitRepository
+from pebble.application.repositories import AsyncHabitRepository, HabitRepository
 from pebble.domain.entities import HabitCollection
 from pebble.domain.value_objects import ID
 
@@ -60,3 +60,43 @@ class CreateHabitCollection:
         self.habit_repository.save_habit_collection(habit_collection)
 
         return habit_collection
+
+
+class AsyncCreateHabitCollection:
+    """
+    Use case that creates a habit collection entity from a DTO,
+    on an asynchronous repository.
+
+    It creates the habit collection like the CreateHabitCollection use case,
+    awaiting the repository instead of blocking on it.
+
+    Attributes:
+        habit_repository: The repository that will be used to get the habits.
+    """
+
+    def __init__(self, habit_repository: AsyncHabitRepository) -> None:
+        self.habit_repository: AsyncHabitRepository = habit_repository
+
+    async def execute(self, dto: CreateHabitCollectionDTO) -> HabitCollection:
+        """
+        Creates the habit collection entity with the
+        provided name, description, and habits.
+
+        Args:
+            dto: The DTO with the data to create the habit collection.
+
+        Returns:
+            The habit collection entity created with a unique identifier.
+        """
+        habit_collection: HabitCollection = HabitCollection(
+            name=dto.name,
+            description=dto.description,
+        )
+
+        if dto.habits_ids:
+            habits = await self.habit_repository.get_habits_by_ids(dto.habits_ids)
+            habit_collection.habits = habits
+
+        await self.habit_repository.save_habit_collection(habit_collection)
+
+        return habit_collection
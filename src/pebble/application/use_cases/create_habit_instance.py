@@ -1,11 +1,16 @@
+import asyncio
 from dataclasses import dataclass
 from datetime import date
 from typing import Optional
 
-from pebble.application.repositories import HabitRepository
-from pebble.domain.entities import Habit, HabitCollection, HabitInstance
+from pebble.application.repositories import AsyncHabitRepository, HabitRepository
+from pebble.domain.entities import Habit, HabitInstance, HabitStreak
+from pebble.domain.services import StreakEngine
 from pebble.domain.value_objects import ID
 
+from .get_completion_calendar import AsyncGetCompletionCalendar, GetCompletionCalendar
+from .recompute_habit_streak import AsyncRecomputeHabitStreak, RecomputeHabitStreak
+
 
 @dataclass
 class CreateHabitInstanceDTO:
@@ -42,13 +47,57 @@ class CreateHabitInstance:
 
     It checks if the habit exists, if the date is in the future,
     and if the habit collection exists before creating the habit instance.
+    The habit collection is never loaded, the habit instance is appended to it
+    in the repository. Creating the habit instance of a habit on the same date
+    again updates it, a retried request is idempotent.
+
+    The streak of the habit is updated from its saved state, it is only
+    recomputed from all the habit instances when the habit instance is
+    on or before the last completed date. The updated or recomputed streak is
+    saved only if no other check-in saved it since it was read, else it is
+    updated again.
+    The check-in is also recorded in the completion calendar of its year.
 
     Attributes:
         habit_repository: The repository used to access and save habit instances.
+        streak_engine: The engine updating the streak of the habit.
     """
 
-    def __init__(self, habit_repository: HabitRepository) -> None:
+    def __init__(
+        self,
+        habit_repository: HabitRepository,
+        streak_engine: Optional[StreakEngine] = None,
+    ) -> None:
         self.habit_repository: HabitRepository = habit_repository
+        self.streak_engine: StreakEngine = (
+            streak_engine if streak_engine is not None else StreakEngine()
+        )
+
+    def _update_habit_streak(
+        self, habit: Habit, habit_instance: HabitInstance
+    ) -> HabitStreak:
+        while True:
+            saved_habit_streak = self.habit_repository.get_habit_streak(habit.id)
+            habit_streak = saved_habit_streak or HabitStreak(habit_id=habit.id)
+
+            updated_habit_streak = self.streak_engine.update(
+                habit, habit_streak, habit_instance
+            )
+
+            # the recomputed streak is saved like an updated one
+            if updated_habit_streak is None:
+                updated_habit_streak = RecomputeHabitStreak(
+                    self.habit_repository, self.streak_engine
+                ).compute(habit)
+
+            elif updated_habit_streak is habit_streak:
+                return habit_streak
+
+            # a streak saved by another check-in since it was read is read again
+            if self.habit_repository.save_habit_streak_if_unchanged(
+                updated_habit_streak, saved_habit_streak
+            ):
+                return updated_habit_streak
 
     def execute(self, dto: CreateHabitInstanceDTO) -> HabitInstance:
         """
@@ -87,24 +136,131 @@ class CreateHabitInstance:
             habit=habit, date=dto.date, completed=dto.completed, note=dto.note
         )
 
-        # Check if the habit collection exists
-        habit_collection: HabitCollection = (
-            self.habit_repository.get_habit_collection_by_id(dto.habit_collection_id)
+        # Check if the habit collection exists, without loading it
+        if not self.habit_repository.habit_collection_exists(dto.habit_collection_id):
+            raise HabitInstanceCreationError(
+                f"Habit collection with ID {dto.habit_collection_id} not found. "
+                f"The habit instance cannot be created without a Habit Collection."
+            )
+
+        # Record the habit instance, a retried request records the same one
+        habit_instance = self.habit_repository.record_check_in(habit_instance)
+
+        # Append the habit instance to the habit collection in the repository
+        self.habit_repository.add_habit_instance_to_collection(
+            dto.habit_collection_id, habit_instance
+        )
+
+        self._update_habit_streak(habit, habit_instance)
+        GetCompletionCalendar(self.habit_repository).record(habit_instance)
+
+        return habit_instance
+
+
+class AsyncCreateHabitInstance:
+    """
+    Use case for creating a new habit instance, on an asynchronous repository.
+
+    It runs the same checks as the CreateHabitInstance use case,
+    the habit and the habit collection are checked concurrently.
+    The streak of the habit and the completion calendar are updated the same way.
+
+    Attributes:
+        habit_repository: The repository used to access and save habit instances.
+        streak_engine: The engine updating the streak of the habit.
+    """
+
+    def __init__(
+        self,
+        habit_repository: AsyncHabitRepository,
+        streak_engine: Optional[StreakEngine] = None,
+    ) -> None:
+        self.habit_repository: AsyncHabitRepository = habit_repository
+        self.streak_engine: StreakEngine = (
+            streak_engine if streak_engine is not None else StreakEngine()
         )
 
-        if habit_collection is None:
+    async def _update_habit_streak(
+        self, habit: Habit, habit_instance: HabitInstance
+    ) -> HabitStreak:
+        while True:
+            saved_habit_streak = await self.habit_repository.get_habit_streak(habit.id)
+            habit_streak = saved_habit_streak or HabitStreak(habit_id=habit.id)
+
+            updated_habit_streak = self.streak_engine.update(
+                habit, habit_streak, habit_instance
+            )
+
+            # the recomputed streak is saved like an updated one
+            if updated_habit_streak is None:
+                updated_habit_streak = await AsyncRecomputeHabitStreak(
+                    self.habit_repository, self.streak_engine
+                ).compute(habit)
+
+            elif updated_habit_streak is habit_streak:
+                return habit_streak
+
+            # a streak saved by another check-in since it was read is read again
+            if await self.habit_repository.save_habit_streak_if_unchanged(
+                updated_habit_streak, saved_habit_streak
+            ):
+                return updated_habit_streak
+
+    async def execute(self, dto: CreateHabitInstanceDTO) -> HabitInstance:
+        """
+        Creates a new habit instance.
+
+        This method checks if the habit exists, if the date is in the future,
+        and if the habit collection exists before creating the habit instance.
+
+        Args:
+            dto: The data transfer object containing the habit ID,
+            date, completion status, and optional note.
+
+        Returns:
+            The created habit instance.
+
+        Raises:
+            HabitInstanceCreationError: If the habit instance could not be created.
+        """
+        # Check if the date is in the future, which is not allowed
+        if dto.date > date.today():
+            raise HabitInstanceCreationError(
+                f"Cannot create a habit instance for a future date: {dto.date}."
+            )
+
+        # The habit and the habit collection do not depend on each other
+        habit, habit_collection_exists = await asyncio.gather(
+            self.habit_repository.get_habit_by_id(dto.habit_id),
+            self.habit_repository.habit_collection_exists(dto.habit_collection_id),
+        )
+
+        if habit is None:
+            raise HabitInstanceCreationError(
+                f"Habit with ID {dto.habit_id} not found. "
+                f"The habit instance cannot be created without a Habit."
+            )
+
+        if not habit_collection_exists:
             raise HabitInstanceCreationError(
                 f"Habit collection with ID {dto.habit_collection_id} not found. "
                 f"The habit instance cannot be created without a Habit Collection."
             )
 
-        # Save the habit instance to the repository
-        habit_instance = self.habit_repository.save_habit_instance(habit_instance)
+        # Create the habit instance and record it, a retried request
+        # records the same one
+        habit_instance: HabitInstance = await self.habit_repository.record_check_in(
+            HabitInstance(
+                habit=habit, date=dto.date, completed=dto.completed, note=dto.note
+            )
+        )
 
-        # Add the habit instance to the habit collection
-        habit_collection.habits_instance.add(habit_instance)
+        # Append the habit instance to the habit collection in the repository
+        await self.habit_repository.add_habit_instance_to_collection(
+            dto.habit_collection_id, habit_instance
+        )
 
-        # Update the habit collection in the repository with the new habit instance
-        self.habit_repository.update_habit_collection(habit_collection)
+        await self._update_habit_streak(habit, habit_instance)
+        await AsyncGetCompletionCalendar(self.habit_repository).record(habit_instance)
 
         return habit_instance
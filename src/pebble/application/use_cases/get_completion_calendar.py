@@ -0,0 +1,201 @@
+from datetime import date
+
+from pebble.application.repositories import AsyncHabitRepository, HabitRepository
+from pebble.domain.entities import CompletionCalendar, HabitInstance
+from pebble.domain.value_objects import ID
+
+
+class GetCompletionCalendar:
+    """
+    Use case for getting the completion calendar of a habit for a year.
+
+    The calendar is a single small record, kept up to date by the check-ins.
+    A calendar that was never saved is built from the habit instances of
+    the year and saved, the following reads only load the calendar. The built
+    calendar is saved only if no other request saved one in the meantime,
+    the saved calendar is kept and the check-in is recorded in it.
+
+    Attributes:
+        habit_repository: The repository used to access the calendars
+        and the habit instances.
+    """
+
+    def __init__(self, habit_repository: HabitRepository) -> None:
+        self.habit_repository: HabitRepository = habit_repository
+
+    def _build(self, habit_id: ID, year: int) -> CompletionCalendar:
+        return CompletionCalendar.from_habit_instances(
+            habit_id,
+            year,
+            self.habit_repository.iter_habit_instances(
+                {habit_id}, date(year, 1, 1), date(year, 12, 31)
+            ),
+        )
+
+    def rebuild(self, habit_id: ID, year: int) -> CompletionCalendar:
+        """
+        Builds and saves the completion calendar of a habit for a year
+        from its habit instances, after a backfill or an import.
+        The saved calendar is replaced.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+
+        Returns:
+            The saved completion calendar.
+        """
+        return self.habit_repository.save_completion_calendar(
+            self._build(habit_id, year)
+        )
+
+    def record(self, habit_instance: HabitInstance) -> CompletionCalendar:
+        """
+        Records a check-in in the completion calendar of its year,
+        in a single atomic write of the repository.
+
+        Args:
+            habit_instance: The recorded habit instance.
+
+        Returns:
+            The saved completion calendar.
+        """
+        while True:
+            completion_calendar = self.habit_repository.record_completion(
+                habit_instance
+            )
+            if completion_calendar is not None:
+                return completion_calendar
+
+            # the habit instance is already recorded, it is part of the build
+            completion_calendar = self._build(
+                habit_instance.habit.id, habit_instance.date.year
+            )
+
+            # a calendar saved by another check-in is kept and recorded again
+            if self.habit_repository.save_completion_calendar_if_absent(
+                completion_calendar
+            ):
+                return completion_calendar
+
+    def execute(self, habit_id: ID, year: int) -> CompletionCalendar:
+        """
+        Gets the completion calendar of a habit for a year.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+
+        Returns:
+            The completion calendar, built from the habit instances
+            if it was never saved.
+        """
+        while True:
+            completion_calendar = self.habit_repository.get_completion_calendar(
+                habit_id, year
+            )
+            if completion_calendar is not None:
+                return completion_calendar
+
+            # a calendar saved by another request is kept and read again
+            completion_calendar = self._build(habit_id, year)
+            if self.habit_repository.save_completion_calendar_if_absent(
+                completion_calendar
+            ):
+                return completion_calendar
+
+
+class AsyncGetCompletionCalendar:
+    """
+    Use case for getting the completion calendar of a habit for a year,
+    on an asynchronous repository.
+
+    Attributes:
+        habit_repository: The repository used to access the calendars
+        and the habit instances.
+    """
+
+    def __init__(self, habit_repository: AsyncHabitRepository) -> None:
+        self.habit_repository: AsyncHabitRepository = habit_repository
+
+    async def _build(self, habit_id: ID, year: int) -> CompletionCalendar:
+        habit_instances = [
+            habit_instance
+            async for habit_instance in self.habit_repository.iter_habit_instances(
+                {habit_id}, date(year, 1, 1), date(year, 12, 31)
+            )
+        ]
+
+        return CompletionCalendar.from_habit_instances(habit_id, year, habit_instances)
+
+    async def rebuild(self, habit_id: ID, year: int) -> CompletionCalendar:
+        """
+        Builds and saves the completion calendar of a habit for a year
+        from its habit instances, after a backfill or an import.
+        The saved calendar is replaced.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+
+        Returns:
+            The saved completion calendar.
+        """
+        return await self.habit_repository.save_completion_calendar(
+            await self._build(habit_id, year)
+        )
+
+    async def record(self, habit_instance: HabitInstance) -> CompletionCalendar:
+        """
+        Records a check-in in the completion calendar of its year,
+        in a single atomic write of the repository.
+
+        Args:
+            habit_instance: The recorded habit instance.
+
+        Returns:
+            The saved completion calendar.
+        """
+        while True:
+            completion_calendar = await self.habit_repository.record_completion(
+                habit_instance
+            )
+            if completion_calendar is not None:
+                return completion_calendar
+
+            # the habit instance is already recorded, it is part of the build
+            completion_calendar = await self._build(
+                habit_instance.habit.id, habit_instance.date.year
+            )
+
+            # a calendar saved by another check-in is kept and recorded again
+            if await self.habit_repository.save_completion_calendar_if_absent(
+                completion_calendar
+            ):
+                return completion_calendar
+
+    async def execute(self, habit_id: ID, year: int) -> CompletionCalendar:
+        """
+        Gets the completion calendar of a habit for a year.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+
+        Returns:
+            The completion calendar, built from the habit instances
+            if it was never saved.
+        """
+        while True:
+            completion_calendar = await self.habit_repository.get_completion_calendar(
+                habit_id, year
+            )
+            if completion_calendar is not None:
+                return completion_calendar
+
+            # a calendar saved by another request is kept and read again
+            completion_calendar = await self._build(habit_id, year)
+            if await self.habit_repository.save_completion_calendar_if_absent(
+                completion_calendar
+            ):
+                return completion_calendar
@@ -0,0 +1,157 @@
+from datetime import date
+from typing import Optional
+
+from pebble.application.repositories import AsyncHabitRepository, HabitRepository
+from pebble.domain.entities import Habit, HabitStreak
+from pebble.domain.services import StreakEngine
+from pebble.domain.value_objects import ID
+
+
+class HabitStreakRecomputeError(Exception):
+    """Exception raised when the streak of a habit could not be recomputed."""
+
+
+class RecomputeHabitStreak:
+    """
+    Use case for recomputing the streak of a habit from all its habit instances.
+
+    The streak is kept up to date by the check-ins, it must be recomputed
+    when habit instances are saved without a check-in, by a backfill
+    or an import.
+
+    Attributes:
+        habit_repository: The repository used to access the habit instances
+        and save the streak.
+        streak_engine: The engine computing the streak.
+    """
+
+    def __init__(
+        self,
+        habit_repository: HabitRepository,
+        streak_engine: Optional[StreakEngine] = None,
+    ) -> None:
+        self.habit_repository: HabitRepository = habit_repository
+        self.streak_engine: StreakEngine = (
+            streak_engine if streak_engine is not None else StreakEngine()
+        )
+
+    def compute(self, habit: Habit) -> HabitStreak:
+        """
+        Computes the streak of a saved habit from all its habit instances,
+        without saving it.
+
+        Args:
+            habit: The habit of the streak.
+
+        Returns:
+            The computed streak.
+        """
+        return self.streak_engine.recompute(
+            habit,
+            self.habit_repository.iter_habit_instances({habit.id}, date.min, date.max),
+        )
+
+    def recompute(self, habit: Habit) -> HabitStreak:
+        """
+        Recomputes and saves the streak of a saved habit.
+
+        Args:
+            habit: The habit of the streak.
+
+        Returns:
+            The saved streak.
+        """
+        return self.habit_repository.save_habit_streak(self.compute(habit))
+
+    def execute(self, habit_id: ID) -> HabitStreak:
+        """
+        Recomputes and saves the streak of a habit.
+
+        Args:
+            habit_id: The identifier of the habit.
+
+        Returns:
+            The saved streak.
+
+        Raises:
+            HabitStreakRecomputeError: If the habit does not exist.
+        """
+        habit: Habit = self.habit_repository.get_habit_by_id(habit_id)
+
+        if habit is None:
+            raise HabitStreakRecomputeError(f"Habit with ID {habit_id} not found.")
+
+        return self.recompute(habit)
+
+
+class AsyncRecomputeHabitStreak:
+    """
+    Use case for recomputing the streak of a habit, on an asynchronous repository.
+
+    Attributes:
+        habit_repository: The repository used to access the habit instances
+        and save the streak.
+        streak_engine: The engine computing the streak.
+    """
+
+    def __init__(
+        self,
+        habit_repository: AsyncHabitRepository,
+        streak_engine: Optional[StreakEngine] = None,
+    ) -> None:
+        self.habit_repository: AsyncHabitRepository = habit_repository
+        self.streak_engine: StreakEngine = (
+            streak_engine if streak_engine is not None else StreakEngine()
+        )
+
+    async def compute(self, habit: Habit) -> HabitStreak:
+        """
+        Computes the streak of a saved habit from all its habit instances,
+        without saving it.
+
+        Args:
+            habit: The habit of the streak.
+
+        Returns:
+            The computed streak.
+        """
+        habit_instances = [
+            habit_instance
+            async for habit_instance in self.habit_repository.iter_habit_instances(
+                {habit.id}, date.min, date.max
+            )
+        ]
+
+        return self.streak_engine.recompute(habit, habit_instances)
+
+    async def recompute(self, habit: Habit) -> HabitStreak:
+        """
+        Recomputes and saves the streak of a saved habit.
+
+        Args:
+            habit: The habit of the streak.
+
+        Returns:
+            The saved streak.
+        """
+        return await self.habit_repository.save_habit_streak(await self.compute(habit))
+
+    async def execute(self, habit_id: ID) -> HabitStreak:
+        """
+        Recomputes and saves the streak of a habit.
+
+        Args:
+            habit_id: The identifier of the habit.
+
+        Returns:
+            The saved streak.
+
+        Raises:
+            HabitStreakRecomputeError: If the habit does not exist.
+        """
+        habit: Habit = await self.habit_repository.get_habit_by_id(habit_id)
+
+        if habit is None:
+            raise HabitStreakRecomputeError(f"Habit with ID {habit_id} not found.")
+
+        return await self.recompute(habit)
@@ -1,7 +1,10 @@
+from .completion_calendar import CompletionCalendar
 from .habit import Habit
 from .habit_category import HabitCategory
 from .habit_collection import HabitCollection
 from .habit_instance import HabitInstance
+from .habit_instance_timeline import HabitInstanceTimeline
+from .habit_streak import HabitStreak
 from .recurrences import (
     BiMonthly,
     BiWeekly,
@@ -15,10 +18,13 @@ from .recurrences import (
 from .user import User
 
 __all__ = [
+    "CompletionCalendar",
     "Habit",
     "HabitCategory",
     "HabitCollection",
     "HabitInstance",
+    "HabitInstanceTimeline",
+    "HabitStreak",
     "Recurrence",
     "Daily",
     "Weekly",
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import calendar
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import ClassVar, Dict, Iterable, List, Optional
+
+from ..value_objects.types import ID, Note
+from .habit_instance import HabitInstance
+
+
+@dataclass(slots=True)
+class CompletionCalendar:
+    """
+    This entity represents the completions of a habit during a year,
+    packed in a bitmap with one bit per day of the year.
+
+    The bit of a day is set when the habit was completed on that day,
+    the notes are kept aside for the few days that have one. A year of
+    completions fits in 46 bytes, the completion counts and the streaks
+    are computed on the bitmap without going through the days.
+
+    Attributes:
+        habit_id: The unique identifier of the habit.
+        year: The year of the calendar.
+        completions: The bitmap of the completions, the bit 0 being January 1st.
+        notes: The notes of the habit instances, by day of the year starting at 0.
+    """
+
+    # A leap year has 366 days, the bitmap is stored on 46 bytes
+    DAYS: ClassVar[int] = 366
+    BYTES: ClassVar[int] = (DAYS + 7) // 8
+
+    habit_id: ID
+    year: int
+    completions: int = 0
+    notes: Dict[int, Note] = field(default_factory=dict)
+
+    @classmethod
+    def from_habit_instances(
+        cls, habit_id: ID, year: int, habit_instances: Iterable[HabitInstance]
+    ) -> CompletionCalendar:
+        """
+        Creates the calendar of a year from the habit instances of a habit,
+        the habit instances of the other years are ignored.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+            habit_instances: The habit instances of the habit.
+
+        Returns:
+            The completion calendar of the year.
+        """
+        completion_calendar = cls(habit_id=habit_id, year=year)
+
+        for habit_instance in habit_instances:
+            if habit_instance.date.year == year:
+                completion_calendar.record(habit_instance)
+
+        return completion_calendar
+
+    @classmethod
+    def from_bytes(
+        cls,
+        habit_id: ID,
+        year: int,
+        data: bytes,
+        notes: Optional[Dict[int, Note]] = None,
+    ) -> CompletionCalendar:
+        """
+        Creates a calendar from its packed bitmap.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+            data: The bitmap, as returned by to_bytes.
+            notes: The notes by day of the year.
+
+        Returns:
+            The completion calendar.
+        """
+        return cls(
+            habit_id=habit_id,
+            year=year,
+            completions=int.from_bytes(data, "little"),
+            notes=dict(notes or {}),
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the bitmap packed in bytes, the bit 0 of the first byte
+        being January 1st.
+        """
+        return self.completions.to_bytes(self.BYTES, "little")
+
+    @property
+    def days_in_year(self) -> int:
+        return 366 if calendar.isleap(self.year) else 365
+
+    def _day_of_year(self, day: date) -> int:
+        if day.year != self.year:
+            raise ValueError(f"The date {day} is not in the year {self.year}.")
+
+        return day.timetuple().tm_yday - 1
+
+    def _range_mask(self, start_date: Optional[date], end_date: Optional[date]) -> int:
+        """
+        Returns the mask of the days between two dates of the year, included,
+        the whole year if the dates are not set.
+        """
+        start = self._day_of_year(start_date) if start_date else 0
+        end = self._day_of_year(end_date) if end_date else self.days_in_year - 1
+
+        if end < start:
+            return 0
+
+        return ((1 << (end - start + 1)) - 1) << start
+
+    def _dates_mask(self, days: Iterable[date]) -> int:
+        mask = 0
+        for day in days:
+            if day.year == self.year:
+                mask |= 1 << self._day_of_year(day)
+        return mask
+
+    def set_completed(
+        self, day: date, completed: bool, note: Optional[Note] = None
+    ) -> None:
+        """
+        Sets the completion and the note of a day.
+
+        Args:
+            day: The day, in the year of the calendar.
+            completed: True if the habit was completed on the day.
+            note: The note of the day, if any.
+
+        Raises:
+            ValueError: If the day is not in the year of the calendar.
+        """
+        day_of_year = self._day_of_year(day)
+
+        if completed:
+            self.completions |= 1 << day_of_year
+        else:
+            self.completions &= ~(1 << day_of_year)
+
+        if note:
+            self.notes[day_of_year] = note
+        else:
+            self.notes.pop(day_of_year, None)
+
+    def record(self, habit_instance: HabitInstance) -> None:
+        """
+        Sets the completion and the note of the day of a habit instance.
+
+        Args:
+            habit_instance: The habit instance, in the year of the calendar.
+        """
+        self.set_completed(
+            habit_instance.date, habit_instance.completed, habit_instance.note
+        )
+
+    def is_completed(self, day: date) -> bool:
+        """
+        Checks if the habit was completed on a day of the year.
+        """
+        return bool(self.completions >> self._day_of_year(day) & 1)
+
+    def note(self, day: date) -> Optional[Note]:
+        """
+        Returns the note of a day of the year, if any.
+        """
+        return self.notes.get(self._day_of_year(day))
+
+    def completed_dates(self) -> List[date]:
+        """
+        Returns the days the habit was completed on, sorted.
+        """
+        first_day = date(self.year, 1, 1)
+        completions = self.completions
+        completed_dates = []
+
+        while completions:
+            # the lowest set bit is the next completed day
+            lowest_bit = completions & -completions
+            completed_dates.append(
+                first_day + timedelta(days=lowest_bit.bit_length() - 1)
+            )
+            completions ^= lowest_bit
+
+        return completed_dates
+
+    def count_completed(
+        self, start_date: Optional[date] = None, end_date: Optional[date] = None
+    ) -> int:
+        """
+        Counts the days the habit was completed on between two dates, included.
+
+        Args:
+            start_date: The first date, January 1st if not set.
+            end_date: The last date, December 31st if not set.
+
+        Returns:
+            The number of completed days.
+        """
+        return (self.completions & self._range_mask(start_date, end_date)).bit_count()
+
+    def completion_rate(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        due_dates: Optional[Iterable[date]] = None,
+    ) -> float:
+        """
+        Returns the ratio of the days the habit was completed on between
+        two dates, included. When the due dates are given, only the due dates
+        are counted, the completions on the other days are ignored.
+
+        Args:
+            start_date: The first date, January 1st if not set.
+            end_date: The last date, December 31st if not set.
+            due_dates: The dates the habit is due, all the days if not set.
+
+        Returns:
+            The completion rate, 0 if there is no day to complete.
+        """
+        mask = self._range_mask(start_date, end_date)
+        if due_dates is not None:
+            mask &= self._dates_mask(due_dates)
+
+        days = mask.bit_count()
+        return (self.completions & mask).bit_count() / days if days else 0.0
+
+    def longest_streak(self) -> int:
+        """
+        Returns the longest number of days in a row the habit was completed on.
+        """
+        # each step removes the last day of every run of completed days
+        completions = self.completions
+        longest_streak = 0
+
+        while completions:
+            completions &= completions << 1
+            longest_streak += 1
+
+        return longest_streak
+
+    def streak_ending_on(self, day: date) -> int:
+        """
+        Returns the number of days in a row the habit was completed on,
+        up to a day of the year included. The days of the previous year
+        are not counted.
+        """
+        day_of_year = self._day_of_year(day)
+        # the missed days up to the day, the streak starts after the last one
+        missed = ~self.completions & ((1 << (day_of_year + 1)) - 1)
+
+        return day_of_year + 1 - missed.bit_length()
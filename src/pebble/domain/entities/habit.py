@@ -9,7 +9,7 @@ from .habit_category import HabitCategory
 from .recurrences import Recurrence
 
 
-@dataclass
+@dataclass(slots=True)
 class Habit:
     """
     Represents a habit. A habit is a task that is repeated over time.
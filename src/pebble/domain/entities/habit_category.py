@@ -7,7 +7,7 @@ from ..value_objects.color import Color
 from ..value_objects.types import ID, Description, Name
 
 
-@dataclass
+@dataclass(slots=True)
 class HabitCategory:
     """
     This entity represents a category for a habit.
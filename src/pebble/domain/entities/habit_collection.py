@@ -3,10 +3,10 @@ from typing import Optional
 
 from ..value_objects.types import ID, Description, Name
 from .habit import Habit
-from .habit_instance import HabitInstance
+from .habit_instance_timeline import HabitInstanceTimeline
 
 
-@dataclass
+@dataclass(slots=True)
 class HabitCollection:
     """
     This entity represents a collection of habits.
@@ -17,16 +17,24 @@ class HabitCollection:
         name: The name of the collection.
         description: The description of the collection.
         habits: A set of habits that belong to the collection.
-        habits_instance: A set of habit instances that belong to the collection.
+        habits_instance: The habit instances that belong to the collection,
+        sorted by date for each habit in a timeline.
         id: The unique identifier of the collection
     """
 
     name: Name
     description: Optional[Description] = None
     habits: set[Habit] = field(default_factory=lambda: set())
-    habits_instance: set[HabitInstance] = field(default_factory=lambda: set())
+    habits_instance: HabitInstanceTimeline = field(
+        default_factory=HabitInstanceTimeline
+    )
     id: Optional[ID] = None
 
+    def __post_init__(self) -> None:
+        # the habit instances can be given in any iterable, such as a set
+        if not isinstance(self.habits_instance, HabitInstanceTimeline):
+            self.habits_instance = HabitInstanceTimeline(self.habits_instance)
+
     def add_habit(self, habit: Habit) -> None:
         """
         Adds a habit to the collection.
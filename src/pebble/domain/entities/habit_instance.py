@@ -6,7 +6,7 @@ from ..value_objects import ID, Note
 from .habit import Habit
 
 
-@dataclass
+@dataclass(slots=True)
 class HabitInstance:
     """
     This entity represents a habit instance, which is a habit
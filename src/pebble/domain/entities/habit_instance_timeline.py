@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, ValuesView
+
+from ..value_objects import ID
+from .habit import Habit
+from .habit_instance import HabitInstance
+
+
+class HabitInstanceTimeline:
+    """
+    The habit instances of a habit collection, sorted by date for each habit.
+
+    A habit has at most one habit instance per day, the dates of a habit
+    are kept in a sorted list next to its habit instances. The habit
+    instances of a day or of a range of dates are found by bisection,
+    the latest habit instance of a habit is the last of its list. Habit
+    instances added in date order, as loaded from a sorted cursor, are
+    appended without being moved.
+
+    The habits are found by identifier: the hash of a habit is the hash of
+    its identifier, it would change when an unsaved habit is saved. Only the
+    habit instances of saved habits can be added, an unsaved habit has no
+    habit instance in the timeline.
+
+    The timeline is compared, iterated and tested for membership like
+    the set of habit instances it replaces.
+    """
+
+    __slots__ = ("_dates", "_habit_instances", "_habits", "_length")
+
+    def __init__(self, habit_instances: Iterable[HabitInstance] = ()) -> None:
+        self._dates: Dict[ID, List[date]] = {}
+        self._habit_instances: Dict[ID, List[HabitInstance]] = {}
+        self._habits: Dict[ID, Habit] = {}
+        self._length = 0
+        self.extend(habit_instances)
+
+    def add(self, habit_instance: HabitInstance) -> Optional[HabitInstance]:
+        """
+        Adds a habit instance at its date in the timeline of its habit.
+
+        Args:
+            habit_instance: The habit instance to be added.
+
+        Returns:
+            The habit instance of the same habit and day it replaced, if any.
+
+        Raises:
+            ValueError: If the habit of the habit instance is not saved.
+        """
+        habit, day = habit_instance.habit, habit_instance.date
+        if habit.id is None:
+            raise ValueError("The habit of a habit instance must be saved")
+
+        self._habits.setdefault(habit.id, habit)
+        dates = self._dates.setdefault(habit.id, [])
+        habit_instances = self._habit_instances.setdefault(habit.id, [])
+
+        # the habit instances loaded in date order are appended
+        if not dates or dates[-1] < day:
+            dates.append(day)
+            habit_instances.append(habit_instance)
+            self._length += 1
+            return None
+
+        index = bisect_left(dates, day)
+        if dates[index] == day:
+            replaced_habit_instance = habit_instances[index]
+            habit_instances[index] = habit_instance
+            return replaced_habit_instance
+
+        dates.insert(index, day)
+        habit_instances.insert(index, habit_instance)
+        self._length += 1
+        return None
+
+    def extend(self, habit_instances: Iterable[HabitInstance]) -> None:
+        """
+        Adds habit instances to the timeline, the last habit instance
+        of a habit and day is kept.
+        """
+        for habit_instance in habit_instances:
+            self.add(habit_instance)
+
+    @property
+    def habits(self) -> ValuesView[Habit]:
+        """
+        Returns the habits with at least one habit instance in the timeline.
+        """
+        return self._habits.values()
+
+    def get(self, habit: Habit, day: date) -> Optional[HabitInstance]:
+        """
+        Returns the habit instance of a habit on a day, if any.
+        """
+        dates = self._dates.get(habit.id)
+        if not dates:
+            return None
+
+        index = bisect_left(dates, day)
+        if index < len(dates) and dates[index] == day:
+            return self._habit_instances[habit.id][index]
+
+        return None
+
+    def latest(self, habit: Habit) -> Optional[HabitInstance]:
+        """
+        Returns the habit instance of a habit with the latest date, if any.
+        """
+        habit_instances = self._habit_instances.get(habit.id)
+        return habit_instances[-1] if habit_instances else None
+
+    def between(
+        self, habit: Habit, start_date: date, end_date: date
+    ) -> List[HabitInstance]:
+        """
+        Returns the habit instances of a habit between two dates, included,
+        sorted by date.
+        """
+        dates = self._dates.get(habit.id)
+        if not dates:
+            return []
+
+        return self._habit_instances[habit.id][
+            bisect_left(dates, start_date) : bisect_right(dates, end_date)
+        ]
+
+    def habit_instances(self, habit: Habit) -> List[HabitInstance]:
+        """
+        Returns all the habit instances of a habit, sorted by date.
+        """
+        return list(self._habit_instances.get(habit.id, ()))
+
+    def __contains__(self, habit_instance: object) -> bool:
+        if not isinstance(habit_instance, HabitInstance):
+            return False
+
+        return self.get(habit_instance.habit, habit_instance.date) == habit_instance
+
+    def __iter__(self) -> Iterator[HabitInstance]:
+        for habit_instances in self._habit_instances.values():
+            yield from habit_instances
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (HabitInstanceTimeline, set, frozenset)):
+            return NotImplemented
+
+        return len(self) == len(other) and all(
+            habit_instance in self for habit_instance in other
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
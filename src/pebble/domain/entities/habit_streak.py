@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from ..value_objects.types import ID
+
+
+@dataclass(frozen=True, slots=True)
+class HabitStreak:
+    """
+    This entity represents the streak of a habit, the number of due dates
+    in a row the habit was completed on.
+
+    It is kept up to date on each check-in, so that the streak does not
+    have to be computed from all the habit instances of the habit.
+
+    Attributes:
+        habit_id: The unique identifier of the habit.
+        current: The number of due dates in a row, up to the last completed one,
+        the habit was completed on.
+        longest: The longest number of due dates in a row the habit was
+        completed on.
+        last_completed_date: The last due date the habit was completed on.
+    """
+
+    habit_id: ID
+    current: int = 0
+    longest: int = 0
+    last_completed_date: Optional[date] = None
@@ -1,9 +1,24 @@
 from __future__ import annotations
 
 from abc import ABC
-from typing import Optional, Union
+from typing import FrozenSet, Iterable, Optional, Tuple, Union
 
-from ..value_objects.weekdays import WeekDays
+from ..value_objects.weekdays import WeekDayMask, WeekDays
+
+DaysOfWeek = Union[Iterable[WeekDays], WeekDayMask]
+
+
+def _days_mask(days_of_week: Optional[DaysOfWeek]) -> Optional[WeekDayMask]:
+    """
+    Returns the mask of the days of the week, None if they are not set.
+    """
+    if days_of_week is None:
+        return None
+
+    if isinstance(days_of_week, int):
+        return WeekDayMask(days_of_week)
+
+    return WeekDayMask.from_weekdays(days_of_week)
 
 
 class Recurrence(ABC):
@@ -20,6 +35,10 @@ class Recurrence(ABC):
     Only one of the weekly_recurrence, monthly_recurrence,
     or yearly_recurrence should be set.
 
+    A recurrence is immutable, it can be shared by all the habits with
+    the same recurrence. The days of the week are stored as a WeekDayMask,
+    the recurrences are compared and hashed on their name and their mask.
+
     Attributes:
         name: The name of the recurrence.
         weekly_recurrence: The number of times the habit should recur in a week.
@@ -27,23 +46,35 @@ class Recurrence(ABC):
         yearly_recurrence: The number of times the habit should recur in a year.
     """
 
+    __slots__ = ("_days_mask",)
+
     name: str
     weekly_recurrence: Optional[int] = None
     monthly_recurrence: Optional[int] = None
     yearly_recurrence: Optional[int] = None
 
-    def __init__(self, days_of_week: Optional[set[WeekDays]] = None) -> None:
+    def __init__(self, days_of_week: Optional[DaysOfWeek] = None) -> None:
         """
         Initializes the recurrence entity with the days of
         the week the habit should recur.
 
         Attributes:
-            days_of_week: The day(s) of the week the habit should recur.
+            days_mask: The mask of the day(s) of the week the habit should recur.
 
         Args:
-            days_of_week: The day(s) of the week the habit should recur.
+            days_of_week: The day(s) of the week the habit should recur,
+            as a set of days or a mask.
         """
-        self._days_of_week: Union[set[WeekDays], None] = days_of_week
+        object.__setattr__(self, "_days_mask", _days_mask(days_of_week))
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"{self.name} recurrence is immutable.")
+
+    def __getstate__(self) -> Tuple[Optional[WeekDayMask]]:
+        return (self._days_mask,)
+
+    def __setstate__(self, state: Tuple[Optional[WeekDayMask]]) -> None:
+        object.__setattr__(self, "_days_mask", state[0])
 
     def __str__(self) -> str:
         return f"{self.name} Recurrence"
@@ -58,26 +89,22 @@ class Recurrence(ABC):
         )
 
     @property
-    def days_of_week(self) -> Union[set[WeekDays], None]:
+    def days_mask(self) -> Optional[WeekDayMask]:
         """
-        Returns the day(s) of the week the habit should recur.
-
-        Returns:
-            The day(s) of the week the habit should recur.
+        Returns the mask of the day(s) of the week the habit should recur,
+        None if they are not set.
         """
-        return self._days_of_week
+        return self._days_mask
 
-    @days_of_week.setter
-    def days_of_week(self, days_of_week: set[WeekDays]) -> None:
+    @property
+    def days_of_week(self) -> Optional[FrozenSet[WeekDays]]:
         """
-        Sets the day(s) of the week the habit should recur.
+        Returns the day(s) of the week the habit should recur.
 
-        Args:
-            days_of_week: The day(s) of the week the habit should recur.
+        Returns:
+            The day(s) of the week the habit should recur.
         """
-        # Ensure that the days_of_week is a subset of all the days of the week.
-        assert days_of_week.issubset(WeekDays.get_all())
-        self._days_of_week = days_of_week
+        return self._days_mask.weekdays() if self._days_mask is not None else None
 
     def __eq__(self, other: Recurrence) -> bool:
         """
@@ -100,40 +127,25 @@ class Recurrence(ABC):
             and self.weekly_recurrence == other.weekly_recurrence
             and self.monthly_recurrence == other.monthly_recurrence
             and self.yearly_recurrence == other.yearly_recurrence
-            and self.days_of_week == other.days_of_week
+            and self._days_mask == other._days_mask
         )
 
+    def __hash__(self) -> int:
+        return hash((self.name, self._days_mask))
+
 
 class Daily(Recurrence):
     """
     Daily recurrence entity that represents the daily recurrence of a habit.
     """
 
+    __slots__ = ()
+
     name = "Daily"
     weekly_recurrence = 7
 
     def __init__(self) -> None:
-        super().__init__(WeekDays.get_all())
-
-    @property
-    def days_of_week(self) -> None:
-        """
-        Calls parent class's days_of_week property, only set to define the setter.
-        """
-        return super().days_of_week
-
-    @days_of_week.setter
-    def days_of_week(self, days_of_week: set[WeekDays]) -> None:
-        """
-        Raises an AttributeError since daily recurrence's days of the week
-        can't be changed, it is always all days.
-        Args:
-            days_of_week: The day(s) of the week the habit should recur.
-        """
-        raise AttributeError(
-            "Daily recurrence does not have a days_of_week attribute, "
-            "it is always all days."
-        )
+        super().__init__(WeekDayMask.ALL)
 
 
 class Weekly(Recurrence):
@@ -141,10 +153,12 @@ class Weekly(Recurrence):
     Weekly recurrence entity that represents the weekly recurrence of a habit.
     """
 
+    __slots__ = ()
+
     name = "Weekly"
     weekly_recurrence = 1
 
-    def __init__(self, days_of_week: Optional[set[WeekDays]] = None) -> None:
+    def __init__(self, days_of_week: Optional[DaysOfWeek] = None) -> None:
         """
         Initializes the weekly recurrence entity with the day(s) of the week
         the habit should recur.
@@ -153,29 +167,11 @@ class Weekly(Recurrence):
         Args:
             days_of_week: The day(s) of the week the habit should recur.
         """
-        assert len(days_of_week) == self.weekly_recurrence if days_of_week else True
+        days_mask = _days_mask(days_of_week)
+        assert days_mask.bit_count() == self.weekly_recurrence if days_mask else True
         assert self.monthly_recurrence is None
         assert self.yearly_recurrence is None
-        super().__init__(days_of_week)
-
-    @property
-    def days_of_week(self) -> set[WeekDays]:
-        """
-        Calls parent class's days_of_week property, only set to define the setter.
-        """
-        return super().days_of_week
-
-    @days_of_week.setter
-    def days_of_week(self, days_of_week: set[WeekDays]) -> None:
-        """
-        Sets the day(s) of the week the habit should recur.
-        Checks that the number of days of the week is equal to the weekly recurrence.
-
-        Args:
-            days_of_week: The day(s) of the week the habit should recur.
-        """
-        assert len(days_of_week) == self.weekly_recurrence
-        self._days_of_week = days_of_week
+        super().__init__(days_mask)
 
 
 class BiWeekly(Weekly):
@@ -183,12 +179,14 @@ class BiWeekly(Weekly):
     Bi-weekly recurrence entity that represents the bi-weekly recurrence of a habit.
     """
 
+    __slots__ = ()
+
     name = "Bi-Weekly"
     weekly_recurrence = 2
 
-    def __init__(self, days_of_week: Optional[set[WeekDays]] = None) -> None:
+    def __init__(self, days_of_week: Optional[DaysOfWeek] = None) -> None:
         super().__init__(
-            days_of_week if days_of_week else {WeekDays.TUESDAY, WeekDays.FRIDAY}
+            days_of_week if days_of_week else WeekDayMask.TUESDAY | WeekDayMask.FRIDAY
         )
 
 
@@ -197,13 +195,16 @@ class Monthly(Recurrence):
     Monthly recurrence entity that represents the monthly recurrence of a habit.
     """
 
+    __slots__ = ()
+
     name = "Monthly"
     monthly_recurrence = 1
     yearly_recurrence = 12
 
-    def __init__(self, days_of_week: Optional[set[WeekDays]] = None) -> None:
-        assert len(days_of_week) == self.monthly_recurrence if days_of_week else True
-        super().__init__(days_of_week)
+    def __init__(self, days_of_week: Optional[DaysOfWeek] = None) -> None:
+        days_mask = _days_mask(days_of_week)
+        assert days_mask.bit_count() == self.monthly_recurrence if days_mask else True
+        super().__init__(days_mask)
 
 
 class BiMonthly(Monthly):
@@ -211,6 +212,8 @@ class BiMonthly(Monthly):
     Bi-monthly recurrence entity that represents the by-monthly recurrence of a habit.
     """
 
+    __slots__ = ()
+
     name = "Bi-Monthly"
     monthly_recurrence = 2
     yearly_recurrence = 24
@@ -221,12 +224,15 @@ class Yearly(Recurrence):
     Yearly recurrence entity that represents the yearly recurrence of a habit.
     """
 
+    __slots__ = ()
+
     name = "Yearly"
     yearly_recurrence = 1
 
-    def __init__(self, days_of_week: Optional[set[WeekDays]] = None) -> None:
-        assert len(days_of_week) == 1 if days_of_week else True
-        super().__init__(days_of_week)
+    def __init__(self, days_of_week: Optional[DaysOfWeek] = None) -> None:
+        days_mask = _days_mask(days_of_week)
+        assert days_mask.bit_count() == 1 if days_mask else True
+        super().__init__(days_mask)
 
 
 class Quarterly(Yearly):
@@ -234,5 +240,7 @@ class Quarterly(Yearly):
     Quarterly recurrence entity that represents the quarterly recurrence of a habit.
     """
 
+    __slots__ = ()
+
     name = "Quarterly"
     yearly_recurrence = 4
@@ -0,0 +1,9 @@
+from .occurrence_engine import CacheInfo, OccurrenceEngine, RecurrenceKey
+from .streak_engine import StreakEngine
+
+__all__ = [
+    "CacheInfo",
+    "OccurrenceEngine",
+    "RecurrenceKey",
+    "StreakEngine",
+]
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import calendar
+import functools
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..entities.habit import Habit
+from ..entities.recurrences import Recurrence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+
+class CacheInfo(NamedTuple):
+    """
+    Snapshot of the counters of a memoized computation.
+
+    Attributes:
+        hits: The number of calls that found their result in the cache.
+        misses: The number of calls that computed their result.
+        max_size: The maximum number of results kept, None if not bounded.
+        size: The number of results in the cache.
+    """
+
+    hits: int
+    misses: int
+    max_size: Optional[int]
+    size: int
+
+    @classmethod
+    def from_lru_cache(cls, function: Callable[..., object]) -> CacheInfo:
+        """
+        Returns the counters of a function memoized with functools.lru_cache.
+        """
+        hits, misses, max_size, size = function.cache_info()
+        return cls(hits=hits, misses=misses, max_size=max_size, size=size)
+
+
+@dataclass(frozen=True)
+class RecurrenceKey:
+    """
+    Hashable description of a recurrence, the recurrences with the same key
+    have the same occurrences.
+
+    Attributes:
+        weekly_recurrence: The number of times the habit should recur in a week.
+        monthly_recurrence: The number of times the habit should recur in a month.
+        yearly_recurrence: The number of times the habit should recur in a year.
+        weekdays: The indexes of the days of the week the habit should recur,
+        Monday being 0, empty if the days of the week are not set.
+    """
+
+    weekly_recurrence: Optional[int]
+    monthly_recurrence: Optional[int]
+    yearly_recurrence: Optional[int]
+    weekdays: Tuple[int, ...]
+
+    @classmethod
+    def from_recurrence(cls, recurrence: Recurrence) -> RecurrenceKey:
+        days_mask = recurrence.days_mask or 0
+        return cls(
+            weekly_recurrence=recurrence.weekly_recurrence,
+            monthly_recurrence=recurrence.monthly_recurrence,
+            yearly_recurrence=recurrence.yearly_recurrence,
+            # the bit of a day of the week in the mask is its index
+            weekdays=tuple(index for index in range(7) if days_mask >> index & 1),
+        )
+
+
+def _slot_start(slot: int, count: int, period_length: int) -> int:
+    """
+    Returns the offset of the first day of a slot, when a period of days
+    or months is split into a number of slots of almost equal length.
+    """
+    return slot * period_length // count
+
+
+def _slot(offset: int, count: int, period_length: int) -> int:
+    """
+    Returns the slot of an offset in a period split into a number of slots.
+    """
+    return ((offset + 1) * count + period_length - 1) // period_length - 1
+
+
+def _first_weekday_offset(weekday: int, weekdays: Tuple[int, ...]) -> int:
+    """
+    Returns the number of days from a day of the week to the first
+    of the days of the week, 0 if the days of the week are not set.
+    """
+    return min(((day - weekday) % 7 for day in weekdays), default=0)
+
+
+def _is_due(key: RecurrenceKey, day: date) -> bool:
+    """
+    Checks if a recurrence is due on a day, see OccurrenceEngine for the rules.
+    """
+    if key.monthly_recurrence is None and key.yearly_recurrence is None:
+        if key.weekdays:
+            return day.weekday() in key.weekdays
+        return day.weekday() < (key.weekly_recurrence or 1)
+
+    if key.monthly_recurrence is not None:
+        count, day_offset = key.monthly_recurrence, day.day - 1
+    else:
+        # the months of the year are split into slots, the habit is due
+        # in the first month of each slot
+        month_offset = day.month - 1
+        month_slot = _slot(month_offset, key.yearly_recurrence, 12)
+        if month_offset != _slot_start(month_slot, key.yearly_recurrence, 12):
+            return False
+        count, day_offset = 1, day.day - 1
+
+    # the days of the month are split into slots, the habit is due on the
+    # first of the days of the week of each slot
+    days_in_month = calendar.monthrange(day.year, day.month)[1]
+    slot_start = _slot_start(
+        _slot(day_offset, count, days_in_month), count, days_in_month
+    )
+    slot_start_weekday = (day.weekday() - (day_offset - slot_start)) % 7
+
+    return day_offset - slot_start == _first_weekday_offset(
+        slot_start_weekday, key.weekdays
+    )
+
+
+class _DayRange(NamedTuple):
+    """
+    The datetime64 days of a date range and their calendar fields,
+    computed once and shared by the recurrences expanded over the range.
+    """
+
+    days: np.ndarray
+    weekdays: np.ndarray
+    day_offsets: np.ndarray
+    days_in_month: np.ndarray
+    month_offsets: np.ndarray
+
+    @classmethod
+    def between(cls, start_date: date, end_date: date) -> _DayRange:
+        days = np.arange(
+            np.datetime64(start_date, "D"),
+            np.datetime64(end_date + timedelta(days=1), "D"),
+        )
+        months = days.astype("datetime64[M]")
+        month_days = months.astype("datetime64[D]")
+
+        day_range = cls(
+            days=days,
+            # 1970-01-01 is a Thursday, the day of the week 3
+            weekdays=(days.astype(np.int64) + 3) % 7,
+            day_offsets=(days - month_days).astype(np.int64),
+            days_in_month=((months + 1).astype("datetime64[D]") - month_days).astype(
+                np.int64
+            ),
+            month_offsets=months.astype(np.int64) % 12,
+        )
+        # the arrays are shared by the expansions, they must not be changed
+        for array in day_range:
+            array.flags.writeable = False
+
+        return day_range
+
+
+def _due_mask(key: RecurrenceKey, day_range: _DayRange) -> np.ndarray:
+    """
+    Checks if a recurrence is due on each day of a range, with the same
+    rules as _is_due.
+    """
+    weekdays = day_range.weekdays
+
+    if key.monthly_recurrence is None and key.yearly_recurrence is None:
+        if key.weekdays:
+            return np.isin(weekdays, key.weekdays)
+        return weekdays < (key.weekly_recurrence or 1)
+
+    day_offsets, days_in_month = day_range.day_offsets, day_range.days_in_month
+
+    if key.monthly_recurrence is not None:
+        count = key.monthly_recurrence
+        due_months = True
+    else:
+        month_offsets = day_range.month_offsets
+        month_slots = ((month_offsets + 1) * key.yearly_recurrence + 11) // 12 - 1
+        due_months = month_offsets == month_slots * 12 // key.yearly_recurrence
+        count = 1
+
+    slots = ((day_offsets + 1) * count + days_in_month - 1) // days_in_month - 1
+    slot_starts = slots * days_in_month // count
+    slot_start_weekdays = (weekdays - (day_offsets - slot_starts)) % 7
+
+    if key.weekdays:
+        first_weekday_offsets = np.min(
+            [(day - slot_start_weekdays) % 7 for day in key.weekdays], axis=0
+        )
+    else:
+        first_weekday_offsets = 0
+
+    return due_months & (day_offsets - slot_starts == first_weekday_offsets)
+
+
+class OccurrenceEngine:
+    """
+    Expands the recurrences of the habits into the dates they are due.
+
+    A recurrence with days of the week and no monthly or yearly recurrence
+    is due on these days of each week, without days of the week it is due
+    on the first days of each week, Monday first.
+
+    A monthly recurrence splits each month into as many slots of almost equal
+    length as the times the habit recurs in a month, a yearly recurrence
+    splits the year into slots of months and uses the first month of each
+    slot. The habit is due on the first of its days of the week of each slot,
+    or on the first day of the slot without days of the week.
+
+    The expansions are memoized by recurrence and date range. When NumPy is
+    installed, the dates of a range are computed at once for each recurrence,
+    the habits with the same recurrence share the computation. The days of
+    a range and their calendar fields are computed once, as datetime64 arrays,
+    and shared by the recurrences expanded over the range.
+
+    Attributes:
+        use_numpy: True if the expansions are computed with NumPy.
+    """
+
+    CACHE_MAX_SIZE: int = 4096
+    DAY_RANGES_CACHE_MAX_SIZE: int = 16
+
+    def __init__(
+        self, cache_max_size: int = CACHE_MAX_SIZE, use_numpy: bool = True
+    ) -> None:
+        """
+        Initializes the engine with an empty cache of expansions.
+
+        Args:
+            cache_max_size: The maximum number of expansions kept in the cache.
+            use_numpy: False to compute the expansions in pure Python even when
+            NumPy is installed.
+        """
+        self.use_numpy: bool = use_numpy and np is not None
+        self._expand_key = functools.lru_cache(maxsize=cache_max_size)(self._expand)
+        self._day_range = functools.lru_cache(maxsize=self.DAY_RANGES_CACHE_MAX_SIZE)(
+            _DayRange.between
+        )
+
+    def _expand(
+        self, key: RecurrenceKey, start_date: date, end_date: date
+    ) -> Tuple[date, ...]:
+        if end_date < start_date:
+            return ()
+
+        if self.use_numpy:
+            day_range = self._day_range(start_date, end_date)
+            return tuple(day_range.days[_due_mask(key, day_range)].tolist())
+
+        return tuple(
+            day
+            for day in (
+                start_date + timedelta(days=offset)
+                for offset in range((end_date - start_date).days + 1)
+            )
+            if _is_due(key, day)
+        )
+
+    def occurrences(
+        self, recurrence: Recurrence, start_date: date, end_date: date
+    ) -> Tuple[date, ...]:
+        """
+        Returns the dates a recurrence is due between two dates, included.
+
+        Args:
+            recurrence: The recurrence to expand.
+            start_date: The first date of the range.
+            end_date: The last date of the range.
+
+        Returns:
+            The sorted dates the recurrence is due.
+        """
+        return self._expand_key(
+            RecurrenceKey.from_recurrence(recurrence), start_date, end_date
+        )
+
+    def occurrences_for_each(
+        self, recurrences: Sequence[Recurrence], start_date: date, end_date: date
+    ) -> List[Tuple[date, ...]]:
+        """
+        Returns the dates several recurrences are due between two dates,
+        each distinct recurrence being expanded once.
+
+        The recurrences are grouped by key, the recurrences with the same key
+        share the expansion. With NumPy, the days of the range are computed
+        once and the due dates of each group are a mask over the shared days.
+
+        Args:
+            recurrences: The recurrences to expand.
+            start_date: The first date of the range.
+            end_date: The last date of the range.
+
+        Returns:
+            The sorted dates each recurrence is due, in the order of the
+            recurrences.
+        """
+        keys = [RecurrenceKey.from_recurrence(recurrence) for recurrence in recurrences]
+
+        expansions = {
+            key: self._expand_key(key, start_date, end_date) for key in set(keys)
+        }
+        return [expansions[key] for key in keys]
+
+    def is_due(self, recurrence: Recurrence, day: date) -> bool:
+        """
+        Checks if a recurrence is due on a date.
+
+        Args:
+            recurrence: The recurrence to check.
+            day: The date to check.
+
+        Returns:
+            True if the recurrence is due on the date, else False.
+        """
+        return _is_due(RecurrenceKey.from_recurrence(recurrence), day)
+
+    def is_due_between(
+        self, recurrence: Recurrence, start_date: date, end_date: date
+    ) -> bool:
+        """
+        Checks if a recurrence is due on any date between two dates, included.
+
+        The dates are checked one by one up to the first due date, the range
+        is not expanded and does not go through the cache of expansions.
+
+        Args:
+            recurrence: The recurrence to check.
+            start_date: The first date of the range.
+            end_date: The last date of the range.
+
+        Returns:
+            True if the recurrence is due on a date of the range, else False.
+        """
+        key = RecurrenceKey.from_recurrence(recurrence)
+        day = start_date
+
+        while day <= end_date:
+            if _is_due(key, day):
+                return True
+            day += timedelta(days=1)
+
+        return False
+
+    def due_on(self, habits: Iterable[Habit], day: date) -> List[Habit]:
+        """
+        Returns the habits due on a date, the habits with the same recurrence
+        are checked once.
+
+        Args:
+            habits: The habits to check.
+            day: The date to check.
+
+        Returns:
+            The habits due on the date, in the order of the habits.
+        """
+        due_keys: Dict[RecurrenceKey, bool] = {}
+        due_habits = []
+
+        for habit in habits:
+            key = RecurrenceKey.from_recurrence(habit.recurrence)
+            if key not in due_keys:
+                due_keys[key] = _is_due(key, day)
+            if due_keys[key]:
+                due_habits.append(habit)
+
+        return due_habits
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Returns the hit and miss counters of the cache of expansions.
+        """
+        return CacheInfo.from_lru_cache(self._expand_key)
+
+    def clear_cache(self) -> None:
+        """
+        Removes all the expansions and the shared day ranges from the cache.
+        """
+        self._expand_key.cache_clear()
+        self._day_range.cache_clear()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from ..entities.habit import Habit
+from ..entities.habit_instance import HabitInstance
+from ..entities.habit_streak import HabitStreak
+from .occurrence_engine import OccurrenceEngine
+
+
+class StreakEngine:
+    """
+    Computes the streaks of the habits on the dates their recurrence is due.
+
+    A streak counts the due dates in a row a habit was completed on,
+    the dates the habit is not due on neither extend nor break it.
+    A weekly habit completed on two Mondays in a row has a streak of 2.
+
+    A check-in after the last completed date updates the streak in constant
+    time. A check-in on or before it, from a backfill or a correction,
+    can change the whole streak, the streak is then recomputed from all
+    the habit instances of the habit.
+
+    Attributes:
+        occurrence_engine: The engine giving the due dates of the habits.
+    """
+
+    def __init__(self, occurrence_engine: Optional[OccurrenceEngine] = None) -> None:
+        """
+        Initializes the streak engine.
+
+        Args:
+            occurrence_engine: The engine giving the due dates of the habits,
+            a new engine is created if none is provided.
+        """
+        self.occurrence_engine: OccurrenceEngine = (
+            occurrence_engine if occurrence_engine is not None else OccurrenceEngine()
+        )
+
+    def _follows(self, habit: Habit, previous_date: date, next_date: date) -> bool:
+        """
+        Checks if the habit is not due between two dates, excluded.
+
+        The ranges differ for every check-in, they are checked up to their
+        first due date rather than expanded in the cache of the engine.
+        """
+        return not self.occurrence_engine.is_due_between(
+            habit.recurrence,
+            previous_date + timedelta(days=1),
+            next_date - timedelta(days=1),
+        )
+
+    def _extend(
+        self, habit: Habit, habit_streak: HabitStreak, completed_date: date
+    ) -> HabitStreak:
+        """
+        Returns the streak extended by a completed due date after its last one.
+        """
+        last_completed_date = habit_streak.last_completed_date
+
+        if last_completed_date is not None and self._follows(
+            habit, last_completed_date, completed_date
+        ):
+            current = habit_streak.current + 1
+        else:
+            current = 1
+
+        return HabitStreak(
+            habit_id=habit_streak.habit_id,
+            current=current,
+            longest=max(habit_streak.longest, current),
+            last_completed_date=completed_date,
+        )
+
+    def update(
+        self, habit: Habit, habit_streak: HabitStreak, habit_instance: HabitInstance
+    ) -> Optional[HabitStreak]:
+        """
+        Updates the streak of a habit with a check-in.
+
+        Args:
+            habit: The habit of the streak.
+            habit_streak: The streak of the habit before the check-in.
+            habit_instance: The habit instance recorded by the check-in.
+
+        Returns:
+            The updated streak, or None if the check-in is on or before the last
+            completed date and the streak must be recomputed.
+        """
+        day = habit_instance.date
+        last_completed_date = habit_streak.last_completed_date
+
+        if not self.occurrence_engine.is_due(habit.recurrence, day):
+            return habit_streak
+
+        if last_completed_date is not None and day <= last_completed_date:
+            # a retried check-in of the last completed date changes nothing
+            if day == last_completed_date and habit_instance.completed:
+                return habit_streak
+            return None
+
+        if not habit_instance.completed:
+            return habit_streak
+
+        return self._extend(habit, habit_streak, day)
+
+    def recompute(
+        self, habit: Habit, habit_instances: Iterable[HabitInstance]
+    ) -> HabitStreak:
+        """
+        Computes the streak of a habit from all its habit instances.
+
+        Args:
+            habit: The habit of the streak.
+            habit_instances: The habit instances of the habit, sorted by date.
+
+        Returns:
+            The streak of the habit.
+        """
+        habit_streak = HabitStreak(habit_id=habit.id)
+
+        for habit_instance in habit_instances:
+            if habit_instance.completed and self.occurrence_engine.is_due(
+                habit.recurrence, habit_instance.date
+            ):
+                habit_streak = self._extend(habit, habit_streak, habit_instance.date)
+
+        return habit_streak
+
+    def current_streak(
+        self, habit: Habit, habit_streak: HabitStreak, today: date
+    ) -> int:
+        """
+        Returns the streak of a habit on a date, the streak is broken
+        if the habit was due since the last completed date and not completed.
+        The due date itself can still be completed, it does not break the streak.
+
+        Args:
+            habit: The habit of the streak.
+            habit_streak: The streak of the habit.
+            today: The date of the streak.
+
+        Returns:
+            The number of due dates in a row the habit was completed on.
+        """
+        last_completed_date = habit_streak.last_completed_date
+
+        if last_completed_date is None:
+            return 0
+
+        if last_completed_date >= today or self._follows(
+            habit, last_completed_date, today
+        ):
+            return habit_streak.current
+
+        return 0
@@ -1,10 +1,11 @@
 from .color import Color
 from .types import ID, Description, Name, Note
-from .weekdays import WeekDays
+from .weekdays import WeekDayMask, WeekDays
 
 __all__ = [
     "Color",
     "WeekDays",
+    "WeekDayMask",
     "ID",
     "Note",
     "Name",
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import re
 from dataclasses import dataclass
 
@@ -11,8 +12,20 @@ class InvalidColorFormatError(Exception):
 HEX_PATTERN = re.compile(r"^#(?:[0-9a-fA-F]{3}){1,2}$")
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Color:
+    """
+    The color of a habit or a category, as a hexadecimal color code.
+
+    A color is immutable, the colors built with intern are shared by all
+    the entities with the same color code.
+
+    Attributes:
+        hex: The hexadecimal color code, such as #FF5733.
+    """
+
+    INTERN_MAX_SIZE = 1024
+
     hex: str
 
     def __post_init__(self) -> None:
@@ -22,6 +35,24 @@ class Color:
     def __eq__(self, other: Color) -> bool:
         return self.hex == other.hex
 
+    @classmethod
+    @functools.lru_cache(maxsize=INTERN_MAX_SIZE)
+    def intern(cls, hex_str: str) -> Color:
+        """
+        Returns the shared color of a hexadecimal color code, the color code
+        is validated once for all the entities with this color.
+
+        Args:
+            hex_str: The hexadecimal color code.
+
+        Returns:
+            The shared color.
+
+        Raises:
+            InvalidColorFormatError: If the color code is invalid.
+        """
+        return cls(hex_str)
+
     @staticmethod
     def is_valid_hex(hex_str: str) -> bool:
         """
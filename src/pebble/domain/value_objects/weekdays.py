@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from enum import Enum
+from enum import Enum, IntFlag
+from typing import Dict, FrozenSet, Iterable, List, Tuple
 
 
 class WeekDays(Enum):
@@ -13,9 +14,86 @@ class WeekDays(Enum):
     SUNDAY: str = "Sunday"
 
     @classmethod
-    def get_all(cls) -> set[WeekDays]:
-        return {day for day in cls}
+    def get_all(cls) -> FrozenSet[WeekDays]:
+        return WeekDayMask.ALL.weekdays()
 
     @classmethod
     def valid_weekday(cls, day: str) -> bool:
         return day in cls._value2member_map_
+
+    @property
+    def mask(self) -> WeekDayMask:
+        """
+        Returns the bit of the day of the week in a WeekDayMask.
+        """
+        return _WEEKDAY_MASKS[self]
+
+
+class WeekDayMask(IntFlag):
+    """
+    The days of the week packed in 7 bits, Monday being the bit 0.
+
+    Masks are compared, hashed and combined as integers. The set of the
+    days of a mask is shared by all the masks with the same days.
+    """
+
+    NONE = 0
+    MONDAY = 1
+    TUESDAY = 2
+    WEDNESDAY = 4
+    THURSDAY = 8
+    FRIDAY = 16
+    SATURDAY = 32
+    SUNDAY = 64
+    ALL = 127
+
+    @classmethod
+    def from_weekdays(cls, weekdays: Iterable[WeekDays]) -> WeekDayMask:
+        """
+        Returns the mask of some days of the week.
+        """
+        mask = 0
+        for day in weekdays:
+            mask |= _WEEKDAY_MASKS[day]
+        return cls(mask)
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> WeekDayMask:
+        """
+        Returns the mask of some days of the week, given by name.
+
+        Raises:
+            ValueError: If a name is not a day of the week.
+        """
+        return cls.from_weekdays(WeekDays(name) for name in names)
+
+    def weekdays(self) -> FrozenSet[WeekDays]:
+        """
+        Returns the days of the week of the mask.
+        """
+        return _WEEKDAY_SETS[self]
+
+    def names(self) -> List[str]:
+        """
+        Returns the names of the days of the week of the mask, Monday first.
+        """
+        return [day.value for day in WeekDays if self & _WEEKDAY_MASKS[day]]
+
+    def overlapping_masks(self) -> Tuple[int, ...]:
+        """
+        Returns all the masks sharing at least one day with the mask.
+        """
+        return _OVERLAPPING_MASKS[self]
+
+
+_WEEKDAY_MASKS: Dict[WeekDays, WeekDayMask] = {
+    day: WeekDayMask[day.name] for day in WeekDays
+}
+_WEEKDAY_SETS: Tuple[FrozenSet[WeekDays], ...] = tuple(
+    frozenset(day for day in WeekDays if mask & _WEEKDAY_MASKS[day])
+    for mask in range(WeekDayMask.ALL + 1)
+)
+_OVERLAPPING_MASKS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(other for other in range(WeekDayMask.ALL + 1) if other & mask)
+    for mask in range(WeekDayMask.ALL + 1)
+)
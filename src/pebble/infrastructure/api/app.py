@@ -1,12 +1,100 @@
-from typing import Dict
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
 
 import toml
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from pymongo.errors import OperationFailure, PyMongoError
+
+from pebble.interface_adapters.factories import (
+    MongoConnectionError,
+    MongoConnectionFactory,
+)
+from pebble.interface_adapters.repositories import MongoHabitRepository
+from pebble.interface_adapters.repositories.mongo import MongoIndexReport
 
 from .routes import habit_router
 
+logger = logging.getLogger("uvicorn")
+
+# the error of MongoDB when a unique index meets duplicated values
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+
+def _ensure_indexes(
+    mongo_habit_repository: MongoHabitRepository,
+) -> Optional[MongoIndexReport]:
+    """
+    Creates the missing indexes, a unique index that cannot be built
+    because of duplicated documents is logged with the command removing them.
+    """
+    try:
+        return mongo_habit_repository.ensure_indexes()
+    except OperationFailure as error:
+        if error.code != DUPLICATE_KEY_ERROR_CODE:
+            raise
+
+        logger.error(
+            "Failed to create the unique index "
+            f"{MongoHabitRepository.HABIT_INSTANCES_UNIQUE_INDEX_NAME}, "
+            "some habit instances are duplicated on a habit and a day: "
+            f"{error}. List them with 'python -m pebble.infrastructure.migrations "
+            "habit-instance-duplicates --dry-run', then run the command without "
+            "--dry-run to remove them."
+        )
+        return None
+
+
+def bootstrap_mongo_indexes() -> None:
+    """
+    Creates the MongoDB indexes missing for the habit repository,
+    and logs the indexes that were created or that are not declared.
+
+    No data is read or changed when the service starts: the migrations of
+    the stored data and the removal of the habit instances duplicated on
+    a habit and a day, which prevent the unique index from being built,
+    are run once with pebble.infrastructure.migrations.
+
+    A failure is logged without preventing the service from starting.
+    """
+    try:
+        report = _ensure_indexes(
+            MongoHabitRepository(MongoConnectionFactory.get_mongo_client())
+        )
+    except (MongoConnectionError, PyMongoError) as error:
+        logger.error(f"Failed to create the MongoDB indexes: {error}")
+        return
+
+    if report:
+        for collection_name, index_names in report.created.items():
+            logger.info(f"Created indexes {index_names} on {collection_name}.")
+
+        for collection_name, index_names in report.extra.items():
+            logger.warning(
+                f"Undeclared indexes {index_names} found on {collection_name}."
+            )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Runs the bootstrap tasks once, when the service starts.
+
+    The tasks run in the background, the service accepts requests without
+    waiting for the database. The shared MongoDB clients are closed
+    when the service stops.
+    """
+    bootstrap_task = asyncio.create_task(run_in_threadpool(bootstrap_mongo_indexes))
+    yield
+    await bootstrap_task
+    MongoConnectionFactory.close_mongo_clients()
+
+
 app = FastAPI(
     version=toml.load("pyproject.toml")["project"]["version"],
+    lifespan=lifespan,
 )
 
 
@@ -0,0 +1,118 @@
+"""
+Runs the one-time migrations of the MongoDB database.
+
+The migrations read whole collections, they are run once by hand after
+an upgrade rather than every time the application starts:
+
+    python -m pebble.infrastructure.migrations habit-instance-dates
+
+The migrations removing data list what they would remove with --dry-run:
+
+    python -m pebble.infrastructure.migrations habit-instance-duplicates --dry-run
+"""
+
+import argparse
+from typing import Callable, Dict, List, Optional, Set
+
+from pebble.interface_adapters.factories import MongoConnectionFactory
+from pebble.interface_adapters.repositories import MongoHabitRepository
+
+
+def migrate_habit_instance_dates(mongo_habit_repository: MongoHabitRepository) -> str:
+    """
+    Converts the dates of the habit instances stored as ISO strings.
+
+    Returns:
+        The summary of the migration.
+    """
+    migrated_count = mongo_habit_repository.migrate_habit_instance_dates()
+    return f"Migrated the dates of {migrated_count} habit instances."
+
+
+def migrate_habit_recurrence_days(
+    mongo_habit_repository: MongoHabitRepository,
+) -> str:
+    """
+    Converts the days of the week of the habits stored as lists of names.
+
+    Returns:
+        The summary of the migration.
+    """
+    migrated_count = mongo_habit_repository.migrate_habit_recurrence_days()
+    return f"Migrated the days of the week of {migrated_count} habits."
+
+
+def deduplicate_habit_instances(
+    mongo_habit_repository: MongoHabitRepository, dry_run: bool = False
+) -> str:
+    """
+    Removes the habit instances duplicated on a habit and a day, so the unique
+    index on the habit and the date can be built when the application starts.
+
+    The habit instance written last is kept. Each group of duplicates is
+    listed, with the completion and note of the habit instances whose data
+    differ from the kept one, so that they can be restored by hand.
+
+    Returns:
+        The summary of the migration.
+    """
+    report = mongo_habit_repository.deduplicate_habit_instances(dry_run=dry_run)
+    lines = [
+        f"{'Would remove' if dry_run else 'Removed'} {report.removed_count} "
+        "duplicated habit instances."
+    ]
+
+    for duplicates in report.duplicates:
+        removed_ids = ", ".join(
+            str(habit_instance["_id"]) for habit_instance in duplicates.removed
+        )
+        lines.append(
+            f"Habit {duplicates.habit_id} on {duplicates.date}: "
+            f"kept {duplicates.kept['_id']}, removed {removed_ids}."
+        )
+        if duplicates.conflicting:
+            lines += [
+                f"  completion or note differ: {habit_instance}"
+                for habit_instance in [duplicates.kept, *duplicates.removed]
+            ]
+
+    return "\n".join(lines)
+
+
+MIGRATIONS: Dict[str, Callable[..., str]] = {
+    "habit-instance-dates": migrate_habit_instance_dates,
+    "habit-instance-duplicates": deduplicate_habit_instances,
+    "habit-recurrence-days": migrate_habit_recurrence_days,
+}
+# the migrations taking a dry_run argument
+DRY_RUN_MIGRATIONS: Set[str] = {"habit-instance-duplicates"}
+
+
+def main(arguments: Optional[List[str]] = None) -> None:
+    """
+    Runs the migration named on the command line and prints its summary.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("migration", choices=sorted(MIGRATIONS))
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="list what the migration would change, without changing it",
+    )
+    parsed_arguments = parser.parse_args(arguments)
+    migration = parsed_arguments.migration
+    if parsed_arguments.dry_run and migration not in DRY_RUN_MIGRATIONS:
+        parser.error(f"the {migration} migration has no dry run")
+
+    options = {"dry_run": True} if parsed_arguments.dry_run else {}
+    mongo_habit_repository = MongoHabitRepository(
+        MongoConnectionFactory.get_mongo_client()
+    )
+    try:
+        print(MIGRATIONS[migration](mongo_habit_repository, **options))
+    finally:
+        MongoConnectionFactory.close_mongo_clients()
+
+
+if __name__ == "__main__":
+    main()
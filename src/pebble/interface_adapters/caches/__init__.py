@@ -0,0 +1,13 @@
+from .cache_store import CacheStats, CacheStore
+from .in_memory_key_value_client import InMemoryKeyValueClient
+from .key_value_cache_store import KeyValueCacheStore, KeyValueClient
+from .lru_cache import LRUCache
+
+__all__ = [
+    "CacheStats",
+    "CacheStore",
+    "InMemoryKeyValueClient",
+    "KeyValueCacheStore",
+    "KeyValueClient",
+    "LRUCache",
+]
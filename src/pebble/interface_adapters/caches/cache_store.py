@@ -0,0 +1,83 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """
+    Snapshot of the counters of a cache.
+
+    Attributes:
+        hits: The number of lookups that found a value.
+        misses: The number of lookups that did not find a value.
+        evictions: The number of values removed to respect the maximum size.
+        expirations: The number of values removed because they were too old.
+        size: The number of values in the cache.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        Returns the ratio of lookups that found a value, 0 if there was no lookup.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CacheStore(ABC):
+    """
+    A store of cached values, with a bounded size or a time to live.
+
+    A value that is not in the store, or that expired, is returned as None,
+    None itself cannot be cached.
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[object]:
+        """
+        Gets a value from the store.
+
+        Args:
+            key: The key of the value.
+
+        Returns:
+            The value, if it is in the store and did not expire, else None.
+        """
+
+    @abstractmethod
+    def set(self, key: Hashable, value: object) -> None:
+        """
+        Adds or replaces a value in the store.
+
+        Args:
+            key: The key of the value.
+            value: The value to cache.
+        """
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        """
+        Removes a value from the store, if it is in the store.
+
+        Args:
+            key: The key of the value.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Removes all the values from the store.
+        """
+
+    @abstractmethod
+    def stats(self) -> CacheStats:
+        """
+        Returns a snapshot of the counters of the store.
+        """
@@ -0,0 +1,64 @@
+import fnmatch
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+
+class InMemoryKeyValueClient:
+    """
+    Key-value store in the memory of the process, with the operations
+    of KeyValueClient.
+
+    A local stand-in for an external key-value store, for the tests
+    and for the deployments running a single process.
+
+    The client is thread-safe.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initializes an empty store.
+
+        Args:
+            clock: The function giving the current time in seconds.
+        """
+        self._clock: Callable[[], float] = clock
+        self._values: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(name)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < self._clock():
+                del self._values[name]
+                return None
+
+            return value
+
+    def set(self, name: str, value: bytes, ex: Optional[int] = None) -> bool:
+        expires_at = self._clock() + ex if ex is not None else float("inf")
+
+        with self._lock:
+            self._values[name] = (expires_at, value)
+
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._values.pop(name, None) is not None for name in names)
+
+    def scan_iter(self, match: str = "*") -> Iterator[str]:
+        now = self._clock()
+
+        with self._lock:
+            names = [
+                name
+                for name, (expires_at, _) in self._values.items()
+                if expires_at >= now and fnmatch.fnmatchcase(name, match)
+            ]
+
+        return iter(names)
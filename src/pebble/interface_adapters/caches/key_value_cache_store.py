@@ -0,0 +1,135 @@
+import pickle
+import threading
+from typing import Hashable, Iterable, Optional, Protocol
+
+from .cache_store import CacheStats, CacheStore
+
+
+class KeyValueClient(Protocol):
+    """
+    The operations of an external key-value store used by KeyValueCacheStore.
+
+    They follow the Redis commands, a Redis client can be used as is.
+    """
+
+    def get(self, name: str) -> Optional[bytes]: ...
+
+    def set(self, name: str, value: bytes, ex: Optional[int] = None) -> object: ...
+
+    def delete(self, *names: str) -> object: ...
+
+    def scan_iter(self, match: str) -> Iterable[str]: ...
+
+
+class KeyValueCacheStore(CacheStore):
+    """
+    Cache store keeping the values in an external key-value store,
+    shared by all the processes using the same store.
+
+    The values are pickled, the store must only be reachable by trusted
+    processes. The keys are prefixed, several caches can share a store.
+    The size and the time to live of the values are enforced by the store,
+    the evictions and expirations are not counted.
+
+    Attributes:
+        prefix: The prefix of the keys of the cache in the store.
+        ttl_seconds: The number of seconds a value is kept, None to keep it
+        until the store evicts it.
+    """
+
+    def __init__(
+        self,
+        client: KeyValueClient,
+        prefix: str = "pebble:",
+        ttl_seconds: Optional[int] = None,
+    ) -> None:
+        """
+        Initializes the cache on a key-value store.
+
+        Args:
+            client: The client of the key-value store.
+            prefix: The prefix of the keys of the cache in the store.
+            ttl_seconds: The number of seconds a value is kept, None to keep it
+            until the store evicts it.
+        """
+        self.prefix: str = prefix
+        self.ttl_seconds: Optional[int] = ttl_seconds
+        self._client: KeyValueClient = client
+        self._lock = threading.Lock()
+
+        self._hits: int = 0
+        self._misses: int = 0
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}{key}"
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """
+        Gets a value from the store.
+
+        Args:
+            key: The key of the value.
+
+        Returns:
+            The value, if it is in the store and did not expire, else None.
+        """
+        data = self._client.get(self._key(key))
+
+        with self._lock:
+            if data is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+
+        return pickle.loads(data)
+
+    def set(self, key: Hashable, value: object) -> None:
+        """
+        Adds or replaces a value in the store, with the time to live if any.
+
+        Args:
+            key: The key of the value.
+            value: The value to cache.
+        """
+        self._client.set(
+            self._key(key),
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            ex=self.ttl_seconds,
+        )
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Removes a value from the store, if it is in the store.
+
+        Args:
+            key: The key of the value.
+        """
+        self._client.delete(self._key(key))
+
+    def _keys(self) -> list:
+        return list(self._client.scan_iter(match=f"{self.prefix}*"))
+
+    def clear(self) -> None:
+        """
+        Removes all the values of the cache from the store, the counters are kept.
+        """
+        keys = self._keys()
+        if keys:
+            self._client.delete(*keys)
+
+    def stats(self) -> CacheStats:
+        """
+        Returns a snapshot of the counters of the cache,
+        the size is the number of keys of the cache in the store.
+        """
+        size = len(self._keys())
+
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=0,
+                expirations=0,
+                size=size,
+            )
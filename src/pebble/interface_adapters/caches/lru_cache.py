@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+from .cache_store import CacheStats, CacheStore
+
+
+class LRUCache(CacheStore):
+    """
+    Bounded in-process cache, evicting the least recently used values first.
+
+    Values can also expire after a time to live, so that changes made
+    by other processes are eventually picked up.
+
+    The cache is thread-safe, it can be shared by the repositories
+    of concurrent requests.
+
+    Attributes:
+        max_size: The maximum number of values kept in the cache.
+        ttl_seconds: The number of seconds a value is kept, None to keep it
+        until it is evicted.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size: The maximum number of values kept in the cache.
+            ttl_seconds: The number of seconds a value is kept, None to keep it
+            until it is evicted.
+            clock: The function giving the current time in seconds.
+        """
+        if max_size <= 0:
+            raise ValueError("The maximum size of the cache must be positive.")
+
+        self.max_size: int = max_size
+        self.ttl_seconds: Optional[float] = ttl_seconds
+        self._clock: Callable[[], float] = clock
+        self._values: OrderedDict[Hashable, Tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+        self._expirations: int = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(self, key: Hashable) -> Optional[object]:
+        """
+        Gets a value from the cache and marks it as recently used.
+
+        Args:
+            key: The key of the value.
+
+        Returns:
+            The value, if it is in the cache and did not expire, else None.
+        """
+        with self._lock:
+            entry = self._values.get(key)
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, value = entry
+
+            if expires_at < self._clock():
+                del self._values[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._values.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: object) -> None:
+        """
+        Adds or replaces a value in the cache.
+
+        The least recently used value is evicted if the cache is full.
+
+        Args:
+            key: The key of the value.
+            value: The value to cache.
+        """
+        expires_at = (
+            self._clock() + self.ttl_seconds
+            if self.ttl_seconds is not None
+            else float("inf")
+        )
+
+        with self._lock:
+            self._values[key] = (expires_at, value)
+            self._values.move_to_end(key)
+
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Removes a value from the cache, if it is in the cache.
+
+        Args:
+            key: The key of the value.
+        """
+        with self._lock:
+            self._values.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Removes all the values from the cache, the counters are kept.
+        """
+        with self._lock:
+            self._values.clear()
+
+    def stats(self) -> CacheStats:
+        """
+        Returns a snapshot of the counters of the cache.
+        """
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                size=len(self._values),
+            )
@@ -1,6 +1,8 @@
+from .mongo_client_settings import MongoClientSettings
 from .mongo_connection_factory import MongoConnectionError, MongoConnectionFactory
 
 __all__ = [
+    "MongoClientSettings",
     "MongoConnectionFactory",
     "MongoConnectionError",
 ]
@@ -0,0 +1,117 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Union
+
+
+@dataclass(frozen=True)
+class MongoClientSettings:
+    """
+    The options of the MongoDB clients, read from the environment.
+
+    A setting that is not provided keeps the default value of the driver,
+    except the server selection timeout: a request fails after a few seconds
+    instead of thirty when the database cannot be reached.
+
+    Attributes:
+        max_pool_size: The maximum number of connections of the pool.
+        min_pool_size: The number of connections the pool keeps open.
+        max_idle_time_ms: The time after which an idle connection is closed.
+        wait_queue_timeout_ms: The time a query waits for a free connection.
+        server_selection_timeout_ms: The time a query waits for a server.
+        connect_timeout_ms: The time allowed to open a connection.
+        compressors: The wire compressors, by order of preference,
+        separated by commas, for example "zstd,zlib".
+        read_concern: The read concern level, for example "majority".
+        write_concern: The write concern, for example "majority" or 1.
+    """
+
+    ENVIRONMENT_PREFIX = "MONGO_"
+    DEFAULT_SERVER_SELECTION_TIMEOUT_MS = 5000
+
+    max_pool_size: Optional[int] = None
+    min_pool_size: Optional[int] = None
+    max_idle_time_ms: Optional[int] = None
+    wait_queue_timeout_ms: Optional[int] = None
+    server_selection_timeout_ms: Optional[int] = DEFAULT_SERVER_SELECTION_TIMEOUT_MS
+    connect_timeout_ms: Optional[int] = None
+    compressors: Optional[str] = None
+    read_concern: Optional[str] = None
+    write_concern: Optional[Union[str, int]] = None
+
+    @classmethod
+    def from_env(
+        cls, environment: Optional[Mapping[str, str]] = None
+    ) -> "MongoClientSettings":
+        """
+        Reads the settings from the environment variables prefixed with MONGO_,
+        for example MONGO_MAX_POOL_SIZE or MONGO_WRITE_CONCERN.
+
+        Args:
+            environment: The variables to read, the environment of the process
+            if none is provided.
+
+        Returns:
+            The settings found in the environment.
+
+        Raises:
+            ValueError: If a numeric setting is not an integer.
+        """
+        environment = os.environ if environment is None else environment
+
+        def get(name: str) -> Union[str, None]:
+            value = environment.get(f"{cls.ENVIRONMENT_PREFIX}{name.upper()}", "")
+            # an empty variable is the same as a variable that is not set
+            return value.strip() or None
+
+        def get_int(name: str, default: Optional[int] = None) -> Union[int, None]:
+            value = get(name)
+            if value is None:
+                return default
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(
+                    f"{cls.ENVIRONMENT_PREFIX}{name.upper()} must be an integer, "
+                    f"got {value!r}."
+                )
+
+        write_concern = get("write_concern")
+
+        return cls(
+            max_pool_size=get_int("max_pool_size"),
+            min_pool_size=get_int("min_pool_size"),
+            max_idle_time_ms=get_int("max_idle_time_ms"),
+            wait_queue_timeout_ms=get_int("wait_queue_timeout_ms"),
+            server_selection_timeout_ms=get_int(
+                "server_selection_timeout_ms",
+                cls.DEFAULT_SERVER_SELECTION_TIMEOUT_MS,
+            ),
+            connect_timeout_ms=get_int("connect_timeout_ms"),
+            compressors=get("compressors"),
+            read_concern=get("read_concern"),
+            # the number of acknowledging members, or a tag such as "majority"
+            write_concern=(
+                int(write_concern)
+                if write_concern and write_concern.isdigit()
+                else write_concern
+            ),
+        )
+
+    def to_client_options(self) -> Dict[str, object]:
+        """
+        Returns the keyword arguments of the MongoDB clients for the settings,
+        the settings that are not provided are left out.
+        """
+        options = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "compressors": self.compressors,
+            "readConcernLevel": self.read_concern,
+            "w": self.write_concern,
+        }
+
+        return {name: value for name, value in options.items() if value is not None}
@@ -1,7 +1,19 @@
-from pebble.interface_adapters.repositories.mongo.mongo_habit_repository import (
+from pebble.interface_adapters.repositories.cached_habit_repository import (
+    CachedHabitRepository,
+)
+from pebble.interface_adapters.repositories.memory import InMemoryHabitRepository
+from pebble.interface_adapters.repositories.mongo import (
+    AsyncMongoHabitRepository,
+    BucketedMongoHabitRepository,
     MongoHabitRepository,
 )
+from pebble.interface_adapters.repositories.sqlite import SqliteHabitRepository
 
 __all__ = [
+    "AsyncMongoHabitRepository",
+    "BucketedMongoHabitRepository",
+    "CachedHabitRepository",
+    "InMemoryHabitRepository",
     "MongoHabitRepository",
+    "SqliteHabitRepository",
 ]
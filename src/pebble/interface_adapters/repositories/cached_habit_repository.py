@@ -0,0 +1,648 @@
+import pickle
+from datetime import date
+from typing import Iterator, List, Optional, Set, Tuple, Union
+
+from pebble.application.repositories import BulkSaveResult, HabitRepository
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+    HabitStreak,
+)
+from pebble.domain.value_objects import ID, WeekDayMask
+from pebble.interface_adapters.caches import CacheStats, CacheStore, LRUCache
+
+
+class CachedHabitRepository(HabitRepository):
+    """
+    Read-through cache in front of another habit repository.
+
+    The habits, the habit categories and the habit collections read by
+    identifier or by name are kept in a cache store, the following reads
+    do not reach the wrapped repository. The cached value of an entity is
+    removed when the entity is saved or updated through this repository,
+    the changes made by other processes are picked up when the value expires.
+
+    The entities are cached as pickled snapshots, like the values of a
+    KeyValueCacheStore, whatever the store. Every read returns its own copy,
+    a caller changing an entity it read does not change the cached value
+    nor the entities read by the other callers.
+
+    The habit instances are not cached, they are read from the wrapped
+    repository. The habit identifiers of each cached habit collection are
+    kept with it, the cached habit collections containing a habit are
+    removed when a habit instance of the habit is saved or recorded.
+
+    Attributes:
+        repository: The wrapped habit repository.
+        store: The store of the cached entities.
+    """
+
+    CACHE_MAX_SIZE: int = 1024
+    CACHE_TTL_SECONDS: float = 60.0
+
+    def __init__(
+        self, repository: HabitRepository, store: Optional[CacheStore] = None
+    ) -> None:
+        """
+        Initializes the cache in front of a habit repository.
+
+        Args:
+            repository: The habit repository to wrap.
+            store: The store of the cached entities, it can be an external
+            key-value store shared by several processes. An in-process LRU
+            cache is created if none is provided.
+        """
+        self.repository: HabitRepository = repository
+        self.store: CacheStore = (
+            store
+            if store is not None
+            else LRUCache(
+                max_size=self.CACHE_MAX_SIZE, ttl_seconds=self.CACHE_TTL_SECONDS
+            )
+        )
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        """
+        Returns the hit, miss and eviction counters of the cache.
+        """
+        return self.store.stats()
+
+    @staticmethod
+    def _habit_key(habit_id: ID) -> str:
+        return f"habit:{habit_id}"
+
+    @staticmethod
+    def _habit_category_key(habit_category_name: str) -> str:
+        return f"habit_category_name:{habit_category_name}"
+
+    @staticmethod
+    def _habit_collection_key(habit_collection_id: ID) -> str:
+        return f"habit_collection:{habit_collection_id}"
+
+    @staticmethod
+    def _habit_collections_of_habit_key(habit_id: ID) -> str:
+        return f"habit_collections_of_habit:{habit_id}"
+
+    def _get_cached(self, key: str) -> Optional[object]:
+        # each read unpickles its own copy of the entity
+        snapshot = self.store.get(key)
+        return None if snapshot is None else pickle.loads(snapshot)
+
+    def _set_cached(self, key: str, entity: object) -> None:
+        self.store.set(key, pickle.dumps(entity, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _set_cached_habit_collection(
+        self, key: str, habit_collection: HabitCollection
+    ) -> None:
+        self._set_cached(key, habit_collection)
+
+        # the habits of the collection and of its habit instances
+        habits_ids = {
+            habit.id
+            for habit in (
+                *habit_collection.habits,
+                *habit_collection.habits_instance.habits,
+            )
+            if habit.id is not None
+        }
+        for habit_id in habits_ids:
+            habit_collections_key = self._habit_collections_of_habit_key(habit_id)
+            habit_collections_ids = self._get_cached(habit_collections_key) or set()
+            habit_collections_ids.add(habit_collection.id)
+            self._set_cached(habit_collections_key, habit_collections_ids)
+
+    def _invalidate_habit_collections_of_habits(
+        self, habit_instances: List[HabitInstance]
+    ) -> None:
+        habits_ids = {
+            habit_instance.habit.id
+            for habit_instance in habit_instances
+            if habit_instance.habit.id is not None
+        }
+        for habit_id in habits_ids:
+            habit_collections_key = self._habit_collections_of_habit_key(habit_id)
+            for habit_collection_id in self._get_cached(habit_collections_key) or ():
+                self.store.delete(self._habit_collection_key(habit_collection_id))
+            self.store.delete(habit_collections_key)
+
+    def _invalidate_habits(self, habits: List[Habit]) -> None:
+        for habit in habits:
+            if habit.id is not None:
+                self.store.delete(self._habit_key(habit.id))
+
+    def _invalidate_habit_categories(
+        self, habit_categories: List[HabitCategory]
+    ) -> None:
+        for habit_category in habit_categories:
+            self.store.delete(self._habit_category_key(habit_category.name))
+
+    def save_habit(self, habit: Habit) -> Habit:
+        """
+        Saves a new habit in the wrapped repository, its cached value is removed.
+
+        Args:
+            habit: The habit to be saved.
+
+        Returns:
+            The saved habit, with the identifier.
+
+        Raises:
+            HabitCreationError: If the habit could not be created.
+        """
+        saved_habit = self.repository.save_habit(habit)
+        self._invalidate_habits([saved_habit])
+        return saved_habit
+
+    def save_habits(self, habits: List[Habit]) -> BulkSaveResult[Habit]:
+        """
+        Saves several new habits in the wrapped repository at once,
+        the cached values of the saved habits are removed.
+
+        Args:
+            habits: The habits to be saved.
+
+        Returns:
+            The saved habits, with their identifier, and the habits that failed.
+        """
+        result = self.repository.save_habits(habits)
+        self._invalidate_habits(result.saved)
+        return result
+
+    def get_habit_by_id(self, habit_id: ID) -> Union[Habit, None]:
+        """
+        Gets a habit by identifier from the cache, or from the wrapped
+        repository when it is not cached.
+
+        Args:
+            habit_id: The identifier of the habit to get.
+
+        Returns:
+            A copy of the habit with the provided identifier, if found, else None.
+
+        Raises:
+            RepositoryError: If the habit could not be found.
+        """
+        key = self._habit_key(habit_id)
+        habit = self._get_cached(key)
+
+        if habit is None:
+            habit = self.repository.get_habit_by_id(habit_id)
+            if habit is not None:
+                self._set_cached(key, habit)
+
+        return habit
+
+    def get_habits_by_ids(self, habits_ids: Set[ID]) -> Set[Habit]:
+        """
+        Gets habits by identifier, the habits missing from the cache
+        are read from the wrapped repository at once.
+
+        Args:
+            habits_ids: The identifiers of the habits to get.
+
+        Returns:
+            Copies of the habits found, the unknown identifiers are ignored.
+
+        Raises:
+            RepositoryError: If the habits could not be found.
+        """
+        habits = set()
+        missing_habits_ids = set()
+
+        for habit_id in habits_ids:
+            habit = self._get_cached(self._habit_key(habit_id))
+            if habit is None:
+                missing_habits_ids.add(habit_id)
+            else:
+                habits.add(habit)
+
+        # only the habits missing from the cache are read, at once
+        if missing_habits_ids:
+            for habit in self.repository.get_habits_by_ids(missing_habits_ids):
+                self._set_cached(self._habit_key(habit.id), habit)
+                habits.add(habit)
+
+        return habits
+
+    def get_habits_by_weekdays(self, weekdays: WeekDayMask) -> Set[Habit]:
+        """
+        Gets the habits due on any of the days of the week of a mask,
+        from the wrapped repository.
+
+        Args:
+            weekdays: The days of the week.
+
+        Returns:
+            The habits recurring on any of the days of the week.
+        """
+        return self.repository.get_habits_by_weekdays(weekdays)
+
+    def save_habit_category(self, habit_category: HabitCategory) -> HabitCategory:
+        """
+        Saves a new habit category in the wrapped repository,
+        its cached value is removed.
+
+        Args:
+            habit_category: The habit category to be saved.
+
+        Returns:
+            The saved habit category, with the identifier.
+
+        Raises:
+            RepositoryError: If the category could not be created.
+        """
+        saved_habit_category = self.repository.save_habit_category(habit_category)
+        self._invalidate_habit_categories([saved_habit_category])
+        return saved_habit_category
+
+    def save_habit_categories(
+        self, habit_categories: List[HabitCategory]
+    ) -> BulkSaveResult[HabitCategory]:
+        """
+        Saves several new habit categories in the wrapped repository at once,
+        the cached values of the saved habit categories are removed.
+
+        Args:
+            habit_categories: The habit categories to be saved.
+
+        Returns:
+            The saved habit categories, with their identifier,
+            and the habit categories that failed.
+        """
+        result = self.repository.save_habit_categories(habit_categories)
+        self._invalidate_habit_categories(result.saved)
+        return result
+
+    def get_habit_category_by_name(
+        self, category_name: str
+    ) -> Union[HabitCategory, None]:
+        """
+        Gets a habit category by name from the cache, or from the wrapped
+        repository when it is not cached.
+
+        Args:
+            category_name: The name of the habit category to get.
+
+        Returns:
+            A copy of the habit category with the provided name, if found,
+            else None.
+
+        Raises:
+            RepositoryError: If the category could not be found.
+        """
+        key = self._habit_category_key(category_name)
+        habit_category = self._get_cached(key)
+
+        if habit_category is None:
+            habit_category = self.repository.get_habit_category_by_name(category_name)
+            if habit_category is not None:
+                self._set_cached(key, habit_category)
+
+        return habit_category
+
+    def save_habit_collection(
+        self, habit_collection: HabitCollection
+    ) -> HabitCollection:
+        """
+        Saves a new habit collection in the wrapped repository,
+        its cached value is removed.
+
+        Args:
+            habit_collection: The habit collection to be saved.
+
+        Returns:
+            The saved habit collection, with the identifier.
+
+        Raises:
+            HabitCreationError: If the habit collection could not be created.
+        """
+        saved_habit_collection = self.repository.save_habit_collection(habit_collection)
+        self.store.delete(self._habit_collection_key(saved_habit_collection.id))
+        return saved_habit_collection
+
+    def update_habit_collection(
+        self, habit_collection: HabitCollection
+    ) -> HabitCollection:
+        """
+        Updates a habit collection in the wrapped repository, its cached value
+        is removed even if the update failed.
+
+        Args:
+            habit_collection: The habit collection to be updated.
+
+        Returns:
+            The updated habit collection.
+
+        Raises:
+            RepositoryError: If the habit collection could not be updated.
+        """
+        try:
+            return self.repository.update_habit_collection(habit_collection)
+        finally:
+            if habit_collection.id is not None:
+                self.store.delete(self._habit_collection_key(habit_collection.id))
+
+    def get_habit_collection_by_id(
+        self, habit_collection_id: ID
+    ) -> Union[HabitCollection, None]:
+        """
+        Gets a habit collection by identifier from the cache, or from the
+        wrapped repository when it is not cached.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection to get.
+
+        Returns:
+            A copy of the habit collection with the provided identifier,
+            if found, else None.
+
+        Raises:
+            RepositoryError: If the habit collection could not be found.
+        """
+        key = self._habit_collection_key(habit_collection_id)
+        habit_collection = self._get_cached(key)
+
+        if habit_collection is None:
+            habit_collection = self.repository.get_habit_collection_by_id(
+                habit_collection_id
+            )
+            if habit_collection is not None:
+                self._set_cached_habit_collection(key, habit_collection)
+
+        return habit_collection
+
+    def open_habit_collection(
+        self, habit_collection_id: ID
+    ) -> Union[HabitCollection, None]:
+        """
+        Gets a habit collection by identifier without loading its history.
+        A cached habit collection is already loaded and is returned, the
+        others are opened by the wrapped repository and are not cached.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection to open.
+
+        Returns:
+            The habit collection with the provided identifier, if found, else None.
+        """
+        habit_collection = self._get_cached(
+            self._habit_collection_key(habit_collection_id)
+        )
+        if habit_collection is not None:
+            return habit_collection
+
+        return self.repository.open_habit_collection(habit_collection_id)
+
+    def habit_collection_exists(self, habit_collection_id: ID) -> bool:
+        """
+        Checks if a habit collection exists, a cached habit collection exists
+        and the others are checked by the wrapped repository.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection to check.
+
+        Returns:
+            True if the habit collection exists, else False.
+        """
+        if self.store.get(self._habit_collection_key(habit_collection_id)) is not None:
+            return True
+
+        return self.repository.habit_collection_exists(habit_collection_id)
+
+    def add_habit_instance_to_collection(
+        self, habit_collection_id: ID, habit_instance: HabitInstance
+    ) -> None:
+        """
+        Adds a saved habit instance to a habit collection in the wrapped
+        repository, the cached value of the habit collection is removed
+        even if the habit instance could not be added.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+            habit_instance: The habit instance to add, it must have an identifier.
+
+        Raises:
+            RepositoryError: If the habit collection could not be found.
+        """
+        try:
+            self.repository.add_habit_instance_to_collection(
+                habit_collection_id, habit_instance
+            )
+        finally:
+            self.store.delete(self._habit_collection_key(habit_collection_id))
+
+    def save_habit_instance(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Saves a new habit instance in the wrapped repository, the cached
+        habit collections containing its habit are removed even if the
+        habit instance could not be saved.
+
+        Args:
+            habit_instance: The habit instance to be saved.
+
+        Returns:
+            The saved habit instance, with the identifier.
+
+        Raises:
+            HabitCreationError: If the habit instance could not be created.
+        """
+        try:
+            return self.repository.save_habit_instance(habit_instance)
+        finally:
+            self._invalidate_habit_collections_of_habits([habit_instance])
+
+    def record_check_in(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Records the habit instance of a habit on a date in the wrapped repository,
+        the cached habit collections containing the habit are removed even if
+        the habit instance could not be recorded.
+
+        Args:
+            habit_instance: The habit instance to record, its habit must be saved.
+
+        Returns:
+            The recorded habit instance, with the identifier of the habit
+            instance of the habit on this date.
+
+        Raises:
+            RepositoryError: If the habit instance could not be recorded.
+        """
+        try:
+            return self.repository.record_check_in(habit_instance)
+        finally:
+            self._invalidate_habit_collections_of_habits([habit_instance])
+
+    def save_habit_instances(
+        self, habit_instances: List[HabitInstance]
+    ) -> BulkSaveResult[HabitInstance]:
+        """
+        Saves several new habit instances in the wrapped repository at once,
+        the cached habit collections containing their habits are removed
+        even if the habit instances could not be saved.
+
+        Args:
+            habit_instances: The habit instances to be saved.
+
+        Returns:
+            The saved habit instances, with their identifier,
+            and the habit instances that failed.
+        """
+        try:
+            return self.repository.save_habit_instances(habit_instances)
+        finally:
+            self._invalidate_habit_collections_of_habits(habit_instances)
+
+    def get_habit_instance_by_id(
+        self, habit_instance_id: ID
+    ) -> Union[HabitInstance, None]:
+        """
+        Gets a habit instance by identifier from the wrapped repository.
+
+        Args:
+            habit_instance_id: The identifier of the habit instance to get.
+
+        Returns:
+            The habit instance with the provided identifier, if found, else None.
+
+        Raises:
+            RepositoryError: If the habit instance could not be found.
+        """
+        return self.repository.get_habit_instance_by_id(habit_instance_id)
+
+    def iter_habit_instances(
+        self,
+        habits_ids: Set[ID],
+        start_date: date,
+        end_date: date,
+        batch_size: int = 100,
+        after: Optional[Tuple[date, ID]] = None,
+    ) -> Iterator[HabitInstance]:
+        """
+        Iterates over the habit instances of habits between two dates, included,
+        read from the wrapped repository.
+
+        Args:
+            habits_ids: The identifiers of the habits.
+            start_date: The first date of the habit instances.
+            end_date: The last date of the habit instances.
+            batch_size: The number of habit instances fetched at once.
+            after: The date and identifier of the habit instance to continue
+            after, to iterate from the start of the date range if None.
+
+        Returns:
+            An iterator over the habit instances, sorted by date and identifier.
+        """
+        return self.repository.iter_habit_instances(
+            habits_ids, start_date, end_date, batch_size=batch_size, after=after
+        )
+
+    def get_habit_streak(self, habit_id: ID) -> Union[HabitStreak, None]:
+        """
+        Gets the streak of a habit from the wrapped repository.
+
+        Args:
+            habit_id: The identifier of the habit.
+
+        Returns:
+            The streak of the habit, None if no streak was saved for the habit.
+        """
+        return self.repository.get_habit_streak(habit_id)
+
+    def save_habit_streak(self, habit_streak: HabitStreak) -> HabitStreak:
+        """
+        Saves the streak of a habit in the wrapped repository.
+
+        Args:
+            habit_streak: The streak to save.
+
+        Returns:
+            The saved streak.
+        """
+        return self.repository.save_habit_streak(habit_streak)
+
+    def save_habit_streak_if_unchanged(
+        self,
+        habit_streak: HabitStreak,
+        previous_habit_streak: Union[HabitStreak, None],
+    ) -> bool:
+        """
+        Saves the streak of a habit in the wrapped repository only if the saved
+        streak is still the previous one.
+
+        Args:
+            habit_streak: The streak to save.
+            previous_habit_streak: The streak read before the update,
+            None if no streak was saved for the habit.
+
+        Returns:
+            True if the streak was saved, False if the saved streak changed.
+        """
+        return self.repository.save_habit_streak_if_unchanged(
+            habit_streak, previous_habit_streak
+        )
+
+    def get_completion_calendar(
+        self, habit_id: ID, year: int
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Gets the completion calendar of a habit for a year from the wrapped
+        repository.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+
+        Returns:
+            The completion calendar, None if no calendar was saved for the year.
+        """
+        return self.repository.get_completion_calendar(habit_id, year)
+
+    def save_completion_calendar(
+        self, completion_calendar: CompletionCalendar
+    ) -> CompletionCalendar:
+        """
+        Saves the completion calendar of a habit for a year in the wrapped
+        repository.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            The saved completion calendar.
+        """
+        return self.repository.save_completion_calendar(completion_calendar)
+
+    def save_completion_calendar_if_absent(
+        self, completion_calendar: CompletionCalendar
+    ) -> bool:
+        """
+        Saves the completion calendar of a habit for a year in the wrapped
+        repository only if no calendar was saved for the year.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            True if the calendar was saved, False if a calendar was already saved.
+        """
+        return self.repository.save_completion_calendar_if_absent(completion_calendar)
+
+    def record_completion(
+        self, habit_instance: HabitInstance
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Records a habit instance in the saved completion calendar of its year,
+        in the wrapped repository.
+
+        Args:
+            habit_instance: The habit instance, its habit must be saved.
+
+        Returns:
+            The updated completion calendar, None if no calendar was saved
+            for the year.
+        """
+        return self.repository.record_completion(habit_instance)
@@ -0,0 +1,17 @@
+from .in_memory_exceptions import (
+    InMemoryError,
+    InMemoryHabitCategoryExistsError,
+    InMemoryHabitCollectionExistsError,
+    InMemoryHabitCollectionNotFoundError,
+    InMemoryHabitExistsError,
+)
+from .in_memory_habit_repository import InMemoryHabitRepository
+
+__all__ = [
+    "InMemoryError",
+    "InMemoryHabitCategoryExistsError",
+    "InMemoryHabitCollectionExistsError",
+    "InMemoryHabitCollectionNotFoundError",
+    "InMemoryHabitExistsError",
+    "InMemoryHabitRepository",
+]
@@ -0,0 +1,29 @@
+class InMemoryError(Exception):
+    """
+    Base class for all exceptions raised by the in-memory repository.
+    """
+
+
+class InMemoryHabitExistsError(InMemoryError):
+    """
+    Exception raised when a habit or a habit instance already exists
+    in the repository.
+    """
+
+
+class InMemoryHabitCategoryExistsError(InMemoryError):
+    """
+    Exception raised when a habit category already exists in the repository.
+    """
+
+
+class InMemoryHabitCollectionExistsError(InMemoryError):
+    """
+    Exception raised when a habit collection already exists in the repository.
+    """
+
+
+class InMemoryHabitCollectionNotFoundError(InMemoryError):
+    """
+    Exception raised when a habit collection is not found in the repository.
+    """
@@ -0,0 +1,830 @@
+import heapq
+import os
+import pickle
+import threading
+import uuid
+from bisect import bisect_right
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, TypeVar, Union
+
+from pebble.application.repositories import (
+    BulkSaveFailure,
+    BulkSaveResult,
+    HabitRepository,
+)
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+    HabitStreak,
+)
+from pebble.domain.value_objects import ID, WeekDayMask
+
+from .in_memory_exceptions import (
+    InMemoryError,
+    InMemoryHabitCategoryExistsError,
+    InMemoryHabitCollectionExistsError,
+    InMemoryHabitCollectionNotFoundError,
+    InMemoryHabitExistsError,
+)
+
+Entity = TypeVar("Entity")
+
+# The position of a habit instance in the habit instances of its habit
+HabitInstanceKey = Tuple[date, str]
+
+
+class InMemoryHabitRepository(HabitRepository):
+    """
+    Habit repository keeping the entities in memory, indexed by hash tables.
+
+    Made for single-node deployments and for tests that need no database.
+    The entities are indexed by identifier, the habit categories by name,
+    and the habit instances by habit, sorted by date and identifier,
+    so a date range of a habit is found by bisection. There is at most one
+    habit instance per habit and per day.
+
+    The saved entities are the objects held by the repository, every lookup
+    returns the same object. All the operations are thread-safe.
+
+    The entities can be written to a snapshot file, to be restored
+    when the repository is created again with the same snapshot path.
+    The snapshot is a pickle, it must only be read from a trusted location.
+
+    Attributes:
+        snapshot_path: The file of the snapshot, if any.
+    """
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, snapshot_path: Optional[Union[str, Path]] = None) -> None:
+        """
+        Initializes an empty repository, or restores the snapshot if any.
+
+        Args:
+            snapshot_path: The file the snapshot is written to and restored from.
+            The repository starts empty if the file does not exist yet.
+        """
+        self.snapshot_path: Optional[Path] = (
+            Path(snapshot_path) if snapshot_path is not None else None
+        )
+        self._lock = threading.RLock()
+
+        self._habits: Dict[str, Habit] = {}
+        self._habit_categories: Dict[str, HabitCategory] = {}
+        self._habit_categories_by_name: Dict[str, HabitCategory] = {}
+        self._habit_collections: Dict[str, HabitCollection] = {}
+        self._habit_instances: Dict[str, HabitInstance] = {}
+        self._habit_instances_by_habit_date: Dict[Tuple[str, date], HabitInstance] = {}
+        # the habit instances of each habit and their keys, sorted by key
+        self._habit_instances_by_habit: Dict[str, List[HabitInstance]] = {}
+        self._habit_instances_keys: Dict[str, List[HabitInstanceKey]] = {}
+        self._habit_streaks: Dict[str, HabitStreak] = {}
+        self._completion_calendars: Dict[Tuple[str, int], CompletionCalendar] = {}
+
+        if self.snapshot_path is not None and self.snapshot_path.exists():
+            self._restore(self.snapshot_path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return (
+                len(self._habits)
+                + len(self._habit_categories)
+                + len(self._habit_collections)
+                + len(self._habit_instances)
+            )
+
+    @staticmethod
+    def _new_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def _habit_instance_key(habit_instance: HabitInstance) -> HabitInstanceKey:
+        return habit_instance.date, str(habit_instance.id)
+
+    def _assign_id(self, entity: object, entities: Dict[str, object]) -> str:
+        """
+        Assigns a new identifier to an entity without one.
+
+        Raises:
+            KeyError: If the identifier of the entity is already taken.
+        """
+        if entity.id is None:
+            entity.id = self._new_id()
+        elif str(entity.id) in entities:
+            raise KeyError(entity.id)
+
+        return str(entity.id)
+
+    def save_habit(self, habit: Habit) -> Habit:
+        """
+        Saves a new habit in the repository.
+
+        Args:
+            habit: The habit to be saved.
+
+        Returns:
+            The saved habit, with the identifier.
+
+        Raises:
+            InMemoryHabitExistsError: If the habit already exists.
+        """
+        with self._lock:
+            try:
+                habit_id = self._assign_id(habit, self._habits)
+            except KeyError:
+                raise InMemoryHabitExistsError(
+                    f"Habit with ID {habit.id} already exists."
+                )
+
+            self._habits[habit_id] = habit
+
+        return habit
+
+    def save_habits(self, habits: List[Habit]) -> BulkSaveResult[Habit]:
+        """
+        Saves several new habits in the repository at once.
+
+        Args:
+            habits: The habits to be saved.
+
+        Returns:
+            The saved habits, with their identifier, and the habits that failed.
+        """
+        return self._save_all(self.save_habit, habits)
+
+    def get_habit_by_id(self, habit_id: ID) -> Union[Habit, None]:
+        """
+        Gets a habit by its identifier.
+
+        Args:
+            habit_id: The identifier of the habit.
+
+        Returns:
+            The habit, or None if it does not exist.
+        """
+        with self._lock:
+            return self._habits.get(str(habit_id))
+
+    def get_habits_by_ids(self, habits_ids: Set[ID]) -> Set[Habit]:
+        """
+        Gets several habits by their identifiers.
+
+        Args:
+            habits_ids: The identifiers of the habits.
+
+        Returns:
+            The habits found, the identifiers that do not exist are ignored.
+        """
+        with self._lock:
+            return {
+                self._habits[str(habit_id)]
+                for habit_id in habits_ids
+                if str(habit_id) in self._habits
+            }
+
+    def get_habits_by_weekdays(self, weekdays: WeekDayMask) -> Set[Habit]:
+        """
+        Gets the habits recurring on any of some days of the week.
+
+        Args:
+            weekdays: The mask of the days of the week.
+
+        Returns:
+            The habits recurring on at least one of the days.
+        """
+        with self._lock:
+            return {
+                habit
+                for habit in self._habits.values()
+                if (habit.recurrence.days_mask or 0) & weekdays
+            }
+
+    def save_habit_category(self, habit_category: HabitCategory) -> HabitCategory:
+        """
+        Saves a new habit category in the repository.
+
+        Args:
+            habit_category: The habit category to be saved.
+
+        Returns:
+            The saved habit category, with the identifier.
+
+        Raises:
+            InMemoryHabitCategoryExistsError: If the habit category already exists,
+            or if another habit category has the same name.
+        """
+        with self._lock:
+            if habit_category.name in self._habit_categories_by_name:
+                raise InMemoryHabitCategoryExistsError(
+                    f"Habit category with name {habit_category.name} already exists."
+                )
+
+            try:
+                habit_category_id = self._assign_id(
+                    habit_category, self._habit_categories
+                )
+            except KeyError:
+                raise InMemoryHabitCategoryExistsError(
+                    f"Habit category with ID {habit_category.id} already exists."
+                )
+
+            self._habit_categories[habit_category_id] = habit_category
+            self._habit_categories_by_name[habit_category.name] = habit_category
+
+        return habit_category
+
+    def save_habit_categories(
+        self, habit_categories: List[HabitCategory]
+    ) -> BulkSaveResult[HabitCategory]:
+        """
+        Saves several new habit categories in the repository at once.
+
+        Args:
+            habit_categories: The habit categories to be saved.
+
+        Returns:
+            The saved habit categories, with their identifier,
+            and the habit categories that failed.
+        """
+        return self._save_all(self.save_habit_category, habit_categories)
+
+    def get_habit_category_by_name(
+        self, category_name: str
+    ) -> Union[HabitCategory, None]:
+        """
+        Gets a habit category by its name.
+
+        Args:
+            category_name: The name of the habit category.
+
+        Returns:
+            The habit category, or None if it does not exist.
+        """
+        with self._lock:
+            return self._habit_categories_by_name.get(category_name)
+
+    def save_habit_collection(
+        self, habit_collection: HabitCollection
+    ) -> HabitCollection:
+        """
+        Saves a new habit collection in the repository.
+
+        Args:
+            habit_collection: The habit collection to be saved.
+
+        Returns:
+            The saved habit collection, with the identifier.
+
+        Raises:
+            InMemoryHabitCollectionExistsError: If the habit collection
+            already exists.
+        """
+        with self._lock:
+            try:
+                habit_collection_id = self._assign_id(
+                    habit_collection, self._habit_collections
+                )
+            except KeyError:
+                raise InMemoryHabitCollectionExistsError(
+                    f"Habit collection with ID {habit_collection.id} already exists."
+                )
+
+            self._habit_collections[habit_collection_id] = habit_collection
+
+        return habit_collection
+
+    def update_habit_collection(
+        self, habit_collection: HabitCollection
+    ) -> HabitCollection:
+        """
+        Updates an existing habit collection in the repository.
+
+        Args:
+            habit_collection: The habit collection to be updated.
+
+        Returns:
+            The updated habit collection.
+
+        Raises:
+            ValueError: If the habit collection does not have an ID.
+            InMemoryHabitCollectionNotFoundError: If the habit collection
+            does not exist.
+        """
+        if not habit_collection.id:
+            raise ValueError("Habit collection must have an ID to be updated.")
+
+        with self._lock:
+            if str(habit_collection.id) not in self._habit_collections:
+                raise InMemoryHabitCollectionNotFoundError(
+                    f"Habit collection with ID {habit_collection.id} does not exist."
+                )
+
+            self._habit_collections[str(habit_collection.id)] = habit_collection
+
+        return habit_collection
+
+    def get_habit_collection_by_id(
+        self, habit_collection_id: ID
+    ) -> Union[HabitCollection, None]:
+        """
+        Gets a habit collection by its identifier.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+
+        Returns:
+            The habit collection, or None if it does not exist.
+        """
+        with self._lock:
+            return self._habit_collections.get(str(habit_collection_id))
+
+    def open_habit_collection(
+        self, habit_collection_id: ID
+    ) -> Union[HabitCollection, None]:
+        """
+        Gets a habit collection by its identifier, the habit collections
+        are already in memory.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+
+        Returns:
+            The habit collection, or None if it does not exist.
+        """
+        return self.get_habit_collection_by_id(habit_collection_id)
+
+    def habit_collection_exists(self, habit_collection_id: ID) -> bool:
+        """
+        Checks if a habit collection exists.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+
+        Returns:
+            True if the habit collection exists, else False.
+        """
+        with self._lock:
+            return str(habit_collection_id) in self._habit_collections
+
+    def add_habit_instance_to_collection(
+        self, habit_collection_id: ID, habit_instance: HabitInstance
+    ) -> None:
+        """
+        Adds a saved habit instance to a habit collection.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+            habit_instance: The habit instance to add, it must have an identifier.
+
+        Raises:
+            ValueError: If the habit instance does not have an ID.
+            InMemoryHabitCollectionNotFoundError: If the habit collection
+            does not exist.
+        """
+        if habit_instance.id is None:
+            raise ValueError(
+                "Habit instance must have an ID to be added to a habit collection."
+            )
+
+        with self._lock:
+            habit_collection = self._habit_collections.get(str(habit_collection_id))
+            if habit_collection is None:
+                raise InMemoryHabitCollectionNotFoundError(
+                    f"Habit collection with ID {habit_collection_id} does not exist."
+                )
+
+            habit_collection.habits_instance.add(
+                self._habit_instances.get(str(habit_instance.id), habit_instance)
+            )
+
+    def _insert_habit_instance(self, habit_instance: HabitInstance) -> None:
+        """
+        Adds a habit instance with an identifier to the indexes.
+        """
+        habit_id = str(habit_instance.habit.id)
+        key = self._habit_instance_key(habit_instance)
+        keys = self._habit_instances_keys.setdefault(habit_id, [])
+        position = bisect_right(keys, key)
+
+        keys.insert(position, key)
+        self._habit_instances_by_habit.setdefault(habit_id, []).insert(
+            position, habit_instance
+        )
+        self._habit_instances[str(habit_instance.id)] = habit_instance
+        self._habit_instances_by_habit_date[(habit_id, habit_instance.date)] = (
+            habit_instance
+        )
+
+    def save_habit_instance(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Saves a new habit instance in the repository.
+
+        Args:
+            habit_instance: The habit instance to be saved, its habit must be saved.
+
+        Returns:
+            The saved habit instance, with the identifier.
+
+        Raises:
+            ValueError: If the habit of the habit instance does not have an ID.
+            InMemoryHabitExistsError: If the habit instance already exists, or if
+            the habit already has a habit instance on the same date.
+        """
+        if habit_instance.habit.id is None:
+            raise ValueError("Habit must have an ID to save its habit instances.")
+
+        with self._lock:
+            if (
+                str(habit_instance.habit.id),
+                habit_instance.date,
+            ) in self._habit_instances_by_habit_date:
+                raise InMemoryHabitExistsError(
+                    f"Habit instance of habit {habit_instance.habit.id} on "
+                    f"{habit_instance.date.isoformat()} already exists."
+                )
+
+            try:
+                self._assign_id(habit_instance, self._habit_instances)
+            except KeyError:
+                raise InMemoryHabitExistsError(
+                    f"Habit instance with ID {habit_instance.id} already exists."
+                )
+
+            self._insert_habit_instance(habit_instance)
+
+        return habit_instance
+
+    def record_check_in(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Records the habit instance of a habit on a date, the check-in.
+
+        The completion and the note of the habit instance already saved
+        for the habit and the date are replaced, else the habit instance
+        is saved.
+
+        Args:
+            habit_instance: The habit instance to record, its habit must be saved.
+
+        Returns:
+            The recorded habit instance, the habit instance already saved
+            for the habit and the date if any.
+
+        Raises:
+            ValueError: If the habit of the habit instance does not have an ID.
+        """
+        if habit_instance.habit.id is None:
+            raise ValueError("Habit must have an ID to record a check-in.")
+
+        with self._lock:
+            recorded_habit_instance = self._habit_instances_by_habit_date.get(
+                (str(habit_instance.habit.id), habit_instance.date)
+            )
+            if recorded_habit_instance is None:
+                return self.save_habit_instance(habit_instance)
+
+            recorded_habit_instance.completed = habit_instance.completed
+            recorded_habit_instance.note = habit_instance.note
+
+        return recorded_habit_instance
+
+    def save_habit_instances(
+        self, habit_instances: List[HabitInstance]
+    ) -> BulkSaveResult[HabitInstance]:
+        """
+        Saves several new habit instances in the repository at once.
+
+        Args:
+            habit_instances: The habit instances to be saved.
+
+        Returns:
+            The saved habit instances, with their identifier,
+            and the habit instances that failed.
+        """
+        return self._save_all(self.save_habit_instance, habit_instances)
+
+    def get_habit_instance_by_id(
+        self, habit_instance_id: ID
+    ) -> Union[HabitInstance, None]:
+        """
+        Gets a habit instance by its identifier.
+
+        Args:
+            habit_instance_id: The identifier of the habit instance.
+
+        Returns:
+            The habit instance, or None if it does not exist.
+        """
+        with self._lock:
+            return self._habit_instances.get(str(habit_instance_id))
+
+    def iter_habit_instances(
+        self,
+        habits_ids: Set[ID],
+        start_date: date,
+        end_date: date,
+        batch_size: int = 100,
+        after: Optional[Tuple[date, ID]] = None,
+    ) -> Iterator[HabitInstance]:
+        """
+        Iterates over the habit instances of habits between two dates, included.
+
+        The date range of each habit is found by bisection and copied under
+        the lock, by batches, then the habits are merged by date and identifier.
+
+        Args:
+            habits_ids: The identifiers of the habits.
+            start_date: The first date of the habit instances.
+            end_date: The last date of the habit instances.
+            batch_size: The number of habit instances copied at once, per habit.
+            after: The date and identifier of the habit instance to continue
+            after, to iterate from the start of the date range if None.
+
+        Returns:
+            An iterator over the habit instances, sorted by date and identifier.
+
+        Raises:
+            ValueError: If the batch size is not greater than 0.
+        """
+        if batch_size <= 0:
+            raise ValueError("The batch size must be greater than 0.")
+
+        start_key = (start_date, "")
+        after_key = (after[0], str(after[1])) if after else None
+
+        yield from heapq.merge(
+            *(
+                self._iter_habit_instances_of_habit(
+                    str(habit_id), start_key, after_key, end_date, batch_size
+                )
+                for habit_id in habits_ids
+            ),
+            key=self._habit_instance_key,
+        )
+
+    def _iter_habit_instances_of_habit(
+        self,
+        habit_id: str,
+        start_key: HabitInstanceKey,
+        after_key: Optional[HabitInstanceKey],
+        end_date: date,
+        batch_size: int,
+    ) -> Iterator[HabitInstance]:
+        # the start key is before every habit instance of the start date
+        position_key = max(start_key, after_key) if after_key else start_key
+
+        while True:
+            with self._lock:
+                keys = self._habit_instances_keys.get(habit_id, [])
+                position = bisect_right(keys, position_key)
+                batch = [
+                    habit_instance
+                    for habit_instance in self._habit_instances_by_habit.get(
+                        habit_id, []
+                    )[position : position + batch_size]
+                    if habit_instance.date <= end_date
+                ]
+
+            yield from batch
+
+            if len(batch) < batch_size:
+                return
+
+            # the next batch starts after the last habit instance of this one
+            position_key = self._habit_instance_key(batch[-1])
+
+    def get_habit_instances(
+        self, habit_id: ID, start_date: date, end_date: date
+    ) -> List[HabitInstance]:
+        """
+        Gets the habit instances of a habit between two dates, included.
+
+        Args:
+            habit_id: The identifier of the habit.
+            start_date: The first date of the habit instances to get.
+            end_date: The last date of the habit instances to get.
+
+        Returns:
+            The habit instances of the habit in the date range, sorted by date.
+        """
+        return list(self.iter_habit_instances({habit_id}, start_date, end_date))
+
+    def get_habit_streak(self, habit_id: ID) -> Union[HabitStreak, None]:
+        """
+        Gets the streak of a habit.
+
+        Args:
+            habit_id: The identifier of the habit.
+
+        Returns:
+            The streak of the habit, None if no streak was saved for the habit.
+        """
+        with self._lock:
+            return self._habit_streaks.get(str(habit_id))
+
+    def save_habit_streak(self, habit_streak: HabitStreak) -> HabitStreak:
+        """
+        Saves the streak of a habit, replacing the saved one.
+
+        Args:
+            habit_streak: The streak to save.
+
+        Returns:
+            The saved streak.
+        """
+        with self._lock:
+            self._habit_streaks[str(habit_streak.habit_id)] = habit_streak
+
+        return habit_streak
+
+    def save_habit_streak_if_unchanged(
+        self,
+        habit_streak: HabitStreak,
+        previous_habit_streak: Union[HabitStreak, None],
+    ) -> bool:
+        """
+        Saves the streak of a habit only if the saved streak is still
+        the previous one, compared and replaced under the lock.
+
+        Args:
+            habit_streak: The streak to save.
+            previous_habit_streak: The streak read before the update,
+            None if no streak was saved for the habit.
+
+        Returns:
+            True if the streak was saved, False if the saved streak changed.
+        """
+        with self._lock:
+            if self._habit_streaks.get(str(habit_streak.habit_id)) != (
+                previous_habit_streak
+            ):
+                return False
+
+            self._habit_streaks[str(habit_streak.habit_id)] = habit_streak
+
+        return True
+
+    def get_completion_calendar(
+        self, habit_id: ID, year: int
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Gets the completion calendar of a habit for a year.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+
+        Returns:
+            The completion calendar, None if no calendar was saved for the year.
+        """
+        with self._lock:
+            return self._completion_calendars.get((str(habit_id), year))
+
+    def save_completion_calendar(
+        self, completion_calendar: CompletionCalendar
+    ) -> CompletionCalendar:
+        """
+        Saves the completion calendar of a habit for a year,
+        replacing the saved one.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            The saved completion calendar.
+        """
+        with self._lock:
+            self._completion_calendars[
+                (str(completion_calendar.habit_id), completion_calendar.year)
+            ] = completion_calendar
+
+        return completion_calendar
+
+    def save_completion_calendar_if_absent(
+        self, completion_calendar: CompletionCalendar
+    ) -> bool:
+        """
+        Saves the completion calendar of a habit for a year only if no calendar
+        was saved for the year, checked and saved under the lock.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            True if the calendar was saved, False if a calendar was already saved.
+        """
+        with self._lock:
+            return (
+                self._completion_calendars.setdefault(
+                    (str(completion_calendar.habit_id), completion_calendar.year),
+                    completion_calendar,
+                )
+                is completion_calendar
+            )
+
+    def record_completion(
+        self, habit_instance: HabitInstance
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Records the completion and the note of a habit instance in the saved
+        completion calendar of its year, under the lock of the repository.
+
+        Args:
+            habit_instance: The habit instance, its habit must be saved.
+
+        Returns:
+            The updated completion calendar, None if no calendar was saved
+            for the year.
+        """
+        with self._lock:
+            completion_calendar = self._completion_calendars.get(
+                (str(habit_instance.habit.id), habit_instance.date.year)
+            )
+            if completion_calendar is not None:
+                completion_calendar.record(habit_instance)
+
+        return completion_calendar
+
+    @staticmethod
+    def _save_all(
+        save: Callable[[Entity], Entity], entities: List[Entity]
+    ) -> BulkSaveResult[Entity]:
+        result = BulkSaveResult()
+
+        for entity in entities:
+            try:
+                result.saved.append(save(entity))
+            except (InMemoryError, ValueError) as error:
+                result.failed.append(BulkSaveFailure(entity=entity, error=str(error)))
+
+        return result
+
+    def snapshot(self) -> None:
+        """
+        Writes all the entities to the snapshot file.
+
+        The snapshot is written to a temporary file first, then moved
+        over the previous snapshot, a snapshot is never partially written.
+
+        Raises:
+            ValueError: If the repository does not have a snapshot path.
+        """
+        if self.snapshot_path is None:
+            raise ValueError("The repository does not have a snapshot path.")
+
+        temporary_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.tmp")
+
+        with self._lock:
+            with temporary_path.open("wb") as snapshot_file:
+                pickle.dump(
+                    {
+                        "version": self.SNAPSHOT_VERSION,
+                        "habits": self._habits,
+                        "habit_categories": self._habit_categories,
+                        "habit_collections": self._habit_collections,
+                        "habit_instances": self._habit_instances,
+                        "habit_streaks": self._habit_streaks,
+                        "completion_calendars": self._completion_calendars,
+                    },
+                    snapshot_file,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+
+        os.replace(temporary_path, self.snapshot_path)
+
+    def _restore(self, snapshot_path: Path) -> None:
+        """
+        Restores the entities of a snapshot file and rebuilds the indexes.
+
+        Raises:
+            InMemoryError: If the snapshot was written by another version.
+        """
+        with snapshot_path.open("rb") as snapshot_file:
+            snapshot = pickle.load(snapshot_file)
+
+        if snapshot.get("version") != self.SNAPSHOT_VERSION:
+            raise InMemoryError(
+                f"Unsupported snapshot version {snapshot.get('version')} "
+                f"in {snapshot_path}."
+            )
+
+        with self._lock:
+            self._habits = snapshot["habits"]
+            self._habit_categories = snapshot["habit_categories"]
+            self._habit_categories_by_name = {
+                habit_category.name: habit_category
+                for habit_category in self._habit_categories.values()
+            }
+            self._habit_collections = snapshot["habit_collections"]
+            # the snapshots written before the streaks and the completion
+            # calendars were kept have none
+            self._habit_streaks = snapshot.get("habit_streaks", {})
+            self._completion_calendars = snapshot.get("completion_calendars", {})
+
+            for habit_instance in sorted(
+                snapshot["habit_instances"].values(), key=self._habit_instance_key
+            ):
+                self._insert_habit_instance(habit_instance)
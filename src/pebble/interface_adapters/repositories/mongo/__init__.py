@@ -1,3 +1,9 @@
+from .async_mongo_habit_repository import AsyncMongoHabitRepository
+from .bucketed_mongo_habit_repository import BucketedMongoHabitRepository
+from .mongo_deduplication_report import (
+    MongoDeduplicationReport,
+    MongoDuplicatedHabitInstances,
+)
 from .mongo_exceptions import (
     MongoError,
     MongoHabitCategoryExistsError,
@@ -7,8 +13,13 @@ from .mongo_exceptions import (
     MongoHabitNotFoundError,
 )
 from .mongo_habit_repository import MongoHabitRepository
+from .mongo_index_report import MongoIndexReport
 
 __all__ = [
+    "AsyncMongoHabitRepository",
+    "BucketedMongoHabitRepository",
+    "MongoDeduplicationReport",
+    "MongoDuplicatedHabitInstances",
     "MongoError",
     "MongoHabitExistsError",
     "MongoHabitRepository",
@@ -17,4 +28,5 @@ __all__ = [
     "MongoHabitCollectionExistsError",
     "MongoHabitCollectionNotFoundError",
     "MongoHabitRepository",
+    "MongoIndexReport",
 ]
@@ -0,0 +1,714 @@
+from datetime import date
+from typing import ClassVar, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import BulkWriteError
+
+from pebble.application.repositories import (
+    BulkSaveFailure,
+    BulkSaveResult,
+    IdentityMap,
+)
+from pebble.application.serializers import (
+    CompletionCalendarKVSerializer,
+    HabitCategoryKVSerializer,
+    HabitCollectionsKVSerializer,
+    HabitInstanceKVSerializer,
+    HabitKVSerializer,
+    HabitStreakKVSerializer,
+)
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Habit,
+    HabitCategory,
+    HabitInstance,
+)
+from pebble.domain.value_objects import ID, WeekDayMask
+from pebble.interface_adapters.caches import CacheStats, CacheStore, LRUCache
+
+from .mongo_deduplication_report import MongoDuplicatedHabitInstances
+
+
+class BaseMongoHabitRepository:
+    """
+    The part of the MongoDB habit repositories that does not access the database.
+
+    It holds the layout of the database, the identity map and the habit
+    categories cache, and builds the entities from the stored documents.
+    The synchronous and asynchronous repositories only add the queries.
+    """
+
+    DATABASE_NAME = "pebble"
+    HABITS_COLLECTION_NAME = "habits"
+    HABIT_CATEGORIES_COLLECTION_NAME = "habit_categories"
+    HABIT_COLLECTIONS_COLLECTION_NAME = "habit_collections"
+    HABIT_INSTANCE_COLLECTION_NAME = "habit_instances"
+    HABIT_STREAKS_COLLECTION_NAME = "habit_streaks"
+    COMPLETION_CALENDARS_COLLECTION_NAME = "completion_calendars"
+    CATEGORY_CACHE_MAX_SIZE = 256
+    CATEGORY_CACHE_TTL_SECONDS = 300
+    HABIT_INSTANCES_UNIQUE_INDEX_NAME = "habit_id_date_unique"
+    HABIT_INSTANCES_SORT = [
+        (HabitInstanceKVSerializer.DataKeys.DATE, ASCENDING),
+        (HabitInstanceKVSerializer.DataKeys.ID, ASCENDING),
+    ]
+    # The order of the habit_id_date_unique index, the habit instances of
+    # a collection are read from the index already sorted for its timeline
+    HABIT_INSTANCES_TIMELINE_SORT = [
+        (HabitInstanceKVSerializer.DataKeys.HABIT_ID, ASCENDING),
+        (HabitInstanceKVSerializer.DataKeys.DATE, ASCENDING),
+    ]
+    # The indexes needed by the queries of the repository, by collection name,
+    # lookups by _id use the index MongoDB creates on every collection
+    INDEXES: ClassVar[Dict[str, List[IndexModel]]] = {
+        HABITS_COLLECTION_NAME: [
+            IndexModel(
+                [(HabitKVSerializer.DataKeys.RECURRENCE_DAYS, ASCENDING)],
+                name="recurrence_days",
+            ),
+        ],
+        HABIT_COLLECTIONS_COLLECTION_NAME: [],
+        HABIT_STREAKS_COLLECTION_NAME: [],
+        COMPLETION_CALENDARS_COLLECTION_NAME: [],
+        HABIT_CATEGORIES_COLLECTION_NAME: [
+            IndexModel(
+                [(HabitCategoryKVSerializer.DataKeys.NAME, ASCENDING)],
+                name="name_unique",
+                unique=True,
+            ),
+        ],
+        HABIT_INSTANCE_COLLECTION_NAME: [
+            IndexModel(
+                [
+                    (HabitInstanceKVSerializer.DataKeys.HABIT_ID, ASCENDING),
+                    (HabitInstanceKVSerializer.DataKeys.DATE, ASCENDING),
+                ],
+                # a habit has at most one habit instance per day
+                name=HABIT_INSTANCES_UNIQUE_INDEX_NAME,
+                unique=True,
+            ),
+        ],
+    }
+
+    def __init__(
+        self,
+        mongo_client: object,
+        identity_map: Optional[IdentityMap] = None,
+        category_cache: Optional[CacheStore] = None,
+    ) -> None:
+        """
+        Initializes the repository with the MongoDB client.
+
+        Args:
+            mongo_client: The client used to access the MongoDB database.
+            identity_map: An optional identity map shared for the duration of
+            a request or session. When provided, each stored entity is loaded
+            at most once and the same object is returned for every lookup.
+            category_cache: The cache of the habit categories data, it can be
+            shared by the repositories of several requests. A new cache is
+            created if none is provided.
+        """
+        self.mongo_client = mongo_client
+        self.identity_map: Union[IdentityMap, None] = identity_map
+        self.category_cache: CacheStore = (
+            category_cache
+            if category_cache is not None
+            else LRUCache(
+                max_size=self.CATEGORY_CACHE_MAX_SIZE,
+                ttl_seconds=self.CATEGORY_CACHE_TTL_SECONDS,
+            )
+        )
+        self.db = mongo_client[self.DATABASE_NAME]
+        self.habits_collection = self.db[self.HABITS_COLLECTION_NAME]
+        self.habit_category_collection = self.db[self.HABIT_CATEGORIES_COLLECTION_NAME]
+        self.habit_collections_collection = self.db[
+            self.HABIT_COLLECTIONS_COLLECTION_NAME
+        ]
+        self.habit_instances_collection = self.db[self.HABIT_INSTANCE_COLLECTION_NAME]
+        self.habit_streaks_collection = self.db[self.HABIT_STREAKS_COLLECTION_NAME]
+        self.completion_calendars_collection = self.db[
+            self.COMPLETION_CALENDARS_COLLECTION_NAME
+        ]
+
+    @staticmethod
+    def _habit_streak_query(habit_id: ID) -> dict:
+        return {HabitStreakKVSerializer.DataKeys.HABIT_ID: str(habit_id)}
+
+    @staticmethod
+    def _completion_calendar_query(habit_id: ID, year: int) -> dict:
+        return {
+            CompletionCalendarKVSerializer.DataKeys.ID: (
+                CompletionCalendarKVSerializer.calendar_id(habit_id, year)
+            )
+        }
+
+    @staticmethod
+    def _completion_calendar_update(
+        completion_calendar: CompletionCalendar,
+    ) -> Tuple[dict, dict]:
+        """
+        Builds the filter and the update writing a completion calendar,
+        every write increments the version of the calendar.
+        """
+        keys = CompletionCalendarKVSerializer.DataKeys
+        completion_calendar_data = CompletionCalendarKVSerializer.to_dict(
+            completion_calendar
+        )
+
+        return (
+            {keys.ID: completion_calendar_data.pop(keys.ID)},
+            {"$set": completion_calendar_data, "$inc": {keys.VERSION: 1}},
+        )
+
+    @staticmethod
+    def _completion_calendar_version_update(
+        completion_calendar: CompletionCalendar, completion_calendar_data: dict
+    ) -> Tuple[dict, dict]:
+        """
+        Builds the filter and the update writing a completion calendar only if
+        it was not written since its data was read, matched on its version.
+        """
+        keys = CompletionCalendarKVSerializer.DataKeys
+        query, update = BaseMongoHabitRepository._completion_calendar_update(
+            completion_calendar
+        )
+        # the calendars saved before the versions match a null version
+        query[keys.VERSION] = completion_calendar_data.get(keys.VERSION)
+
+        return query, update
+
+    @property
+    def category_cache_stats(self) -> CacheStats:
+        """
+        Returns the hit and miss counters of the habit categories cache.
+        """
+        return self.category_cache.stats()
+
+    def _get_from_identity_map(
+        self, entity_type: type, entity_id: ID
+    ) -> Union[object, None]:
+        if self.identity_map is None:
+            return None
+        return self.identity_map.get(entity_type, entity_id)
+
+    def _add_to_identity_map(self, entity: object) -> object:
+        # the entity already held by the identity map wins over the new copy
+        if self.identity_map is None:
+            return entity
+        return self.identity_map.add(entity)
+
+    @staticmethod
+    def _compare_indexes(
+        indexes: List[IndexModel], existing_names: Set[str]
+    ) -> Tuple[List[IndexModel], List[str]]:
+        """
+        Compares the declared indexes of a collection to its existing indexes.
+
+        Args:
+            indexes: The indexes declared for the collection.
+            existing_names: The names of the indexes found in the database.
+
+        Returns:
+            The declared indexes that are missing,
+            and the names of the existing indexes that are not declared.
+        """
+        declared_names = {index.document["name"] for index in indexes}
+
+        missing_indexes = [
+            index for index in indexes if index.document["name"] not in existing_names
+        ]
+
+        # The index on _id exists on every collection
+        extra_names = sorted(existing_names - declared_names - {"_id_"})
+
+        return missing_indexes, extra_names
+
+    def _cache_habit_category(self, habit_category_data: dict) -> None:
+        # the category is cached by identifier and by name,
+        # the two lookups used by the repository
+        habit_category_id = str(
+            habit_category_data[HabitCategoryKVSerializer.DataKeys.ID]
+        )
+        habit_category_name = habit_category_data[
+            HabitCategoryKVSerializer.DataKeys.NAME
+        ]
+        self.category_cache.set(("id", habit_category_id), habit_category_data)
+        self.category_cache.set(("name", habit_category_name), habit_category_data)
+
+    def _habit_category_from_dict(self, habit_category_data: dict) -> HabitCategory:
+        return self._add_to_identity_map(
+            HabitCategoryKVSerializer.from_dict(habit_category_data)
+        )
+
+    def _get_loaded_habit_category(
+        self, habit_category_id: ID
+    ) -> Union[HabitCategory, None]:
+        """
+        Gets a habit category from the identity map or from the cache,
+        without querying the database.
+        """
+        habit_category = self._get_from_identity_map(HabitCategory, habit_category_id)
+        if habit_category:
+            return habit_category
+
+        habit_category_data = self.category_cache.get(("id", str(habit_category_id)))
+        if habit_category_data is None:
+            return None
+
+        return self._habit_category_from_dict(habit_category_data)
+
+    def _get_loaded_habit_categories(
+        self, habit_categories_ids: Iterable[ID]
+    ) -> Tuple[Dict[ID, HabitCategory], List[ID]]:
+        """
+        Gets the habit categories from the identity map or from the cache,
+        without querying the database.
+
+        Returns:
+            The habit categories found, indexed by identifier,
+            and the identifiers of the habit categories left to fetch.
+        """
+        habit_categories: Dict[ID, HabitCategory] = {}
+        missing_habit_categories_ids: List[ID] = []
+
+        for habit_category_id in habit_categories_ids:
+            habit_category = self._get_loaded_habit_category(habit_category_id)
+            if habit_category:
+                habit_categories[habit_category.id] = habit_category
+            else:
+                missing_habit_categories_ids.append(habit_category_id)
+
+        return habit_categories, missing_habit_categories_ids
+
+    def _get_loaded_habits(
+        self, habits_ids: Iterable[ID]
+    ) -> Tuple[Dict[ID, Habit], List[ID]]:
+        """
+        Gets the habits from the identity map, without querying the database.
+
+        Returns:
+            The habits found, indexed by identifier,
+            and the identifiers of the habits left to fetch.
+        """
+        habits: Dict[ID, Habit] = {}
+        missing_habits_ids: List[ID] = []
+
+        for habit_id in habits_ids:
+            habit = self._get_from_identity_map(Habit, habit_id)
+            if habit:
+                habits[habit.id] = habit
+            else:
+                missing_habits_ids.append(habit_id)
+
+        return habits, missing_habits_ids
+
+    @staticmethod
+    def _habit_categories_ids(habits_data: Iterable[dict]) -> Set[ID]:
+        return {
+            str(habit_data[HabitKVSerializer.DataKeys.CATEGORY_ID])
+            for habit_data in habits_data
+            if habit_data[HabitKVSerializer.DataKeys.CATEGORY_ID]
+        }
+
+    @staticmethod
+    def _ids_query(ids: Iterable[ID]) -> dict:
+        return {"_id": {"$in": [ObjectId(entity_id) for entity_id in ids]}}
+
+    def _build_habit(
+        self, habit_data: dict, habit_category: Union[HabitCategory, None]
+    ) -> Habit:
+        """
+        Builds a habit from its data and its already loaded category.
+        """
+        return self._add_to_identity_map(
+            HabitKVSerializer.from_dict(habit_data, habit_category)
+        )
+
+    def _habit_instance_from_dict(
+        self, habit_instance_data: dict, habits: Dict[ID, Habit]
+    ) -> HabitInstance:
+        """
+        Converts the habit instance data to a HabitInstance object,
+        linked to its habit already in memory.
+        """
+        return self._get_from_identity_map(
+            HabitInstance,
+            habit_instance_data[HabitInstanceKVSerializer.DataKeys.ID],
+        ) or self._add_to_identity_map(
+            HabitInstanceKVSerializer.from_dict(
+                habit_instance_data,
+                habits[
+                    habit_instance_data[HabitInstanceKVSerializer.DataKeys.HABIT_ID]
+                ],
+            )
+        )
+
+    def _habit_instances_from_dicts(
+        self, habit_instances_data: Iterable[dict], habits: Dict[ID, Habit]
+    ) -> List[HabitInstance]:
+        """
+        Converts the habit instances data to HabitInstance objects,
+        linked to the habits already in memory, in the order of the data.
+        """
+        return [
+            self._habit_instance_from_dict(habit_instance_data, habits)
+            for habit_instance_data in habit_instances_data
+        ]
+
+    @staticmethod
+    def _habit_instances_range_query(
+        habits_ids: Iterable[ID],
+        start_date: date,
+        end_date: date,
+        after: Optional[Tuple[date, ID]] = None,
+    ) -> dict:
+        """
+        Builds the query of the habit instances of habits in a date range,
+        after the provided date and identifier if any.
+        """
+        keys = HabitInstanceKVSerializer.DataKeys
+        to_value = HabitInstanceKVSerializer.date_to_value
+        query = {
+            keys.HABIT_ID: {"$in": [str(habit_id) for habit_id in habits_ids]},
+            keys.DATE: {"$gte": to_value(start_date), "$lte": to_value(end_date)},
+        }
+
+        if after:
+            # keyset pagination, the position does not depend on an offset
+            after_date, after_id = after
+            query["$or"] = [
+                {keys.DATE: {"$gt": to_value(after_date)}},
+                {
+                    keys.DATE: to_value(after_date),
+                    keys.ID: {"$gt": ObjectId(after_id)},
+                },
+            ]
+
+        return query
+
+    @staticmethod
+    def _check_in_query(habit_instance: HabitInstance) -> Tuple[dict, dict]:
+        """
+        Builds the filter and the update of the upsert recording a check-in,
+        the habit instance is matched by its habit and its date.
+
+        Raises:
+            ValueError: If the habit of the habit instance does not have an ID.
+        """
+        if habit_instance.habit.id is None:
+            raise ValueError("Habit must have an ID to record a check-in.")
+
+        keys = HabitInstanceKVSerializer.DataKeys
+        habit_instance_data = HabitInstanceKVSerializer.to_dict(habit_instance)
+
+        return (
+            {
+                keys.HABIT_ID: habit_instance_data[keys.HABIT_ID],
+                keys.DATE: habit_instance_data[keys.DATE],
+            },
+            {
+                "$set": {
+                    keys.COMPLETED: habit_instance_data[keys.COMPLETED],
+                    keys.NOTE: habit_instance_data[keys.NOTE],
+                }
+            },
+        )
+
+    def _add_check_in_to_identity_map(
+        self, habit_instance: HabitInstance
+    ) -> HabitInstance:
+        """
+        Adds a recorded check-in to the identity map,
+        the habit instance already loaded for it is updated instead.
+        """
+        loaded_habit_instance = self._get_from_identity_map(
+            HabitInstance, habit_instance.id
+        )
+        if loaded_habit_instance is None:
+            return self._add_to_identity_map(habit_instance)
+
+        loaded_habit_instance.completed = habit_instance.completed
+        loaded_habit_instance.note = habit_instance.note
+
+        return loaded_habit_instance
+
+    @staticmethod
+    def _legacy_dates_query() -> dict:
+        """
+        Builds the query of the habit instances whose date is an ISO string.
+        """
+        return {HabitInstanceKVSerializer.DataKeys.DATE: {"$type": "string"}}
+
+    @staticmethod
+    def _duplicate_habit_instances_pipeline() -> List[dict]:
+        """
+        Builds the aggregation grouping the identifier, completion and note
+        of the habit instances sharing a habit and a date, for the groups
+        of more than one.
+        """
+        keys = HabitInstanceKVSerializer.DataKeys
+        return [
+            {
+                "$group": {
+                    "_id": {
+                        keys.HABIT_ID: f"${keys.HABIT_ID}",
+                        keys.DATE: f"${keys.DATE}",
+                    },
+                    "habit_instances": {
+                        "$push": {
+                            keys.ID: f"${keys.ID}",
+                            # the legacy habit instances may have no note
+                            keys.COMPLETED: {"$ifNull": [f"${keys.COMPLETED}", None]},
+                            keys.NOTE: {"$ifNull": [f"${keys.NOTE}", ""]},
+                        }
+                    },
+                    "count": {"$sum": 1},
+                }
+            },
+            {"$match": {"count": {"$gt": 1}}},
+        ]
+
+    @staticmethod
+    def _duplicated_habit_instances(
+        groups: Iterable[dict],
+    ) -> List[MongoDuplicatedHabitInstances]:
+        """
+        Builds the duplicates of the groups of habit instances, the habit
+        instance written last is kept, ObjectIds grow with time.
+        """
+        keys = HabitInstanceKVSerializer.DataKeys
+        duplicates = []
+
+        for group in groups:
+            habit_instances = sorted(
+                group["habit_instances"],
+                key=lambda habit_instance: habit_instance[keys.ID],
+            )
+            duplicates.append(
+                MongoDuplicatedHabitInstances(
+                    habit_id=group["_id"][keys.HABIT_ID],
+                    date=group["_id"][keys.DATE],
+                    kept=habit_instances[-1],
+                    removed=habit_instances[:-1],
+                )
+            )
+
+        return duplicates
+
+    @staticmethod
+    def _pull_habit_instances_update(
+        habit_instances_ids: List[ObjectId],
+    ) -> Tuple[dict, dict]:
+        """
+        Builds the filter and the update removing habit instances
+        from the habit collections referencing them.
+        """
+        key = HabitCollectionsKVSerializer.DataKeys.HABITS_INSTANCES
+        ids = [str(habit_instance_id) for habit_instance_id in habit_instances_ids]
+        return {key: {"$in": ids}}, {"$pull": {key: {"$in": ids}}}
+
+    @staticmethod
+    def _weekdays_query(weekdays: WeekDayMask) -> dict:
+        """
+        Builds the query of the habits recurring on any of the days of a mask.
+
+        The bitwise query operators cannot use an index, the masks sharing
+        a day with the days are listed instead, at most 127 values matched
+        on the index of the days of the habits.
+        """
+        return {
+            HabitKVSerializer.DataKeys.RECURRENCE_DAYS: {
+                "$in": list(weekdays.overlapping_masks())
+            }
+        }
+
+    @staticmethod
+    def _legacy_recurrence_days_query() -> dict:
+        """
+        Builds the query of the habits whose days of the week are a list of names.
+        """
+        return {HabitKVSerializer.DataKeys.RECURRENCE_DAYS: {"$type": "array"}}
+
+    @staticmethod
+    def _migrated_recurrence_days(habits_data: Iterable[dict]) -> Dict[int, List]:
+        """
+        Groups the identifiers of the habits with legacy days of the week
+        by the mask of their days.
+        """
+        habits_ids_by_mask: Dict[int, List] = {}
+
+        for habit_data in habits_data:
+            days_mask = HabitKVSerializer.days_from_value(
+                habit_data[HabitKVSerializer.DataKeys.RECURRENCE_DAYS]
+            )
+            habits_ids_by_mask.setdefault(int(days_mask), []).append(
+                habit_data[HabitKVSerializer.DataKeys.ID]
+            )
+
+        return habits_ids_by_mask
+
+    @staticmethod
+    def _migrated_date(legacy_date: str) -> date:
+        """
+        Returns the stored value of a legacy ISO string date.
+        """
+        return HabitInstanceKVSerializer.date_to_value(
+            HabitInstanceKVSerializer.date_from_value(legacy_date)
+        )
+
+    @staticmethod
+    def _migrated_date_update(legacy_date: str) -> dict:
+        """
+        Builds the update replacing a legacy ISO string date with its stored value.
+        """
+        return {
+            "$set": {
+                HabitInstanceKVSerializer.DataKeys.DATE: (
+                    BaseMongoHabitRepository._migrated_date(legacy_date)
+                )
+            }
+        }
+
+    @staticmethod
+    def _migrated_date_collisions_query(legacy_date: str, habits_ids: List) -> dict:
+        """
+        Builds the query of the habit instances of some habits already stored
+        with the migrated value of a legacy date, matched on the unique index.
+        """
+        return {
+            HabitInstanceKVSerializer.DataKeys.HABIT_ID: {"$in": habits_ids},
+            HabitInstanceKVSerializer.DataKeys.DATE: (
+                BaseMongoHabitRepository._migrated_date(legacy_date)
+            ),
+        }
+
+    @staticmethod
+    def _check_batch_size(batch_size: int) -> None:
+        if batch_size <= 0:
+            raise ValueError("The batch size must be greater than 0.")
+
+    @staticmethod
+    def _set_object_id(document: dict) -> dict:
+        """
+        Converts the identifier of a document to insert to an ObjectId.
+
+        An entity with an identifier must not be saved a second time,
+        it is stored under the same _id to be rejected by MongoDB.
+
+        Raises:
+            InvalidId: If the identifier is not a valid ObjectId.
+        """
+        if document.get("_id"):
+            document["_id"] = ObjectId(document["_id"])
+
+        return document
+
+    @staticmethod
+    def _prepare_insert_many(
+        documents: List[dict],
+    ) -> Tuple[List[dict], List[int], Dict[int, str]]:
+        """
+        Prepares the documents of several entities for an unordered bulk insert.
+
+        Returns:
+            The documents to insert, the index of each of them in the provided
+            documents, and the errors of the documents that cannot be inserted.
+        """
+        errors: Dict[int, str] = {}
+        documents_to_insert: List[dict] = []
+        documents_indexes: List[int] = []
+
+        for index, document in enumerate(documents):
+            try:
+                BaseMongoHabitRepository._set_object_id(document)
+            except InvalidId as error:
+                errors[index] = str(error)
+                continue
+
+            documents_to_insert.append(document)
+            documents_indexes.append(index)
+
+        return documents_to_insert, documents_indexes, errors
+
+    @staticmethod
+    def _add_bulk_write_errors(
+        error: BulkWriteError, documents_indexes: List[int], errors: Dict[int, str]
+    ) -> None:
+        # map the errors back to the index of the documents provided by the caller
+        for write_error in error.details["writeErrors"]:
+            index = documents_indexes[write_error["index"]]
+            errors[index] = write_error["errmsg"]
+
+    def _bulk_save_result(
+        self, entities: List, documents: List[dict], errors: Dict[int, str]
+    ) -> BulkSaveResult:
+        """
+        Assigns their identifier to the inserted entities, and reports
+        the entities that failed.
+        """
+        result = BulkSaveResult()
+
+        for index, (entity, document) in enumerate(zip(entities, documents)):
+            if index in errors:
+                result.failed.append(BulkSaveFailure(entity, errors[index]))
+                continue
+
+            # The _id of each document is generated client-side by pymongo
+            entity.id = str(document["_id"])
+            result.saved.append(self._add_to_identity_map(entity))
+
+        return result
+
+    @staticmethod
+    def _split_habit_categories_by_name(
+        habit_categories: List[HabitCategory], existing_names: Set[str]
+    ) -> Tuple[BulkSaveResult[HabitCategory], List[HabitCategory]]:
+        """
+        Rejects the habit categories with a name that is already used,
+        in the database or earlier in the batch.
+
+        Returns:
+            The result holding the rejected habit categories,
+            and the habit categories to insert.
+        """
+        result = BulkSaveResult()
+        habit_categories_to_insert: List[HabitCategory] = []
+
+        for habit_category in habit_categories:
+            if habit_category.name in existing_names:
+                result.failed.append(
+                    BulkSaveFailure(
+                        habit_category,
+                        f"Habit category with name {habit_category.name} "
+                        f"already exists.",
+                    )
+                )
+                continue
+
+            existing_names.add(habit_category.name)
+            habit_categories_to_insert.append(habit_category)
+
+        return result, habit_categories_to_insert
+
+    def _cache_saved_habit_categories(
+        self,
+        habit_categories_dicts: List[dict],
+        saved_habit_categories: List[HabitCategory],
+    ) -> None:
+        # pymongo also assigns an _id to the documents that failed
+        saved_ids = {habit_category.id for habit_category in saved_habit_categories}
+        for habit_category_dict in habit_categories_dicts:
+            if str(habit_category_dict.get("_id")) in saved_ids:
+                self._cache_habit_category(habit_category_dict)
+
+    @staticmethod
+    def _habit_instance_without_habit_message(habit_instance_data: dict) -> str:
+        return (
+            f"Error when trying to retrieve the habit instance "
+            f"{habit_instance_data[HabitInstanceKVSerializer.DataKeys.ID]}. "
+            f"Habit with ID "
+            f"{habit_instance_data[HabitInstanceKVSerializer.DataKeys.HABIT_ID]} "
+            f"does not exist."
+        )
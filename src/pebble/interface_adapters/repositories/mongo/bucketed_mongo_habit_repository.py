@@ -0,0 +1,480 @@
+from collections import defaultdict
+from datetime import date
+from math import ceil
+from typing import ClassVar, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+from pebble.application.repositories import BulkSaveFailure, BulkSaveResult
+from pebble.application.serializers import HabitInstanceBucketKVSerializer
+from pebble.domain.entities import Habit, HabitInstance
+from pebble.domain.value_objects import ID
+
+from .mongo_deduplication_report import MongoDeduplicationReport
+from .mongo_exceptions import MongoHabitExistsError, MongoHabitNotFoundError
+from .mongo_habit_repository import MongoHabitRepository
+
+
+class BucketedMongoHabitRepository(MongoHabitRepository):
+    """
+    MongoDB habit repository storing the habit instances in monthly buckets.
+
+    Each bucket holds up to a month of habit instances of one habit, reading
+    a year of history of a habit fetches about 12 documents instead of 365.
+    There is at most one habit instance per habit and per day, its identifier
+    is derived from the habit and the date.
+
+    The buckets are stored in their own collection, the habits, habit
+    categories and habit collections are stored like in MongoHabitRepository.
+    """
+
+    HABIT_INSTANCE_COLLECTION_NAME = "habit_instance_buckets"
+    # The maximum number of habit instances in a bucket, one per day of a month
+    BUCKET_MAX_SIZE = 31
+    INDEXES: ClassVar[Dict[str, List[IndexModel]]] = {
+        **{
+            collection_name: indexes
+            for collection_name, indexes in MongoHabitRepository.INDEXES.items()
+            if collection_name != MongoHabitRepository.HABIT_INSTANCE_COLLECTION_NAME
+        },
+        HABIT_INSTANCE_COLLECTION_NAME: [
+            IndexModel(
+                [
+                    (HabitInstanceBucketKVSerializer.DataKeys.HABIT_ID, ASCENDING),
+                    (HabitInstanceBucketKVSerializer.DataKeys.MONTH, ASCENDING),
+                ],
+                name="habit_id_month",
+            ),
+        ],
+    }
+
+    def deduplicate_habit_instances(
+        self, dry_run: bool = False
+    ) -> MongoDeduplicationReport:
+        """
+        A bucket holds one habit instance per day of its month,
+        there is nothing to remove.
+
+        Args:
+            dry_run: True to only list the duplicates, without removing them.
+
+        Returns:
+            An empty report, no habit instance is ever duplicated.
+        """
+        return MongoDeduplicationReport(dry_run=dry_run)
+
+    def _upsert_bucket_days(
+        self, habit_id: ID, month_date: date, habit_instances: List[HabitInstance]
+    ) -> None:
+        """
+        Writes habit instances of the same habit and month in their bucket,
+        the bucket is created if it does not exist yet.
+
+        The days are only written if none of them is in the bucket already.
+
+        Raises:
+            DuplicateKeyError: If a habit instance already exists on one of the days.
+        """
+        keys = HabitInstanceBucketKVSerializer.DataKeys
+        day_fields = {
+            HabitInstanceBucketKVSerializer.day_field(
+                habit_instance.date
+            ): HabitInstanceBucketKVSerializer.to_dict(habit_instance)
+            for habit_instance in habit_instances
+        }
+
+        # When a day is already taken the filter does not match, and
+        # the upsert is rejected because the bucket _id already exists
+        self.habit_instances_collection.update_one(
+            {
+                keys.ID: HabitInstanceBucketKVSerializer.bucket_id(
+                    habit_id, month_date
+                ),
+                **{day_field: {"$exists": False} for day_field in day_fields},
+            },
+            {
+                "$set": day_fields,
+                "$setOnInsert": {
+                    keys.HABIT_ID: str(habit_id),
+                    keys.MONTH: HabitInstanceBucketKVSerializer.month_key(month_date),
+                },
+            },
+            upsert=True,
+        )
+
+    def _habit_instance_from_bucket(
+        self, bucket_data: dict, habit: Habit, habit_instance_date: date
+    ) -> Union[HabitInstance, None]:
+        habit_instances = HabitInstanceBucketKVSerializer.from_dict(
+            bucket_data, habit, habit_instance_date, habit_instance_date
+        )
+        if not habit_instances:
+            return None
+
+        return self._get_from_identity_map(
+            HabitInstance, habit_instances[0].id
+        ) or self._add_to_identity_map(habit_instances[0])
+
+    def _habit_instances_from_buckets(
+        self,
+        buckets_data: List[dict],
+        habits: Dict[ID, Habit],
+        start_date: Union[date, None] = None,
+        end_date: Union[date, None] = None,
+    ) -> List[HabitInstance]:
+        habit_instances: List[HabitInstance] = []
+
+        for bucket_data in buckets_data:
+            habit = habits[
+                bucket_data[HabitInstanceBucketKVSerializer.DataKeys.HABIT_ID]
+            ]
+            habit_instances.extend(
+                self._get_from_identity_map(HabitInstance, habit_instance.id)
+                or self._add_to_identity_map(habit_instance)
+                for habit_instance in HabitInstanceBucketKVSerializer.from_dict(
+                    bucket_data, habit, start_date, end_date
+                )
+            )
+
+        return habit_instances
+
+    def _get_habit_instances_of_habits(
+        self, habits: Dict[ID, Habit]
+    ) -> List[HabitInstance]:
+        """
+        Gets all the habit instances of the provided habits with a single cursor,
+        one bucket per habit and per month, sorted by habit and by month.
+
+        Args:
+            habits: The habits already in memory, indexed by identifier.
+
+        Returns:
+            The sorted habit instances, linked to the habits already in memory.
+        """
+        keys = HabitInstanceBucketKVSerializer.DataKeys
+        buckets_data = self.habit_instances_collection.find(
+            {keys.HABIT_ID: {"$in": list(habits)}}
+        ).sort([(keys.HABIT_ID, ASCENDING), (keys.MONTH, ASCENDING)])
+
+        return self._habit_instances_from_buckets(buckets_data, habits)
+
+    def save_habit_instance(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Saves a new habit instance in the bucket of its habit and month.
+
+        Assigns the identifier derived from the habit and the date
+        to the habit instance.
+
+        Args:
+            habit_instance: The habit instance to be saved.
+
+        Returns:
+            The saved habit instance, with the identifier.
+
+        Raises:
+            MongoHabitExistsError: If the habit already has a habit instance
+            on the same date.
+        """
+        habit_id = habit_instance.habit.id
+
+        try:
+            self._upsert_bucket_days(habit_id, habit_instance.date, [habit_instance])
+        except DuplicateKeyError:
+            raise MongoHabitExistsError(
+                f"Habit instance of habit {habit_id} on "
+                f"{habit_instance.date.isoformat()} already exists."
+            )
+
+        habit_instance.id = HabitInstanceBucketKVSerializer.habit_instance_id(
+            habit_id, habit_instance.date
+        )
+
+        return self._add_to_identity_map(habit_instance)
+
+    def record_check_in(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Records the habit instance of a habit on a date, the check-in.
+
+        The day is set in the bucket of the habit and the month with a single
+        upsert, the bucket is created if it does not exist yet. The identifier
+        is derived from the habit and the date, a retried check-in writes
+        the same day again.
+
+        Args:
+            habit_instance: The habit instance to record, its habit must be saved.
+
+        Returns:
+            The recorded habit instance, with the identifier.
+
+        Raises:
+            ValueError: If the habit of the habit instance does not have an ID.
+        """
+        habit_id = habit_instance.habit.id
+        if habit_id is None:
+            raise ValueError("Habit must have an ID to record a check-in.")
+
+        keys = HabitInstanceBucketKVSerializer.DataKeys
+        self.habit_instances_collection.update_one(
+            {
+                keys.ID: HabitInstanceBucketKVSerializer.bucket_id(
+                    habit_id, habit_instance.date
+                )
+            },
+            {
+                "$set": {
+                    HabitInstanceBucketKVSerializer.day_field(
+                        habit_instance.date
+                    ): HabitInstanceBucketKVSerializer.to_dict(habit_instance)
+                },
+                "$setOnInsert": {
+                    keys.HABIT_ID: str(habit_id),
+                    keys.MONTH: HabitInstanceBucketKVSerializer.month_key(
+                        habit_instance.date
+                    ),
+                },
+            },
+            upsert=True,
+        )
+        habit_instance.id = HabitInstanceBucketKVSerializer.habit_instance_id(
+            habit_id, habit_instance.date
+        )
+
+        return self._add_check_in_to_identity_map(habit_instance)
+
+    def save_habit_instances(
+        self, habit_instances: List[HabitInstance]
+    ) -> BulkSaveResult[HabitInstance]:
+        """
+        Saves several new habit instances in the repository at once.
+
+        The days already taken are found with a single query, the other
+        habit instances are written with one update per habit and month.
+        If a day is taken in the meantime, the habit instances of its bucket
+        are reported as failed.
+
+        Args:
+            habit_instances: The habit instances to be saved.
+
+        Returns:
+            The saved habit instances, with their identifier,
+            and the habit instances that failed.
+        """
+        keys = HabitInstanceBucketKVSerializer.DataKeys
+        result = BulkSaveResult()
+
+        buckets: Dict[str, List[HabitInstance]] = defaultdict(list)
+        for habit_instance in habit_instances:
+            buckets[
+                HabitInstanceBucketKVSerializer.bucket_id(
+                    habit_instance.habit.id, habit_instance.date
+                )
+            ].append(habit_instance)
+
+        taken_days = {
+            bucket_data[keys.ID]: set(bucket_data.get(keys.DAYS, {}))
+            for bucket_data in self.habit_instances_collection.find(
+                {keys.ID: {"$in": list(buckets)}}, {keys.DAYS: 1}
+            )
+        }
+
+        for bucket_id, bucket_habit_instances in buckets.items():
+            days = taken_days.get(bucket_id, set())
+            habit_instances_to_save: List[HabitInstance] = []
+
+            for habit_instance in bucket_habit_instances:
+                day = HabitInstanceBucketKVSerializer.day_key(habit_instance.date)
+                if day in days:
+                    result.failed.append(
+                        BulkSaveFailure(
+                            habit_instance,
+                            f"Habit instance of habit {habit_instance.habit.id} on "
+                            f"{habit_instance.date.isoformat()} already exists.",
+                        )
+                    )
+                    continue
+
+                # a second habit instance on the same day in the batch also fails
+                days.add(day)
+                habit_instances_to_save.append(habit_instance)
+
+            if not habit_instances_to_save:
+                continue
+
+            first_habit_instance = habit_instances_to_save[0]
+            try:
+                self._upsert_bucket_days(
+                    first_habit_instance.habit.id,
+                    first_habit_instance.date,
+                    habit_instances_to_save,
+                )
+            except DuplicateKeyError as error:
+                result.failed.extend(
+                    BulkSaveFailure(habit_instance, str(error))
+                    for habit_instance in habit_instances_to_save
+                )
+                continue
+
+            for habit_instance in habit_instances_to_save:
+                habit_instance.id = HabitInstanceBucketKVSerializer.habit_instance_id(
+                    habit_instance.habit.id, habit_instance.date
+                )
+                result.saved.append(self._add_to_identity_map(habit_instance))
+
+        return result
+
+    def get_habit_instance_by_id(
+        self, habit_instance_id: ID
+    ) -> Union[HabitInstance, None]:
+        """
+        Gets a habit instance by identifier from the repository.
+
+        Only the day of the habit instance is read from its bucket.
+
+        Args:
+            habit_instance_id: The identifier of the habit instance to get.
+
+        Returns:
+            The habit instance with the provided identifier, if found, else None.
+
+        Raises:
+            MongoHabitNotFoundError: If the habit of the habit instance does not exist.
+        """
+        habit_instance = self._get_from_identity_map(HabitInstance, habit_instance_id)
+        if habit_instance:
+            return habit_instance
+
+        parsed_id = HabitInstanceBucketKVSerializer.parse_habit_instance_id(
+            habit_instance_id
+        )
+        if not parsed_id:
+            return None
+
+        habit_id, habit_instance_date = parsed_id
+        keys = HabitInstanceBucketKVSerializer.DataKeys
+        day_field = HabitInstanceBucketKVSerializer.day_field(habit_instance_date)
+
+        bucket_data = self.habit_instances_collection.find_one(
+            {
+                keys.ID: HabitInstanceBucketKVSerializer.bucket_id(
+                    habit_id, habit_instance_date
+                ),
+                day_field: {"$exists": True},
+            },
+            {keys.MONTH: 1, day_field: 1},
+        )
+
+        # If the habit instance is not found, return None
+        if not bucket_data:
+            return None
+
+        habit = self.get_habit_by_id(habit_id)
+
+        if not habit:
+            raise MongoHabitNotFoundError(
+                f"Error when trying to retrieve the habit instance "
+                f"{habit_instance_id}. Habit with ID {habit_id} does not exist."
+            )
+
+        return self._habit_instance_from_bucket(bucket_data, habit, habit_instance_date)
+
+    def _habit_instances_of_month(
+        self,
+        buckets_data: List[dict],
+        habits: Dict[ID, Habit],
+        start_date: date,
+        end_date: date,
+        after: Optional[Tuple[date, ID]],
+    ) -> List[HabitInstance]:
+        # the buckets of the habits for one month, merged by date and identifier
+        habit_instances = sorted(
+            self._habit_instances_from_buckets(
+                buckets_data, habits, start_date, end_date
+            ),
+            key=lambda habit_instance: (habit_instance.date, habit_instance.id),
+        )
+
+        if not after:
+            return habit_instances
+
+        after_date, after_id = after
+        return [
+            habit_instance
+            for habit_instance in habit_instances
+            if (habit_instance.date, habit_instance.id) > (after_date, str(after_id))
+        ]
+
+    def iter_habit_instances(
+        self,
+        habits_ids: Set[ID],
+        start_date: date,
+        end_date: date,
+        batch_size: int = 100,
+        after: Optional[Tuple[date, ID]] = None,
+    ) -> Iterator[HabitInstance]:
+        """
+        Iterates over the habit instances of habits between two dates, included.
+
+        The buckets are streamed from a server-side cursor, month by month,
+        only the buckets of one month are held in memory at once.
+        The position after a habit instance is its date and identifier,
+        the buckets of the months before it are not read.
+
+        Args:
+            habits_ids: The identifiers of the habits.
+            start_date: The first date of the habit instances.
+            end_date: The last date of the habit instances.
+            batch_size: The number of habit instances fetched at once,
+            rounded up to a number of buckets.
+            after: The date and identifier of the habit instance to continue
+            after, to iterate from the start of the date range if None.
+
+        Returns:
+            An iterator over the habit instances, sorted by date and identifier.
+
+        Raises:
+            ValueError: If the batch size is not greater than 0.
+        """
+        self._check_batch_size(batch_size)
+
+        habits = self._get_habits_by_ids(habits_ids)
+        if not habits:
+            return
+
+        if after and after[0] > start_date:
+            start_date = after[0]
+
+        keys = HabitInstanceBucketKVSerializer.DataKeys
+        cursor = (
+            self.habit_instances_collection.find(
+                {
+                    keys.HABIT_ID: {"$in": list(habits)},
+                    keys.MONTH: {
+                        "$gte": HabitInstanceBucketKVSerializer.month_key(start_date),
+                        "$lte": HabitInstanceBucketKVSerializer.month_key(end_date),
+                    },
+                }
+            )
+            .sort(keys.MONTH, ASCENDING)
+            .batch_size(ceil(batch_size / self.BUCKET_MAX_SIZE))
+        )
+
+        month_buckets_data: List[dict] = []
+
+        # the cursor is closed on the server even if the iteration stops early
+        with cursor:
+            for bucket_data in cursor:
+                if (
+                    month_buckets_data
+                    and month_buckets_data[0][keys.MONTH] != bucket_data[keys.MONTH]
+                ):
+                    yield from self._habit_instances_of_month(
+                        month_buckets_data, habits, start_date, end_date, after
+                    )
+                    month_buckets_data = []
+
+                month_buckets_data.append(bucket_data)
+
+        yield from self._habit_instances_of_month(
+            month_buckets_data, habits, start_date, end_date, after
+        )
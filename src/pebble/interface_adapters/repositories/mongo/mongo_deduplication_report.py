@@ -0,0 +1,57 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List
+
+
+@dataclass(frozen=True)
+class MongoDuplicatedHabitInstances:
+    """
+    The habit instances stored for the same habit on the same day.
+
+    Attributes:
+        habit_id: The identifier of the habit.
+        date: The stored date of the habit instances.
+        kept: The habit instance written last, kept by the deduplication.
+        removed: The other habit instances, removed by the deduplication.
+        Each habit instance is the stored identifier, completion and note.
+    """
+
+    habit_id: str
+    date: datetime
+    kept: dict
+    removed: List[dict]
+
+    @property
+    def conflicting(self) -> bool:
+        """
+        Returns True if a removed habit instance has another completion
+        or note than the kept one, its data is lost when it is removed.
+        """
+        return any(
+            (habit_instance.get("completed"), habit_instance.get("note"))
+            != (self.kept.get("completed"), self.kept.get("note"))
+            for habit_instance in self.removed
+        )
+
+
+@dataclass
+class MongoDeduplicationReport:
+    """
+    The habit instances duplicated on a habit and a day, found before
+    building the unique index on the habit and the date.
+
+    Attributes:
+        duplicates: The duplicated habit instances, by habit and day.
+        dry_run: True if the duplicates were only listed, nothing was removed.
+    """
+
+    duplicates: List[MongoDuplicatedHabitInstances] = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def removed_count(self) -> int:
+        """
+        Returns the number of habit instances removed, or to be removed
+        in a dry run.
+        """
+        return sum(len(duplicates.removed) for duplicates in self.duplicates)
@@ -1,19 +1,38 @@
-from typing import Set, Union
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 from bson import ObjectId
-from pymongo import MongoClient
-
-from pebble.application.factories import RecurrenceFactory
-from pebble.application.repositories import HabitRepository
+from pymongo import MongoClient, ReturnDocument
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from pebble.application.repositories import (
+    BulkSaveResult,
+    HabitRepository,
+    IdentityMap,
+    LazyHabitCollection,
+)
 from pebble.application.serializers import (
+    CompletionCalendarKVSerializer,
     HabitCategoryKVSerializer,
     HabitCollectionsKVSerializer,
     HabitInstanceKVSerializer,
     HabitKVSerializer,
+    HabitStreakKVSerializer,
+)
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+    HabitStreak,
 )
-from pebble.domain.entities import Habit, HabitCategory, HabitCollection, HabitInstance
-from pebble.domain.value_objects import ID, Color
+from pebble.domain.value_objects import ID, WeekDayMask
+from pebble.interface_adapters.caches import CacheStore
 
+from .base_mongo_habit_repository import BaseMongoHabitRepository
+from .mongo_deduplication_report import MongoDeduplicationReport
 from .mongo_exceptions import (
     MongoHabitCategoryExistsError,
     MongoHabitCollectionExistsError,
@@ -21,51 +40,339 @@ from .mongo_exceptions import (
     MongoHabitExistsError,
     MongoHabitNotFoundError,
 )
+from .mongo_index_report import MongoIndexReport
+
+
+class MongoHabitRepository(BaseMongoHabitRepository, HabitRepository):
+    def __init__(
+        self,
+        mongo_client: MongoClient,
+        identity_map: Optional[IdentityMap] = None,
+        category_cache: Optional[CacheStore] = None,
+    ) -> None:
+        """
+        Initializes the repository with the MongoDB client.
+
+        Args:
+            mongo_client: The client used to access the MongoDB database.
+            identity_map: An optional identity map shared for the duration of
+            a request or session. When provided, each stored entity is loaded
+            at most once and the same object is returned for every lookup.
+            category_cache: The cache of the habit categories data, it can be
+            shared by the repositories of several requests. A new cache is
+            created if none is provided.
+        """
+        super().__init__(mongo_client, identity_map, category_cache)
+
+    def ensure_indexes(self) -> MongoIndexReport:
+        """
+        Creates the declared indexes that are missing from the database.
+
+        Meant to be run once, when the application starts.
+        Indexes are compared by name, the indexes found in the database
+        that are not declared are reported but never dropped.
+
+        Returns:
+            The report of the created indexes and of the extra indexes.
+        """
+        report = MongoIndexReport()
+
+        for collection_name, indexes in self.INDEXES.items():
+            mongo_collection = self.db[collection_name]
+            missing_indexes, extra_names = self._compare_indexes(
+                indexes, set(mongo_collection.index_information())
+            )
+
+            if missing_indexes:
+                report.created[collection_name] = mongo_collection.create_indexes(
+                    missing_indexes
+                )
+
+            if extra_names:
+                report.extra[collection_name] = extra_names
+
+        return report
+
+    def deduplicate_habit_instances(
+        self, dry_run: bool = False
+    ) -> MongoDeduplicationReport:
+        """
+        Removes the habit instances of a habit on a day that already has one,
+        so the unique index on the habit and the date can be built.
+
+        The habit instance written last is kept, the removed ones are also
+        removed from the habit collections. The duplicates are grouped over
+        the whole collection, the deduplication is run once with the
+        migrations command, after listing the duplicates with a dry run.
+        Nothing is read once the unique index exists.
 
+        Args:
+            dry_run: True to only list the duplicates, without removing them.
 
-class MongoHabitRepository(HabitRepository):
-    DATABASE_NAME = "pebble"
-    HABITS_COLLECTION_NAME = "habits"
-    HABIT_CATEGORIES_COLLECTION_NAME = "habit_categories"
-    HABIT_COLLECTIONS_COLLECTION_NAME = "habit_collections"
-    HABIT_INSTANCE_COLLECTION_NAME = "habit_instances"
-
-    def __init__(self, mongo_client: MongoClient) -> None:
-        self.mongo_client = mongo_client
-        self.db = mongo_client[self.DATABASE_NAME]
-        self.habits_collection = self.db[self.HABITS_COLLECTION_NAME]
-        self.habit_category_collection = self.db[self.HABIT_CATEGORIES_COLLECTION_NAME]
-        self.habit_collections_collection = self.db[
-            self.HABIT_COLLECTIONS_COLLECTION_NAME
+        Returns:
+            The report of the duplicated habit instances.
+        """
+        report = MongoDeduplicationReport(dry_run=dry_run)
+        if (
+            self.HABIT_INSTANCES_UNIQUE_INDEX_NAME
+            in self.habit_instances_collection.index_information()
+        ):
+            return report
+
+        groups = self.habit_instances_collection.aggregate(
+            self._duplicate_habit_instances_pipeline(), allowDiskUse=True
+        )
+        report.duplicates = self._duplicated_habit_instances(groups)
+        removed_ids = [
+            habit_instance[HabitInstanceKVSerializer.DataKeys.ID]
+            for duplicates in report.duplicates
+            for habit_instance in duplicates.removed
         ]
-        self.habit_instances_collection = self.db[self.HABIT_INSTANCE_COLLECTION_NAME]
+        if removed_ids and not dry_run:
+            self._remove_habit_instances(removed_ids)
+
+        return report
+
+    def _remove_habit_instances(self, habit_instances_ids: List[ObjectId]) -> None:
+        """
+        Removes habit instances and their references from the habit collections.
+        """
+        self.habit_instances_collection.delete_many(
+            {"_id": {"$in": habit_instances_ids}}
+        )
+        self.habit_collections_collection.update_many(
+            *self._pull_habit_instances_update(habit_instances_ids)
+        )
+
+    def migrate_habit_instance_dates(self) -> int:
+        """
+        Converts the dates of the habit instances stored as ISO strings
+        to native dates, so the date range queries match them.
+
+        The habit instances are updated by date, with one update per
+        distinct legacy date. A habit instance with a legacy date is removed
+        when its habit already has a habit instance stored on the same day,
+        the one written by the current version is kept. Finding the legacy
+        dates reads the whole collection, the migration is run once with
+        the migrations command rather than when the application starts.
+        Running it again only updates the habit instances written since
+        by an older version.
+
+        Returns:
+            The number of habit instances migrated.
+        """
+        keys = HabitInstanceKVSerializer.DataKeys
+        migrated_count = 0
+
+        for legacy_date in self.habit_instances_collection.distinct(
+            keys.DATE, self._legacy_dates_query()
+        ):
+            legacy_date_query = {keys.DATE: legacy_date}
+            collided_habits_ids = self.habit_instances_collection.distinct(
+                keys.HABIT_ID,
+                self._migrated_date_collisions_query(
+                    legacy_date,
+                    self.habit_instances_collection.distinct(
+                        keys.HABIT_ID, legacy_date_query
+                    ),
+                ),
+            )
+
+            # the unique index rejects the update of a habit instance
+            # whose habit already has one on the migrated date
+            if collided_habits_ids:
+                legacy_collisions_query = {
+                    **legacy_date_query,
+                    keys.HABIT_ID: {"$in": collided_habits_ids},
+                }
+                legacy_collisions_data = self.habit_instances_collection.find(
+                    legacy_collisions_query, [keys.ID]
+                )
+                self._remove_habit_instances(
+                    [
+                        habit_instance_data[keys.ID]
+                        for habit_instance_data in legacy_collisions_data
+                    ]
+                )
+
+            result = self.habit_instances_collection.update_many(
+                legacy_date_query, self._migrated_date_update(legacy_date)
+            )
+            migrated_count += result.modified_count
+
+        return migrated_count
+
+    def migrate_habit_recurrence_days(self) -> int:
+        """
+        Converts the days of the week of the habits stored as lists of names
+        to masks, so the queries on the days of the week match them.
+
+        The habits are updated by mask, with one update per distinct mask.
+        Finding the legacy habits reads the whole collection, no index can
+        serve it, the migration is run once with the migrations command
+        rather than when the application starts. Running it again only
+        updates the habits written since by an older version.
+
+        Returns:
+            The number of habits migrated.
+        """
+        migrated_count = 0
+        legacy_habits_data = self.habits_collection.find(
+            self._legacy_recurrence_days_query(),
+            [HabitKVSerializer.DataKeys.RECURRENCE_DAYS],
+        )
 
-    def _habit_from_dict(self, habit_data: dict) -> Habit:
-        # recover the recurrence from the habit data with the factory
-        recurrence = RecurrenceFactory.get_recurrence_from_strings(
-            habit_data[HabitKVSerializer.DataKeys.RECURRENCE],
-            habit_data[HabitKVSerializer.DataKeys.RECURRENCE_DAYS],
+        for days_mask, habits_ids in self._migrated_recurrence_days(
+            legacy_habits_data
+        ).items():
+            result = self.habits_collection.update_many(
+                {"_id": {"$in": habits_ids}},
+                {"$set": {HabitKVSerializer.DataKeys.RECURRENCE_DAYS: days_mask}},
+            )
+            migrated_count += result.modified_count
+
+        return migrated_count
+
+    def _habit_from_dict(
+        self,
+        habit_data: dict,
+        habit_categories: Optional[Dict[ID, HabitCategory]] = None,
+    ) -> Habit:
+        # the habit was already loaded, no need to decode it again
+        habit = self._get_from_identity_map(
+            Habit, habit_data[HabitKVSerializer.DataKeys.ID]
         )
+        if habit:
+            return habit
 
         category_id: str = habit_data[HabitKVSerializer.DataKeys.CATEGORY_ID]
         habit_category: HabitCategory = None
 
-        if category_id:
+        if category_id and habit_categories is not None:
+            # the categories were already fetched in batch by the caller
+            habit_category = habit_categories.get(str(category_id))
+
+        if category_id and not habit_category:
+            habit_category = self._get_loaded_habit_category(category_id)
+
+        if category_id and not habit_category:
             # recover the habit category from the habit data
             habit_category_data = self.habit_category_collection.find_one(
-                {"_id": ObjectId(habit_data[HabitKVSerializer.DataKeys.CATEGORY_ID])}
+                {"_id": ObjectId(category_id)}
             )
-            habit_category = HabitCategoryKVSerializer.from_dict(habit_category_data)
+            self._cache_habit_category(habit_category_data)
+            habit_category = self._habit_category_from_dict(habit_category_data)
+
+        return self._build_habit(habit_data, habit_category)
+
+    def _get_habit_categories_by_ids(
+        self, habit_categories_ids: Set[ID]
+    ) -> Dict[ID, HabitCategory]:
+        """
+        Gets the habit categories with the provided identifiers in a single query.
+
+        Args:
+            habit_categories_ids: The identifiers of the habit categories to get.
+
+        Returns:
+            The habit categories found, indexed by identifier.
+        """
+        # only the categories that were not loaded or cached yet are fetched
+        habit_categories, missing_habit_categories_ids = (
+            self._get_loaded_habit_categories(habit_categories_ids)
+        )
+
+        if not missing_habit_categories_ids:
+            return habit_categories
+
+        habit_categories_data = self.habit_category_collection.find(
+            self._ids_query(missing_habit_categories_ids)
+        )
+
+        for habit_category_data in habit_categories_data:
+            self._cache_habit_category(habit_category_data)
+            habit_category = self._habit_category_from_dict(habit_category_data)
+            habit_categories[habit_category.id] = habit_category
+
+        return habit_categories
+
+    def _habits_from_dicts(self, habits_data: Iterable[dict]) -> Dict[ID, Habit]:
+        """
+        Converts the habits data to Habit objects.
+
+        The categories of all the habits are fetched with one query,
+        instead of one query per habit.
+
+        Args:
+            habits_data: The habits data, as stored in the MongoDB collection.
+
+        Returns:
+            The habits, indexed by identifier.
+        """
+        habits_data = list(habits_data)
+
+        habit_categories = self._get_habit_categories_by_ids(
+            self._habit_categories_ids(habits_data)
+        )
+
+        habits = (
+            self._habit_from_dict(habit_data, habit_categories)
+            for habit_data in habits_data
+        )
+
+        return {habit.id: habit for habit in habits}
+
+    def _get_habits_by_ids(self, habits_ids: Iterable[ID]) -> Dict[ID, Habit]:
+        """
+        Gets the habits with the provided identifiers in a single query.
+
+        Args:
+            habits_ids: The identifiers of the habits to get.
+
+        Returns:
+            The habits found, indexed by identifier.
+        """
+        # only the habits that were not loaded yet are fetched
+        habits, missing_habits_ids = self._get_loaded_habits(habits_ids)
+
+        if not missing_habits_ids:
+            return habits
+
+        habits_data = self.habits_collection.find(self._ids_query(missing_habits_ids))
+        habits.update(self._habits_from_dicts(habits_data))
+
+        return habits
+
+    def _insert_many(
+        self, mongo_collection: Collection, entities: List, documents: List[dict]
+    ) -> BulkSaveResult:
+        """
+        Inserts the documents of several entities with a single unordered
+        bulk insert, and assigns their identifier to the inserted entities.
 
-        return Habit(
-            name=habit_data[HabitKVSerializer.DataKeys.NAME],
-            recurrence=recurrence,
-            description=habit_data[HabitKVSerializer.DataKeys.DESCRIPTION],
-            category=habit_category,
-            color=Color(habit_data[HabitKVSerializer.DataKeys.COLOR_HEX]),
-            id=str(habit_data[HabitKVSerializer.DataKeys.ID]),
+        A document that cannot be inserted does not abort the insertion
+        of the other documents, the error is reported for its entity.
+
+        Args:
+            mongo_collection: The MongoDB collection to insert the documents in.
+            entities: The entities to be saved.
+            documents: The documents of the entities, in the same order.
+
+        Returns:
+            The saved entities, with their identifier, and the entities that failed.
+        """
+        documents_to_insert, documents_indexes, errors = self._prepare_insert_many(
+            documents
         )
 
+        if documents_to_insert:
+            try:
+                mongo_collection.insert_many(documents_to_insert, ordered=False)
+            except BulkWriteError as error:
+                self._add_bulk_write_errors(error, documents_indexes, errors)
+
+        return self._bulk_save_result(entities, documents, errors)
+
     def save_habit(self, habit: Habit) -> Habit:
         """
         Saves a new habit in the repository.
@@ -80,18 +387,37 @@ class MongoHabitRepository(HabitRepository):
             The saved habit, with the identifier.
 
         Raises:
-
+            MongoHabitExistsError: If the habit already exists.
         """
-        # Check if the habit already exists in the database
-        if habit.id and self.get_habit_by_id(habit.id):
+        # Convert the habit to a dictionary and insert it into the MongoDB collection,
+        # a habit with an identifier is rejected by the unique index of _id
+        habit_dict = self._set_object_id(HabitKVSerializer.to_dict(habit))
+        try:
+            result = self.habits_collection.insert_one(habit_dict)
+        except DuplicateKeyError:
             raise MongoHabitExistsError(f"Habit with ID {habit.id} already exists.")
-
-        # Convert the habit to a dictionary and insert it into the MongoDB collection
-        habit_dict = HabitKVSerializer.to_dict(habit)
-        result = self.habits_collection.insert_one(habit_dict)
         habit.id = str(result.inserted_id)
 
-        return habit
+        return self._add_to_identity_map(habit)
+
+    def save_habits(self, habits: List[Habit]) -> BulkSaveResult[Habit]:
+        """
+        Saves several new habits in the repository at once.
+
+        The habits are inserted with a single unordered bulk insert,
+        a habit that fails does not abort the insertion of the others.
+
+        Args:
+            habits: The habits to be saved.
+
+        Returns:
+            The saved habits, with their identifier, and the habits that failed.
+        """
+        return self._insert_many(
+            self.habits_collection,
+            habits,
+            HabitKVSerializer.to_dicts(habits),
+        )
 
     def get_habit_by_id(self, habit_id: str) -> Union[Habit, None]:
         """
@@ -106,6 +432,10 @@ class MongoHabitRepository(HabitRepository):
         Returns:
             The habit with the provided identifier, if found, else None.
         """
+        habit = self._get_from_identity_map(Habit, habit_id)
+        if habit:
+            return habit
+
         habit_data = self.habits_collection.find_one({"_id": ObjectId(habit_id)})
 
         # If the habit is not found, return None
@@ -127,20 +457,28 @@ class MongoHabitRepository(HabitRepository):
         Returns:
             The set of habits with the provided identifiers.
         """
-        habits_data = self.habits_collection.find(
-            {"_id": {"$in": [ObjectId(habit_id) for habit_id in habits_ids]}}
-        )
+        return set(self._get_habits_by_ids(habits_ids).values())
 
-        habits = set()
+    def get_habits_by_weekdays(self, weekdays: WeekDayMask) -> Set[Habit]:
+        """
+        Gets the habits recurring on any of some days of the week,
+        with a single query on the index of the days of the habits.
 
-        for habit_data in habits_data:
-            habits.add(self._habit_from_dict(habit_data))
+        Args:
+            weekdays: The mask of the days of the week.
 
-        return habits
+        Returns:
+            The habits recurring on at least one of the days.
+        """
+        habits_data = self.habits_collection.find(self._weekdays_query(weekdays))
+        return set(self._habits_from_dicts(habits_data).values())
 
     def save_habit_category(self, habit_category: HabitCategory) -> HabitCategory:
         """
         Saves a new habit category in the repository.
+
+        The habit category is also written to the habit categories cache.
+
         Args:
             habit_category: The habit category to be saved.
 
@@ -150,19 +488,74 @@ class MongoHabitRepository(HabitRepository):
         Raises:
             MongoHabitCategoryExistsError: If the habit category already exists.
         """
-        # Check if the habit category already exists in the database
-        if self.get_habit_category_by_name(habit_category.name):
+        # Convert the habit category to a dictionary and insert it into the
+        # MongoDB collection, the unique index of the name rejects a duplicate
+        habit_category_dict = self._set_object_id(
+            HabitCategoryKVSerializer.to_dict(habit_category)
+        )
+        try:
+            result = self.habit_category_collection.insert_one(habit_category_dict)
+        except DuplicateKeyError:
             raise MongoHabitCategoryExistsError(
                 f"Habit category with name {habit_category.name} already exists."
             )
-
-        # Convert the habit category to a dictionary and
-        # insert it into the MongoDB collection
-        habit_category_dict = HabitCategoryKVSerializer.to_dict(habit_category)
-        result = self.habit_category_collection.insert_one(habit_category_dict)
         habit_category.id = str(result.inserted_id)
 
-        return habit_category
+        # The inserted data includes the identifier assigned by MongoDB
+        self._cache_habit_category(habit_category_dict)
+
+        return self._add_to_identity_map(habit_category)
+
+    def save_habit_categories(
+        self, habit_categories: List[HabitCategory]
+    ) -> BulkSaveResult[HabitCategory]:
+        """
+        Saves several new habit categories in the repository at once.
+
+        The names already used, in the database or earlier in the batch,
+        are found with a single query. The other categories are inserted
+        with a single unordered bulk insert and written to the cache.
+
+        Args:
+            habit_categories: The habit categories to be saved.
+
+        Returns:
+            The saved habit categories, with their identifier,
+            and the habit categories that failed.
+        """
+        existing_names = {
+            data[HabitCategoryKVSerializer.DataKeys.NAME]
+            for data in self.habit_category_collection.find(
+                {
+                    HabitCategoryKVSerializer.DataKeys.NAME: {
+                        "$in": [
+                            habit_category.name for habit_category in habit_categories
+                        ]
+                    }
+                },
+                {HabitCategoryKVSerializer.DataKeys.NAME: 1},
+            )
+        }
+
+        result, habit_categories_to_insert = self._split_habit_categories_by_name(
+            habit_categories, existing_names
+        )
+
+        habit_categories_dicts = HabitCategoryKVSerializer.to_dicts(
+            habit_categories_to_insert
+        )
+        inserted = self._insert_many(
+            self.habit_category_collection,
+            habit_categories_to_insert,
+            habit_categories_dicts,
+        )
+
+        self._cache_saved_habit_categories(habit_categories_dicts, inserted.saved)
+
+        result.saved.extend(inserted.saved)
+        result.failed.extend(inserted.failed)
+
+        return result
 
     def get_habit_category_by_name(
         self, category_name: str
@@ -170,8 +563,8 @@ class MongoHabitRepository(HabitRepository):
         """
         Gets a habit category by name from the repository.
 
-        Retrieves a habit category from the MongoDB collection
-        using the provided name.
+        Retrieves a habit category from the habit categories cache,
+        or from the MongoDB collection using the provided name.
 
         Args:
             category_name: The name of the habit category to get.
@@ -179,15 +572,20 @@ class MongoHabitRepository(HabitRepository):
         Returns:
             The habit category with the provided name, if found, else None.
         """
-        # Retrieve the habit category from the MongoDB collection
-        data = self.habit_category_collection.find_one({"name": category_name})
+        data = self.category_cache.get(("name", category_name))
 
-        # If the habit category is not found, return None
-        if not data:
-            return None
+        if data is None:
+            # Retrieve the habit category from the MongoDB collection
+            data = self.habit_category_collection.find_one({"name": category_name})
+
+            # If the habit category is not found, return None
+            if not data:
+                return None
+
+            self._cache_habit_category(data)
 
         # Convert the habit category data to a HabitCategory object
-        return HabitCategoryKVSerializer.from_dict(data)
+        return self._habit_category_from_dict(data)
 
     def save_habit_collection(
         self, habit_collection: HabitCollection
@@ -203,22 +601,27 @@ class MongoHabitRepository(HabitRepository):
 
         Returns:
             The saved habit collection, with the identifier.
+
+        Raises:
+            MongoHabitCollectionExistsError: If the habit collection already exists.
         """
-        # Check if the habit collection already exists in the database
-        if self.get_habit_collection_by_id(habit_collection.id):
+        # Convert the habit collection to a dictionary and insert it into the
+        # MongoDB collection, a habit collection with an identifier is rejected
+        # by the unique index of _id
+        data = self._set_object_id(
+            HabitCollectionsKVSerializer.to_dict(habit_collection)
+        )
+
+        try:
+            result = self.habit_collections_collection.insert_one(data)
+        except DuplicateKeyError:
             raise MongoHabitCollectionExistsError(
                 f"Habit collection with ID {habit_collection.id} already exists."
             )
 
-        # Convert the habit collection to a dictionary and
-        # insert it into the MongoDB collection.
-        data = HabitCollectionsKVSerializer.to_dict(habit_collection)
-
-        result = self.habit_collections_collection.insert_one(data)
-
         habit_collection.id = str(result.inserted_id)
 
-        return habit_collection
+        return self._add_to_identity_map(habit_collection)
 
     def update_habit_collection(
         self, habit_collection: HabitCollection
@@ -240,9 +643,8 @@ class MongoHabitRepository(HabitRepository):
         if not habit_collection.id:
             raise ValueError("Habit collection must have an ID to be updated.")
 
-        # Check if the habit collection exists in the database
-        existing_collection = self.get_habit_collection_by_id(habit_collection.id)
-        if not existing_collection:
+        # Check if the habit collection exists, without loading it
+        if not self.habit_collection_exists(habit_collection.id):
             raise MongoHabitCollectionNotFoundError(
                 f"Habit collection with ID {habit_collection.id} does not exist."
             )
@@ -270,12 +672,22 @@ class MongoHabitRepository(HabitRepository):
         Retrieves a habit collection from the MongoDB collection
         using the provided identifier.
 
+        The whole graph is loaded with a fixed number of queries,
+        whatever the number of habit instances in the collection:
+        the collection, its habits, their categories and their instances.
+
         Args:
             habit_collection_id: The identifier of the habit collection to get.
 
         Returns:
             The habit collection with the provided identifier, if found, else None.
         """
+        habit_collection = self._get_from_identity_map(
+            HabitCollection, habit_collection_id
+        )
+        if habit_collection:
+            return habit_collection
+
         habit_collection_data = self.habit_collections_collection.find_one(
             {"_id": ObjectId(habit_collection_id)}
         )
@@ -284,49 +696,143 @@ class MongoHabitRepository(HabitRepository):
         if not habit_collection_data:
             return None
 
-        # Recover the habits from the habit collection data
-        habits_data = self.habits_collection.find(
-            {
-                "_id": {
-                    "$in": [
-                        ObjectId(habit_id)
-                        for habit_id in habit_collection_data[
-                            HabitCollectionsKVSerializer.DataKeys.HABITS
-                        ]
-                    ]
-                }
-            }
+        # Recover the habits, and their categories, from the habit collection data
+        habits = self._get_habits_by_ids(
+            habit_collection_data[HabitCollectionsKVSerializer.DataKeys.HABITS]
         )
 
-        habits = set()
+        habit_instances = self._get_habit_instances_of_habits(habits)
 
-        for habit_data in habits_data:
-            habits.add(self._habit_from_dict(habit_data))
+        return self._add_to_identity_map(
+            HabitCollectionsKVSerializer.from_dict(
+                habit_collection_data, set(habits.values()), habit_instances
+            )
+        )
 
-        # Recover the habit instances from the habits data
-        habit_instances_data = list(
-            self.habit_instances_collection.find(
-                {
-                    HabitInstanceKVSerializer.DataKeys.HABIT_ID: {
-                        "$in": [habit.id for habit in habits]
-                    }
+    def open_habit_collection(
+        self, habit_collection_id: ID
+    ) -> Union[HabitCollection, None]:
+        """
+        Gets a habit collection by identifier, without loading its habits
+        and habit instances.
+
+        Only the name, the description and the identifiers of the habits
+        of the collection are read, the habit instances identifiers stay
+        in the database.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection to open.
+
+        Returns:
+            The habit collection with the provided identifier, if found, else None.
+        """
+        habit_collection = self._get_from_identity_map(
+            HabitCollection, habit_collection_id
+        )
+        if habit_collection:
+            return habit_collection
+
+        keys = HabitCollectionsKVSerializer.DataKeys
+        habit_collection_data = self.habit_collections_collection.find_one(
+            {"_id": ObjectId(habit_collection_id)},
+            {keys.NAME: 1, keys.DESCRIPTION: 1, keys.HABITS: 1},
+        )
+
+        if not habit_collection_data:
+            return None
+
+        return LazyHabitCollection(
+            name=habit_collection_data[keys.NAME],
+            repository=self,
+            habits_ids=habit_collection_data.get(keys.HABITS, []),
+            description=habit_collection_data.get(keys.DESCRIPTION),
+            id=str(habit_collection_data[keys.ID]),
+        )
+
+    def _get_habit_instances_of_habits(
+        self, habits: Dict[ID, Habit]
+    ) -> List[HabitInstance]:
+        """
+        Gets all the habit instances of the provided habits with a single cursor,
+        sorted by habit and by date from the habit_id_date_unique index.
+
+        Args:
+            habits: The habits already in memory, indexed by identifier.
+
+        Returns:
+            The sorted habit instances, linked to the habits already in memory.
+        """
+        habit_instances_data = self.habit_instances_collection.find(
+            {HabitInstanceKVSerializer.DataKeys.HABIT_ID: {"$in": list(habits)}}
+        ).sort(self.HABIT_INSTANCES_TIMELINE_SORT)
+
+        return self._habit_instances_from_dicts(habit_instances_data, habits)
+
+    def habit_collection_exists(self, habit_collection_id: ID) -> bool:
+        """
+        Checks if a habit collection exists in the repository.
+
+        Only the identifier of the habit collection is read,
+        from the index MongoDB maintains on _id.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection to check.
+
+        Returns:
+            True if the habit collection exists, else False.
+        """
+        if self._get_from_identity_map(HabitCollection, habit_collection_id):
+            return True
+
+        habit_collection_data = self.habit_collections_collection.find_one(
+            {"_id": ObjectId(habit_collection_id)}, {"_id": 1}
+        )
+
+        return habit_collection_data is not None
+
+    def add_habit_instance_to_collection(
+        self, habit_collection_id: ID, habit_instance: HabitInstance
+    ) -> None:
+        """
+        Adds a saved habit instance to a habit collection.
+
+        The identifier of the habit instance is added with a single $addToSet,
+        the cost does not depend on the number of habit instances
+        already in the habit collection.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+            habit_instance: The habit instance to add, it must have an identifier.
+
+        Raises:
+            ValueError: If the habit instance does not have an ID.
+            MongoHabitCollectionNotFoundError: If the habit collection does not exist.
+        """
+        if not habit_instance.id:
+            raise ValueError("Habit instance must have an ID to be added.")
+
+        result = self.habit_collections_collection.update_one(
+            {"_id": ObjectId(habit_collection_id)},
+            {
+                "$addToSet": {
+                    HabitCollectionsKVSerializer.DataKeys.HABITS_INSTANCES: (
+                        habit_instance.id
+                    )
                 }
-            )
+            },
         )
 
-        # Convert the habit instances data to HabitInstance objects
-        habit_instances = set(
-            (
-                self.get_habit_instance_by_id(
-                    str(habit_instance[HabitInstanceKVSerializer.DataKeys.ID])
-                )
-                for habit_instance in habit_instances_data
+        if result.matched_count == 0:
+            raise MongoHabitCollectionNotFoundError(
+                f"Habit collection with ID {habit_collection_id} does not exist."
             )
-        )
 
-        return HabitCollectionsKVSerializer.from_dict(
-            habit_collection_data, habits, habit_instances
+        # keep the habit collection already in memory in sync with the database
+        habit_collection = self._get_from_identity_map(
+            HabitCollection, habit_collection_id
         )
+        if habit_collection:
+            habit_collection.habits_instance.add(habit_instance)
 
     def save_habit_instance(self, habit_instance: HabitInstance) -> HabitInstance:
         """
@@ -340,20 +846,86 @@ class MongoHabitRepository(HabitRepository):
 
         Returns:
             The saved habit instance, with the identifier.
+
+        Raises:
+            MongoHabitExistsError: If the habit instance already exists, or if
+            the habit already has a habit instance on the same date.
         """
-        # Check if the habit instance already exists in the database
-        if habit_instance.id and self.get_habit_instance_by_id(habit_instance.id):
+        # Convert the habit instance to a dictionary and insert it into the
+        # MongoDB collection, the unique indexes of _id and of the habit and
+        # the date reject a duplicate
+        habit_instance_dict = self._set_object_id(
+            HabitInstanceKVSerializer.to_dict(habit_instance)
+        )
+        try:
+            result = self.habit_instances_collection.insert_one(habit_instance_dict)
+        except DuplicateKeyError:
             raise MongoHabitExistsError(
-                f"Habit instance with ID {habit_instance.id} already exists."
+                f"Habit instance with ID {habit_instance.id} of habit "
+                f"{habit_instance.habit.id} on {habit_instance.date.isoformat()} "
+                f"already exists."
             )
-
-        # Convert the habit instance to a dictionary and
-        # insert it into the MongoDB collection
-        habit_instance_dict = HabitInstanceKVSerializer.to_dict(habit_instance)
-        result = self.habit_instances_collection.insert_one(habit_instance_dict)
         habit_instance.id = str(result.inserted_id)
 
-        return habit_instance
+        return self._add_to_identity_map(habit_instance)
+
+    def record_check_in(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Records the habit instance of a habit on a date, the check-in.
+
+        The habit instance is upserted on the unique index of the habit
+        and the date, with a single round trip. The completion and the note
+        of an existing habit instance are replaced, a retried check-in
+        never creates a second habit instance.
+
+        Args:
+            habit_instance: The habit instance to record, its habit must be saved.
+
+        Returns:
+            The recorded habit instance, with the identifier of the habit
+            instance of the habit on this date.
+
+        Raises:
+            ValueError: If the habit of the habit instance does not have an ID.
+        """
+        check_in_filter, check_in_update = self._check_in_query(habit_instance)
+
+        # concurrent upserts on a unique index are retried by the server,
+        # only one habit instance is created
+        habit_instance_data = self.habit_instances_collection.find_one_and_update(
+            check_in_filter,
+            check_in_update,
+            projection={HabitInstanceKVSerializer.DataKeys.ID: True},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        habit_instance.id = str(
+            habit_instance_data[HabitInstanceKVSerializer.DataKeys.ID]
+        )
+
+        return self._add_check_in_to_identity_map(habit_instance)
+
+    def save_habit_instances(
+        self, habit_instances: List[HabitInstance]
+    ) -> BulkSaveResult[HabitInstance]:
+        """
+        Saves several new habit instances in the repository at once.
+
+        The habit instances are inserted with a single unordered bulk insert,
+        a habit instance that fails does not abort the insertion of the others.
+
+        Args:
+            habit_instances: The habit instances to be saved.
+
+        Returns:
+            The saved habit instances, with their identifier,
+            and the habit instances that failed.
+        """
+        return self._insert_many(
+            self.habit_instances_collection,
+            habit_instances,
+            HabitInstanceKVSerializer.to_dicts(habit_instances),
+        )
 
     def get_habit_instance_by_id(
         self, habit_instance_id: ID
@@ -370,6 +942,10 @@ class MongoHabitRepository(HabitRepository):
         Returns:
             The habit instance with the provided identifier, if found, else None.
         """
+        habit_instance = self._get_from_identity_map(HabitInstance, habit_instance_id)
+        if habit_instance:
+            return habit_instance
+
         habit_instance_data = self.habit_instances_collection.find_one(
             {"_id": ObjectId(habit_instance_id)}
         )
@@ -384,11 +960,257 @@ class MongoHabitRepository(HabitRepository):
 
         if not habit:
             raise MongoHabitNotFoundError(
-                f"Error when trying to retrieve the habit instance "
-                f"{habit_instance_data[HabitInstanceKVSerializer.DataKeys.ID]}. "
-                f"Habit with ID "
-                f"{habit_instance_data[HabitInstanceKVSerializer.DataKeys.HABIT_ID]} "
-                f"does not exist."
+                self._habit_instance_without_habit_message(habit_instance_data)
+            )
+
+        return self._add_to_identity_map(
+            HabitInstanceKVSerializer.from_dict(habit_instance_data, habit)
+        )
+
+    def iter_habit_instances(
+        self,
+        habits_ids: Set[ID],
+        start_date: date,
+        end_date: date,
+        batch_size: int = 100,
+        after: Optional[Tuple[date, ID]] = None,
+    ) -> Iterator[HabitInstance]:
+        """
+        Iterates over the habit instances of habits between two dates, included.
+
+        The habit instances are streamed from a server-side cursor,
+        fetched by batches of batch_size documents.
+        The position after a habit instance is its date and identifier,
+        a page is found from the index whatever its depth.
+
+        Args:
+            habits_ids: The identifiers of the habits.
+            start_date: The first date of the habit instances.
+            end_date: The last date of the habit instances.
+            batch_size: The number of habit instances fetched at once.
+            after: The date and identifier of the habit instance to continue
+            after, to iterate from the start of the date range if None.
+
+        Returns:
+            An iterator over the habit instances, sorted by date and identifier.
+
+        Raises:
+            ValueError: If the batch size is not greater than 0.
+        """
+        self._check_batch_size(batch_size)
+
+        habits = self._get_habits_by_ids(habits_ids)
+        if not habits:
+            return
+
+        cursor = (
+            self.habit_instances_collection.find(
+                self._habit_instances_range_query(habits, start_date, end_date, after)
+            )
+            .sort(self.HABIT_INSTANCES_SORT)
+            .batch_size(batch_size)
+        )
+
+        # the cursor is closed on the server even if the iteration stops early
+        with cursor:
+            for habit_instance_data in cursor:
+                yield self._habit_instance_from_dict(habit_instance_data, habits)
+
+    def get_habit_instances(
+        self, habit_id: ID, start_date: date, end_date: date
+    ) -> List[HabitInstance]:
+        """
+        Gets the habit instances of a habit between two dates, included.
+
+        Args:
+            habit_id: The identifier of the habit.
+            start_date: The first date of the habit instances to get.
+            end_date: The last date of the habit instances to get.
+
+        Returns:
+            The habit instances of the habit in the date range, sorted by date.
+            No habit instances if the habit does not exist.
+        """
+        return list(self.iter_habit_instances({habit_id}, start_date, end_date))
+
+    def get_habit_streak(self, habit_id: ID) -> Union[HabitStreak, None]:
+        """
+        Gets the streak of a habit from the MongoDB database.
+
+        Args:
+            habit_id: The identifier of the habit.
+
+        Returns:
+            The streak of the habit, None if no streak was saved for the habit.
+        """
+        habit_streak_data = self.habit_streaks_collection.find_one(
+            self._habit_streak_query(habit_id)
+        )
+
+        if habit_streak_data is None:
+            return None
+
+        return HabitStreakKVSerializer.from_dict(habit_streak_data)
+
+    def save_habit_streak(self, habit_streak: HabitStreak) -> HabitStreak:
+        """
+        Saves the streak of a habit in the MongoDB database,
+        replacing the saved one in a single upsert.
+
+        Args:
+            habit_streak: The streak to save.
+
+        Returns:
+            The saved streak.
+        """
+        self.habit_streaks_collection.replace_one(
+            self._habit_streak_query(habit_streak.habit_id),
+            HabitStreakKVSerializer.to_dict(habit_streak),
+            upsert=True,
+        )
+
+        return habit_streak
+
+    def save_habit_streak_if_unchanged(
+        self,
+        habit_streak: HabitStreak,
+        previous_habit_streak: Union[HabitStreak, None],
+    ) -> bool:
+        """
+        Saves the streak of a habit in the MongoDB database only if the saved
+        streak is still the previous one. The replacement is matched on all
+        the fields of the previous streak, the first streak of a habit is
+        inserted and rejected by the _id of a streak inserted concurrently.
+
+        Args:
+            habit_streak: The streak to save.
+            previous_habit_streak: The streak read before the update,
+            None if no streak was saved for the habit.
+
+        Returns:
+            True if the streak was saved, False if the saved streak changed.
+        """
+        habit_streak_data = HabitStreakKVSerializer.to_dict(habit_streak)
+
+        if previous_habit_streak is None:
+            try:
+                self.habit_streaks_collection.insert_one(habit_streak_data)
+            except DuplicateKeyError:
+                return False
+            return True
+
+        result = self.habit_streaks_collection.replace_one(
+            HabitStreakKVSerializer.to_dict(previous_habit_streak), habit_streak_data
+        )
+
+        return bool(result.matched_count)
+
+    def get_completion_calendar(
+        self, habit_id: ID, year: int
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Gets the completion calendar of a habit for a year from the MongoDB
+        database, a single small document.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+
+        Returns:
+            The completion calendar, None if no calendar was saved for the year.
+        """
+        completion_calendar_data = self.completion_calendars_collection.find_one(
+            self._completion_calendar_query(habit_id, year)
+        )
+
+        if completion_calendar_data is None:
+            return None
+
+        return CompletionCalendarKVSerializer.from_dict(completion_calendar_data)
+
+    def save_completion_calendar(
+        self, completion_calendar: CompletionCalendar
+    ) -> CompletionCalendar:
+        """
+        Saves the completion calendar of a habit for a year in the MongoDB
+        database, replacing the saved one in a single upsert.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            The saved completion calendar.
+        """
+        self.completion_calendars_collection.update_one(
+            *self._completion_calendar_update(completion_calendar), upsert=True
+        )
+
+        return completion_calendar
+
+    def save_completion_calendar_if_absent(
+        self, completion_calendar: CompletionCalendar
+    ) -> bool:
+        """
+        Saves the completion calendar of a habit for a year in the MongoDB
+        database only if no calendar was saved for the year. The calendar is
+        inserted and rejected by the _id of a calendar inserted concurrently.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            True if the calendar was saved, False if a calendar was already saved.
+        """
+        completion_calendar_data = CompletionCalendarKVSerializer.to_dict(
+            completion_calendar
+        )
+        completion_calendar_data[CompletionCalendarKVSerializer.DataKeys.VERSION] = 1
+
+        try:
+            self.completion_calendars_collection.insert_one(completion_calendar_data)
+        except DuplicateKeyError:
+            return False
+
+        return True
+
+    def record_completion(
+        self, habit_instance: HabitInstance
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Records the completion and the note of a habit instance in the saved
+        completion calendar of its year.
+
+        The calendar is written only if its version did not change since it
+        was read, a calendar written by a concurrent check-in is read again
+        and the habit instance recorded on top of it.
+
+        Args:
+            habit_instance: The habit instance, its habit must be saved.
+
+        Returns:
+            The updated completion calendar, None if no calendar was saved
+            for the year.
+        """
+        query = self._completion_calendar_query(
+            habit_instance.habit.id, habit_instance.date.year
+        )
+
+        while True:
+            completion_calendar_data = self.completion_calendars_collection.find_one(
+                query
+            )
+            if completion_calendar_data is None:
+                return None
+
+            completion_calendar = CompletionCalendarKVSerializer.from_dict(
+                completion_calendar_data
             )
+            completion_calendar.record(habit_instance)
 
-        return HabitInstanceKVSerializer.from_dict(habit_instance_data, habit)
+            result = self.completion_calendars_collection.update_one(
+                *self._completion_calendar_version_update(
+                    completion_calendar, completion_calendar_data
+                )
+            )
+            if result.matched_count:
+                return completion_calendar
@@ -0,0 +1,26 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class MongoIndexReport:
+    """
+    The differences between the indexes declared by a repository
+    and the indexes found in the database.
+
+    Attributes:
+        created: The declared indexes that were missing and have been created,
+        by collection name.
+        extra: The indexes found in the database that are not declared,
+        by collection name. They are reported but never dropped.
+    """
+
+    created: Dict[str, List[str]] = field(default_factory=dict)
+    extra: Dict[str, List[str]] = field(default_factory=dict)
+
+    @property
+    def up_to_date(self) -> bool:
+        """
+        Returns True if no index was missing and no extra index was found.
+        """
+        return not self.created and not self.extra
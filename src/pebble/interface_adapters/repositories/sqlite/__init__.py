@@ -0,0 +1,17 @@
+from .sqlite_exceptions import (
+    SqliteError,
+    SqliteHabitCategoryExistsError,
+    SqliteHabitCollectionExistsError,
+    SqliteHabitCollectionNotFoundError,
+    SqliteHabitExistsError,
+)
+from .sqlite_habit_repository import SqliteHabitRepository
+
+__all__ = [
+    "SqliteError",
+    "SqliteHabitCategoryExistsError",
+    "SqliteHabitCollectionExistsError",
+    "SqliteHabitCollectionNotFoundError",
+    "SqliteHabitExistsError",
+    "SqliteHabitRepository",
+]
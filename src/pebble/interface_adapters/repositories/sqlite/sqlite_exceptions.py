@@ -0,0 +1,29 @@
+class SqliteError(Exception):
+    """
+    Base class for all exceptions raised by the SQLite repository.
+    """
+
+
+class SqliteHabitExistsError(SqliteError):
+    """
+    Exception raised when a habit or a habit instance already exists
+    in the repository.
+    """
+
+
+class SqliteHabitCategoryExistsError(SqliteError):
+    """
+    Exception raised when a habit category already exists in the repository.
+    """
+
+
+class SqliteHabitCollectionExistsError(SqliteError):
+    """
+    Exception raised when a habit collection already exists in the repository.
+    """
+
+
+class SqliteHabitCollectionNotFoundError(SqliteError):
+    """
+    Exception raised when a habit collection is not found in the repository.
+    """
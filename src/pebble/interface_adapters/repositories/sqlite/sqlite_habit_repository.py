@@ -0,0 +1,1281 @@
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from pebble.application.factories import RecurrenceFactory
+from pebble.application.repositories import (
+    BulkSaveFailure,
+    BulkSaveResult,
+    HabitRepository,
+    LazyHabitCollection,
+)
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+    HabitStreak,
+)
+from pebble.domain.value_objects import ID, Color, WeekDayMask
+
+from .sqlite_exceptions import (
+    SqliteError,
+    SqliteHabitCategoryExistsError,
+    SqliteHabitCollectionExistsError,
+    SqliteHabitCollectionNotFoundError,
+    SqliteHabitExistsError,
+)
+
+Entity = TypeVar("Entity")
+
+
+class SqliteHabitRepository(HabitRepository):
+    """
+    Habit repository storing the entities in a SQLite database.
+
+    Made for small deployments and offline clients that run without MongoDB.
+    The schema is normalized, the habits of a habit collection and its habit
+    instances are stored in association tables. The habit instances are
+    indexed by habit and date, with at most one habit instance per habit
+    and per day, and the habit categories by name.
+
+    The database is opened in WAL mode, the readers of other connections
+    are not blocked by the writes. The connection of the repository is
+    shared by its methods under a lock, the repository is thread-safe.
+    """
+
+    # The number of identifiers in the IN clause of one query
+    QUERY_IDS_BATCH_SIZE = 500
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS habit_categories (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT,
+            color_hex TEXT
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS habit_categories_name_unique
+            ON habit_categories (name);
+
+        CREATE TABLE IF NOT EXISTS habits (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            recurrence TEXT NOT NULL,
+            recurrence_days INTEGER,
+            description TEXT,
+            category_id TEXT REFERENCES habit_categories (id),
+            color_hex TEXT
+        );
+        CREATE INDEX IF NOT EXISTS habits_recurrence_days
+            ON habits (recurrence_days);
+
+        CREATE TABLE IF NOT EXISTS habit_instances (
+            id TEXT PRIMARY KEY,
+            habit_id TEXT NOT NULL REFERENCES habits (id),
+            date TEXT NOT NULL,
+            completed INTEGER NOT NULL,
+            note TEXT
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS habit_instances_habit_id_date_unique
+            ON habit_instances (habit_id, date);
+
+        CREATE TABLE IF NOT EXISTS habit_collections (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS habit_collection_habits (
+            habit_collection_id TEXT NOT NULL REFERENCES habit_collections (id),
+            habit_id TEXT NOT NULL REFERENCES habits (id),
+            PRIMARY KEY (habit_collection_id, habit_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS habit_collection_habit_instances (
+            habit_collection_id TEXT NOT NULL REFERENCES habit_collections (id),
+            habit_instance_id TEXT NOT NULL REFERENCES habit_instances (id),
+            PRIMARY KEY (habit_collection_id, habit_instance_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS habit_streaks (
+            habit_id TEXT PRIMARY KEY REFERENCES habits (id),
+            current INTEGER NOT NULL,
+            longest INTEGER NOT NULL,
+            last_completed_date TEXT
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS completion_calendars (
+            habit_id TEXT NOT NULL REFERENCES habits (id),
+            year INTEGER NOT NULL,
+            completions BLOB NOT NULL,
+            notes TEXT NOT NULL,
+            PRIMARY KEY (habit_id, year)
+        ) WITHOUT ROWID;
+    """
+    # The columns of a habit and of its category, for the queries joining them
+    HABIT_COLUMNS = """
+        h.id AS habit_id,
+        h.name AS habit_name,
+        h.recurrence AS habit_recurrence,
+        h.recurrence_days AS habit_recurrence_days,
+        h.description AS habit_description,
+        h.color_hex AS habit_color_hex,
+        c.id AS category_id,
+        c.name AS category_name,
+        c.description AS category_description,
+        c.color_hex AS category_color_hex
+    """
+
+    def __init__(self, database: Union[str, Path] = ":memory:") -> None:
+        """
+        Opens the database and creates the tables and indexes missing from it.
+
+        Args:
+            database: The path of the database file, or ":memory:"
+            for a database that only lives as long as the repository.
+        """
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(str(database), check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+
+        # WAL is not available for the databases in memory, they stay in memory
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        # with WAL, a commit is durable at the next checkpoint
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(self.SCHEMA)
+
+    @property
+    def journal_mode(self) -> str:
+        """
+        Returns the journal mode of the database, "wal" for a database file.
+        """
+        with self._lock:
+            return self._connection.execute("PRAGMA journal_mode").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+        """
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _new_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def _is_unique_violation(error: sqlite3.IntegrityError) -> bool:
+        return str(error).startswith("UNIQUE constraint failed")
+
+    @classmethod
+    def _batches(cls, ids: Iterable[ID]) -> Iterator[List[str]]:
+        ids = list(dict.fromkeys(str(entity_id) for entity_id in ids))
+        for start in range(0, len(ids), cls.QUERY_IDS_BATCH_SIZE):
+            yield ids[start : start + cls.QUERY_IDS_BATCH_SIZE]
+
+    @staticmethod
+    def _placeholders(values: Sequence[object]) -> str:
+        return ", ".join("?" for _ in values)
+
+    def _insert(
+        self,
+        sql: str,
+        parameters: Sequence[object],
+        exists_error: Callable[[], SqliteError],
+    ) -> None:
+        """
+        Runs an insert in its own transaction.
+
+        Raises:
+            SqliteError: The error of exists_error, if a unique constraint fails.
+        """
+        try:
+            with self._connection:
+                self._connection.execute(sql, parameters)
+        except sqlite3.IntegrityError as error:
+            if self._is_unique_violation(error):
+                raise exists_error()
+            raise SqliteError(str(error))
+
+    def _insert_many(
+        self,
+        entities: List[Entity],
+        save: Callable[[Entity], Entity],
+        prepare: Callable[[Entity], Tuple[str, Sequence[object]]],
+    ) -> BulkSaveResult[Entity]:
+        """
+        Inserts several entities with a single executemany, in one transaction.
+
+        If one of the entities is rejected, the transaction is rolled back
+        and the entities are inserted one by one, to report the failures.
+
+        Args:
+            entities: The entities to insert.
+            save: The method saving a single entity.
+            prepare: Returns the insert statement and the parameters of an entity,
+            after it was assigned an identifier.
+        """
+        result: BulkSaveResult[Entity] = BulkSaveResult()
+        if not entities:
+            return result
+
+        with self._lock:
+            previous_ids = [entity.id for entity in entities]
+
+            try:
+                statements = [prepare(entity) for entity in entities]
+                with self._connection:
+                    self._connection.executemany(
+                        statements[0][0],
+                        [parameters for _, parameters in statements],
+                    )
+                result.saved.extend(entities)
+                return result
+            except (sqlite3.IntegrityError, ValueError):
+                # the identifiers are only kept for the entities that are saved
+                for entity, previous_id in zip(entities, previous_ids):
+                    entity.id = previous_id
+
+            for entity in entities:
+                try:
+                    result.saved.append(save(entity))
+                except (SqliteError, ValueError) as error:
+                    result.failed.append(
+                        BulkSaveFailure(entity=entity, error=str(error))
+                    )
+
+        return result
+
+    def _habit_category_from_row(
+        self, row: sqlite3.Row, prefix: str = ""
+    ) -> Union[HabitCategory, None]:
+        if row[f"{prefix}id"] is None:
+            return None
+
+        color_hex = row[f"{prefix}color_hex"]
+        return HabitCategory(
+            name=row[f"{prefix}name"],
+            description=row[f"{prefix}description"],
+            color=Color.intern(color_hex) if color_hex else None,
+            id=row[f"{prefix}id"],
+        )
+
+    def _habit_from_row(self, row: sqlite3.Row, habits: Dict[str, Habit]) -> Habit:
+        """
+        Builds the habit of a row selected with the HABIT_COLUMNS,
+        the habits already built for the query are reused.
+        """
+        habit = habits.get(row["habit_id"])
+        if habit is not None:
+            return habit
+
+        color_hex = row["habit_color_hex"]
+        habit = Habit(
+            name=row["habit_name"],
+            recurrence=RecurrenceFactory.get_recurrence(
+                row["habit_recurrence"], row["habit_recurrence_days"]
+            ),
+            description=row["habit_description"],
+            category=self._habit_category_from_row(row, "category_"),
+            color=Color.intern(color_hex) if color_hex else None,
+            id=row["habit_id"],
+        )
+        habits[habit.id] = habit
+
+        return habit
+
+    @staticmethod
+    def _habit_instance_from_row(row: sqlite3.Row, habit: Habit) -> HabitInstance:
+        return HabitInstance(
+            id=row["habit_instance_id"],
+            habit=habit,
+            date=date.fromisoformat(row["habit_instance_date"]),
+            completed=bool(row["habit_instance_completed"]),
+            note=row["habit_instance_note"],
+        )
+
+    def _prepare_habit(self, habit: Habit) -> Tuple[str, Sequence[object]]:
+        if habit.id is None:
+            habit.id = self._new_id()
+
+        days_mask = habit.recurrence.days_mask
+
+        return (
+            "INSERT INTO habits "
+            "(id, name, recurrence, recurrence_days, description, category_id, "
+            "color_hex) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(habit.id),
+                habit.name,
+                habit.recurrence.name,
+                int(days_mask) if days_mask is not None else None,
+                habit.description,
+                habit.category.id if habit.category else None,
+                habit.color.hex if habit.color else None,
+            ),
+        )
+
+    def save_habit(self, habit: Habit) -> Habit:
+        """
+        Saves a new habit in the repository.
+
+        Args:
+            habit: The habit to be saved, its category must be saved.
+
+        Returns:
+            The saved habit, with the identifier.
+
+        Raises:
+            SqliteHabitExistsError: If the habit already exists.
+        """
+        previous_id = habit.id
+
+        with self._lock:
+            try:
+                self._insert(
+                    *self._prepare_habit(habit),
+                    lambda: SqliteHabitExistsError(
+                        f"Habit with ID {habit.id} already exists."
+                    ),
+                )
+            except SqliteError:
+                habit.id = previous_id
+                raise
+
+        return habit
+
+    def save_habits(self, habits: List[Habit]) -> BulkSaveResult[Habit]:
+        """
+        Saves several new habits in the repository at once.
+
+        Args:
+            habits: The habits to be saved.
+
+        Returns:
+            The saved habits, with their identifier, and the habits that failed.
+        """
+        return self._insert_many(habits, self.save_habit, self._prepare_habit)
+
+    def get_habit_by_id(self, habit_id: ID) -> Union[Habit, None]:
+        """
+        Gets a habit and its category by the identifier of the habit.
+
+        Args:
+            habit_id: The identifier of the habit.
+
+        Returns:
+            The habit, or None if it does not exist.
+        """
+        return next(iter(self.get_habits_by_ids({habit_id})), None)
+
+    def get_habits_by_ids(self, habits_ids: Set[ID]) -> Set[Habit]:
+        """
+        Gets several habits and their categories, with one query per batch
+        of identifiers.
+
+        Args:
+            habits_ids: The identifiers of the habits.
+
+        Returns:
+            The habits found, the identifiers that do not exist are ignored.
+        """
+        habits: Dict[str, Habit] = {}
+
+        with self._lock:
+            for ids in self._batches(habits_ids):
+                for row in self._connection.execute(
+                    f"SELECT {self.HABIT_COLUMNS} FROM habits AS h "
+                    "LEFT JOIN habit_categories AS c ON c.id = h.category_id "
+                    f"WHERE h.id IN ({self._placeholders(ids)})",
+                    ids,
+                ):
+                    self._habit_from_row(row, habits)
+
+        return set(habits.values())
+
+    def get_habits_by_weekdays(self, weekdays: WeekDayMask) -> Set[Habit]:
+        """
+        Gets the habits recurring on any of some days of the week,
+        with a single query on the index of the days of the habits.
+
+        Args:
+            weekdays: The mask of the days of the week.
+
+        Returns:
+            The habits recurring on at least one of the days.
+        """
+        habits: Dict[str, Habit] = {}
+        # the bitwise operators cannot use the index, the masks sharing
+        # a day with the days are listed instead
+        masks = weekdays.overlapping_masks()
+
+        with self._lock:
+            for row in self._connection.execute(
+                f"SELECT {self.HABIT_COLUMNS} FROM habits AS h "
+                "LEFT JOIN habit_categories AS c ON c.id = h.category_id "
+                f"WHERE h.recurrence_days IN ({self._placeholders(masks)})",
+                masks,
+            ):
+                self._habit_from_row(row, habits)
+
+        return set(habits.values())
+
+    def _prepare_habit_category(
+        self, habit_category: HabitCategory
+    ) -> Tuple[str, Sequence[object]]:
+        if habit_category.id is None:
+            habit_category.id = self._new_id()
+
+        return (
+            "INSERT INTO habit_categories (id, name, description, color_hex) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                str(habit_category.id),
+                habit_category.name,
+                habit_category.description,
+                habit_category.color.hex if habit_category.color else None,
+            ),
+        )
+
+    def save_habit_category(self, habit_category: HabitCategory) -> HabitCategory:
+        """
+        Saves a new habit category in the repository.
+
+        Args:
+            habit_category: The habit category to be saved.
+
+        Returns:
+            The saved habit category, with the identifier.
+
+        Raises:
+            SqliteHabitCategoryExistsError: If the habit category already exists,
+            or if another habit category has the same name.
+        """
+        previous_id = habit_category.id
+
+        with self._lock:
+            try:
+                self._insert(
+                    *self._prepare_habit_category(habit_category),
+                    lambda: SqliteHabitCategoryExistsError(
+                        f"Habit category with name {habit_category.name} "
+                        f"already exists."
+                    ),
+                )
+            except SqliteError:
+                habit_category.id = previous_id
+                raise
+
+        return habit_category
+
+    def save_habit_categories(
+        self, habit_categories: List[HabitCategory]
+    ) -> BulkSaveResult[HabitCategory]:
+        """
+        Saves several new habit categories in the repository at once.
+
+        Args:
+            habit_categories: The habit categories to be saved.
+
+        Returns:
+            The saved habit categories, with their identifier,
+            and the habit categories that failed.
+        """
+        return self._insert_many(
+            habit_categories, self.save_habit_category, self._prepare_habit_category
+        )
+
+    def get_habit_category_by_name(
+        self, category_name: str
+    ) -> Union[HabitCategory, None]:
+        """
+        Gets a habit category by its name.
+
+        Args:
+            category_name: The name of the habit category.
+
+        Returns:
+            The habit category, or None if it does not exist.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, name, description, color_hex FROM habit_categories "
+                "WHERE name = ?",
+                (category_name,),
+            ).fetchone()
+
+        return self._habit_category_from_row(row) if row else None
+
+    def _write_habit_collection_members(
+        self, habit_collection: HabitCollection
+    ) -> None:
+        """
+        Writes the habits and the habit instances of a habit collection
+        in the association tables, in the current transaction.
+        """
+        habit_collection_id = str(habit_collection.id)
+
+        self._connection.executemany(
+            "INSERT INTO habit_collection_habits (habit_collection_id, habit_id) "
+            "VALUES (?, ?)",
+            [(habit_collection_id, str(habit.id)) for habit in habit_collection.habits],
+        )
+        self._connection.executemany(
+            "INSERT INTO habit_collection_habit_instances "
+            "(habit_collection_id, habit_instance_id) VALUES (?, ?)",
+            [
+                (habit_collection_id, str(habit_instance.id))
+                for habit_instance in habit_collection.habits_instance
+            ],
+        )
+
+    def save_habit_collection(
+        self, habit_collection: HabitCollection
+    ) -> HabitCollection:
+        """
+        Saves a new habit collection in the repository, in one transaction
+        with its habits and habit instances.
+
+        Args:
+            habit_collection: The habit collection to be saved, its habits
+            and habit instances must be saved.
+
+        Returns:
+            The saved habit collection, with the identifier.
+
+        Raises:
+            SqliteHabitCollectionExistsError: If the habit collection
+            already exists.
+        """
+        previous_id = habit_collection.id
+        if habit_collection.id is None:
+            habit_collection.id = self._new_id()
+
+        with self._lock:
+            try:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT INTO habit_collections (id, name, description) "
+                        "VALUES (?, ?, ?)",
+                        (
+                            str(habit_collection.id),
+                            habit_collection.name,
+                            habit_collection.description,
+                        ),
+                    )
+                    self._write_habit_collection_members(habit_collection)
+            except sqlite3.IntegrityError as error:
+                habit_collection.id = previous_id
+                if self._is_unique_violation(error):
+                    raise SqliteHabitCollectionExistsError(
+                        f"Habit collection with ID {previous_id} already exists."
+                    )
+                raise SqliteError(str(error))
+
+        return habit_collection
+
+    def update_habit_collection(
+        self, habit_collection: HabitCollection
+    ) -> HabitCollection:
+        """
+        Updates an existing habit collection in the repository,
+        its habits and habit instances are replaced.
+
+        Args:
+            habit_collection: The habit collection to be updated.
+
+        Returns:
+            The updated habit collection.
+
+        Raises:
+            ValueError: If the habit collection does not have an ID.
+            SqliteHabitCollectionNotFoundError: If the habit collection
+            does not exist.
+        """
+        if not habit_collection.id:
+            raise ValueError("Habit collection must have an ID to be updated.")
+
+        habit_collection_id = str(habit_collection.id)
+
+        with self._lock:
+            try:
+                with self._connection:
+                    cursor = self._connection.execute(
+                        "UPDATE habit_collections SET name = ?, description = ? "
+                        "WHERE id = ?",
+                        (
+                            habit_collection.name,
+                            habit_collection.description,
+                            habit_collection_id,
+                        ),
+                    )
+                    if cursor.rowcount == 0:
+                        raise SqliteHabitCollectionNotFoundError(
+                            f"Habit collection with ID {habit_collection.id} "
+                            f"does not exist."
+                        )
+
+                    for table in (
+                        "habit_collection_habits",
+                        "habit_collection_habit_instances",
+                    ):
+                        self._connection.execute(
+                            f"DELETE FROM {table} WHERE habit_collection_id = ?",
+                            (habit_collection_id,),
+                        )
+                    self._write_habit_collection_members(habit_collection)
+            except sqlite3.IntegrityError as error:
+                raise SqliteError(str(error))
+
+        return habit_collection
+
+    def get_habit_collection_by_id(
+        self, habit_collection_id: ID
+    ) -> Union[HabitCollection, None]:
+        """
+        Gets a habit collection, its habits and its habit instances
+        with a single query.
+
+        The habits and the habit instances are joined to the habit collection
+        in the same rows, a habit shared by several rows is built once.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+
+        Returns:
+            The habit collection, or None if it does not exist.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT hc.name AS collection_name, "
+                "hc.description AS collection_description, "
+                "m.habit_instance_id, m.habit_instance_date, "
+                "m.habit_instance_completed, m.habit_instance_note, "
+                f"{self.HABIT_COLUMNS} "
+                "FROM habit_collections AS hc "
+                "LEFT JOIN ("
+                "    SELECT habit_collection_id, habit_id, "
+                "    NULL AS habit_instance_id, NULL AS habit_instance_date, "
+                "    NULL AS habit_instance_completed, NULL AS habit_instance_note "
+                "    FROM habit_collection_habits "
+                "    UNION ALL "
+                "    SELECT chi.habit_collection_id, i.habit_id, i.id, i.date, "
+                "    i.completed, i.note "
+                "    FROM habit_collection_habit_instances AS chi "
+                "    JOIN habit_instances AS i ON i.id = chi.habit_instance_id"
+                ") AS m ON m.habit_collection_id = hc.id "
+                "LEFT JOIN habits AS h ON h.id = m.habit_id "
+                "LEFT JOIN habit_categories AS c ON c.id = h.category_id "
+                "WHERE hc.id = ? "
+                # the habit instances of a habit are added to the timeline in order
+                "ORDER BY m.habit_id, m.habit_instance_date",
+                (str(habit_collection_id),),
+            ).fetchall()
+
+        if not rows:
+            return None
+
+        habits: Dict[str, Habit] = {}
+        habit_collection = HabitCollection(
+            name=rows[0]["collection_name"],
+            description=rows[0]["collection_description"],
+            id=str(habit_collection_id),
+        )
+
+        for row in rows:
+            if row["habit_id"] is None:
+                continue
+
+            habit = self._habit_from_row(row, habits)
+            if row["habit_instance_id"] is None:
+                habit_collection.habits.add(habit)
+            else:
+                habit_collection.habits_instance.add(
+                    self._habit_instance_from_row(row, habit)
+                )
+
+        return habit_collection
+
+    def open_habit_collection(
+        self, habit_collection_id: ID
+    ) -> Union[HabitCollection, None]:
+        """
+        Gets a habit collection by identifier, without loading its habits
+        and habit instances.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection to open.
+
+        Returns:
+            The habit collection, or None if it does not exist.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT name, description FROM habit_collections WHERE id = ?",
+                (str(habit_collection_id),),
+            ).fetchone()
+            if row is None:
+                return None
+
+            habits_ids = [
+                habit_row["habit_id"]
+                for habit_row in self._connection.execute(
+                    "SELECT habit_id FROM habit_collection_habits "
+                    "WHERE habit_collection_id = ?",
+                    (str(habit_collection_id),),
+                )
+            ]
+
+        return LazyHabitCollection(
+            name=row["name"],
+            repository=self,
+            habits_ids=habits_ids,
+            description=row["description"],
+            id=str(habit_collection_id),
+        )
+
+    def habit_collection_exists(self, habit_collection_id: ID) -> bool:
+        """
+        Checks if a habit collection exists, without loading it.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+
+        Returns:
+            True if the habit collection exists, else False.
+        """
+        with self._lock:
+            return (
+                self._connection.execute(
+                    "SELECT 1 FROM habit_collections WHERE id = ?",
+                    (str(habit_collection_id),),
+                ).fetchone()
+                is not None
+            )
+
+    def add_habit_instance_to_collection(
+        self, habit_collection_id: ID, habit_instance: HabitInstance
+    ) -> None:
+        """
+        Adds a saved habit instance to a habit collection,
+        adding it twice has no effect.
+
+        Args:
+            habit_collection_id: The identifier of the habit collection.
+            habit_instance: The habit instance to add, it must have an identifier.
+
+        Raises:
+            ValueError: If the habit instance does not have an ID.
+            SqliteHabitCollectionNotFoundError: If the habit collection
+            does not exist.
+        """
+        if habit_instance.id is None:
+            raise ValueError(
+                "Habit instance must have an ID to be added to a habit collection."
+            )
+
+        with self._lock:
+            try:
+                with self._connection:
+                    cursor = self._connection.execute(
+                        "INSERT OR IGNORE INTO habit_collection_habit_instances "
+                        "(habit_collection_id, habit_instance_id) "
+                        "SELECT id, ? FROM habit_collections WHERE id = ?",
+                        (str(habit_instance.id), str(habit_collection_id)),
+                    )
+            except sqlite3.IntegrityError as error:
+                raise SqliteError(str(error))
+
+            # nothing is inserted if the habit collection does not exist,
+            # or if the habit instance is already in it
+            if cursor.rowcount == 0 and not self.habit_collection_exists(
+                habit_collection_id
+            ):
+                raise SqliteHabitCollectionNotFoundError(
+                    f"Habit collection with ID {habit_collection_id} does not exist."
+                )
+
+    def _prepare_habit_instance(
+        self, habit_instance: HabitInstance
+    ) -> Tuple[str, Sequence[object]]:
+        if habit_instance.habit.id is None:
+            raise ValueError("Habit must have an ID to save its habit instances.")
+
+        if habit_instance.id is None:
+            habit_instance.id = self._new_id()
+
+        return (
+            "INSERT INTO habit_instances (id, habit_id, date, completed, note) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                str(habit_instance.id),
+                str(habit_instance.habit.id),
+                habit_instance.date.isoformat(),
+                habit_instance.completed,
+                habit_instance.note,
+            ),
+        )
+
+    def save_habit_instance(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Saves a new habit instance in the repository.
+
+        Args:
+            habit_instance: The habit instance to be saved, its habit must be saved.
+
+        Returns:
+            The saved habit instance, with the identifier.
+
+        Raises:
+            ValueError: If the habit of the habit instance does not have an ID.
+            SqliteHabitExistsError: If the habit instance already exists, or if
+            the habit already has a habit instance on the same date.
+        """
+        previous_id = habit_instance.id
+
+        with self._lock:
+            try:
+                self._insert(
+                    *self._prepare_habit_instance(habit_instance),
+                    lambda: SqliteHabitExistsError(
+                        f"Habit instance with ID {habit_instance.id} of habit "
+                        f"{habit_instance.habit.id} on "
+                        f"{habit_instance.date.isoformat()} already exists."
+                    ),
+                )
+            except SqliteError:
+                habit_instance.id = previous_id
+                raise
+
+        return habit_instance
+
+    def record_check_in(self, habit_instance: HabitInstance) -> HabitInstance:
+        """
+        Records the habit instance of a habit on a date, the check-in.
+
+        The habit instance is upserted on the unique index of the habit
+        and the date with a single statement. The completion and the note
+        of an existing habit instance are replaced, a retried check-in
+        never creates a second habit instance.
+
+        Args:
+            habit_instance: The habit instance to record, its habit must be saved.
+
+        Returns:
+            The recorded habit instance, with the identifier of the habit
+            instance of the habit on this date.
+
+        Raises:
+            ValueError: If the habit of the habit instance does not have an ID.
+        """
+        if habit_instance.habit.id is None:
+            raise ValueError("Habit must have an ID to record a check-in.")
+
+        with self._lock:
+            try:
+                with self._connection:
+                    row = self._connection.execute(
+                        "INSERT INTO habit_instances "
+                        "(id, habit_id, date, completed, note) "
+                        "VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (habit_id, date) DO UPDATE SET "
+                        "completed = excluded.completed, note = excluded.note "
+                        "RETURNING id",
+                        (
+                            self._new_id(),
+                            str(habit_instance.habit.id),
+                            habit_instance.date.isoformat(),
+                            habit_instance.completed,
+                            habit_instance.note,
+                        ),
+                    ).fetchone()
+            except sqlite3.IntegrityError as error:
+                raise SqliteError(str(error))
+
+        habit_instance.id = row["id"]
+
+        return habit_instance
+
+    def save_habit_instances(
+        self, habit_instances: List[HabitInstance]
+    ) -> BulkSaveResult[HabitInstance]:
+        """
+        Saves several new habit instances in the repository at once.
+
+        Args:
+            habit_instances: The habit instances to be saved.
+
+        Returns:
+            The saved habit instances, with their identifier,
+            and the habit instances that failed.
+        """
+        return self._insert_many(
+            habit_instances, self.save_habit_instance, self._prepare_habit_instance
+        )
+
+    def get_habit_instance_by_id(
+        self, habit_instance_id: ID
+    ) -> Union[HabitInstance, None]:
+        """
+        Gets a habit instance, its habit and the category of the habit,
+        with a single query.
+
+        Args:
+            habit_instance_id: The identifier of the habit instance.
+
+        Returns:
+            The habit instance, or None if it does not exist.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {self._habit_instance_columns()}, {self.HABIT_COLUMNS} "
+                "FROM habit_instances AS i "
+                "JOIN habits AS h ON h.id = i.habit_id "
+                "LEFT JOIN habit_categories AS c ON c.id = h.category_id "
+                "WHERE i.id = ?",
+                (str(habit_instance_id),),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return self._habit_instance_from_row(row, self._habit_from_row(row, {}))
+
+    @staticmethod
+    def _habit_instance_columns() -> str:
+        return (
+            "i.id AS habit_instance_id, i.date AS habit_instance_date, "
+            "i.completed AS habit_instance_completed, i.note AS habit_instance_note"
+        )
+
+    def iter_habit_instances(
+        self,
+        habits_ids: Set[ID],
+        start_date: date,
+        end_date: date,
+        batch_size: int = 100,
+        after: Optional[Tuple[date, ID]] = None,
+    ) -> Iterator[HabitInstance]:
+        """
+        Iterates over the habit instances of habits between two dates, included.
+
+        Each batch is a query on the index of the habit and the date,
+        continuing after the last habit instance of the previous batch,
+        no cursor is kept open between the batches.
+
+        Args:
+            habits_ids: The identifiers of the habits.
+            start_date: The first date of the habit instances.
+            end_date: The last date of the habit instances.
+            batch_size: The number of habit instances fetched at once.
+            after: The date and identifier of the habit instance to continue
+            after, to iterate from the start of the date range if None.
+
+        Returns:
+            An iterator over the habit instances, sorted by date and identifier.
+
+        Raises:
+            ValueError: If the batch size is not greater than 0.
+        """
+        if batch_size <= 0:
+            raise ValueError("The batch size must be greater than 0.")
+
+        habits = {str(habit.id): habit for habit in self.get_habits_by_ids(habits_ids)}
+        if not habits:
+            return
+
+        habits_placeholders = self._placeholders(list(habits))
+        position = (after[0].isoformat(), str(after[1])) if after else None
+
+        while True:
+            query = (
+                f"SELECT {self._habit_instance_columns()}, i.habit_id "
+                "FROM habit_instances AS i "
+                f"WHERE i.habit_id IN ({habits_placeholders}) "
+                "AND i.date BETWEEN ? AND ?"
+            )
+            parameters: List[object] = [
+                *habits,
+                start_date.isoformat(),
+                end_date.isoformat(),
+            ]
+
+            if position:
+                # keyset pagination, the position does not depend on an offset
+                query += " AND (i.date > ? OR (i.date = ? AND i.id > ?))"
+                parameters.extend([position[0], position[0], position[1]])
+
+            with self._lock:
+                rows = self._connection.execute(
+                    f"{query} ORDER BY i.date, i.id LIMIT ?",
+                    [*parameters, batch_size],
+                ).fetchall()
+
+            for row in rows:
+                yield self._habit_instance_from_row(row, habits[row["habit_id"]])
+
+            if len(rows) < batch_size:
+                return
+
+            position = (rows[-1]["habit_instance_date"], rows[-1]["habit_instance_id"])
+
+    def get_habit_instances(
+        self, habit_id: ID, start_date: date, end_date: date
+    ) -> List[HabitInstance]:
+        """
+        Gets the habit instances of a habit between two dates, included.
+
+        Args:
+            habit_id: The identifier of the habit.
+            start_date: The first date of the habit instances to get.
+            end_date: The last date of the habit instances to get.
+
+        Returns:
+            The habit instances of the habit in the date range, sorted by date.
+        """
+        return list(self.iter_habit_instances({habit_id}, start_date, end_date))
+
+    def get_habit_streak(self, habit_id: ID) -> Union[HabitStreak, None]:
+        """
+        Gets the streak of a habit.
+
+        Args:
+            habit_id: The identifier of the habit.
+
+        Returns:
+            The streak of the habit, None if no streak was saved for the habit.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT habit_id, current, longest, last_completed_date "
+                "FROM habit_streaks WHERE habit_id = ?",
+                (str(habit_id),),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return HabitStreak(
+            habit_id=row["habit_id"],
+            current=row["current"],
+            longest=row["longest"],
+            last_completed_date=date.fromisoformat(row["last_completed_date"])
+            if row["last_completed_date"]
+            else None,
+        )
+
+    def save_habit_streak(self, habit_streak: HabitStreak) -> HabitStreak:
+        """
+        Saves the streak of a habit, replacing the saved one
+        with a single upsert.
+
+        Args:
+            habit_streak: The streak to save.
+
+        Returns:
+            The saved streak.
+
+        Raises:
+            SqliteError: If the habit of the streak does not exist.
+        """
+        last_completed_date = habit_streak.last_completed_date
+
+        with self._lock:
+            try:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT INTO habit_streaks "
+                        "(habit_id, current, longest, last_completed_date) "
+                        "VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (habit_id) DO UPDATE SET "
+                        "current = excluded.current, longest = excluded.longest, "
+                        "last_completed_date = excluded.last_completed_date",
+                        (
+                            str(habit_streak.habit_id),
+                            habit_streak.current,
+                            habit_streak.longest,
+                            last_completed_date.isoformat()
+                            if last_completed_date
+                            else None,
+                        ),
+                    )
+            except sqlite3.IntegrityError as error:
+                raise SqliteError(str(error))
+
+        return habit_streak
+
+    def save_habit_streak_if_unchanged(
+        self,
+        habit_streak: HabitStreak,
+        previous_habit_streak: Union[HabitStreak, None],
+    ) -> bool:
+        """
+        Saves the streak of a habit only if the saved streak is still
+        the previous one, compared and replaced under the lock.
+
+        Args:
+            habit_streak: The streak to save.
+            previous_habit_streak: The streak read before the update,
+            None if no streak was saved for the habit.
+
+        Returns:
+            True if the streak was saved, False if the saved streak changed.
+
+        Raises:
+            SqliteError: If the habit of the streak does not exist.
+        """
+        with self._lock:
+            if self.get_habit_streak(habit_streak.habit_id) != previous_habit_streak:
+                return False
+
+            self.save_habit_streak(habit_streak)
+
+        return True
+
+    def get_completion_calendar(
+        self, habit_id: ID, year: int
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Gets the completion calendar of a habit for a year.
+
+        Args:
+            habit_id: The identifier of the habit.
+            year: The year of the calendar.
+
+        Returns:
+            The completion calendar, None if no calendar was saved for the year.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT completions, notes FROM completion_calendars "
+                "WHERE habit_id = ? AND year = ?",
+                (str(habit_id), year),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return CompletionCalendar.from_bytes(
+            habit_id=str(habit_id),
+            year=year,
+            data=row["completions"],
+            notes={
+                int(day_of_year): note
+                for day_of_year, note in json.loads(row["notes"]).items()
+            },
+        )
+
+    def save_completion_calendar(
+        self, completion_calendar: CompletionCalendar
+    ) -> CompletionCalendar:
+        """
+        Saves the completion calendar of a habit for a year, replacing
+        the saved one with a single upsert. The completions are stored
+        in a single blob, the notes as a JSON object.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            The saved completion calendar.
+
+        Raises:
+            SqliteError: If the habit of the completion calendar does not exist.
+        """
+        with self._lock:
+            try:
+                with self._connection:
+                    self._connection.execute(
+                        "INSERT INTO completion_calendars "
+                        "(habit_id, year, completions, notes) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (habit_id, year) DO UPDATE SET "
+                        "completions = excluded.completions, notes = excluded.notes",
+                        (
+                            str(completion_calendar.habit_id),
+                            completion_calendar.year,
+                            completion_calendar.to_bytes(),
+                            json.dumps(completion_calendar.notes),
+                        ),
+                    )
+            except sqlite3.IntegrityError as error:
+                raise SqliteError(str(error))
+
+        return completion_calendar
+
+    def save_completion_calendar_if_absent(
+        self, completion_calendar: CompletionCalendar
+    ) -> bool:
+        """
+        Saves the completion calendar of a habit for a year only if no calendar
+        was saved for the year, with a single insert ignoring the conflict.
+
+        Args:
+            completion_calendar: The completion calendar to save.
+
+        Returns:
+            True if the calendar was saved, False if a calendar was already saved.
+
+        Raises:
+            SqliteError: If the habit of the completion calendar does not exist.
+        """
+        with self._lock:
+            try:
+                with self._connection:
+                    cursor = self._connection.execute(
+                        "INSERT INTO completion_calendars "
+                        "(habit_id, year, completions, notes) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (habit_id, year) DO NOTHING",
+                        (
+                            str(completion_calendar.habit_id),
+                            completion_calendar.year,
+                            completion_calendar.to_bytes(),
+                            json.dumps(completion_calendar.notes),
+                        ),
+                    )
+            except sqlite3.IntegrityError as error:
+                raise SqliteError(str(error))
+
+        return bool(cursor.rowcount)
+
+    def record_completion(
+        self, habit_instance: HabitInstance
+    ) -> Union[CompletionCalendar, None]:
+        """
+        Records the completion and the note of a habit instance in the saved
+        completion calendar of its year. The calendar is read and written
+        under the lock of the repository, no other write comes in between.
+
+        Args:
+            habit_instance: The habit instance, its habit must be saved.
+
+        Returns:
+            The updated completion calendar, None if no calendar was saved
+            for the year.
+        """
+        with self._lock:
+            completion_calendar = self.get_completion_calendar(
+                habit_instance.habit.id, habit_instance.date.year
+            )
+            if completion_calendar is None:
+                return None
+
+            completion_calendar.record(habit_instance)
+
+            return self.save_completion_calendar(completion_calendar)
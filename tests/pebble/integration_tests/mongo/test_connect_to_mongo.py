@@ -19,6 +19,7 @@ def test_mongo_connection() -> None:
 
     mongo_client = MongoConnectionFactory.get_mongo_client()
     assert mongo_client is not None
+    MongoConnectionFactory.check_connection(mongo_client)
     assert mongo_client.server_info() is not None
 
 
@@ -0,0 +1,66 @@
+import datetime
+from typing import Iterator
+
+import pytest
+from bson import ObjectId
+
+from pebble.interface_adapters.factories import MongoConnectionFactory
+from pebble.interface_adapters.repositories import MongoHabitRepository
+
+
+class IntegrationMongoHabitRepository(MongoHabitRepository):
+    # Keep the data of the tests away from the application database
+    DATABASE_NAME = "pebble_integration_tests"
+
+
+def _stages(plan: dict) -> Iterator[str]:
+    # Walk the tree of stages of a query plan
+    yield plan.get("stage")
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for input_stage in plan.get("inputStages", []):
+        yield from _stages(input_stage)
+
+
+@pytest.fixture
+def repository() -> Iterator[MongoHabitRepository]:
+    mongo_client = MongoConnectionFactory.get_mongo_client()
+    repository = IntegrationMongoHabitRepository(mongo_client)
+    repository.ensure_indexes()
+    yield repository
+    mongo_client.drop_database(IntegrationMongoHabitRepository.DATABASE_NAME)
+
+
+@pytest.mark.parametrize(
+    "collection_name, query",
+    [
+        (
+            MongoHabitRepository.HABIT_CATEGORIES_COLLECTION_NAME,
+            {"name": "Test Category"},
+        ),
+        (
+            MongoHabitRepository.HABIT_INSTANCE_COLLECTION_NAME,
+            {"habit_id": {"$in": [str(ObjectId()), str(ObjectId())]}},
+        ),
+        (
+            MongoHabitRepository.HABIT_INSTANCE_COLLECTION_NAME,
+            {
+                "habit_id": str(ObjectId()),
+                "date": {"$gte": datetime.datetime(2023, 1, 1)},
+            },
+        ),
+    ],
+)
+def test_hot_queries_use_indexes(
+    repository: MongoHabitRepository, collection_name: str, query: dict
+) -> None:
+    """
+    Test that the hot queries of the repository never scan a whole collection.
+    """
+    explanation = repository.db[collection_name].find(query).explain()
+
+    stages = list(_stages(explanation["queryPlanner"]["winningPlan"]))
+
+    assert "COLLSCAN" not in stages
+    assert "IXSCAN" in stages
@@ -1,6 +1,8 @@
 import pytest
 
 from pebble.application.factories import InvalidRecurrenceError, RecurrenceFactory
+from pebble.domain.entities import BiWeekly, Weekly
+from pebble.domain.value_objects import WeekDayMask, WeekDays
 
 
 def test_invalid_days_of_week() -> None:
@@ -8,3 +10,42 @@ def test_invalid_days_of_week() -> None:
         RecurrenceFactory.get_recurrence_from_strings(
             "Weekly", days_of_week={"invalid"}
         )
+
+
+def test_get_recurrence_from_mask() -> None:
+    recurrence = RecurrenceFactory.get_recurrence(
+        "Bi-Weekly", WeekDayMask.MONDAY | WeekDayMask.THURSDAY
+    )
+
+    assert recurrence == BiWeekly({WeekDays.MONDAY, WeekDays.THURSDAY})
+    assert RecurrenceFactory.get_recurrence("Weekly", None) == Weekly()
+    assert RecurrenceFactory.get_recurrence("Weekly", 0).days_mask is None
+    assert RecurrenceFactory.get_recurrence_from_strings(
+        "Bi-Weekly", {"Thursday", "Monday"}
+    ) == (recurrence)
+
+    with pytest.raises(InvalidRecurrenceError):
+        RecurrenceFactory.get_recurrence("Weekly", 128)
+
+
+def test_recurrences_are_canonical() -> None:
+    RecurrenceFactory.clear_cache()
+
+    recurrence = RecurrenceFactory.get_recurrence_from_strings(
+        "Bi-Weekly", {"Monday", "Friday"}
+    )
+
+    # the same recurrence is shared, whether built from names or from a mask
+    assert recurrence is RecurrenceFactory.get_recurrence_from_strings(
+        "Bi-Weekly", {"Friday", "Monday"}
+    )
+    assert recurrence is RecurrenceFactory.get_recurrence(
+        "Bi-Weekly", WeekDayMask.MONDAY | WeekDayMask.FRIDAY
+    )
+    assert RecurrenceFactory.get_recurrence(
+        "daily", None
+    ) is RecurrenceFactory.get_recurrence_from_strings("Daily", {"Monday"})
+    assert RecurrenceFactory.get_recurrence(
+        "Weekly", 0
+    ) is RecurrenceFactory.get_recurrence("Weekly", None)
+    assert RecurrenceFactory.cache_info().size == 3
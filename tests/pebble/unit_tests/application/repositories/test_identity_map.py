@@ -0,0 +1,63 @@
+import pytest
+
+from pebble.application.repositories import IdentityMap
+from pebble.domain.entities import Daily, Habit, HabitCategory
+
+
+def test_identity_map_add_and_get() -> None:
+    identity_map = IdentityMap()
+    habit = Habit(name="Test Habit", recurrence=Daily(), id="1")
+
+    assert identity_map.add(habit) is habit
+    assert identity_map.get(Habit, "1") is habit
+    assert len(identity_map) == 1
+
+
+def test_identity_map_keeps_first_loaded_entity() -> None:
+    identity_map = IdentityMap()
+    habit = Habit(name="Test Habit", recurrence=Daily(), id="1")
+    habit_copy = Habit(name="Test Habit", recurrence=Daily(), id="1")
+
+    identity_map.add(habit)
+
+    assert identity_map.add(habit_copy) is habit
+    assert identity_map.get(Habit, "1") is habit
+
+
+def test_identity_map_is_keyed_by_type() -> None:
+    identity_map = IdentityMap()
+    habit = Habit(name="Test Habit", recurrence=Daily(), id="1")
+    habit_category = HabitCategory(name="Test Category", id="1")
+
+    identity_map.add(habit)
+    identity_map.add(habit_category)
+
+    assert identity_map.get(Habit, "1") is habit
+    assert identity_map.get(HabitCategory, "1") is habit_category
+
+
+def test_identity_map_get_missing_entity() -> None:
+    identity_map = IdentityMap()
+
+    assert identity_map.get(Habit, "1") is None
+    assert identity_map.get(Habit, None) is None
+
+
+def test_identity_map_remove_and_clear() -> None:
+    identity_map = IdentityMap()
+    identity_map.add(Habit(name="Habit 1", recurrence=Daily(), id="1"))
+    identity_map.add(Habit(name="Habit 2", recurrence=Daily(), id="2"))
+
+    identity_map.remove(Habit, "1")
+    assert identity_map.get(Habit, "1") is None
+    assert len(identity_map) == 1
+
+    identity_map.clear()
+    assert len(identity_map) == 0
+
+
+def test_identity_map_entity_without_id() -> None:
+    identity_map = IdentityMap()
+
+    with pytest.raises(ValueError):
+        identity_map.add(Habit(name="Test Habit", recurrence=Daily()))
@@ -0,0 +1,23 @@
+import datetime
+
+from pebble.application.serializers import CompletionCalendarKVSerializer
+from pebble.domain.entities import CompletionCalendar
+
+
+def test_completion_calendar_kv_serializer() -> None:
+    completion_calendar = CompletionCalendar(habit_id="habit1", year=2025)
+    completion_calendar.set_completed(datetime.date(2025, 1, 3), True, note="Done")
+
+    serialized_data = CompletionCalendarKVSerializer.to_dict(completion_calendar)
+
+    assert serialized_data == {
+        "_id": "habit1:2025",
+        "habit_id": "habit1",
+        "year": 2025,
+        "completions": completion_calendar.to_bytes(),
+        "notes": {"2": "Done"},
+    }
+    assert isinstance(serialized_data["completions"], bytes)
+    assert (
+        CompletionCalendarKVSerializer.from_dict(serialized_data) == completion_calendar
+    )
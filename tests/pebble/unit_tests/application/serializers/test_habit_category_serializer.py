@@ -78,3 +78,26 @@ def test_habit_category_serializer_with_id() -> None:
     assert serialized_category[serializer.DataKeys.DESCRIPTION] == category.description
     assert serialized_category[serializer.DataKeys.COLOR_HEX] == category.color.hex
     assert serialized_category[serializer.DataKeys.ID] == category.id
+
+
+def test_habit_category_serializer_batch() -> None:
+    categories = [
+        HabitCategory(
+            name=f"Category {index}",
+            description=None,
+            color=Color(hex="#FF5733"),
+            id=str(index),
+        )
+        for index in range(3)
+    ]
+
+    data = HabitCategoryKVSerializer.to_dicts(categories)
+
+    assert data == [
+        HabitCategoryKVSerializer.to_dict(category) for category in categories
+    ]
+    assert HabitCategoryKVSerializer.from_dicts(data) == categories
+    # the colors of the categories are shared
+    assert {
+        id(category.color) for category in HabitCategoryKVSerializer.from_dicts(data)
+    } == {id(Color.intern("#FF5733"))}
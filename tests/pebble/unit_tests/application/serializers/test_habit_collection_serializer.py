@@ -1,3 +1,5 @@
+from datetime import date
+
 from pebble.application.serializers.habit_collections_kv_serializer import (
     HabitCollectionsKVSerializer,
 )
@@ -11,7 +13,7 @@ def test_habit_collections_kv_serializer() -> None:
     # Create sample Habit and HabitInstance objects
     habit = Habit(name=Name("Drink Water"), recurrence=None, id=ID("habit1"))
     habit_instance = HabitInstance(
-        habit=habit, date=None, completed=True, id=ID("instance1")
+        habit=habit, date=date(2024, 1, 1), completed=True, id=ID("instance1")
     )
 
     # Create a HabitCollection object
@@ -0,0 +1,65 @@
+import datetime
+
+from pebble.application.serializers import HabitInstanceBucketKVSerializer
+from pebble.domain.entities.habit import Habit
+from pebble.domain.entities.habit_instance import HabitInstance
+from pebble.domain.value_objects.types import ID, Name
+
+
+def test_habit_instance_bucket_kv_serializer() -> None:
+    habit = Habit(name=Name("Drink Water"), recurrence=None, id=ID("habit1"))
+    habit_instance = HabitInstance(
+        habit=habit,
+        date=datetime.date(2023, 10, 1),
+        completed=True,
+        note="Completed successfully",
+    )
+
+    assert HabitInstanceBucketKVSerializer.to_dict(habit_instance) == {
+        "c": True,
+        "n": "Completed successfully",
+    }
+    assert (
+        HabitInstanceBucketKVSerializer.bucket_id(habit.id, habit_instance.date)
+        == "habit1:2023-10"
+    )
+    assert HabitInstanceBucketKVSerializer.day_field(habit_instance.date) == "days.01"
+
+    bucket_data = {
+        "_id": "habit1:2023-10",
+        "habit_id": "habit1",
+        "month": "2023-10",
+        "days": {
+            "15": {"c": False},
+            "01": HabitInstanceBucketKVSerializer.to_dict(habit_instance),
+        },
+    }
+
+    habit_instances = HabitInstanceBucketKVSerializer.from_dict(bucket_data, habit)
+
+    assert [
+        (instance.id, instance.date, instance.completed, instance.note)
+        for instance in habit_instances
+    ] == [
+        ("habit1:2023-10-01", datetime.date(2023, 10, 1), True, habit_instance.note),
+        ("habit1:2023-10-15", datetime.date(2023, 10, 15), False, None),
+    ]
+
+    # only the days in the date range are kept
+    habit_instances = HabitInstanceBucketKVSerializer.from_dict(
+        bucket_data, habit, start_date=datetime.date(2023, 10, 2)
+    )
+    assert [instance.date for instance in habit_instances] == [
+        datetime.date(2023, 10, 15)
+    ]
+
+
+def test_parse_habit_instance_id() -> None:
+    assert HabitInstanceBucketKVSerializer.parse_habit_instance_id(
+        "habit1:2023-10-01"
+    ) == ("habit1", datetime.date(2023, 10, 1))
+    assert HabitInstanceBucketKVSerializer.parse_habit_instance_id("instance1") is None
+    assert (
+        HabitInstanceBucketKVSerializer.parse_habit_instance_id("habit1:2023-13-01")
+        is None
+    )
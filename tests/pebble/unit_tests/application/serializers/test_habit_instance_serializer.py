@@ -27,7 +27,7 @@ def test_habit_instance_kv_serializer() -> None:
     # Assert the serialized data
     assert serialized_data == {
         "habit_id": "habit1",
-        "date": "2023-10-01",
+        "date": datetime.datetime(2023, 10, 1),
         "completed": True,
         "note": "Completed successfully",
         "_id": "instance1",
@@ -41,3 +41,64 @@ def test_habit_instance_kv_serializer() -> None:
 
     # Assert the deserialized object matches the original
     assert deserialized_instance == habit_instance
+
+
+def test_habit_instance_kv_serializer_legacy_date() -> None:
+    habit = Habit(name=Name("Drink Water"), recurrence=None, id=ID("habit1"))
+
+    # the dates were stored as ISO strings by the previous versions
+    habit_instance = HabitInstanceKVSerializer.from_dict(
+        {
+            "habit_id": "habit1",
+            "date": "2023-10-01",
+            "completed": False,
+            "_id": "instance1",
+        },
+        habit=habit,
+    )
+
+    assert habit_instance.date == datetime.date(2023, 10, 1)
+
+
+def test_habit_instance_kv_serializer_batch() -> None:
+    habits = {
+        habit_id: Habit(name=Name(habit_id), recurrence=None, id=ID(habit_id))
+        for habit_id in ("habit1", "habit2")
+    }
+    habit_instances = [
+        HabitInstance(
+            habit=habit,
+            date=datetime.date(2023, 10, day),
+            completed=day % 2 == 0,
+            note="Note" if day == 1 else None,
+            id=ID(f"{habit.id}-{day}"),
+        )
+        for habit in habits.values()
+        for day in range(1, 4)
+    ]
+
+    data = HabitInstanceKVSerializer.to_dicts(habit_instances)
+
+    # the batch gives the same data as the habit instances one by one
+    assert data == [
+        HabitInstanceKVSerializer.to_dict(habit_instance)
+        for habit_instance in habit_instances
+    ]
+    # the habit of each habit instance is found by identifier
+    assert HabitInstanceKVSerializer.from_dicts(data, habits) == habit_instances
+
+    # the dates stored as ISO strings by the previous versions are still read
+    data[0]["date"] = "2023-10-01"
+    assert HabitInstanceKVSerializer.from_dicts(data[:1], habits) == habit_instances[:1]
+
+
+def test_habit_instance_kv_serializer_without_id() -> None:
+    habit = Habit(name=Name("Drink Water"), recurrence=None, id=ID("habit1"))
+    habit_instance = HabitInstance(
+        habit=habit, date=datetime.date(2023, 10, 1), completed=True
+    )
+
+    serialized_data = HabitInstanceKVSerializer.to_dict(habit_instance)
+
+    assert "_id" not in serialized_data
+    assert HabitInstanceKVSerializer.from_dict(serialized_data, habit).id is None
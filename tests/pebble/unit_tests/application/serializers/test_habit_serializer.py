@@ -1,6 +1,8 @@
+import pytest
+
 from pebble.application.serializers import HabitKVSerializer
-from pebble.domain.entities import Daily, Habit, HabitCategory
-from pebble.domain.value_objects import Color
+from pebble.domain.entities import BiWeekly, Daily, Habit, HabitCategory, Weekly
+from pebble.domain.value_objects import Color, WeekDayMask, WeekDays
 
 
 def test_habit_serializer() -> None:
@@ -29,17 +31,8 @@ def test_habit_serializer() -> None:
     # Check that the serialized data matches the expected format
     assert serialized_habit[serializer.DataKeys.NAME] == habit.name
     assert serialized_habit[serializer.DataKeys.RECURRENCE] == "Daily"
-    assert len(serialized_habit[serializer.DataKeys.RECURRENCE_DAYS]) == 7
-    for day in serialized_habit[serializer.DataKeys.RECURRENCE_DAYS]:
-        assert day in [
-            "Monday",
-            "Tuesday",
-            "Wednesday",
-            "Thursday",
-            "Friday",
-            "Saturday",
-            "Sunday",
-        ]
+    # the days of the week are stored as a mask, all the days for a daily habit
+    assert serialized_habit[serializer.DataKeys.RECURRENCE_DAYS] == 0b1111111
     assert serialized_habit[serializer.DataKeys.DESCRIPTION] == habit.description
     assert serialized_habit[serializer.DataKeys.CATEGORY_ID] == habit.category.id
     assert serialized_habit[serializer.DataKeys.COLOR_HEX] == habit.color.hex
@@ -73,18 +66,58 @@ def test_habit_serializer_with_id() -> None:
     # Check that the serialized data matches the expected format
     assert serialized_habit[serializer.DataKeys.NAME] == habit.name
     assert serialized_habit[serializer.DataKeys.RECURRENCE] == "Daily"
-    assert len(serialized_habit[serializer.DataKeys.RECURRENCE_DAYS]) == 7
-    for day in serialized_habit[serializer.DataKeys.RECURRENCE_DAYS]:
-        assert day in [
-            "Monday",
-            "Tuesday",
-            "Wednesday",
-            "Thursday",
-            "Friday",
-            "Saturday",
-            "Sunday",
-        ]
+    # the days of the week are stored as a mask, all the days for a daily habit
+    assert serialized_habit[serializer.DataKeys.RECURRENCE_DAYS] == 0b1111111
     assert serialized_habit[serializer.DataKeys.DESCRIPTION] == habit.description
     assert serialized_habit[serializer.DataKeys.CATEGORY_ID] == habit.category.id
     assert serialized_habit[serializer.DataKeys.COLOR_HEX] == habit.color.hex
     assert serialized_habit[serializer.DataKeys.ID] == habit.id
+
+
+def test_habit_serializer_recurrence_days() -> None:
+    weekly_habit = Habit(name="Run", recurrence=Weekly())
+    bi_weekly_habit = Habit(
+        name="Swim", recurrence=BiWeekly({WeekDays.MONDAY, WeekDays.SUNDAY})
+    )
+
+    # the days of the week that are not set are not stored as a mask
+    assert HabitKVSerializer.to_dict(weekly_habit)["recurrence_days"] is None
+    assert HabitKVSerializer.to_dict(bi_weekly_habit)["recurrence_days"] == 65
+
+    assert HabitKVSerializer.days_from_value(None) is None
+    assert HabitKVSerializer.days_from_value(65) == 65
+    # the days of the week were stored as a list of names by older versions
+    assert (
+        HabitKVSerializer.days_from_value(["Sunday", "Monday"])
+        == WeekDayMask.MONDAY | WeekDayMask.SUNDAY
+    )
+    with pytest.raises(ValueError):
+        HabitKVSerializer.days_from_value(["Someday"])
+
+
+def test_habit_serializer_from_dict() -> None:
+    category = HabitCategory(
+        name="Test Category",
+        description="This is a test category",
+        color=Color(hex="#FF5733"),
+        id="123456",
+    )
+    habits = [
+        Habit(
+            name="Swim",
+            recurrence=BiWeekly({WeekDays.MONDAY, WeekDays.SUNDAY}),
+            description="In the lake",
+            category=category,
+            color=Color(hex="#FF5733"),
+            id="1",
+        ),
+        # a habit without category nor color
+        Habit(name="Run", recurrence=Daily(), id="2"),
+    ]
+
+    data = HabitKVSerializer.to_dicts(habits)
+
+    assert data == [HabitKVSerializer.to_dict(habit) for habit in habits]
+    assert HabitKVSerializer.from_dict(data[0], category) == habits[0]
+    # the category of each habit is found by identifier
+    assert HabitKVSerializer.from_dicts(data, {category.id: category}) == habits
@@ -0,0 +1,32 @@
+import datetime
+
+from pebble.application.serializers import HabitStreakKVSerializer
+from pebble.domain.entities import HabitStreak
+
+
+def test_habit_streak_kv_serializer() -> None:
+    habit_streak = HabitStreak(
+        habit_id="habit1",
+        current=2,
+        longest=5,
+        last_completed_date=datetime.date(2025, 1, 2),
+    )
+
+    serialized_data = HabitStreakKVSerializer.to_dict(habit_streak)
+
+    assert serialized_data == {
+        "_id": "habit1",
+        "current": 2,
+        "longest": 5,
+        "last_completed_date": datetime.datetime(2025, 1, 2),
+    }
+    assert HabitStreakKVSerializer.from_dict(serialized_data) == habit_streak
+
+
+def test_habit_streak_kv_serializer_without_completion() -> None:
+    habit_streak = HabitStreak(habit_id="habit1")
+
+    assert (
+        HabitStreakKVSerializer.from_dict(HabitStreakKVSerializer.to_dict(habit_streak))
+        == habit_streak
+    )
@@ -1,8 +1,21 @@
 from dataclasses import dataclass
-from typing import Any, List, Union
-
-from pebble.application.repositories import HabitRepository
-from pebble.domain.entities import Habit, HabitCategory, HabitCollection, HabitInstance
+from datetime import date
+from typing import Any, AsyncIterator, Iterator, List, Optional, Set, Tuple, Union
+
+from pebble.application.repositories import (
+    AsyncHabitRepository,
+    BulkSaveResult,
+    HabitRepository,
+)
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+    HabitStreak,
+)
+from pebble.domain.value_objects import WeekDayMask
 from pebble.domain.value_objects.types import ID
 
 
@@ -18,6 +31,8 @@ class MockRepository(HabitRepository):
         self.categories = []
         self.habit_collections = []
         self.habit_instances = []
+        self.habit_streaks = {}
+        self.completion_calendars = {}
 
         self.save_habit_calls = []
         self.save_habit_category_calls = []
@@ -28,6 +43,10 @@ class MockRepository(HabitRepository):
         self.save_habit_instances_calls = []
         self.get_habit_collection_by_id_calls = []
         self.update_habit_collection_calls = []
+        self.habit_collection_exists_calls = []
+        self.add_habit_instance_to_collection_calls = []
+        self.record_check_in_calls = []
+        self.save_habit_streak_calls = []
 
     def save_habit(self, habit: Habit) -> Habit:
         habit.id = ID(len(self.habits) + 1)
@@ -37,6 +56,9 @@ class MockRepository(HabitRepository):
 
         return habit
 
+    def save_habits(self, habits: List[Habit]) -> BulkSaveResult[Habit]:
+        return BulkSaveResult(saved=[self.save_habit(habit) for habit in habits])
+
     def get_habits_by_ids(self, habits_ids: set[ID]) -> set[Habit]:
         habits = {habit for habit in self.habits if habit.id in habits_ids}
 
@@ -44,6 +66,13 @@ class MockRepository(HabitRepository):
 
         return habits
 
+    def get_habits_by_weekdays(self, weekdays: WeekDayMask) -> set[Habit]:
+        return {
+            habit
+            for habit in self.habits
+            if (habit.recurrence.days_mask or 0) & weekdays
+        }
+
     def save_habit_category(self, habit_category: HabitCategory) -> HabitCategory:
         habit_category.id = ID(str(len(self.categories) + 1))
         self.categories.append(habit_category)
@@ -54,6 +83,16 @@ class MockRepository(HabitRepository):
 
         return habit_category
 
+    def save_habit_categories(
+        self, habit_categories: List[HabitCategory]
+    ) -> BulkSaveResult[HabitCategory]:
+        return BulkSaveResult(
+            saved=[
+                self.save_habit_category(habit_category)
+                for habit_category in habit_categories
+            ]
+        )
+
     def get_habit_category_by_name(
         self, category_name: str
     ) -> Union[HabitCategory, None]:
@@ -96,6 +135,33 @@ class MockRepository(HabitRepository):
 
         return habit_collection_to_return
 
+    def open_habit_collection(self, habit_collection_id: ID) -> HabitCollection:
+        return self.get_habit_collection_by_id(habit_collection_id)
+
+    def habit_collection_exists(self, habit_collection_id: ID) -> bool:
+        exists = any(
+            habit_collection.id == habit_collection_id
+            for habit_collection in self.habit_collections
+        )
+
+        self.habit_collection_exists_calls.append(
+            Call(args=[habit_collection_id], return_value=exists)
+        )
+
+        return exists
+
+    def add_habit_instance_to_collection(
+        self, habit_collection_id: ID, habit_instance: HabitInstance
+    ) -> None:
+        for habit_collection in self.habit_collections:
+            if habit_collection.id == habit_collection_id:
+                habit_collection.habits_instance.add(habit_instance)
+                break
+
+        self.add_habit_instance_to_collection_calls.append(
+            Call(args=[habit_collection_id, habit_instance], return_value=None)
+        )
+
     def get_habit_by_id(self, habit_id: ID) -> Habit:
         habit_to_return = None
         for habit in self.habits:
@@ -117,6 +183,39 @@ class MockRepository(HabitRepository):
 
         return habit_instance
 
+    def record_check_in(self, habit_instance: HabitInstance) -> HabitInstance:
+        recorded_habit_instance = next(
+            (
+                hi
+                for hi in self.habit_instances
+                if hi.habit.id == habit_instance.habit.id
+                and hi.date == habit_instance.date
+            ),
+            None,
+        )
+
+        if recorded_habit_instance is None:
+            recorded_habit_instance = self.save_habit_instance(habit_instance)
+        else:
+            recorded_habit_instance.completed = habit_instance.completed
+            recorded_habit_instance.note = habit_instance.note
+
+        self.record_check_in_calls.append(
+            Call(args=[habit_instance], return_value=recorded_habit_instance)
+        )
+
+        return recorded_habit_instance
+
+    def save_habit_instances(
+        self, habit_instances: List[HabitInstance]
+    ) -> BulkSaveResult[HabitInstance]:
+        return BulkSaveResult(
+            saved=[
+                self.save_habit_instance(habit_instance)
+                for habit_instance in habit_instances
+            ]
+        )
+
     def update_habit_collection(
         self, habit_collection: HabitCollection
     ) -> HabitCollection:
@@ -139,3 +238,214 @@ class MockRepository(HabitRepository):
                 break
 
         return habit_instance_to_return
+
+    def iter_habit_instances(
+        self,
+        habits_ids: Set[ID],
+        start_date: date,
+        end_date: date,
+        batch_size: int = 100,
+        after: Optional[Tuple[date, ID]] = None,
+    ) -> Iterator[HabitInstance]:
+        habit_instances = sorted(
+            (
+                habit_instance
+                for habit_instance in self.habit_instances
+                if habit_instance.habit.id in habits_ids
+                and start_date <= habit_instance.date <= end_date
+            ),
+            key=lambda habit_instance: (habit_instance.date, str(habit_instance.id)),
+        )
+
+        for habit_instance in habit_instances:
+            if after and (habit_instance.date, str(habit_instance.id)) <= (
+                after[0],
+                str(after[1]),
+            ):
+                continue
+            yield habit_instance
+
+    def get_habit_streak(self, habit_id: ID) -> Union[HabitStreak, None]:
+        return self.habit_streaks.get(habit_id)
+
+    def save_habit_streak(self, habit_streak: HabitStreak) -> HabitStreak:
+        self.habit_streaks[habit_streak.habit_id] = habit_streak
+
+        self.save_habit_streak_calls.append(
+            Call(args=[habit_streak], return_value=habit_streak)
+        )
+
+        return habit_streak
+
+    def save_habit_streak_if_unchanged(
+        self,
+        habit_streak: HabitStreak,
+        previous_habit_streak: Union[HabitStreak, None],
+    ) -> bool:
+        if self.habit_streaks.get(habit_streak.habit_id) != previous_habit_streak:
+            return False
+
+        self.save_habit_streak(habit_streak)
+
+        return True
+
+    def get_completion_calendar(
+        self, habit_id: ID, year: int
+    ) -> Union[CompletionCalendar, None]:
+        return self.completion_calendars.get((habit_id, year))
+
+    def save_completion_calendar(
+        self, completion_calendar: CompletionCalendar
+    ) -> CompletionCalendar:
+        self.completion_calendars[
+            (completion_calendar.habit_id, completion_calendar.year)
+        ] = completion_calendar
+
+        return completion_calendar
+
+    def save_completion_calendar_if_absent(
+        self, completion_calendar: CompletionCalendar
+    ) -> bool:
+        key = (completion_calendar.habit_id, completion_calendar.year)
+        if key in self.completion_calendars:
+            return False
+
+        self.completion_calendars[key] = completion_calendar
+
+        return True
+
+    def record_completion(
+        self, habit_instance: HabitInstance
+    ) -> Union[CompletionCalendar, None]:
+        completion_calendar = self.completion_calendars.get(
+            (habit_instance.habit.id, habit_instance.date.year)
+        )
+        if completion_calendar is not None:
+            completion_calendar.record(habit_instance)
+
+        return completion_calendar
+
+
+class AsyncMockRepository(AsyncHabitRepository):
+    """
+    Awaitable version of the MockRepository, it records the calls
+    on the MockRepository it wraps.
+    """
+
+    def __init__(self) -> None:
+        self.repository = MockRepository()
+
+    async def save_habit(self, habit: Habit) -> Habit:
+        return self.repository.save_habit(habit)
+
+    async def save_habits(self, habits: List[Habit]) -> BulkSaveResult[Habit]:
+        return self.repository.save_habits(habits)
+
+    async def get_habits_by_ids(self, habits_ids: set[ID]) -> set[Habit]:
+        return self.repository.get_habits_by_ids(habits_ids)
+
+    async def get_habits_by_weekdays(self, weekdays: WeekDayMask) -> set[Habit]:
+        return self.repository.get_habits_by_weekdays(weekdays)
+
+    async def save_habit_category(self, habit_category: HabitCategory) -> HabitCategory:
+        return self.repository.save_habit_category(habit_category)
+
+    async def save_habit_categories(
+        self, habit_categories: List[HabitCategory]
+    ) -> BulkSaveResult[HabitCategory]:
+        return self.repository.save_habit_categories(habit_categories)
+
+    async def get_habit_category_by_name(
+        self, category_name: str
+    ) -> Union[HabitCategory, None]:
+        return self.repository.get_habit_category_by_name(category_name)
+
+    async def save_habit_collection(
+        self, habit_collection: HabitCollection
+    ) -> HabitCollection:
+        return self.repository.save_habit_collection(habit_collection)
+
+    async def get_habit_collection_by_id(
+        self, habit_collection_id: ID
+    ) -> HabitCollection:
+        return self.repository.get_habit_collection_by_id(habit_collection_id)
+
+    async def habit_collection_exists(self, habit_collection_id: ID) -> bool:
+        return self.repository.habit_collection_exists(habit_collection_id)
+
+    async def add_habit_instance_to_collection(
+        self, habit_collection_id: ID, habit_instance: HabitInstance
+    ) -> None:
+        return self.repository.add_habit_instance_to_collection(
+            habit_collection_id, habit_instance
+        )
+
+    async def get_habit_by_id(self, habit_id: ID) -> Habit:
+        return self.repository.get_habit_by_id(habit_id)
+
+    async def save_habit_instance(self, habit_instance: HabitInstance) -> HabitInstance:
+        return self.repository.save_habit_instance(habit_instance)
+
+    async def record_check_in(self, habit_instance: HabitInstance) -> HabitInstance:
+        return self.repository.record_check_in(habit_instance)
+
+    async def save_habit_instances(
+        self, habit_instances: List[HabitInstance]
+    ) -> BulkSaveResult[HabitInstance]:
+        return self.repository.save_habit_instances(habit_instances)
+
+    async def update_habit_collection(
+        self, habit_collection: HabitCollection
+    ) -> HabitCollection:
+        return self.repository.update_habit_collection(habit_collection)
+
+    async def get_habit_instance_by_id(self, habit_instance_id: ID) -> HabitInstance:
+        return self.repository.get_habit_instance_by_id(habit_instance_id)
+
+    async def iter_habit_instances(
+        self,
+        habits_ids: Set[ID],
+        start_date: date,
+        end_date: date,
+        batch_size: int = 100,
+        after: Optional[Tuple[date, ID]] = None,
+    ) -> AsyncIterator[HabitInstance]:
+        for habit_instance in self.repository.iter_habit_instances(
+            habits_ids, start_date, end_date, batch_size, after
+        ):
+            yield habit_instance
+
+    async def get_habit_streak(self, habit_id: ID) -> Union[HabitStreak, None]:
+        return self.repository.get_habit_streak(habit_id)
+
+    async def save_habit_streak(self, habit_streak: HabitStreak) -> HabitStreak:
+        return self.repository.save_habit_streak(habit_streak)
+
+    async def save_habit_streak_if_unchanged(
+        self,
+        habit_streak: HabitStreak,
+        previous_habit_streak: Union[HabitStreak, None],
+    ) -> bool:
+        return self.repository.save_habit_streak_if_unchanged(
+            habit_streak, previous_habit_streak
+        )
+
+    async def get_completion_calendar(
+        self, habit_id: ID, year: int
+    ) -> Union[CompletionCalendar, None]:
+        return self.repository.get_completion_calendar(habit_id, year)
+
+    async def save_completion_calendar(
+        self, completion_calendar: CompletionCalendar
+    ) -> CompletionCalendar:
+        return self.repository.save_completion_calendar(completion_calendar)
+
+    async def save_completion_calendar_if_absent(
+        self, completion_calendar: CompletionCalendar
+    ) -> bool:
+        return self.repository.save_completion_calendar_if_absent(completion_calendar)
+
+    async def record_completion(
+        self, habit_instance: HabitInstance
+    ) -> Union[CompletionCalendar, None]:
+        return self.repository.record_completion(habit_instance)
@@ -1,7 +1,13 @@
+import asyncio
+
 import pytest
-from mock_repository import MockRepository
+from mock_repository import AsyncMockRepository, MockRepository
 
-from pebble.application.use_cases.create_habit import CreateHabit, CreateHabitDTO
+from pebble.application.use_cases.create_habit import (
+    AsyncCreateHabit,
+    CreateHabit,
+    CreateHabitDTO,
+)
 from pebble.domain.entities import BiMonthly, HabitCategory
 from pebble.domain.value_objects import Color, WeekDays
 
@@ -216,3 +222,38 @@ def test_create_habit_category_exists(habit_repository: MockRepository) -> None:
     assert habit.category.name == "Test Category"
     assert habit.category.description == "A Description"
     assert habit.id is not None
+
+
+def test_async_create_habit_with_new_category() -> None:
+    async_repository = AsyncMockRepository()
+    use_case = AsyncCreateHabit(async_repository)
+    dto = CreateHabitDTO(
+        name="Test Habit",
+        recurrence="Daily",
+        category_name="Health",
+        category_color="#00FF00",
+    )
+
+    habit = asyncio.run(use_case.execute(dto))
+
+    habit_repository = async_repository.repository
+    assert habit_repository.habits == [habit]
+    assert len(habit_repository.save_habit_category_calls) == 1
+    assert habit.id is not None
+    assert habit.recurrence.name == "Daily"
+    assert habit.category.name == "Health"
+    assert habit.category.id is not None
+
+
+def test_async_create_habit_with_existing_category() -> None:
+    async_repository = AsyncMockRepository()
+    habit_category = async_repository.repository.save_habit_category(
+        HabitCategory(name="Health")
+    )
+    use_case = AsyncCreateHabit(async_repository)
+    dto = CreateHabitDTO(name="Test Habit", recurrence="Daily", category_name="Health")
+
+    habit = asyncio.run(use_case.execute(dto))
+
+    assert len(async_repository.repository.save_habit_category_calls) == 1
+    assert habit.category is habit_category
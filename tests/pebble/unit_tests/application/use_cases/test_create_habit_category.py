@@ -1,7 +1,13 @@
+import asyncio
+
 import pytest
-from mock_repository import MockRepository
+from mock_repository import AsyncMockRepository, MockRepository
 
-from pebble.application.use_cases import CreateHabitCategory, CreateHabitCategoryDTO
+from pebble.application.use_cases import (
+    AsyncCreateHabitCategory,
+    CreateHabitCategory,
+    CreateHabitCategoryDTO,
+)
 from pebble.domain.entities import HabitCategory
 
 
@@ -90,3 +96,19 @@ def test_create_habit_category_no_description_or_color(
     assert habit_category.name == "Cooking"
     assert habit_category.description is None
     assert habit_category.color is None
+
+
+def test_async_create_habit_category() -> None:
+    async_repository = AsyncMockRepository()
+    use_case = AsyncCreateHabitCategory(async_repository)
+    dto = CreateHabitCategoryDTO(
+        name="Cooking",
+        description="Cooking meals at home",
+        color="#FF0000",
+    )
+
+    habit_category: HabitCategory = asyncio.run(use_case.execute(dto))
+
+    assert async_repository.repository.categories == [habit_category]
+    assert habit_category.id is not None
+    assert habit_category.color.hex == "#FF0000"
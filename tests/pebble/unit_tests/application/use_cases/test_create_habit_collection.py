@@ -1,7 +1,10 @@
+import asyncio
+
 import pytest
-from mock_repository import MockRepository
+from mock_repository import AsyncMockRepository, MockRepository
 
 from pebble.application.use_cases.create_habit_collection import (
+    AsyncCreateHabitCollection,
     CreateHabitCollection,
     CreateHabitCollectionDTO,
 )
@@ -75,3 +78,18 @@ def test_create_habit_collection_with_habits(habit_repository: MockRepository) -
     assert habit_collection.description == "A test habit collection"
     assert habit_collection.habits == set(habits)
     assert habit_collection.id is not None
+
+
+def test_async_create_habit_collection_with_habits() -> None:
+    async_repository = AsyncMockRepository()
+    habit = async_repository.repository.save_habit(
+        Habit(name="Habit 1", recurrence=Daily())
+    )
+    use_case = AsyncCreateHabitCollection(async_repository)
+    dto = CreateHabitCollectionDTO(name="Test Habit Collection", habits_ids={habit.id})
+
+    habit_collection = asyncio.run(use_case.execute(dto))
+
+    assert async_repository.repository.habit_collections == [habit_collection]
+    assert habit_collection.habits == {habit}
+    assert habit_collection.id is not None
@@ -1,9 +1,14 @@
-from datetime import date
+import asyncio
+from datetime import date, timedelta
 
 import pytest
-from mock_repository import MockRepository
+from mock_repository import AsyncMockRepository, MockRepository
 
-from pebble.application.use_cases import CreateHabitInstance, CreateHabitInstanceDTO
+from pebble.application.use_cases import (
+    AsyncCreateHabitInstance,
+    CreateHabitInstance,
+    CreateHabitInstanceDTO,
+)
 from pebble.application.use_cases.create_habit_instance import (
     HabitInstanceCreationError,
 )
@@ -65,31 +70,27 @@ def test_create_habit_instance(
     assert mock_repository.get_habit_by_id_calls[0].args == [test_habit_1.id]
     assert mock_repository.get_habit_by_id_calls[0].return_value == test_habit_1
 
-    # get habit collection by id call
-    assert len(mock_repository.get_habit_collection_by_id_calls) == 1
-    assert mock_repository.get_habit_collection_by_id_calls[0].args == [
+    # the habit collection is checked, never loaded
+    assert len(mock_repository.get_habit_collection_by_id_calls) == 0
+    assert len(mock_repository.habit_collection_exists_calls) == 1
+    assert mock_repository.habit_collection_exists_calls[0].args == [
         test_habit_collection_1.id
     ]
-    assert (
-        mock_repository.get_habit_collection_by_id_calls[0].return_value
-        == test_habit_collection_1
-    )
+    assert mock_repository.habit_collection_exists_calls[0].return_value is True
 
-    # save habit instance call
-    assert len(mock_repository.save_habit_instances_calls) == 1
-    assert mock_repository.save_habit_instances_calls[0].args == [habit_instance]
-    assert mock_repository.save_habit_instances_calls[0].return_value == habit_instance
+    # record check-in call
+    assert len(mock_repository.record_check_in_calls) == 1
+    assert mock_repository.record_check_in_calls[0].args == [habit_instance]
+    assert mock_repository.record_check_in_calls[0].return_value == habit_instance
 
-    # check update of habit collection
-    assert len(mock_repository.update_habit_collection_calls) == 1
-    assert (
-        mock_repository.update_habit_collection_calls[0].args[0]
-        == test_habit_collection_1
-    )
-    assert (
-        habit_instance
-        in mock_repository.update_habit_collection_calls[0].args[0].habits_instance
-    )
+    # check the habit instance is appended to the habit collection
+    assert len(mock_repository.update_habit_collection_calls) == 0
+    assert len(mock_repository.add_habit_instance_to_collection_calls) == 1
+    assert mock_repository.add_habit_instance_to_collection_calls[0].args == [
+        test_habit_collection_1.id,
+        habit_instance,
+    ]
+    assert habit_instance in test_habit_collection_1.habits_instance
 
     assert habit_instance is not None
     assert habit_instance.habit == test_habit_1
@@ -100,6 +101,159 @@ def test_create_habit_instance(
     assert habit_instance in mock_repository.habit_instances
 
 
+def test_create_habit_instance_retried(
+    test_habit_1: Habit,
+    test_habit_collection_1: HabitCollection,
+    mock_repository: MockRepository,
+) -> None:
+    """
+    Test that creating the same habit instance again does not duplicate it.
+    """
+    habit_instance_dto = CreateHabitInstanceDTO(
+        habit_id=test_habit_1.id,
+        habit_collection_id=test_habit_collection_1.id,
+        date=date.today(),
+        completed=True,
+    )
+
+    habit_instance = CreateHabitInstance(mock_repository).execute(habit_instance_dto)
+    retried_habit_instance = CreateHabitInstance(mock_repository).execute(
+        habit_instance_dto
+    )
+
+    assert retried_habit_instance is habit_instance
+    assert mock_repository.habit_instances == [habit_instance]
+    assert len(mock_repository.record_check_in_calls) == 2
+
+    # the retried check-in does not change the streak
+    assert len(mock_repository.save_habit_streak_calls) == 1
+    assert mock_repository.get_habit_streak(test_habit_1.id).current == 1
+
+
+def test_create_habit_instance_updates_streak(
+    test_habit_1: Habit,
+    test_habit_collection_1: HabitCollection,
+    mock_repository: MockRepository,
+) -> None:
+    """
+    Test that the check-ins update the streak of the habit, and that a
+    correction of a past check-in recomputes it.
+    """
+
+    def check_in(days_ago: int, completed: bool = True) -> None:
+        CreateHabitInstance(mock_repository).execute(
+            CreateHabitInstanceDTO(
+                habit_id=test_habit_1.id,
+                habit_collection_id=test_habit_collection_1.id,
+                date=date.today() - timedelta(days=days_ago),
+                completed=completed,
+            )
+        )
+
+    for days_ago in (2, 1, 0):
+        check_in(days_ago)
+
+    habit_streak = mock_repository.get_habit_streak(test_habit_1.id)
+    assert (habit_streak.current, habit_streak.longest) == (3, 3)
+    assert habit_streak.last_completed_date == date.today()
+
+    check_in(1, completed=False)
+
+    habit_streak = mock_repository.get_habit_streak(test_habit_1.id)
+    assert (habit_streak.current, habit_streak.longest) == (1, 1)
+    assert len(mock_repository.save_habit_streak_calls) == 4
+
+    # the check-ins are recorded in the completion calendar of their year
+    completed_dates = [
+        completed_date
+        for year in {date.today().year - 1, date.today().year}
+        if (
+            completion_calendar := mock_repository.get_completion_calendar(
+                test_habit_1.id, year
+            )
+        )
+        for completed_date in completion_calendar.completed_dates()
+    ]
+    assert sorted(completed_dates) == [
+        date.today() - timedelta(days=2),
+        date.today(),
+    ]
+
+
+def test_create_habit_instance_concurrent_streak_update(
+    test_habit_1: Habit,
+    test_habit_collection_1: HabitCollection,
+    mock_repository: MockRepository,
+) -> None:
+    """
+    Test that a streak saved by another check-in between the read and the
+    write of the streak is read again, the other check-in is not lost.
+    """
+
+    def check_in(days_ago: int) -> None:
+        CreateHabitInstance(mock_repository).execute(
+            CreateHabitInstanceDTO(
+                habit_id=test_habit_1.id,
+                habit_collection_id=test_habit_collection_1.id,
+                date=date.today() - timedelta(days=days_ago),
+                completed=True,
+            )
+        )
+
+    check_in(2)
+    save_habit_streak_if_unchanged = mock_repository.save_habit_streak_if_unchanged
+
+    def save_after_concurrent_check_in(*args: object) -> bool:
+        mock_repository.save_habit_streak_if_unchanged = save_habit_streak_if_unchanged
+        check_in(1)
+        return save_habit_streak_if_unchanged(*args)
+
+    mock_repository.save_habit_streak_if_unchanged = save_after_concurrent_check_in
+    check_in(0)
+
+    habit_streak = mock_repository.get_habit_streak(test_habit_1.id)
+    assert (habit_streak.current, habit_streak.longest) == (3, 3)
+    assert habit_streak.last_completed_date == date.today()
+
+
+def test_create_habit_instance_concurrent_streak_recompute(
+    test_habit_1: Habit,
+    test_habit_collection_1: HabitCollection,
+    mock_repository: MockRepository,
+) -> None:
+    """
+    Test that a streak saved by another check-in while the streak was
+    recomputed is read again, the recomputed streak does not overwrite it.
+    """
+
+    def check_in(days_ago: int, completed: bool = True) -> None:
+        CreateHabitInstance(mock_repository).execute(
+            CreateHabitInstanceDTO(
+                habit_id=test_habit_1.id,
+                habit_collection_id=test_habit_collection_1.id,
+                date=date.today() - timedelta(days=days_ago),
+                completed=completed,
+            )
+        )
+
+    for days_ago in (3, 2):
+        check_in(days_ago)
+    save_habit_streak_if_unchanged = mock_repository.save_habit_streak_if_unchanged
+
+    def save_after_concurrent_check_in(*args: object) -> bool:
+        mock_repository.save_habit_streak_if_unchanged = save_habit_streak_if_unchanged
+        check_in(1)
+        return save_habit_streak_if_unchanged(*args)
+
+    # the correction of a past check-in recomputes the streak
+    mock_repository.save_habit_streak_if_unchanged = save_after_concurrent_check_in
+    check_in(3, completed=False)
+
+    habit_streak = mock_repository.get_habit_streak(test_habit_1.id)
+    assert (habit_streak.current, habit_streak.longest) == (2, 2)
+    assert habit_streak.last_completed_date == date.today() - timedelta(days=1)
+
+
 def test_create_habit_collection_habit_not_exist(
     mock_repository: MockRepository,
 ) -> None:
@@ -173,3 +327,70 @@ def test_create_habit_instance_future_date(
         + str(habit_instance_dto.date)
         + "."
     )
+
+
+@pytest.fixture
+def async_mock_repository(
+    test_habit_1: Habit, test_habit_collection_1: HabitCollection
+) -> AsyncMockRepository:
+    async_mock_repository = AsyncMockRepository()
+    async_mock_repository.repository.save_habit(test_habit_1)
+    async_mock_repository.repository.save_habit_collection(test_habit_collection_1)
+
+    return async_mock_repository
+
+
+def test_async_create_habit_instance(
+    test_habit_1: Habit,
+    test_habit_collection_1: HabitCollection,
+    async_mock_repository: AsyncMockRepository,
+) -> None:
+    """
+    Test the creation of a habit instance on an asynchronous repository.
+    """
+    habit_instance_dto = CreateHabitInstanceDTO(
+        habit_id=test_habit_1.id,
+        habit_collection_id=test_habit_collection_1.id,
+        date=date.today(),
+        completed=True,
+    )
+
+    habit_instance = asyncio.run(
+        AsyncCreateHabitInstance(async_mock_repository).execute(habit_instance_dto)
+    )
+
+    mock_repository = async_mock_repository.repository
+    assert habit_instance.habit == test_habit_1
+    assert habit_instance.id is not None
+    assert habit_instance in mock_repository.habit_instances
+    assert len(mock_repository.get_habit_collection_by_id_calls) == 0
+    assert len(mock_repository.add_habit_instance_to_collection_calls) == 1
+    assert habit_instance in test_habit_collection_1.habits_instance
+    assert mock_repository.get_habit_streak(test_habit_1.id).current == 1
+
+
+def test_async_create_habit_instance_habit_not_exist(
+    test_habit_collection_1: HabitCollection,
+    async_mock_repository: AsyncMockRepository,
+) -> None:
+    """
+    Test the creation of a habit instance with a non-existing habit
+    on an asynchronous repository.
+    """
+    habit_instance_dto = CreateHabitInstanceDTO(
+        habit_id=999,  # Non-existing habit ID
+        habit_collection_id=test_habit_collection_1.id,
+        date=date.today(),
+        completed=True,
+    )
+
+    with pytest.raises(HabitInstanceCreationError) as error_info:
+        asyncio.run(
+            AsyncCreateHabitInstance(async_mock_repository).execute(habit_instance_dto)
+        )
+
+    assert (
+        str(error_info.value) == "Habit with ID 999 not found. "
+        "The habit instance cannot be created without a Habit."
+    )
+    assert async_mock_repository.repository.habit_instances == []
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import date
+
+from mock_repository import AsyncMockRepository, MockRepository
+
+from pebble.application.use_cases import (
+    AsyncGetCompletionCalendar,
+    GetCompletionCalendar,
+)
+from pebble.domain.entities import CompletionCalendar, Daily, Habit, HabitInstance
+from pebble.domain.value_objects import ID
+
+
+def backfill(mock_repository: MockRepository) -> Habit:
+    habit = mock_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+    mock_repository.save_habit_instances(
+        [
+            HabitInstance(habit=habit, date=date(2024, 12, 31), completed=True),
+            HabitInstance(habit=habit, date=date(2025, 1, 1), completed=True),
+            HabitInstance(habit=habit, date=date(2025, 1, 2), completed=False),
+        ]
+    )
+    return habit
+
+
+def test_get_completion_calendar_builds_once() -> None:
+    mock_repository = MockRepository()
+    habit = backfill(mock_repository)
+
+    completion_calendar = GetCompletionCalendar(mock_repository).execute(habit.id, 2025)
+
+    assert completion_calendar.completed_dates() == [date(2025, 1, 1)]
+    assert mock_repository.get_completion_calendar(habit.id, 2025) is (
+        completion_calendar
+    )
+
+    # the saved calendar is read, the habit instances are not
+    mock_repository.habit_instances.clear()
+    assert (
+        GetCompletionCalendar(mock_repository).execute(habit.id, 2025)
+        is completion_calendar
+    )
+
+
+def test_record_check_in_in_completion_calendar() -> None:
+    mock_repository = MockRepository()
+    habit = backfill(mock_repository)
+    get_completion_calendar = GetCompletionCalendar(mock_repository)
+    get_completion_calendar.execute(habit.id, 2025)
+
+    completion_calendar = get_completion_calendar.record(
+        HabitInstance(habit=habit, date=date(2025, 1, 2), completed=True, note="Late")
+    )
+
+    assert completion_calendar.completed_dates() == [
+        date(2025, 1, 1),
+        date(2025, 1, 2),
+    ]
+    assert completion_calendar.note(date(2025, 1, 2)) == "Late"
+
+
+class ConcurrentCheckInRepository(MockRepository):
+    """Mock repository saving the calendar of a concurrent check-in first."""
+
+    def __init__(self, concurrent_habit_instance: HabitInstance) -> None:
+        super().__init__()
+        self.concurrent_habit_instance = concurrent_habit_instance
+
+    def save_completion_calendar_if_absent(
+        self, completion_calendar: CompletionCalendar
+    ) -> bool:
+        concurrent_completion_calendar = CompletionCalendar(
+            habit_id=completion_calendar.habit_id, year=completion_calendar.year
+        )
+        concurrent_completion_calendar.record(self.concurrent_habit_instance)
+        self.save_completion_calendar(concurrent_completion_calendar)
+
+        return super().save_completion_calendar_if_absent(completion_calendar)
+
+
+def test_record_check_in_keeps_a_concurrent_completion_calendar() -> None:
+    habit = Habit(name="Read", recurrence=Daily(), id=ID(1))
+    mock_repository = ConcurrentCheckInRepository(
+        HabitInstance(habit=habit, date=date(2025, 1, 3), completed=True)
+    )
+
+    # the built calendar is not saved over the concurrent one, it is recorded in
+    completion_calendar = GetCompletionCalendar(mock_repository).record(
+        HabitInstance(habit=habit, date=date(2025, 1, 2), completed=True)
+    )
+
+    assert completion_calendar.completed_dates() == [
+        date(2025, 1, 2),
+        date(2025, 1, 3),
+    ]
+    assert mock_repository.get_completion_calendar(habit.id, 2025) is (
+        completion_calendar
+    )
+
+
+def test_async_get_completion_calendar() -> None:
+    async_mock_repository = AsyncMockRepository()
+    habit = backfill(async_mock_repository.repository)
+
+    completion_calendar = asyncio.run(
+        AsyncGetCompletionCalendar(async_mock_repository).execute(habit.id, 2024)
+    )
+
+    assert completion_calendar.completed_dates() == [date(2024, 12, 31)]
+    assert (
+        async_mock_repository.repository.get_completion_calendar(habit.id, 2024)
+        is completion_calendar
+    )
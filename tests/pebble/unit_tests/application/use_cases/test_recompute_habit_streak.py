@@ -0,0 +1,62 @@
+import asyncio
+from datetime import date
+
+import pytest
+from mock_repository import AsyncMockRepository, MockRepository
+
+from pebble.application.use_cases import (
+    AsyncRecomputeHabitStreak,
+    HabitStreakRecomputeError,
+    RecomputeHabitStreak,
+)
+from pebble.domain.entities import Daily, Habit, HabitInstance, HabitStreak
+
+
+@pytest.fixture
+def habit() -> Habit:
+    return Habit(name="Read", recurrence=Daily())
+
+
+def backfill(mock_repository: MockRepository, habit: Habit) -> None:
+    mock_repository.save_habit(habit)
+    mock_repository.save_habit_instances(
+        [
+            HabitInstance(habit=habit, date=date(2025, 1, day), completed=day != 3)
+            for day in (5, 1, 2, 3, 4)
+        ]
+    )
+
+
+def test_recompute_habit_streak(habit: Habit) -> None:
+    mock_repository = MockRepository()
+    backfill(mock_repository, habit)
+
+    habit_streak = RecomputeHabitStreak(mock_repository).execute(habit.id)
+
+    assert habit_streak == HabitStreak(
+        habit_id=habit.id,
+        current=2,
+        longest=2,
+        last_completed_date=date(2025, 1, 5),
+    )
+    assert mock_repository.get_habit_streak(habit.id) == habit_streak
+
+    with pytest.raises(HabitStreakRecomputeError):
+        RecomputeHabitStreak(mock_repository).execute("unknown")
+
+
+def test_async_recompute_habit_streak(habit: Habit) -> None:
+    async_mock_repository = AsyncMockRepository()
+    backfill(async_mock_repository.repository, habit)
+
+    habit_streak = asyncio.run(
+        AsyncRecomputeHabitStreak(async_mock_repository).execute(habit.id)
+    )
+
+    assert habit_streak.current == 2
+    assert async_mock_repository.repository.save_habit_streak_calls[0].args == [
+        habit_streak
+    ]
+
+    with pytest.raises(HabitStreakRecomputeError):
+        asyncio.run(AsyncRecomputeHabitStreak(async_mock_repository).execute("unknown"))
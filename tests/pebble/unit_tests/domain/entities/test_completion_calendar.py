@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+
+import pytest
+
+from pebble.domain.entities import CompletionCalendar, Daily, Habit, HabitInstance
+
+
+@pytest.fixture
+def habit() -> Habit:
+    return Habit(name="Read", recurrence=Daily(), id="1")
+
+
+def test_completion_calendar_from_habit_instances(habit: Habit) -> None:
+    completion_calendar = CompletionCalendar.from_habit_instances(
+        habit.id,
+        2024,
+        [
+            HabitInstance(habit=habit, date=date(2024, 1, 1), completed=True),
+            HabitInstance(
+                habit=habit, date=date(2024, 12, 31), completed=True, note="Done"
+            ),
+            HabitInstance(habit=habit, date=date(2024, 6, 1), completed=False),
+            # the habit instances of the other years are ignored
+            HabitInstance(habit=habit, date=date(2025, 1, 1), completed=True),
+        ],
+    )
+
+    assert completion_calendar.completed_dates() == [
+        date(2024, 1, 1),
+        date(2024, 12, 31),
+    ]
+    assert completion_calendar.is_completed(date(2024, 12, 31))
+    assert not completion_calendar.is_completed(date(2024, 6, 1))
+    assert completion_calendar.note(date(2024, 12, 31)) == "Done"
+    assert completion_calendar.note(date(2024, 1, 1)) is None
+    assert completion_calendar.notes == {365: "Done"}
+
+    with pytest.raises(ValueError):
+        completion_calendar.is_completed(date(2025, 1, 1))
+
+
+def test_completion_calendar_bytes() -> None:
+    completion_calendar = CompletionCalendar(habit_id="1", year=2024)
+    completion_calendar.set_completed(date(2024, 12, 31), True)
+    completion_calendar.set_completed(date(2024, 1, 2), True)
+
+    data = completion_calendar.to_bytes()
+
+    assert len(data) == 46
+    assert data[0] == 0b10
+    assert (
+        CompletionCalendar.from_bytes("1", 2024, data).completions
+        == completion_calendar.completions
+    )
+
+    completion_calendar.set_completed(date(2024, 1, 2), False)
+    assert completion_calendar.completed_dates() == [date(2024, 12, 31)]
+
+
+def test_completion_calendar_counts_and_rates() -> None:
+    completion_calendar = CompletionCalendar(habit_id="1", year=2025)
+    for day in range(1, 11):
+        completion_calendar.set_completed(date(2025, 1, day), day % 2 == 1)
+
+    assert completion_calendar.count_completed() == 5
+    assert completion_calendar.count_completed(date(2025, 1, 2), date(2025, 1, 5)) == 2
+    assert completion_calendar.completion_rate(
+        date(2025, 1, 1), date(2025, 1, 10)
+    ) == pytest.approx(0.5)
+    # only the due dates are counted
+    assert completion_calendar.completion_rate(
+        date(2025, 1, 1),
+        date(2025, 1, 10),
+        due_dates=[date(2025, 1, 1), date(2025, 1, 3), date(2025, 1, 4)],
+    ) == pytest.approx(2 / 3)
+    assert completion_calendar.completion_rate(date(2025, 1, 5), date(2025, 1, 4)) == 0
+    assert completion_calendar.days_in_year == 365
+
+
+def test_completion_calendar_streaks() -> None:
+    completion_calendar = CompletionCalendar(habit_id="1", year=2025)
+    first_day = date(2025, 1, 1)
+    for day in [*range(0, 3), *range(10, 17), *range(20, 24)]:
+        completion_calendar.set_completed(first_day + timedelta(days=day), True)
+
+    assert completion_calendar.longest_streak() == 7
+    assert completion_calendar.streak_ending_on(first_day + timedelta(days=23)) == 4
+    assert completion_calendar.streak_ending_on(first_day + timedelta(days=2)) == 3
+    assert completion_calendar.streak_ending_on(first_day + timedelta(days=24)) == 0
+    assert CompletionCalendar(habit_id="1", year=2025).longest_streak() == 0
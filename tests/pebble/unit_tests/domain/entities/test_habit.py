@@ -1,3 +1,5 @@
+import pytest
+
 from pebble.domain.entities import (
     BiMonthly,
     BiWeekly,
@@ -197,3 +199,11 @@ def test_habit_inequality_with_different_id() -> None:
         name="Test Habit", description="Test description", recurrence=Daily(), id=2
     )
     assert habit1 != habit2
+
+
+def test_habit_is_slotted() -> None:
+    habit = Habit(name="Test Habit", recurrence=Daily())
+
+    assert not hasattr(habit, "__dict__")
+    with pytest.raises(AttributeError):
+        habit.priority = 1
@@ -0,0 +1,142 @@
+from datetime import date
+
+import pytest
+
+from pebble.domain.entities import (
+    Daily,
+    Habit,
+    HabitCollection,
+    HabitInstance,
+    HabitInstanceTimeline,
+)
+
+
+@pytest.fixture
+def habit() -> Habit:
+    return Habit(name="Read", recurrence=Daily(), id="habit1")
+
+
+@pytest.fixture
+def other_habit() -> Habit:
+    return Habit(name="Run", recurrence=Daily(), id="habit2")
+
+
+def test_habit_instances_are_sorted_by_date(habit: Habit) -> None:
+    days = [date(2024, 1, 3), date(2024, 1, 1), date(2024, 1, 2)]
+    timeline = HabitInstanceTimeline(
+        HabitInstance(habit=habit, date=day, completed=True) for day in days
+    )
+
+    assert [
+        habit_instance.date for habit_instance in timeline.habit_instances(habit)
+    ] == sorted(days)
+    assert timeline.latest(habit).date == date(2024, 1, 3)
+    assert len(timeline) == 3
+
+
+def test_unsaved_habit_instances_do_not_collide(habit: Habit) -> None:
+    # the habit instances without identifier are told apart by their dates
+    timeline = HabitInstanceTimeline()
+    for day in range(1, 11):
+        timeline.add(
+            HabitInstance(habit=habit, date=date(2024, 1, day), completed=True)
+        )
+
+    assert len(timeline) == 10
+
+
+def test_add_replaces_the_habit_instance_of_the_same_day(habit: Habit) -> None:
+    timeline = HabitInstanceTimeline()
+    first = HabitInstance(habit=habit, date=date(2024, 1, 1), completed=False)
+    second = HabitInstance(habit=habit, date=date(2024, 1, 1), completed=True)
+
+    assert timeline.add(first) is None
+    assert timeline.add(second) is first
+
+    assert len(timeline) == 1
+    assert timeline.get(habit, date(2024, 1, 1)) is second
+    assert first not in timeline
+    assert second in timeline
+
+
+def test_between_returns_the_range_included(habit: Habit, other_habit: Habit) -> None:
+    timeline = HabitInstanceTimeline(
+        HabitInstance(habit=habit_, date=date(2024, 1, day), completed=True)
+        for habit_ in (habit, other_habit)
+        for day in range(1, 11)
+    )
+
+    habit_instances = timeline.between(habit, date(2024, 1, 3), date(2024, 1, 5))
+
+    assert [habit_instance.date.day for habit_instance in habit_instances] == [3, 4, 5]
+    assert all(habit_instance.habit is habit for habit_instance in habit_instances)
+    assert timeline.between(habit, date(2024, 2, 1), date(2024, 2, 28)) == []
+    assert (
+        timeline.between(Habit(name="Walk", recurrence=Daily()), date.min, date.max)
+        == []
+    )
+
+
+def test_habits_are_found_by_identifier(habit: Habit) -> None:
+    timeline = HabitInstanceTimeline(
+        [HabitInstance(habit=habit, date=date(2024, 1, 1), completed=True)]
+    )
+
+    # an equal habit read again from a repository finds the habit instances
+    same_habit = Habit(name="Read", recurrence=Daily(), id="habit1")
+    assert timeline.get(same_habit, date(2024, 1, 1)) is not None
+    assert timeline.latest(same_habit).habit is habit
+
+
+def test_unsaved_habits_have_no_habit_instances() -> None:
+    unsaved_habit = Habit(name="Walk", recurrence=Daily())
+    timeline = HabitInstanceTimeline()
+
+    with pytest.raises(ValueError):
+        timeline.add(
+            HabitInstance(habit=unsaved_habit, date=date(2024, 1, 1), completed=True)
+        )
+
+    # the habit saved later, changing its hash, is still not found
+    unsaved_habit.id = "habit3"
+    assert timeline.latest(unsaved_habit) is None
+    assert len(timeline) == 0
+
+
+def test_get_and_latest_of_unknown_habit(habit: Habit) -> None:
+    timeline = HabitInstanceTimeline()
+
+    assert timeline.get(habit, date(2024, 1, 1)) is None
+    assert timeline.latest(habit) is None
+    assert timeline.habit_instances(habit) == []
+
+
+def test_timeline_compares_to_a_set(habit: Habit, other_habit: Habit) -> None:
+    habit_instances = {
+        HabitInstance(habit=habit, date=date(2024, 1, 2), completed=True),
+        HabitInstance(habit=other_habit, date=date(2024, 1, 1), completed=False),
+    }
+    timeline = HabitInstanceTimeline(habit_instances)
+
+    assert timeline == habit_instances
+    assert timeline == HabitInstanceTimeline(habit_instances)
+    assert set(timeline) == habit_instances
+    assert set(timeline.habits) == {habit, other_habit}
+    assert timeline != set()
+
+
+def test_habit_collection_sorts_its_habit_instances(habit: Habit) -> None:
+    habit_instances = [
+        HabitInstance(habit=habit, date=date(2024, 1, day), completed=True)
+        for day in (2, 1)
+    ]
+
+    habit_collection = HabitCollection(
+        name="Morning", habits={habit}, habits_instance=set(habit_instances)
+    )
+
+    assert isinstance(habit_collection.habits_instance, HabitInstanceTimeline)
+    assert habit_collection.habits_instance.habit_instances(habit) == [
+        habit_instances[1],
+        habit_instances[0],
+    ]
@@ -1,7 +1,9 @@
+import pickle
+
 import pytest
 
 from pebble.domain.entities import BiMonthly, BiWeekly, Daily, Monthly, Weekly, Yearly
-from pebble.domain.value_objects import WeekDays
+from pebble.domain.value_objects import WeekDayMask, WeekDays
 
 
 def test_try_to_set_daily_days_of_week() -> None:
@@ -9,14 +11,13 @@ def test_try_to_set_daily_days_of_week() -> None:
         Daily().days_of_week = {WeekDays.THURSDAY}
 
 
-def test_try_to_set_incorrect_amount_of_weekdays() -> None:
+def test_incorrect_amount_of_weekdays() -> None:
     with pytest.raises(AssertionError):
-        Weekly().days_of_week = {WeekDays.THURSDAY, WeekDays.FRIDAY, WeekDays.SATURDAY}
+        Weekly({WeekDays.THURSDAY, WeekDays.FRIDAY, WeekDays.SATURDAY})
 
 
-def test_set_weekly_days_of_week() -> None:
-    weekly = Weekly()
-    weekly.days_of_week = {WeekDays.THURSDAY}
+def test_weekly_days_of_week() -> None:
+    weekly = Weekly({WeekDays.THURSDAY})
     assert weekly.days_of_week == {WeekDays.THURSDAY}
 
 
@@ -38,7 +39,40 @@ def test_assert_repr() -> None:
     assert repr(Yearly()) is not None
 
 
-def test_set_days_of_week() -> None:
-    weekly = Monthly(days_of_week={WeekDays.FRIDAY})
-    weekly.days_of_week = {WeekDays.THURSDAY}
-    assert weekly.days_of_week == {WeekDays.THURSDAY}
+def test_recurrences_are_immutable() -> None:
+    monthly = Monthly(days_of_week={WeekDays.FRIDAY})
+
+    with pytest.raises(AttributeError):
+        monthly.days_of_week = {WeekDays.THURSDAY}
+    assert monthly.days_of_week == {WeekDays.FRIDAY}
+    assert pickle.loads(pickle.dumps(monthly)) == monthly
+
+
+def test_recurrences_days_mask() -> None:
+    assert Daily().days_mask == WeekDayMask.ALL
+    assert Weekly().days_mask is None
+    assert Weekly().days_of_week is None
+    assert BiWeekly().days_mask == WeekDayMask.TUESDAY | WeekDayMask.FRIDAY
+    # the days of the week can be given as a mask
+    assert Monthly(WeekDayMask.FRIDAY).days_of_week == {WeekDays.FRIDAY}
+
+    with pytest.raises(AssertionError):
+        BiWeekly(WeekDayMask.FRIDAY)
+
+
+def test_recurrences_equality_and_hash() -> None:
+    recurrence = BiWeekly({WeekDays.MONDAY, WeekDays.FRIDAY})
+    same_recurrence = BiWeekly(WeekDayMask.MONDAY | WeekDayMask.FRIDAY)
+
+    assert recurrence == same_recurrence
+    assert hash(recurrence) == hash(same_recurrence)
+    assert recurrence != BiWeekly()
+    assert Monthly(WeekDayMask.FRIDAY) != Yearly(WeekDayMask.FRIDAY)
+    assert len({Daily(), Daily(), Weekly(), recurrence, same_recurrence}) == 3
+
+
+def test_recurrences_are_slotted() -> None:
+    assert not hasattr(BiWeekly(), "__dict__")
+
+    with pytest.raises(AttributeError):
+        Daily().interval = 2
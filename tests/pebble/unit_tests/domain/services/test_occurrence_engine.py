@@ -0,0 +1,163 @@
+from datetime import date
+
+import pytest
+
+from pebble.domain.entities import (
+    BiMonthly,
+    BiWeekly,
+    Daily,
+    Habit,
+    Monthly,
+    Quarterly,
+    Weekly,
+    Yearly,
+)
+from pebble.domain.services import CacheInfo, OccurrenceEngine, RecurrenceKey
+from pebble.domain.value_objects import WeekDays
+
+RECURRENCES = [
+    Daily(),
+    Weekly(),
+    Weekly({WeekDays.SUNDAY}),
+    BiWeekly({WeekDays.MONDAY, WeekDays.THURSDAY}),
+    Monthly(),
+    Monthly({WeekDays.FRIDAY}),
+    BiMonthly(),
+    BiMonthly({WeekDays.MONDAY, WeekDays.SATURDAY}),
+    Yearly(),
+    Yearly({WeekDays.TUESDAY}),
+    Quarterly(),
+]
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def occurrence_engine(request: pytest.FixtureRequest) -> OccurrenceEngine:
+    if request.param:
+        pytest.importorskip("numpy")
+    return OccurrenceEngine(use_numpy=request.param)
+
+
+def test_weekly_occurrences(occurrence_engine: OccurrenceEngine) -> None:
+    # 2025-01-06 is a Monday
+    start_date, end_date = date(2025, 1, 6), date(2025, 1, 19)
+
+    assert len(occurrence_engine.occurrences(Daily(), start_date, end_date)) == 14
+    assert occurrence_engine.occurrences(Weekly(), start_date, end_date) == (
+        date(2025, 1, 6),
+        date(2025, 1, 13),
+    )
+    assert occurrence_engine.occurrences(
+        BiWeekly({WeekDays.TUESDAY, WeekDays.SUNDAY}), start_date, end_date
+    ) == (date(2025, 1, 7), date(2025, 1, 12), date(2025, 1, 14), date(2025, 1, 19))
+    assert occurrence_engine.occurrences(Daily(), end_date, start_date) == ()
+
+
+def test_monthly_and_yearly_occurrences(occurrence_engine: OccurrenceEngine) -> None:
+    start_date, end_date = date(2025, 1, 1), date(2025, 12, 31)
+
+    assert occurrence_engine.occurrences(BiMonthly(), start_date, end_date)[:4] == (
+        date(2025, 1, 1),
+        date(2025, 1, 16),
+        date(2025, 2, 1),
+        date(2025, 2, 15),
+    )
+    # the first Friday of each month
+    assert occurrence_engine.occurrences(
+        Monthly({WeekDays.FRIDAY}), start_date, date(2025, 3, 31)
+    ) == (date(2025, 1, 3), date(2025, 2, 7), date(2025, 3, 7))
+    assert occurrence_engine.occurrences(Quarterly(), start_date, end_date) == (
+        date(2025, 1, 1),
+        date(2025, 4, 1),
+        date(2025, 7, 1),
+        date(2025, 10, 1),
+    )
+    assert occurrence_engine.occurrences(
+        Yearly({WeekDays.MONDAY}), start_date, end_date
+    ) == (date(2025, 1, 6),)
+
+
+def test_numpy_and_python_expansions_match() -> None:
+    pytest.importorskip("numpy")
+    start_date, end_date = date(2023, 11, 15), date(2026, 3, 10)
+
+    assert OccurrenceEngine(use_numpy=True).occurrences_for_each(
+        RECURRENCES, start_date, end_date
+    ) == OccurrenceEngine(use_numpy=False).occurrences_for_each(
+        RECURRENCES, start_date, end_date
+    )
+
+
+def test_numpy_expansions_share_the_day_range() -> None:
+    pytest.importorskip("numpy")
+    occurrence_engine = OccurrenceEngine(use_numpy=True)
+
+    occurrence_engine.occurrences_for_each(
+        RECURRENCES, date(2025, 1, 1), date(2025, 12, 31)
+    )
+
+    # the days of the range are computed once for all the recurrences
+    assert occurrence_engine._day_range.cache_info().misses == 1
+    assert occurrence_engine.cache_info().misses == len(
+        {RecurrenceKey.from_recurrence(recurrence) for recurrence in RECURRENCES}
+    )
+
+
+def test_is_due_matches_occurrences(occurrence_engine: OccurrenceEngine) -> None:
+    start_date, end_date = date(2024, 2, 1), date(2024, 3, 31)
+
+    for recurrence in RECURRENCES:
+        occurrences = set(
+            occurrence_engine.occurrences(recurrence, start_date, end_date)
+        )
+        for day in (date(2024, 2, day) for day in range(1, 30)):
+            assert occurrence_engine.is_due(recurrence, day) == (day in occurrences)
+
+
+def test_is_due_between_matches_occurrences(
+    occurrence_engine: OccurrenceEngine,
+) -> None:
+    for recurrence in RECURRENCES:
+        for start_day, end_day in ((1, 1), (2, 8), (10, 24), (9, 8)):
+            start_date, end_date = date(2024, 2, start_day), date(2024, 2, end_day)
+            assert occurrence_engine.is_due_between(
+                recurrence, start_date, end_date
+            ) == bool(occurrence_engine.occurrences(recurrence, start_date, end_date))
+
+    occurrence_engine.clear_cache()
+    occurrence_engine.is_due_between(Daily(), date(2024, 1, 1), date(2024, 12, 31))
+    assert occurrence_engine.cache_info().size == 0
+
+
+def test_occurrences_are_memoized(occurrence_engine: OccurrenceEngine) -> None:
+    start_date, end_date = date(2025, 1, 1), date(2025, 1, 31)
+
+    expansions = occurrence_engine.occurrences_for_each(
+        [Daily(), Weekly(), Daily(), Weekly()], start_date, end_date
+    )
+    assert expansions[0] == expansions[2]
+    assert occurrence_engine.cache_info().misses == 2
+
+    # equal recurrences share the expansion
+    occurrence_engine.occurrences(Daily(), start_date, end_date)
+    assert occurrence_engine.cache_info().hits == 1
+
+    occurrence_engine.clear_cache()
+    assert occurrence_engine.cache_info() == CacheInfo(
+        hits=0, misses=0, max_size=OccurrenceEngine.CACHE_MAX_SIZE, size=0
+    )
+
+
+def test_due_on(occurrence_engine: OccurrenceEngine) -> None:
+    habits = [
+        Habit(name="Read", recurrence=Daily(), id="1"),
+        Habit(name="Run", recurrence=Weekly({WeekDays.SUNDAY}), id="2"),
+        Habit(name="Swim", recurrence=Weekly(), id="3"),
+        Habit(name="Walk", recurrence=Daily(), id="4"),
+    ]
+
+    # 2025-01-06 is a Monday
+    assert occurrence_engine.due_on(habits, date(2025, 1, 6)) == [
+        habits[0],
+        habits[2],
+        habits[3],
+    ]
@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+
+import pytest
+
+from pebble.domain.entities import Daily, Habit, HabitInstance, HabitStreak, Weekly
+from pebble.domain.services import StreakEngine
+from pebble.domain.value_objects import WeekDays
+
+
+@pytest.fixture
+def streak_engine() -> StreakEngine:
+    return StreakEngine()
+
+
+@pytest.fixture
+def daily_habit() -> Habit:
+    return Habit(name="Read", recurrence=Daily(), id="1")
+
+
+def check_in(habit: Habit, day: date, completed: bool = True) -> HabitInstance:
+    return HabitInstance(habit=habit, date=day, completed=completed)
+
+
+def test_update_extends_and_breaks_streak(
+    streak_engine: StreakEngine, daily_habit: Habit
+) -> None:
+    habit_streak = HabitStreak(habit_id=daily_habit.id)
+
+    for day in (1, 2, 3, 5, 6):
+        habit_streak = streak_engine.update(
+            daily_habit, habit_streak, check_in(daily_habit, date(2025, 1, day))
+        )
+
+    assert habit_streak == HabitStreak(
+        habit_id=daily_habit.id,
+        current=2,
+        longest=3,
+        last_completed_date=date(2025, 1, 6),
+    )
+
+    # a missed check-in after the last completed date changes nothing
+    assert (
+        streak_engine.update(
+            daily_habit, habit_streak, check_in(daily_habit, date(2025, 1, 7), False)
+        )
+        is habit_streak
+    )
+
+
+def test_update_follows_recurrence(streak_engine: StreakEngine) -> None:
+    habit = Habit(name="Run", recurrence=Weekly({WeekDays.MONDAY}), id="1")
+    habit_streak = HabitStreak(habit_id=habit.id)
+
+    # 2025-01-06 and 2025-01-13 are Mondays, the Sunday in between is ignored
+    for day in (date(2025, 1, 6), date(2025, 1, 12), date(2025, 1, 13)):
+        habit_streak = streak_engine.update(habit, habit_streak, check_in(habit, day))
+
+    assert habit_streak.current == 2
+    assert habit_streak.last_completed_date == date(2025, 1, 13)
+    # the gaps between the check-ins are not kept in the cache of expansions
+    assert streak_engine.occurrence_engine.cache_info().size == 0
+
+
+def test_update_requires_recompute_on_backfill(
+    streak_engine: StreakEngine, daily_habit: Habit
+) -> None:
+    habit_streak = HabitStreak(
+        habit_id=daily_habit.id,
+        current=1,
+        longest=1,
+        last_completed_date=date(2025, 1, 3),
+    )
+
+    # a retried check-in is idempotent
+    assert (
+        streak_engine.update(
+            daily_habit, habit_streak, check_in(daily_habit, date(2025, 1, 3))
+        )
+        is habit_streak
+    )
+    for habit_instance in (
+        check_in(daily_habit, date(2025, 1, 3), False),
+        check_in(daily_habit, date(2025, 1, 2)),
+    ):
+        assert streak_engine.update(daily_habit, habit_streak, habit_instance) is None
+
+
+def test_recompute_matches_updates(
+    streak_engine: StreakEngine, daily_habit: Habit
+) -> None:
+    habit_instances = [
+        check_in(daily_habit, date(2025, 1, 1) + timedelta(days=day), day % 5 != 4)
+        for day in range(30)
+    ]
+
+    habit_streak = HabitStreak(habit_id=daily_habit.id)
+    for habit_instance in habit_instances:
+        habit_streak = streak_engine.update(daily_habit, habit_streak, habit_instance)
+
+    assert streak_engine.recompute(daily_habit, habit_instances) == habit_streak
+    assert habit_streak.longest == 4
+
+
+def test_current_streak(streak_engine: StreakEngine, daily_habit: Habit) -> None:
+    habit_streak = HabitStreak(
+        habit_id=daily_habit.id,
+        current=3,
+        longest=5,
+        last_completed_date=date(2025, 1, 3),
+    )
+
+    # the streak holds until a due date is missed
+    assert (
+        streak_engine.current_streak(daily_habit, habit_streak, date(2025, 1, 3)) == 3
+    )
+    assert (
+        streak_engine.current_streak(daily_habit, habit_streak, date(2025, 1, 4)) == 3
+    )
+    assert (
+        streak_engine.current_streak(daily_habit, habit_streak, date(2025, 1, 5)) == 0
+    )
+    assert (
+        streak_engine.current_streak(
+            daily_habit, HabitStreak(habit_id=daily_habit.id), date(2025, 1, 5)
+        )
+        == 0
+    )
@@ -7,3 +7,19 @@ from pebble.domain.value_objects.color import InvalidColorFormatError
 def test_invalid_color() -> None:
     with pytest.raises(InvalidColorFormatError):
         Color("invalid color")
+
+
+def test_interned_colors_are_shared() -> None:
+    color = Color.intern("#FF5733")
+
+    assert color is Color.intern("#FF5733")
+    assert color == Color("#FF5733")
+    assert hash(color) == hash(Color("#FF5733"))
+
+    with pytest.raises(InvalidColorFormatError):
+        Color.intern("invalid color")
+
+
+def test_color_is_immutable() -> None:
+    with pytest.raises(AttributeError):
+        Color("#FF5733").hex = "#FFFFFF"
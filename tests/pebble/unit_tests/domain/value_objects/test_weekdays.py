@@ -0,0 +1,35 @@
+import pytest
+
+from pebble.domain.value_objects import WeekDayMask, WeekDays
+
+
+def test_weekday_mask() -> None:
+    mask = WeekDayMask.from_weekdays([WeekDays.SUNDAY, WeekDays.MONDAY])
+
+    assert mask == WeekDayMask.MONDAY | WeekDayMask.SUNDAY == 0b1000001
+    assert WeekDayMask.from_names(["Sunday", "Monday"]) == mask
+    assert mask.names() == ["Monday", "Sunday"]
+    assert mask.weekdays() == {WeekDays.MONDAY, WeekDays.SUNDAY}
+    assert WeekDays.SUNDAY.mask == WeekDayMask.SUNDAY
+    assert WeekDayMask.NONE.weekdays() == frozenset()
+
+    with pytest.raises(ValueError):
+        WeekDayMask.from_names(["Someday"])
+
+
+def test_weekday_mask_shares_weekday_sets() -> None:
+    # the masks with the same days share the same set of days
+    assert WeekDayMask.ALL.weekdays() is WeekDays.get_all()
+    assert WeekDays.get_all() == set(WeekDays)
+    assert (
+        WeekDayMask.from_names(["Friday"]).weekdays() is WeekDayMask.FRIDAY.weekdays()
+    )
+
+
+def test_weekday_mask_overlapping_masks() -> None:
+    overlapping_masks = WeekDayMask.TUESDAY.overlapping_masks()
+
+    assert len(overlapping_masks) == 64
+    assert all(mask & WeekDayMask.TUESDAY for mask in overlapping_masks)
+    assert WeekDayMask.NONE.overlapping_masks() == ()
+    assert len(WeekDayMask.ALL.overlapping_masks()) == 127
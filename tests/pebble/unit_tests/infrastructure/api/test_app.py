@@ -1,6 +1,14 @@
+import logging
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import mongomock
+import pytest
 from fastapi.testclient import TestClient
+from pymongo.errors import OperationFailure
 
 from pebble.infrastructure.api.app import app
+from pebble.interface_adapters.factories import MongoConnectionError
 
 client = TestClient(app)
 
@@ -51,3 +59,81 @@ def test_create_habit() -> None:
         "message": "Habit created successfully",
         "habit": "Test Habit",
     }
+
+
+@patch("pebble.infrastructure.api.app.MongoConnectionFactory.get_mongo_client")
+def test_startup_creates_indexes(get_mongo_client: MagicMock) -> None:
+    mongo_client = mongomock.MongoClient()
+    get_mongo_client.return_value = mongo_client
+
+    # The lifespan of the app runs when the client is used as a context manager
+    with TestClient(app) as startup_client:
+        assert startup_client.get("/health").status_code == 200
+
+    assert "name_unique" in (
+        mongo_client["pebble"]["habit_categories"].index_information()
+    )
+
+
+@patch("pebble.infrastructure.api.app.MongoConnectionFactory.get_mongo_client")
+def test_startup_without_mongo(get_mongo_client: MagicMock) -> None:
+    get_mongo_client.side_effect = MongoConnectionError("unreachable")
+
+    # The service starts even if the indexes could not be created
+    with TestClient(app) as startup_client:
+        assert startup_client.get("/health").status_code == 200
+
+
+@patch("pebble.infrastructure.api.app.MongoConnectionFactory.get_mongo_client")
+def test_startup_keeps_duplicated_habit_instances(
+    get_mongo_client: MagicMock, caplog: pytest.LogCaptureFixture
+) -> None:
+    mongo_client = mongomock.MongoClient()
+    get_mongo_client.return_value = mongo_client
+    mongo_client["pebble"]["habit_instances"].insert_many(
+        [
+            {"habit_id": "habit1", "date": datetime(2023, 10, 1), "completed": True}
+            for _ in range(2)
+        ]
+    )
+
+    with caplog.at_level(logging.ERROR, logger="uvicorn"):
+        with TestClient(app) as startup_client:
+            assert startup_client.get("/health").status_code == 200
+
+    # the duplicates are removed by the migrations command, not at startup
+    assert mongo_client["pebble"]["habit_instances"].count_documents({}) == 2
+    assert "habit_id_date_unique" not in (
+        mongo_client["pebble"]["habit_instances"].index_information()
+    )
+    assert "habit-instance-duplicates --dry-run" in caplog.text
+
+
+@patch(
+    "pebble.infrastructure.api.app.MongoHabitRepository.ensure_indexes",
+    side_effect=OperationFailure("index build failed"),
+)
+@patch("pebble.infrastructure.api.app.MongoConnectionFactory.get_mongo_client")
+def test_startup_does_not_migrate_the_habits(
+    get_mongo_client: MagicMock, ensure_indexes: MagicMock
+) -> None:
+    mongo_client = mongomock.MongoClient()
+    get_mongo_client.return_value = mongo_client
+    mongo_client["pebble"]["habits"].insert_one(
+        {
+            "name": "Read",
+            "recurrence": "Weekly",
+            "recurrence_days": ["Tuesday"],
+            "description": None,
+            "category_id": None,
+            "color_hex": "#FF5733",
+        }
+    )
+
+    # the service starts even though the indexes could not be created
+    with TestClient(app) as startup_client:
+        assert startup_client.get("/health").status_code == 200
+
+    # the days of the week are migrated by the migrations command only
+    ensure_indexes.assert_called_once()
+    assert mongo_client["pebble"]["habits"].find_one()["recurrence_days"] == ["Tuesday"]
@@ -0,0 +1,84 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import mongomock
+import pytest
+
+from pebble.infrastructure.migrations import main
+
+
+@patch("pebble.infrastructure.migrations.MongoConnectionFactory.get_mongo_client")
+def test_migrate_habit_instance_dates(
+    get_mongo_client: MagicMock, capsys: pytest.CaptureFixture
+) -> None:
+    mongo_client = mongomock.MongoClient()
+    get_mongo_client.return_value = mongo_client
+    mongo_client["pebble"]["habit_instances"].insert_one(
+        {"habit_id": "habit1", "date": "2023-10-01", "completed": True}
+    )
+
+    main(["habit-instance-dates"])
+
+    assert capsys.readouterr().out == "Migrated the dates of 1 habit instances.\n"
+    assert not isinstance(
+        mongo_client["pebble"]["habit_instances"].find_one()["date"], str
+    )
+
+
+@patch("pebble.infrastructure.migrations.MongoConnectionFactory.get_mongo_client")
+def test_deduplicate_habit_instances(
+    get_mongo_client: MagicMock, capsys: pytest.CaptureFixture
+) -> None:
+    mongo_client = mongomock.MongoClient()
+    get_mongo_client.return_value = mongo_client
+    habit_instances_collection = mongo_client["pebble"]["habit_instances"]
+    habit_instances_collection.insert_many(
+        [
+            {
+                "habit_id": "habit1",
+                "date": datetime(2023, 10, 1),
+                "completed": completed,
+                "note": "",
+            }
+            for completed in (True, False)
+        ]
+    )
+
+    # the dry run only lists the duplicates and their differences
+    main(["habit-instance-duplicates", "--dry-run"])
+
+    output = capsys.readouterr().out
+    assert output.startswith("Would remove 1 duplicated habit instances.\n")
+    assert "completion or note differ" in output
+    assert habit_instances_collection.count_documents({}) == 2
+
+    main(["habit-instance-duplicates"])
+
+    assert capsys.readouterr().out.startswith("Removed 1 duplicated habit instances.\n")
+    assert habit_instances_collection.count_documents({}) == 1
+
+
+@patch("pebble.infrastructure.migrations.MongoConnectionFactory.get_mongo_client")
+def test_migrate_habit_recurrence_days(
+    get_mongo_client: MagicMock, capsys: pytest.CaptureFixture
+) -> None:
+    mongo_client = mongomock.MongoClient()
+    get_mongo_client.return_value = mongo_client
+    mongo_client["pebble"]["habits"].insert_one(
+        {"name": "Read", "recurrence": "Weekly", "recurrence_days": ["Tuesday"]}
+    )
+
+    main(["habit-recurrence-days"])
+
+    assert capsys.readouterr().out == "Migrated the days of the week of 1 habits.\n"
+    assert mongo_client["pebble"]["habits"].find_one()["recurrence_days"] == 2
+
+
+def test_dry_run_of_a_migration_without_dry_run() -> None:
+    with pytest.raises(SystemExit):
+        main(["habit-instance-dates", "--dry-run"])
+
+
+def test_unknown_migration() -> None:
+    with pytest.raises(SystemExit):
+        main(["habit-dates"])
@@ -0,0 +1,80 @@
+from typing import Callable, Coroutine, List, Union
+
+import mongomock
+
+
+class AsyncMockCursor:
+    """
+    Awaitable view of a mongomock cursor, like the cursors of the async client.
+    """
+
+    def __init__(self, cursor: mongomock.collection.Cursor) -> None:
+        self.cursor = cursor
+
+    def sort(self, *args: object, **kwargs: object) -> "AsyncMockCursor":
+        self.cursor.sort(*args, **kwargs)
+        return self
+
+    def batch_size(self, batch_size: int) -> "AsyncMockCursor":
+        self.cursor.batch_size(batch_size)
+        return self
+
+    def __aiter__(self) -> "AsyncMockCursor":
+        return self
+
+    async def __anext__(self) -> dict:
+        try:
+            return next(self.cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def close(self) -> None:
+        self.cursor.close()
+
+    async def to_list(self, length: Union[int, None] = None) -> List[dict]:
+        documents = list(self.cursor)
+        return documents if length is None else documents[:length]
+
+
+class AsyncMockCollection:
+    """
+    Awaitable view of a mongomock collection, like the collections of the
+    async client: the queries are coroutines and find returns a cursor.
+    """
+
+    def __init__(self, collection: mongomock.Collection) -> None:
+        self.collection = collection
+
+    def find(self, *args: object, **kwargs: object) -> AsyncMockCursor:
+        return AsyncMockCursor(self.collection.find(*args, **kwargs))
+
+    async def aggregate(self, *args: object, **kwargs: object) -> AsyncMockCursor:
+        return AsyncMockCursor(self.collection.aggregate(*args, **kwargs))
+
+    def __getattr__(self, name: str) -> Callable[..., Coroutine]:
+        method = getattr(self.collection, name)
+
+        async def coroutine(*args: object, **kwargs: object) -> object:
+            return method(*args, **kwargs)
+
+        return coroutine
+
+
+class AsyncMockDatabase:
+    def __init__(self, database: mongomock.Database) -> None:
+        self.database = database
+
+    def __getitem__(self, name: str) -> AsyncMockCollection:
+        return AsyncMockCollection(self.database[name])
+
+
+class AsyncMockMongoClient:
+    """
+    Awaitable view of a mongomock client, to test the async repository.
+    """
+
+    def __init__(self, client: mongomock.MongoClient) -> None:
+        self.client = client
+
+    def __getitem__(self, name: str) -> AsyncMockDatabase:
+        return AsyncMockDatabase(self.client[name])
@@ -0,0 +1,56 @@
+from pebble.interface_adapters.caches import InMemoryKeyValueClient, KeyValueCacheStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_key_value_cache_store_get_and_set() -> None:
+    client = InMemoryKeyValueClient()
+    cache = KeyValueCacheStore(client, prefix="test:")
+
+    cache.set("a", {"name": "Read"})
+
+    assert cache.get("a") == {"name": "Read"}
+    assert cache.get("b") is None
+    assert list(client.scan_iter(match="*")) == ["test:a"]
+
+    cache.delete("a")
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 2
+    assert stats.size == 0
+    assert stats.hit_ratio == 1 / 3
+
+
+def test_key_value_cache_store_expires_values() -> None:
+    clock = FakeClock()
+    cache = KeyValueCacheStore(InMemoryKeyValueClient(clock), ttl_seconds=10)
+
+    cache.set("a", 1)
+    clock.now = 10
+    assert cache.get("a") == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+
+
+def test_key_value_cache_store_clear_keeps_other_prefixes() -> None:
+    client = InMemoryKeyValueClient()
+    cache = KeyValueCacheStore(client, prefix="habits:")
+    other_cache = KeyValueCacheStore(client, prefix="categories:")
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    other_cache.set("a", 3)
+
+    cache.clear()
+
+    assert cache.stats().size == 0
+    assert other_cache.get("a") == 3
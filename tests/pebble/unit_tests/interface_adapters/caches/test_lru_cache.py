@@ -0,0 +1,75 @@
+import pytest
+
+from pebble.interface_adapters.caches import LRUCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_cache_get_and_set() -> None:
+    cache = LRUCache(max_size=2)
+
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.size == 1
+    assert stats.hit_ratio == 0.5
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache = LRUCache(max_size=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # "a" becomes the most recently used value
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats().evictions == 1
+    assert len(cache) == 2
+
+
+def test_lru_cache_expires_values() -> None:
+    clock = FakeClock()
+    cache = LRUCache(max_size=2, ttl_seconds=10, clock=clock)
+
+    cache.set("a", 1)
+    clock.now = 5
+    assert cache.get("a") == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats().expirations == 1
+    assert len(cache) == 0
+
+
+def test_lru_cache_delete_and_clear() -> None:
+    cache = LRUCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_invalid_size() -> None:
+    with pytest.raises(ValueError):
+        LRUCache(max_size=0)
@@ -0,0 +1,55 @@
+import pytest
+
+from pebble.interface_adapters.factories import MongoClientSettings
+
+
+def test_from_env_defaults() -> None:
+    settings = MongoClientSettings.from_env({})
+
+    assert settings == MongoClientSettings()
+    assert settings.to_client_options() == {"serverSelectionTimeoutMS": 5000}
+
+
+def test_from_env() -> None:
+    settings = MongoClientSettings.from_env(
+        {
+            "MONGO_MAX_POOL_SIZE": "50",
+            "MONGO_MIN_POOL_SIZE": "5",
+            "MONGO_MAX_IDLE_TIME_MS": "60000",
+            "MONGO_WAIT_QUEUE_TIMEOUT_MS": "2000",
+            "MONGO_SERVER_SELECTION_TIMEOUT_MS": "3000",
+            "MONGO_CONNECT_TIMEOUT_MS": "1000",
+            "MONGO_COMPRESSORS": "zstd,zlib",
+            "MONGO_READ_CONCERN": "majority",
+            "MONGO_WRITE_CONCERN": "majority",
+        }
+    )
+
+    assert settings.to_client_options() == {
+        "maxPoolSize": 50,
+        "minPoolSize": 5,
+        "maxIdleTimeMS": 60000,
+        "waitQueueTimeoutMS": 2000,
+        "serverSelectionTimeoutMS": 3000,
+        "connectTimeoutMS": 1000,
+        "compressors": "zstd,zlib",
+        "readConcernLevel": "majority",
+        "w": "majority",
+    }
+
+
+def test_from_env_numeric_write_concern() -> None:
+    settings = MongoClientSettings.from_env({"MONGO_WRITE_CONCERN": "1"})
+
+    assert settings.write_concern == 1
+
+
+def test_from_env_empty_variable() -> None:
+    settings = MongoClientSettings.from_env({"MONGO_MAX_POOL_SIZE": " "})
+
+    assert settings.max_pool_size is None
+
+
+def test_from_env_invalid_integer() -> None:
+    with pytest.raises(ValueError, match="MONGO_MAX_POOL_SIZE must be an integer"):
+        MongoClientSettings.from_env({"MONGO_MAX_POOL_SIZE": "many"})
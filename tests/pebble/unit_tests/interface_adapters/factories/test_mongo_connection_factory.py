@@ -0,0 +1,79 @@
+from typing import Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pymongo import AsyncMongoClient
+
+from pebble.interface_adapters.factories import (
+    MongoClientSettings,
+    MongoConnectionError,
+    MongoConnectionFactory,
+)
+
+
+@pytest.fixture(autouse=True)
+def local_connection_uri() -> Iterator[None]:
+    # the clients connect in the background, no server is needed to create them
+    with patch.object(
+        MongoConnectionFactory, "CONNECTION_URI", "mongodb://localhost:27017/"
+    ):
+        yield
+    MongoConnectionFactory.close_mongo_clients()
+
+
+def test_get_mongo_client_is_shared() -> None:
+    mongo_client = MongoConnectionFactory.get_mongo_client()
+
+    assert MongoConnectionFactory.get_mongo_client() is mongo_client
+
+
+def test_get_mongo_client_new_process() -> None:
+    mongo_client = MongoConnectionFactory.get_mongo_client()
+
+    # a forked process must not reuse the client of its parent
+    with patch("os.getpid", return_value=-1):
+        assert MongoConnectionFactory.get_mongo_client() is not mongo_client
+
+
+def test_get_mongo_client_settings() -> None:
+    settings = MongoClientSettings(
+        max_pool_size=10, min_pool_size=2, compressors="zlib", write_concern=1
+    )
+
+    mongo_client = MongoConnectionFactory.get_mongo_client(settings)
+
+    assert mongo_client.options.pool_options.max_pool_size == 10
+    assert mongo_client.options.pool_options.min_pool_size == 2
+    assert mongo_client.write_concern.document == {"w": 1}
+
+
+def test_get_mongo_client_error() -> None:
+    settings = MongoClientSettings(max_pool_size=-1)
+
+    with pytest.raises(MongoConnectionError):
+        MongoConnectionFactory.get_mongo_client(settings)
+
+
+def test_close_mongo_clients() -> None:
+    mongo_client = MongoConnectionFactory.get_mongo_client()
+
+    MongoConnectionFactory.close_mongo_clients()
+
+    assert MongoConnectionFactory.get_mongo_client() is not mongo_client
+
+
+def test_get_async_mongo_client() -> None:
+    async_mongo_client = MongoConnectionFactory.get_async_mongo_client(
+        MongoClientSettings(max_pool_size=10)
+    )
+
+    assert isinstance(async_mongo_client, AsyncMongoClient)
+    assert async_mongo_client.options.pool_options.max_pool_size == 10
+
+
+def test_check_connection_error() -> None:
+    mongo_client = MagicMock()
+    mongo_client.admin.command.side_effect = Exception("unreachable")
+
+    with pytest.raises(MongoConnectionError):
+        MongoConnectionFactory.check_connection(mongo_client)
@@ -0,0 +1,615 @@
+import asyncio
+import datetime
+from unittest.mock import patch
+
+import mongomock
+import pytest
+from async_mongomock import AsyncMockMongoClient
+from bson import ObjectId
+
+from pebble.application.repositories import IdentityMap
+from pebble.application.use_cases import AsyncCreateHabit, CreateHabitDTO
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Daily,
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+    HabitStreak,
+)
+from pebble.domain.value_objects import Color, WeekDayMask
+from pebble.interface_adapters.repositories import AsyncMongoHabitRepository
+from pebble.interface_adapters.repositories.mongo import (
+    MongoDeduplicationReport,
+    MongoHabitCategoryExistsError,
+    MongoHabitCollectionNotFoundError,
+    MongoHabitExistsError,
+    MongoHabitNotFoundError,
+)
+
+
+@pytest.fixture
+def mock_mongo_client() -> mongomock.MongoClient:
+    return mongomock.MongoClient()
+
+
+@pytest.fixture
+def async_habit_repository(
+    mock_mongo_client: mongomock.MongoClient,
+) -> AsyncMongoHabitRepository:
+    async_habit_repository = AsyncMongoHabitRepository(
+        AsyncMockMongoClient(mock_mongo_client)
+    )
+    # the repository relies on the unique indexes to reject duplicates
+    asyncio.run(async_habit_repository.ensure_indexes())
+    return async_habit_repository
+
+
+@pytest.fixture
+def generic_habit() -> Habit:
+    return Habit(
+        name="Test Habit",
+        recurrence=Daily(),
+        description="This is a test habit",
+        category=HabitCategory(
+            name="Test Category",
+            description="This is a test category",
+            color=Color(hex="#FF5733"),
+        ),
+        color=Color(hex="#FF5733"),
+    )
+
+
+def test_save_and_get_habit(
+    async_habit_repository: AsyncMongoHabitRepository,
+    mock_mongo_client: mongomock.MongoClient,
+    generic_habit: Habit,
+) -> None:
+    async def scenario() -> Habit:
+        await async_habit_repository.save_habit_category(generic_habit.category)
+        await async_habit_repository.save_habit(generic_habit)
+        return await async_habit_repository.get_habit_by_id(generic_habit.id)
+
+    habit = asyncio.run(scenario())
+
+    assert mock_mongo_client["pebble"]["habits"].find_one(
+        {"_id": ObjectId(generic_habit.id)}
+    )
+    assert habit == generic_habit
+    assert habit.category == generic_habit.category
+    assert habit.recurrence == Daily()
+
+
+def test_save_habit_already_exists(
+    async_habit_repository: AsyncMongoHabitRepository, generic_habit: Habit
+) -> None:
+    async def scenario() -> None:
+        await async_habit_repository.save_habit(generic_habit)
+        await async_habit_repository.save_habit(generic_habit)
+
+    with pytest.raises(MongoHabitExistsError):
+        asyncio.run(scenario())
+
+
+def test_save_habit_category_already_exists(
+    async_habit_repository: AsyncMongoHabitRepository,
+) -> None:
+    async def scenario() -> None:
+        await async_habit_repository.save_habit_category(
+            HabitCategory(name="Sport", color=Color(hex="#FF5733"))
+        )
+        await async_habit_repository.save_habit_category(
+            HabitCategory(name="Sport", color=Color(hex="#FF5733"))
+        )
+
+    with pytest.raises(MongoHabitCategoryExistsError):
+        asyncio.run(scenario())
+
+
+def test_get_habit_category_by_name_uses_cache(
+    async_habit_repository: AsyncMongoHabitRepository,
+) -> None:
+    async def scenario() -> HabitCategory:
+        await async_habit_repository.save_habit_category(
+            HabitCategory(name="Sport", color=Color(hex="#FF5733"))
+        )
+        return await async_habit_repository.get_habit_category_by_name("Sport")
+
+    habit_category = asyncio.run(scenario())
+
+    assert habit_category.name == "Sport"
+    assert async_habit_repository.category_cache_stats.hits == 1
+
+
+def test_get_habits_by_ids(
+    async_habit_repository: AsyncMongoHabitRepository,
+) -> None:
+    habits = [
+        Habit(name=f"Habit {index}", recurrence=Daily(), color=Color(hex="#FF5733"))
+        for index in range(3)
+    ]
+
+    async def scenario() -> set:
+        result = await async_habit_repository.save_habits(habits)
+        assert result.failed == []
+        return await async_habit_repository.get_habits_by_ids(
+            {habit.id for habit in habits[:2]}
+        )
+
+    assert asyncio.run(scenario()) == set(habits[:2])
+
+
+def test_save_habit_categories_reports_failures(
+    async_habit_repository: AsyncMongoHabitRepository,
+) -> None:
+    async def scenario() -> None:
+        await async_habit_repository.save_habit_category(
+            HabitCategory(name="Sport", color=Color(hex="#FF5733"))
+        )
+        return await async_habit_repository.save_habit_categories(
+            [
+                HabitCategory(name="Sport", color=Color(hex="#FF5733")),
+                HabitCategory(name="Music", color=Color(hex="#FF5733")),
+            ]
+        )
+
+    result = asyncio.run(scenario())
+
+    assert [habit_category.name for habit_category in result.saved] == ["Music"]
+    assert [failure.entity.name for failure in result.failed] == ["Sport"]
+
+
+def test_get_habit_collection_by_id(
+    async_habit_repository: AsyncMongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    habit_collection = HabitCollection(name="Test Collection", habits={generic_habit})
+
+    async def scenario() -> HabitCollection:
+        await async_habit_repository.save_habit_category(generic_habit.category)
+        await async_habit_repository.save_habit(generic_habit)
+        await async_habit_repository.save_habit_collection(habit_collection)
+        habit_instance = await async_habit_repository.save_habit_instance(
+            HabitInstance(
+                habit=generic_habit, date=datetime.date(2025, 1, 1), completed=True
+            )
+        )
+        habit_collection.habits_instance.add(habit_instance)
+        await async_habit_repository.update_habit_collection(habit_collection)
+
+        return await async_habit_repository.get_habit_collection_by_id(
+            habit_collection.id
+        )
+
+    retrieved_habit_collection = asyncio.run(scenario())
+
+    assert retrieved_habit_collection.name == "Test Collection"
+    assert retrieved_habit_collection.habits == {generic_habit}
+    assert retrieved_habit_collection.habits_instance == (
+        habit_collection.habits_instance
+    )
+
+
+def test_add_habit_instance_to_collection(
+    async_habit_repository: AsyncMongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    habit_collection = HabitCollection(name="Test Collection", habits={generic_habit})
+
+    async def scenario() -> HabitInstance:
+        await async_habit_repository.save_habit_category(generic_habit.category)
+        await async_habit_repository.save_habit(generic_habit)
+        await async_habit_repository.save_habit_collection(habit_collection)
+        assert await async_habit_repository.habit_collection_exists(habit_collection.id)
+        habit_instance = await async_habit_repository.save_habit_instance(
+            HabitInstance(
+                habit=generic_habit, date=datetime.date(2025, 1, 1), completed=True
+            )
+        )
+        await async_habit_repository.add_habit_instance_to_collection(
+            habit_collection.id, habit_instance
+        )
+        return habit_instance
+
+    habit_instance = asyncio.run(scenario())
+
+    retrieved_habit_collection = asyncio.run(
+        async_habit_repository.get_habit_collection_by_id(habit_collection.id)
+    )
+    assert retrieved_habit_collection.habits_instance == {habit_instance}
+
+
+def test_add_habit_instance_to_collection_not_found(
+    async_habit_repository: AsyncMongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    habit_instance = HabitInstance(
+        habit=generic_habit,
+        date=datetime.date(2025, 1, 1),
+        completed=True,
+        id=str(ObjectId()),
+    )
+
+    assert not asyncio.run(
+        async_habit_repository.habit_collection_exists(str(ObjectId()))
+    )
+    with pytest.raises(MongoHabitCollectionNotFoundError):
+        asyncio.run(
+            async_habit_repository.add_habit_instance_to_collection(
+                str(ObjectId()), habit_instance
+            )
+        )
+
+
+def test_iter_habit_instances(
+    async_habit_repository: AsyncMongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    async def scenario() -> list:
+        await async_habit_repository.save_habit_category(generic_habit.category)
+        await async_habit_repository.save_habit(generic_habit)
+        await async_habit_repository.save_habit_instances(
+            [
+                HabitInstance(
+                    habit=generic_habit,
+                    date=datetime.date(2025, 1, day),
+                    completed=True,
+                )
+                for day in range(1, 11)
+            ]
+        )
+        return [
+            habit_instance
+            async for habit_instance in async_habit_repository.iter_habit_instances(
+                {generic_habit.id},
+                datetime.date(2025, 1, 3),
+                datetime.date(2025, 1, 8),
+                batch_size=2,
+                after=(datetime.date(2025, 1, 4), str(ObjectId("f" * 24))),
+            )
+        ]
+
+    habit_instances = asyncio.run(scenario())
+
+    assert [habit_instance.date.day for habit_instance in habit_instances] == [
+        5,
+        6,
+        7,
+        8,
+    ]
+
+
+def test_record_check_in(
+    async_habit_repository: AsyncMongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    async def scenario() -> tuple:
+        await async_habit_repository.save_habit_category(generic_habit.category)
+        await async_habit_repository.save_habit(generic_habit)
+        habit_instances = [
+            await async_habit_repository.record_check_in(
+                HabitInstance(
+                    habit=generic_habit,
+                    date=datetime.date(2025, 1, 1),
+                    completed=completed,
+                )
+            )
+            for completed in (False, True)
+        ]
+        return (
+            habit_instances,
+            await async_habit_repository.habit_instances_collection.count_documents({}),
+        )
+
+    habit_instances, count = asyncio.run(scenario())
+
+    assert habit_instances[0].id == habit_instances[1].id
+    assert habit_instances[1].completed is True
+    assert count == 1
+
+
+def test_deduplicate_habit_instances(mock_mongo_client: mongomock.MongoClient) -> None:
+    # the unique index is not built yet, the duplicates were written before it
+    async_habit_repository = AsyncMongoHabitRepository(
+        AsyncMockMongoClient(mock_mongo_client)
+    )
+    habit_instances_ids = [ObjectId() for _ in range(2)]
+
+    async def scenario() -> MongoDeduplicationReport:
+        await async_habit_repository.habit_instances_collection.insert_many(
+            [
+                {
+                    "_id": habit_instance_id,
+                    "habit_id": "habit1",
+                    "date": datetime.datetime(2023, 10, 1),
+                    "completed": True,
+                }
+                for habit_instance_id in habit_instances_ids
+            ]
+        )
+        await async_habit_repository.habit_collections_collection.insert_one(
+            {
+                "name": "Morning",
+                "habits": ["habit1"],
+                "habits_instances": [
+                    str(habit_instance_id) for habit_instance_id in habit_instances_ids
+                ],
+            }
+        )
+        return await async_habit_repository.deduplicate_habit_instances()
+
+    assert asyncio.run(scenario()).removed_count == 1
+    assert [
+        data["_id"] for data in mock_mongo_client["pebble"]["habit_instances"].find()
+    ] == [habit_instances_ids[-1]]
+    assert mock_mongo_client["pebble"]["habit_collections"].find_one()[
+        "habits_instances"
+    ] == [str(habit_instances_ids[-1])]
+
+    asyncio.run(async_habit_repository.ensure_indexes())
+
+    assert (
+        asyncio.run(async_habit_repository.deduplicate_habit_instances()).removed_count
+        == 0
+    )
+
+
+def test_migrate_habit_instance_dates(
+    async_habit_repository: AsyncMongoHabitRepository,
+) -> None:
+    async def scenario() -> int:
+        await async_habit_repository.habit_instances_collection.insert_many(
+            [
+                {"habit_id": str(ObjectId()), "date": "2023-10-01", "completed": True}
+                for _ in range(2)
+            ]
+        )
+        return await async_habit_repository.migrate_habit_instance_dates()
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_migrate_habit_instance_dates_collision(
+    async_habit_repository: AsyncMongoHabitRepository,
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    habit_instances = mock_mongo_client["pebble"]["habit_instances"]
+    habit_instances.insert_many(
+        [
+            {"habit_id": "habit1", "date": date, "completed": completed}
+            for date, completed in (
+                (datetime.datetime(2023, 10, 1), True),
+                ("2023-10-01", False),
+            )
+        ]
+    )
+
+    assert asyncio.run(async_habit_repository.migrate_habit_instance_dates()) == 0
+
+    # the habit instance written by the current version is kept
+    assert [(data["date"], data["completed"]) for data in habit_instances.find()] == [
+        (datetime.datetime(2023, 10, 1), True)
+    ]
+
+
+def test_get_habit_collection_by_id_not_found(
+    async_habit_repository: AsyncMongoHabitRepository,
+) -> None:
+    habit_collection = asyncio.run(
+        async_habit_repository.get_habit_collection_by_id(str(ObjectId()))
+    )
+
+    assert habit_collection is None
+
+
+def test_update_habit_collection(
+    async_habit_repository: AsyncMongoHabitRepository,
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    habit_collection = asyncio.run(
+        async_habit_repository.save_habit_collection(
+            HabitCollection(name="Test Collection")
+        )
+    )
+    habit_collection.name = "Updated Collection"
+
+    # the habit collection is not loaded to check that it exists
+    with patch.object(
+        async_habit_repository,
+        "get_habit_collection_by_id",
+        side_effect=AssertionError("the habit collection must not be loaded"),
+    ):
+        asyncio.run(async_habit_repository.update_habit_collection(habit_collection))
+
+    assert (
+        mock_mongo_client["pebble"]["habit_collections"].find_one()["name"]
+        == "Updated Collection"
+    )
+
+
+def test_update_habit_collection_raises_error_when_not_found(
+    async_habit_repository: AsyncMongoHabitRepository,
+) -> None:
+    habit_collection = HabitCollection(name="Test Collection", id=str(ObjectId()))
+
+    with pytest.raises(MongoHabitCollectionNotFoundError):
+        asyncio.run(async_habit_repository.update_habit_collection(habit_collection))
+
+
+def test_get_habit_instance_by_id_habit_not_found(
+    async_habit_repository: AsyncMongoHabitRepository,
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    habit_instance_id = (
+        mock_mongo_client["pebble"]["habit_instances"]
+        .insert_one(
+            {"habit_id": str(ObjectId()), "date": "2025-01-01", "completed": True}
+        )
+        .inserted_id
+    )
+
+    with pytest.raises(MongoHabitNotFoundError):
+        asyncio.run(async_habit_repository.get_habit_instance_by_id(habit_instance_id))
+
+
+def test_identity_map_returns_same_objects(
+    mock_mongo_client: mongomock.MongoClient,
+    async_habit_repository: AsyncMongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    asyncio.run(async_habit_repository.save_habit_category(generic_habit.category))
+    asyncio.run(async_habit_repository.save_habit(generic_habit))
+
+    identity_map_repository = AsyncMongoHabitRepository(
+        AsyncMockMongoClient(mock_mongo_client), identity_map=IdentityMap()
+    )
+
+    async def scenario() -> tuple:
+        first_habit = await identity_map_repository.get_habit_by_id(generic_habit.id)
+        second_habit = await identity_map_repository.get_habit_by_id(generic_habit.id)
+        return first_habit, second_habit
+
+    first_habit, second_habit = asyncio.run(scenario())
+
+    assert first_habit == generic_habit
+    assert first_habit is not generic_habit
+    assert second_habit is first_habit
+
+
+def test_async_create_habit_use_case(
+    async_habit_repository: AsyncMongoHabitRepository,
+) -> None:
+    dto = CreateHabitDTO(
+        name="Test Habit",
+        recurrence="Daily",
+        category_name="Sport",
+        category_color="#FF5733",
+        habit_color="#FF5733",
+    )
+
+    habit = asyncio.run(AsyncCreateHabit(async_habit_repository).execute(dto))
+
+    saved_habit = asyncio.run(async_habit_repository.get_habit_by_id(habit.id))
+    assert saved_habit == habit
+    assert saved_habit.category.name == "Sport"
+
+
+def test_ensure_indexes(
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    async_habit_repository = AsyncMongoHabitRepository(
+        AsyncMockMongoClient(mock_mongo_client)
+    )
+    report = asyncio.run(async_habit_repository.ensure_indexes())
+
+    assert report.created == {
+        "habits": ["recurrence_days"],
+        "habit_categories": ["name_unique"],
+        "habit_instances": ["habit_id_date_unique"],
+    }
+    assert "name_unique" in (
+        mock_mongo_client["pebble"]["habit_categories"].index_information()
+    )
+    assert asyncio.run(async_habit_repository.ensure_indexes()).up_to_date
+
+
+def test_save_habit_streak(async_habit_repository: AsyncMongoHabitRepository) -> None:
+    habit_streak = HabitStreak(
+        habit_id="habit1",
+        current=1,
+        longest=3,
+        last_completed_date=datetime.date(2025, 1, 1),
+    )
+
+    asyncio.run(async_habit_repository.save_habit_streak(habit_streak))
+
+    assert (
+        asyncio.run(async_habit_repository.get_habit_streak("habit1")) == habit_streak
+    )
+    assert asyncio.run(async_habit_repository.get_habit_streak("unknown")) is None
+
+
+def test_save_completion_calendar(
+    async_habit_repository: AsyncMongoHabitRepository,
+) -> None:
+    completion_calendar = CompletionCalendar(habit_id="habit1", year=2025)
+    completion_calendar.set_completed(datetime.date(2025, 3, 1), True)
+
+    asyncio.run(async_habit_repository.save_completion_calendar(completion_calendar))
+
+    assert (
+        asyncio.run(async_habit_repository.get_completion_calendar("habit1", 2025))
+        == completion_calendar
+    )
+    assert (
+        asyncio.run(async_habit_repository.get_completion_calendar("habit1", 2024))
+        is None
+    )
+
+
+def test_record_completion(
+    async_habit_repository: AsyncMongoHabitRepository,
+    mock_mongo_client: mongomock.MongoClient,
+    generic_habit: Habit,
+) -> None:
+    habit = asyncio.run(async_habit_repository.save_habit(generic_habit))
+    asyncio.run(
+        async_habit_repository.save_completion_calendar(
+            CompletionCalendar(habit_id=habit.id, year=2025)
+        )
+    )
+    completion_calendars = mock_mongo_client["pebble"]["completion_calendars"]
+    # a calendar saved before the versions
+    completion_calendars.update_one({}, {"$unset": {"version": ""}})
+
+    completion_calendar = asyncio.run(
+        async_habit_repository.record_completion(
+            HabitInstance(habit=habit, date=datetime.date(2025, 3, 1), completed=True)
+        )
+    )
+
+    assert completion_calendar.completed_dates() == [datetime.date(2025, 3, 1)]
+    assert completion_calendars.find_one()["version"] == 1
+    assert (
+        asyncio.run(
+            async_habit_repository.record_completion(
+                HabitInstance(
+                    habit=habit, date=datetime.date(2024, 3, 1), completed=True
+                )
+            )
+        )
+        is None
+    )
+
+
+def test_get_habits_by_weekdays(
+    async_habit_repository: AsyncMongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    habit = asyncio.run(async_habit_repository.save_habit(generic_habit))
+
+    assert asyncio.run(
+        async_habit_repository.get_habits_by_weekdays(WeekDayMask.SUNDAY)
+    ) == {habit}
+
+
+def test_migrate_habit_recurrence_days(
+    async_habit_repository: AsyncMongoHabitRepository,
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    mock_mongo_client["pebble"]["habits"].insert_one(
+        {
+            "name": "Run",
+            "recurrence": "Bi-Weekly",
+            "recurrence_days": ["Friday", "Monday"],
+            "description": None,
+            "category_id": None,
+            "color_hex": "#FF5733",
+        }
+    )
+
+    assert asyncio.run(async_habit_repository.migrate_habit_recurrence_days()) == 1
+    assert mock_mongo_client["pebble"]["habits"].find_one()["recurrence_days"] == (
+        WeekDayMask.MONDAY | WeekDayMask.FRIDAY
+    )
@@ -0,0 +1,296 @@
+import datetime
+import itertools
+from unittest.mock import patch
+
+import mongomock
+import pytest
+
+from pebble.application.repositories import IdentityMap
+from pebble.application.use_cases import CreateHabitInstance, CreateHabitInstanceDTO
+from pebble.domain.entities import Daily, Habit, HabitCollection, HabitInstance
+from pebble.domain.value_objects import Color
+from pebble.interface_adapters.repositories import BucketedMongoHabitRepository
+from pebble.interface_adapters.repositories.mongo import (
+    MongoHabitExistsError,
+    MongoHabitNotFoundError,
+)
+
+
+@pytest.fixture
+def bucketed_habit_repository() -> BucketedMongoHabitRepository:
+    bucketed_habit_repository = BucketedMongoHabitRepository(mongomock.MongoClient())
+    bucketed_habit_repository.ensure_indexes()
+    return bucketed_habit_repository
+
+
+@pytest.fixture
+def saved_habit(bucketed_habit_repository: BucketedMongoHabitRepository) -> Habit:
+    return bucketed_habit_repository.save_habit(
+        Habit(name="Test Habit", recurrence=Daily(), color=Color(hex="#FF5733"))
+    )
+
+
+def habit_instances_of_year(habit: Habit, year: int) -> list:
+    first_day = datetime.date(year, 1, 1)
+    return [
+        HabitInstance(
+            habit=habit,
+            date=first_day + datetime.timedelta(days=day),
+            completed=day % 2 == 0,
+        )
+        for day in range(365)
+    ]
+
+
+def test_save_habit_instance(
+    bucketed_habit_repository: BucketedMongoHabitRepository, saved_habit: Habit
+) -> None:
+    habit_instance = bucketed_habit_repository.save_habit_instance(
+        HabitInstance(
+            habit=saved_habit,
+            date=datetime.date(2025, 3, 7),
+            completed=True,
+            note="Done",
+        )
+    )
+
+    assert habit_instance.id == f"{saved_habit.id}:2025-03-07"
+    assert bucketed_habit_repository.habit_instances_collection.find_one() == {
+        "_id": f"{saved_habit.id}:2025-03",
+        "habit_id": saved_habit.id,
+        "month": "2025-03",
+        "days": {"07": {"c": True, "n": "Done"}},
+    }
+
+    retrieved_habit_instance = bucketed_habit_repository.get_habit_instance_by_id(
+        habit_instance.id
+    )
+    assert retrieved_habit_instance == habit_instance
+
+
+def test_save_habit_instance_same_day(
+    bucketed_habit_repository: BucketedMongoHabitRepository, saved_habit: Habit
+) -> None:
+    bucketed_habit_repository.save_habit_instance(
+        HabitInstance(habit=saved_habit, date=datetime.date(2025, 3, 7), completed=True)
+    )
+
+    with pytest.raises(MongoHabitExistsError):
+        bucketed_habit_repository.save_habit_instance(
+            HabitInstance(
+                habit=saved_habit, date=datetime.date(2025, 3, 7), completed=False
+            )
+        )
+
+
+def test_deduplicate_habit_instances_keeps_the_buckets(
+    bucketed_habit_repository: BucketedMongoHabitRepository, saved_habit: Habit
+) -> None:
+    for day in (7, 8):
+        bucketed_habit_repository.save_habit_instance(
+            HabitInstance(
+                habit=saved_habit, date=datetime.date(2025, 3, day), completed=True
+            )
+        )
+
+    # the habit instances of a month share a bucket, none is a duplicate
+    assert bucketed_habit_repository.deduplicate_habit_instances().removed_count == 0
+    assert bucketed_habit_repository.habit_instances_collection.count_documents({}) == 1
+
+
+def test_record_check_in(
+    bucketed_habit_repository: BucketedMongoHabitRepository, saved_habit: Habit
+) -> None:
+    bucketed_habit_repository.record_check_in(
+        HabitInstance(habit=saved_habit, date=datetime.date(2025, 3, 6), completed=True)
+    )
+    for completed in (False, False, True):
+        habit_instance = bucketed_habit_repository.record_check_in(
+            HabitInstance(
+                habit=saved_habit, date=datetime.date(2025, 3, 7), completed=completed
+            )
+        )
+
+    assert habit_instance.id == f"{saved_habit.id}:2025-03-07"
+    assert list(bucketed_habit_repository.habit_instances_collection.find()) == [
+        {
+            "_id": f"{saved_habit.id}:2025-03",
+            "habit_id": saved_habit.id,
+            "month": "2025-03",
+            "days": {"06": {"c": True}, "07": {"c": True}},
+        }
+    ]
+
+
+def test_save_habit_instances_one_bucket_per_month(
+    bucketed_habit_repository: BucketedMongoHabitRepository, saved_habit: Habit
+) -> None:
+    result = bucketed_habit_repository.save_habit_instances(
+        habit_instances_of_year(saved_habit, 2025)
+    )
+
+    assert len(result.saved) == 365
+    assert result.failed == []
+    assert bucketed_habit_repository.habit_instances_collection.count_documents({}) == (
+        12
+    )
+
+
+def test_save_habit_instances_reports_failures(
+    bucketed_habit_repository: BucketedMongoHabitRepository, saved_habit: Habit
+) -> None:
+    bucketed_habit_repository.save_habit_instance(
+        HabitInstance(habit=saved_habit, date=datetime.date(2025, 3, 7), completed=True)
+    )
+
+    result = bucketed_habit_repository.save_habit_instances(
+        [
+            HabitInstance(
+                habit=saved_habit, date=datetime.date(2025, 3, 7), completed=True
+            ),
+            HabitInstance(
+                habit=saved_habit, date=datetime.date(2025, 3, 8), completed=True
+            ),
+            HabitInstance(
+                habit=saved_habit, date=datetime.date(2025, 3, 8), completed=False
+            ),
+        ]
+    )
+
+    assert [habit_instance.date.day for habit_instance in result.saved] == [8]
+    assert [failure.entity.date.day for failure in result.failed] == [7, 8]
+    assert result.saved[0].completed is True
+
+
+def test_get_habit_instances(
+    bucketed_habit_repository: BucketedMongoHabitRepository, saved_habit: Habit
+) -> None:
+    bucketed_habit_repository.save_habit_instances(
+        habit_instances_of_year(saved_habit, 2025)
+    )
+
+    with patch.object(
+        bucketed_habit_repository.habit_instances_collection,
+        "find",
+        wraps=bucketed_habit_repository.habit_instances_collection.find,
+    ) as find:
+        habit_instances = bucketed_habit_repository.get_habit_instances(
+            saved_habit.id, datetime.date(2025, 2, 20), datetime.date(2025, 4, 10)
+        )
+
+    # a single query reads the buckets of February, March and April
+    assert find.call_count == 1
+    assert [habit_instance.date for habit_instance in habit_instances] == [
+        datetime.date(2025, 2, 20) + datetime.timedelta(days=day) for day in range(50)
+    ]
+
+
+def test_iter_habit_instances_keyset_pagination(
+    bucketed_habit_repository: BucketedMongoHabitRepository,
+) -> None:
+    habits = bucketed_habit_repository.save_habits(
+        [
+            Habit(name=name, recurrence=Daily(), color=Color(hex="#FF5733"))
+            for name in ("Read", "Run")
+        ]
+    ).saved
+    for habit in habits:
+        bucketed_habit_repository.save_habit_instances(
+            habit_instances_of_year(habit, 2025)
+        )
+    habits_ids = {habit.id for habit in habits}
+    start_date, end_date = datetime.date(2025, 1, 30), datetime.date(2025, 3, 2)
+
+    first_page = list(
+        itertools.islice(
+            bucketed_habit_repository.iter_habit_instances(
+                habits_ids, start_date, end_date, batch_size=10
+            ),
+            5,
+        )
+    )
+    second_page = list(
+        bucketed_habit_repository.iter_habit_instances(
+            habits_ids,
+            start_date,
+            end_date,
+            after=(first_page[-1].date, first_page[-1].id),
+        )
+    )
+    habit_instances = first_page + second_page
+
+    # 32 days of the two habits, across the buckets of three months
+    assert len(habit_instances) == 64
+    assert [habit_instance.date for habit_instance in habit_instances[::2]] == [
+        start_date + datetime.timedelta(days=day) for day in range(32)
+    ]
+    assert habit_instances == sorted(
+        habit_instances,
+        key=lambda habit_instance: (habit_instance.date, habit_instance.id),
+    )
+
+
+def test_get_habit_instance_by_id_not_found(
+    bucketed_habit_repository: BucketedMongoHabitRepository, saved_habit: Habit
+) -> None:
+    bucketed_habit_repository.save_habit_instance(
+        HabitInstance(habit=saved_habit, date=datetime.date(2025, 3, 7), completed=True)
+    )
+
+    assert (
+        bucketed_habit_repository.get_habit_instance_by_id(
+            f"{saved_habit.id}:2025-03-08"
+        )
+        is None
+    )
+    assert bucketed_habit_repository.get_habit_instance_by_id("unknown") is None
+
+
+def test_get_habit_instance_by_id_habit_not_found(
+    bucketed_habit_repository: BucketedMongoHabitRepository, saved_habit: Habit
+) -> None:
+    habit_instance = bucketed_habit_repository.save_habit_instance(
+        HabitInstance(habit=saved_habit, date=datetime.date(2025, 3, 7), completed=True)
+    )
+    bucketed_habit_repository.habits_collection.delete_many({})
+
+    with pytest.raises(MongoHabitNotFoundError):
+        bucketed_habit_repository.get_habit_instance_by_id(habit_instance.id)
+
+
+def test_get_habit_collection_by_id() -> None:
+    mongo_client = mongomock.MongoClient()
+    bucketed_habit_repository = BucketedMongoHabitRepository(mongo_client)
+    saved_habit = bucketed_habit_repository.save_habit(
+        Habit(name="Test Habit", recurrence=Daily(), color=Color(hex="#FF5733"))
+    )
+    habit_collection = bucketed_habit_repository.save_habit_collection(
+        HabitCollection(name="Test Collection", habits={saved_habit})
+    )
+
+    habit_instance = CreateHabitInstance(bucketed_habit_repository).execute(
+        CreateHabitInstanceDTO(
+            habit_id=saved_habit.id,
+            habit_collection_id=habit_collection.id,
+            date=datetime.date(2025, 3, 7),
+            completed=True,
+        )
+    )
+
+    # a new repository, with an identity map, loads the habit collection
+    retrieved_habit_collection = BucketedMongoHabitRepository(
+        mongo_client, identity_map=IdentityMap()
+    ).get_habit_collection_by_id(habit_collection.id)
+
+    assert retrieved_habit_collection.habits_instance == {habit_instance}
+
+
+def test_ensure_indexes() -> None:
+    bucketed_habit_repository = BucketedMongoHabitRepository(mongomock.MongoClient())
+    report = bucketed_habit_repository.ensure_indexes()
+
+    assert report.created == {
+        "habits": ["recurrence_days"],
+        "habit_categories": ["name_unique"],
+        "habit_instance_buckets": ["habit_id_month"],
+    }
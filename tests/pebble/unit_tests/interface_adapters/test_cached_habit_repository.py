@@ -0,0 +1,243 @@
+import datetime
+
+import pytest
+
+from pebble.domain.entities import (
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+)
+from pebble.domain.entities.recurrences import Daily
+from pebble.interface_adapters.caches import (
+    CacheStore,
+    InMemoryKeyValueClient,
+    KeyValueCacheStore,
+    LRUCache,
+)
+from pebble.interface_adapters.repositories import (
+    CachedHabitRepository,
+    InMemoryHabitRepository,
+)
+from pebble.interface_adapters.repositories.memory import (
+    InMemoryHabitCollectionNotFoundError,
+)
+
+
+class CountingHabitRepository(InMemoryHabitRepository):
+    """In-memory habit repository counting the reads of the cached methods."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads: list = []
+
+    def get_habit_by_id(self, habit_id: object) -> object:
+        self.reads.append(("get_habit_by_id", habit_id))
+        return super().get_habit_by_id(habit_id)
+
+    def get_habits_by_ids(self, habits_ids: set) -> set:
+        self.reads.append(("get_habits_by_ids", frozenset(habits_ids)))
+        return super().get_habits_by_ids(habits_ids)
+
+    def get_habit_category_by_name(self, category_name: str) -> object:
+        self.reads.append(("get_habit_category_by_name", category_name))
+        return super().get_habit_category_by_name(category_name)
+
+    def get_habit_collection_by_id(self, habit_collection_id: object) -> object:
+        self.reads.append(("get_habit_collection_by_id", habit_collection_id))
+        return super().get_habit_collection_by_id(habit_collection_id)
+
+
+@pytest.fixture
+def counting_habit_repository() -> CountingHabitRepository:
+    return CountingHabitRepository()
+
+
+@pytest.fixture(params=["lru", "key_value"])
+def cache_store(request: pytest.FixtureRequest) -> CacheStore:
+    if request.param == "lru":
+        return LRUCache(max_size=16)
+    return KeyValueCacheStore(InMemoryKeyValueClient())
+
+
+@pytest.fixture
+def cached_habit_repository(
+    counting_habit_repository: CountingHabitRepository, cache_store: CacheStore
+) -> CachedHabitRepository:
+    return CachedHabitRepository(counting_habit_repository, cache_store)
+
+
+def test_get_habit_by_id_reads_through(
+    cached_habit_repository: CachedHabitRepository,
+    counting_habit_repository: CountingHabitRepository,
+) -> None:
+    habit = cached_habit_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+
+    for _ in range(3):
+        assert cached_habit_repository.get_habit_by_id(habit.id) == habit
+
+    # the missing habits are not cached
+    for _ in range(2):
+        assert cached_habit_repository.get_habit_by_id("unknown") is None
+
+    assert counting_habit_repository.reads == [
+        ("get_habit_by_id", habit.id),
+        ("get_habit_by_id", "unknown"),
+        ("get_habit_by_id", "unknown"),
+    ]
+    stats = cached_habit_repository.cache_stats
+    assert (stats.hits, stats.misses) == (2, 3)
+    assert stats.hit_ratio == 0.4
+
+
+def test_cached_entities_are_copies(
+    cached_habit_repository: CachedHabitRepository,
+) -> None:
+    habit = cached_habit_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+    cached_habit_repository.get_habit_by_id(habit.id)
+
+    # a caller changing the habit it read does not change the cached habit
+    first_habit = cached_habit_repository.get_habit_by_id(habit.id)
+    first_habit.name = "Run"
+    second_habit = cached_habit_repository.get_habit_by_id(habit.id)
+
+    assert second_habit is not first_habit
+    assert second_habit.name == "Read"
+
+
+def test_get_habits_by_ids_reads_missing_habits(
+    cached_habit_repository: CachedHabitRepository,
+    counting_habit_repository: CountingHabitRepository,
+) -> None:
+    habits = cached_habit_repository.save_habits(
+        [Habit(name=name, recurrence=Daily()) for name in ("Read", "Run", "Swim")]
+    ).saved
+    cached_habit_repository.get_habit_by_id(habits[0].id)
+
+    habits_ids = {habit.id for habit in habits}
+    assert cached_habit_repository.get_habits_by_ids(habits_ids) == set(habits)
+    assert cached_habit_repository.get_habits_by_ids(habits_ids) == set(habits)
+
+    assert counting_habit_repository.reads == [
+        ("get_habit_by_id", habits[0].id),
+        ("get_habits_by_ids", frozenset(habits_ids - {habits[0].id})),
+    ]
+
+
+def test_get_habit_category_by_name_reads_through(
+    cached_habit_repository: CachedHabitRepository,
+    counting_habit_repository: CountingHabitRepository,
+) -> None:
+    assert cached_habit_repository.get_habit_category_by_name("Health") is None
+
+    # saving the habit category replaces the missing value
+    habit_category = cached_habit_repository.save_habit_category(
+        HabitCategory(name="Health")
+    )
+    for _ in range(2):
+        assert cached_habit_repository.get_habit_category_by_name("Health") == (
+            habit_category
+        )
+
+    assert counting_habit_repository.reads == [
+        ("get_habit_category_by_name", "Health"),
+        ("get_habit_category_by_name", "Health"),
+    ]
+
+
+def test_habit_collection_invalidated_on_update(
+    cached_habit_repository: CachedHabitRepository,
+    counting_habit_repository: CountingHabitRepository,
+) -> None:
+    habit = cached_habit_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+    habit_collection = cached_habit_repository.save_habit_collection(
+        HabitCollection(name="Morning", habits={habit})
+    )
+    habit_collection_id = habit_collection.id
+
+    cached_habit_repository.get_habit_collection_by_id(habit_collection_id)
+    assert cached_habit_repository.habit_collection_exists(habit_collection_id)
+
+    cached_habit_repository.update_habit_collection(
+        HabitCollection(name="Evening", habits=set(), id=habit_collection_id)
+    )
+    assert (
+        cached_habit_repository.get_habit_collection_by_id(habit_collection_id).name
+        == "Evening"
+    )
+
+    habit_instance = cached_habit_repository.record_check_in(
+        HabitInstance(habit=habit, date=datetime.date(2025, 1, 1), completed=True)
+    )
+    cached_habit_repository.add_habit_instance_to_collection(
+        habit_collection_id, habit_instance
+    )
+    assert cached_habit_repository.get_habit_collection_by_id(
+        habit_collection_id
+    ).habits_instance == {habit_instance}
+
+    assert (
+        counting_habit_repository.reads
+        == [("get_habit_collection_by_id", habit_collection_id)] * 3
+    )
+
+    with pytest.raises(InMemoryHabitCollectionNotFoundError):
+        cached_habit_repository.add_habit_instance_to_collection(
+            "unknown", habit_instance
+        )
+
+
+def test_habit_collection_invalidated_on_check_in(
+    cached_habit_repository: CachedHabitRepository,
+    counting_habit_repository: CountingHabitRepository,
+) -> None:
+    habit = cached_habit_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+    habit_collection = cached_habit_repository.save_habit_collection(
+        HabitCollection(name="Morning", habits={habit})
+    )
+    habit_collection_id = habit_collection.id
+    day = datetime.date(2025, 1, 1)
+
+    habit_instance = cached_habit_repository.record_check_in(
+        HabitInstance(habit=habit, date=day, completed=False)
+    )
+    cached_habit_repository.add_habit_instance_to_collection(
+        habit_collection_id, habit_instance
+    )
+    cached_habit_repository.get_habit_collection_by_id(habit_collection_id)
+
+    cached_habit_repository.record_check_in(
+        HabitInstance(habit=habit, date=day, completed=True)
+    )
+    habit_collection = cached_habit_repository.get_habit_collection_by_id(
+        habit_collection_id
+    )
+    assert habit_collection.habits_instance.get(habit, day).completed
+
+    cached_habit_repository.save_habit_instances(
+        [HabitInstance(habit=habit, date=datetime.date(2025, 1, 2), completed=True)]
+    )
+    cached_habit_repository.get_habit_collection_by_id(habit_collection_id)
+
+    assert (
+        counting_habit_repository.reads
+        == [("get_habit_collection_by_id", habit_collection_id)] * 3
+    )
+
+
+def test_cached_habit_repository_bounded_size(
+    counting_habit_repository: CountingHabitRepository,
+) -> None:
+    cached_habit_repository = CachedHabitRepository(
+        counting_habit_repository, LRUCache(max_size=2)
+    )
+    habits = cached_habit_repository.save_habits(
+        [Habit(name=name, recurrence=Daily()) for name in ("Read", "Run", "Swim")]
+    ).saved
+
+    for habit in habits:
+        cached_habit_repository.get_habit_by_id(habit.id)
+
+    stats = cached_habit_repository.cache_stats
+    assert stats.size == 2
+    assert stats.evictions == 1
@@ -0,0 +1,370 @@
+import datetime
+import itertools
+import random
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+    HabitStreak,
+)
+from pebble.domain.entities.recurrences import Daily, Weekly
+from pebble.domain.value_objects import Color, WeekDayMask, WeekDays
+from pebble.interface_adapters.repositories.memory import (
+    InMemoryError,
+    InMemoryHabitCategoryExistsError,
+    InMemoryHabitCollectionExistsError,
+    InMemoryHabitCollectionNotFoundError,
+    InMemoryHabitExistsError,
+    InMemoryHabitRepository,
+)
+
+
+@pytest.fixture
+def in_memory_habit_repository() -> InMemoryHabitRepository:
+    return InMemoryHabitRepository()
+
+
+@pytest.fixture
+def saved_habit(in_memory_habit_repository: InMemoryHabitRepository) -> Habit:
+    return in_memory_habit_repository.save_habit(
+        Habit(name="Read", recurrence=Daily(), color=Color(hex="#FF5733"))
+    )
+
+
+def test_save_habit(in_memory_habit_repository: InMemoryHabitRepository) -> None:
+    habit = in_memory_habit_repository.save_habit(
+        Habit(name="Read", recurrence=Daily())
+    )
+
+    assert habit.id is not None
+    assert in_memory_habit_repository.get_habit_by_id(habit.id) is habit
+    assert in_memory_habit_repository.get_habits_by_ids({habit.id, "unknown"}) == {
+        habit
+    }
+    assert in_memory_habit_repository.get_habit_by_id("unknown") is None
+
+    with pytest.raises(InMemoryHabitExistsError):
+        in_memory_habit_repository.save_habit(habit)
+
+
+def test_save_habits_reports_failures(
+    in_memory_habit_repository: InMemoryHabitRepository, saved_habit: Habit
+) -> None:
+    new_habit = Habit(name="Run", recurrence=Daily())
+
+    result = in_memory_habit_repository.save_habits([saved_habit, new_habit])
+
+    assert result.saved == [new_habit]
+    assert [failure.entity for failure in result.failed] == [saved_habit]
+
+
+def test_save_habit_category(
+    in_memory_habit_repository: InMemoryHabitRepository,
+) -> None:
+    habit_category = in_memory_habit_repository.save_habit_category(
+        HabitCategory(name="Health")
+    )
+
+    assert habit_category.id is not None
+    assert (
+        in_memory_habit_repository.get_habit_category_by_name("Health")
+        is habit_category
+    )
+    assert in_memory_habit_repository.get_habit_category_by_name("Work") is None
+
+    # the name of a habit category is unique
+    with pytest.raises(InMemoryHabitCategoryExistsError):
+        in_memory_habit_repository.save_habit_category(HabitCategory(name="Health"))
+
+    result = in_memory_habit_repository.save_habit_categories(
+        [HabitCategory(name="Health"), HabitCategory(name="Work")]
+    )
+    assert [habit_category.name for habit_category in result.saved] == ["Work"]
+    assert len(result.failed) == 1
+
+
+def test_habit_collections(
+    in_memory_habit_repository: InMemoryHabitRepository, saved_habit: Habit
+) -> None:
+    habit_collection = in_memory_habit_repository.save_habit_collection(
+        HabitCollection(name="Morning", habits={saved_habit})
+    )
+
+    assert in_memory_habit_repository.habit_collection_exists(habit_collection.id)
+    assert not in_memory_habit_repository.habit_collection_exists("unknown")
+    assert (
+        in_memory_habit_repository.get_habit_collection_by_id(habit_collection.id)
+        is habit_collection
+    )
+
+    with pytest.raises(InMemoryHabitCollectionExistsError):
+        in_memory_habit_repository.save_habit_collection(habit_collection)
+
+    habit_instance = in_memory_habit_repository.save_habit_instance(
+        HabitInstance(habit=saved_habit, date=datetime.date(2025, 1, 1), completed=True)
+    )
+    in_memory_habit_repository.add_habit_instance_to_collection(
+        habit_collection.id, habit_instance
+    )
+    assert habit_collection.habits_instance == {habit_instance}
+
+    with pytest.raises(InMemoryHabitCollectionNotFoundError):
+        in_memory_habit_repository.add_habit_instance_to_collection(
+            "unknown", habit_instance
+        )
+
+    updated_habit_collection = HabitCollection(
+        name="Evening", habits=set(), id=habit_collection.id
+    )
+    in_memory_habit_repository.update_habit_collection(updated_habit_collection)
+    assert (
+        in_memory_habit_repository.get_habit_collection_by_id(habit_collection.id)
+        is updated_habit_collection
+    )
+
+    with pytest.raises(InMemoryHabitCollectionNotFoundError):
+        in_memory_habit_repository.update_habit_collection(
+            HabitCollection(name="Night", habits=set(), id="unknown")
+        )
+
+
+def test_save_habit_instance_same_day(
+    in_memory_habit_repository: InMemoryHabitRepository, saved_habit: Habit
+) -> None:
+    habit_instance = in_memory_habit_repository.save_habit_instance(
+        HabitInstance(habit=saved_habit, date=datetime.date(2025, 1, 1), completed=True)
+    )
+
+    assert (
+        in_memory_habit_repository.get_habit_instance_by_id(habit_instance.id)
+        is habit_instance
+    )
+
+    with pytest.raises(InMemoryHabitExistsError):
+        in_memory_habit_repository.save_habit_instance(
+            HabitInstance(
+                habit=saved_habit, date=datetime.date(2025, 1, 1), completed=False
+            )
+        )
+
+    with pytest.raises(ValueError):
+        in_memory_habit_repository.save_habit_instance(
+            HabitInstance(
+                habit=Habit(name="Run", recurrence=Daily()),
+                date=datetime.date(2025, 1, 1),
+                completed=True,
+            )
+        )
+
+
+def test_record_check_in(
+    in_memory_habit_repository: InMemoryHabitRepository, saved_habit: Habit
+) -> None:
+    def check_in(completed: bool) -> HabitInstance:
+        return in_memory_habit_repository.record_check_in(
+            HabitInstance(
+                habit=saved_habit,
+                date=datetime.date(2025, 1, 1),
+                completed=completed,
+            )
+        )
+
+    # the same check-in, retried concurrently
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        habit_instances = list(executor.map(check_in, [False] * 32))
+
+    assert len({id(habit_instance) for habit_instance in habit_instances}) == 1
+    assert check_in(True) is habit_instances[0]
+    assert habit_instances[0].completed is True
+    assert len(in_memory_habit_repository) == 2
+
+
+def test_iter_habit_instances(
+    in_memory_habit_repository: InMemoryHabitRepository,
+) -> None:
+    habits = in_memory_habit_repository.save_habits(
+        [Habit(name=name, recurrence=Daily()) for name in ("Read", "Run", "Swim")]
+    ).saved
+    days = list(range(1, 29))
+    random.Random(0).shuffle(days)
+    in_memory_habit_repository.save_habit_instances(
+        [
+            HabitInstance(habit=habit, date=datetime.date(2025, 2, day), completed=True)
+            for day in days
+            for habit in habits[:2]
+        ]
+    )
+    start_date, end_date = datetime.date(2025, 2, 5), datetime.date(2025, 2, 20)
+
+    expected_habit_instances = sorted(
+        (
+            habit_instance
+            for habit in habits[:2]
+            for habit_instance in in_memory_habit_repository.get_habit_instances(
+                habit.id, start_date, end_date
+            )
+        ),
+        key=lambda habit_instance: (habit_instance.date, habit_instance.id),
+    )
+
+    # read the date range by pages of 5 habit instances
+    habit_instances = []
+    after = None
+    while True:
+        page = list(
+            itertools.islice(
+                in_memory_habit_repository.iter_habit_instances(
+                    {habit.id for habit in habits},
+                    start_date,
+                    end_date,
+                    batch_size=3,
+                    after=after,
+                ),
+                5,
+            )
+        )
+        if not page:
+            break
+        habit_instances.extend(page)
+        after = (page[-1].date, page[-1].id)
+
+    assert len(habit_instances) == 32
+    assert habit_instances == expected_habit_instances
+    assert [habit_instance.date for habit_instance in habit_instances[::2]] == [
+        start_date + datetime.timedelta(days=day) for day in range(16)
+    ]
+
+    with pytest.raises(ValueError):
+        next(
+            in_memory_habit_repository.iter_habit_instances(
+                {habits[0].id}, start_date, end_date, batch_size=0
+            )
+        )
+
+
+def test_snapshot(tmp_path: Path) -> None:
+    snapshot_path = tmp_path / "pebble.snapshot"
+    in_memory_habit_repository = InMemoryHabitRepository(snapshot_path)
+    habit_category = in_memory_habit_repository.save_habit_category(
+        HabitCategory(name="Health")
+    )
+    habit = in_memory_habit_repository.save_habit(
+        Habit(name="Read", recurrence=Daily(), category=habit_category)
+    )
+    habit_instance = in_memory_habit_repository.save_habit_instance(
+        HabitInstance(habit=habit, date=datetime.date(2025, 1, 1), completed=True)
+    )
+    habit_collection = in_memory_habit_repository.save_habit_collection(
+        HabitCollection(
+            name="Morning", habits={habit}, habits_instance={habit_instance}
+        )
+    )
+
+    in_memory_habit_repository.snapshot()
+    restored_habit_repository = InMemoryHabitRepository(snapshot_path)
+
+    assert len(restored_habit_repository) == 4
+    assert restored_habit_repository.get_habit_by_id(habit.id) == habit
+    assert restored_habit_repository.get_habit_category_by_name("Health") == (
+        habit_category
+    )
+    assert restored_habit_repository.get_habit_instances(
+        habit.id, datetime.date(2025, 1, 1), datetime.date(2025, 1, 1)
+    ) == [habit_instance]
+    restored_habit_collection = restored_habit_repository.get_habit_collection_by_id(
+        habit_collection.id
+    )
+    assert restored_habit_collection == habit_collection
+
+    # the restored entities are linked to each other
+    restored_habit = restored_habit_repository.get_habit_by_id(habit.id)
+    assert next(iter(restored_habit_collection.habits)) is restored_habit
+
+    with pytest.raises(InMemoryHabitExistsError):
+        restored_habit_repository.save_habit_instance(
+            HabitInstance(habit=habit, date=datetime.date(2025, 1, 1), completed=False)
+        )
+
+
+def test_snapshot_without_path(
+    in_memory_habit_repository: InMemoryHabitRepository,
+) -> None:
+    with pytest.raises(ValueError):
+        in_memory_habit_repository.snapshot()
+
+
+def test_snapshot_unsupported_version(tmp_path: Path) -> None:
+    snapshot_path = tmp_path / "pebble.snapshot"
+    in_memory_habit_repository = InMemoryHabitRepository(snapshot_path)
+    in_memory_habit_repository.SNAPSHOT_VERSION = 0
+    in_memory_habit_repository.snapshot()
+
+    with pytest.raises(InMemoryError):
+        InMemoryHabitRepository(snapshot_path)
+
+
+def test_save_habit_streak(tmp_path: Path) -> None:
+    snapshot_path = tmp_path / "pebble.snapshot"
+    in_memory_habit_repository = InMemoryHabitRepository(snapshot_path)
+    habit_streak = HabitStreak(
+        habit_id="habit1",
+        current=2,
+        longest=2,
+        last_completed_date=datetime.date(2025, 1, 2),
+    )
+
+    in_memory_habit_repository.save_habit_streak(habit_streak)
+    in_memory_habit_repository.snapshot()
+
+    assert in_memory_habit_repository.get_habit_streak("habit1") is habit_streak
+    assert in_memory_habit_repository.get_habit_streak("unknown") is None
+    assert (
+        InMemoryHabitRepository(snapshot_path).get_habit_streak("habit1")
+        == habit_streak
+    )
+
+
+def test_save_completion_calendar(tmp_path: Path) -> None:
+    snapshot_path = tmp_path / "pebble.snapshot"
+    in_memory_habit_repository = InMemoryHabitRepository(snapshot_path)
+    completion_calendar = CompletionCalendar(habit_id="habit1", year=2025)
+    completion_calendar.set_completed(datetime.date(2025, 1, 2), True, "Done")
+
+    in_memory_habit_repository.save_completion_calendar(completion_calendar)
+    in_memory_habit_repository.snapshot()
+
+    assert (
+        in_memory_habit_repository.get_completion_calendar("habit1", 2025)
+        is completion_calendar
+    )
+    assert in_memory_habit_repository.get_completion_calendar("habit1", 2024) is None
+    assert (
+        InMemoryHabitRepository(snapshot_path).get_completion_calendar("habit1", 2025)
+        == completion_calendar
+    )
+
+
+def test_get_habits_by_weekdays(
+    in_memory_habit_repository: InMemoryHabitRepository,
+) -> None:
+    daily_habit, tuesday_habit, _ = in_memory_habit_repository.save_habits(
+        [
+            Habit(name="Read", recurrence=Daily()),
+            Habit(name="Run", recurrence=Weekly({WeekDays.TUESDAY})),
+            Habit(name="Swim", recurrence=Weekly()),
+        ]
+    ).saved
+
+    assert in_memory_habit_repository.get_habits_by_weekdays(
+        WeekDayMask.TUESDAY | WeekDayMask.SUNDAY
+    ) == {daily_habit, tuesday_habit}
+    assert in_memory_habit_repository.get_habits_by_weekdays(WeekDayMask.MONDAY) == {
+        daily_habit
+    }
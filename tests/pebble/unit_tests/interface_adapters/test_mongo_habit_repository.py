@@ -1,18 +1,25 @@
 import datetime
+import itertools
+from unittest.mock import patch
 
 import mongomock
 import pytest
 from bson import ObjectId
 
+from pebble.application.repositories import IdentityMap, LazyHabitCollection
 from pebble.application.serializers import HabitKVSerializer
+from pebble.application.use_cases import CreateHabitInstance, CreateHabitInstanceDTO
 from pebble.domain.entities import (
+    CompletionCalendar,
     Daily,
     Habit,
     HabitCategory,
     HabitCollection,
     HabitInstance,
+    HabitStreak,
+    Weekly,
 )
-from pebble.domain.value_objects import Color
+from pebble.domain.value_objects import Color, WeekDayMask, WeekDays
 from pebble.interface_adapters.repositories import MongoHabitRepository
 from pebble.interface_adapters.repositories.mongo import MongoHabitExistsError
 from pebble.interface_adapters.repositories.mongo.mongo_exceptions import (
@@ -33,7 +40,21 @@ def mock_mongo_client() -> mongomock.MongoClient:
 def mock_mongo_habit_repository(
     mock_mongo_client: mongomock.MongoClient,
 ) -> MongoHabitRepository:
-    return MongoHabitRepository(mock_mongo_client)
+    mock_mongo_habit_repository = MongoHabitRepository(mock_mongo_client)
+    # the repository relies on the unique indexes to reject duplicates
+    mock_mongo_habit_repository.ensure_indexes()
+    return mock_mongo_habit_repository
+
+
+@pytest.fixture
+def identity_map_habit_repository(
+    mock_mongo_client: mongomock.MongoClient,
+) -> MongoHabitRepository:
+    identity_map_habit_repository = MongoHabitRepository(
+        mock_mongo_client, identity_map=IdentityMap()
+    )
+    identity_map_habit_repository.ensure_indexes()
+    return identity_map_habit_repository
 
 
 @pytest.fixture
@@ -189,6 +210,23 @@ def test_save_habit_category_already_exists(
         mock_mongo_habit_repository.save_habit_category(generic_habit_category)
 
 
+def test_save_habit_category_same_name(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit_category: HabitCategory,
+) -> None:
+    mock_mongo_habit_repository.save_habit_category(generic_habit_category)
+
+    # a new habit category with the name of the saved one
+    with pytest.raises(MongoHabitCategoryExistsError):
+        mock_mongo_habit_repository.save_habit_category(
+            HabitCategory(name=generic_habit_category.name)
+        )
+
+    assert (
+        mock_mongo_habit_repository.habit_category_collection.count_documents({}) == 1
+    )
+
+
 def test_get_habit_category_by_name(
     mock_mongo_habit_repository: MongoHabitRepository,
     generic_habit_category: HabitCategory,
@@ -210,6 +248,76 @@ def test_get_habit_category_by_name(
     assert fetched_habit_category.color == saved_habit_category.color
 
 
+def test_get_habit_category_by_name_uses_cache(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit_category: HabitCategory,
+) -> None:
+    # Saving the habit category writes it to the cache
+    saved_habit_category = mock_mongo_habit_repository.save_habit_category(
+        generic_habit_category
+    )
+    stats = mock_mongo_habit_repository.category_cache_stats
+
+    with patch.object(
+        mock_mongo_habit_repository.habit_category_collection,
+        "find_one",
+        side_effect=AssertionError("habit category fetched from the database"),
+    ):
+        fetched_habit_category = mock_mongo_habit_repository.get_habit_category_by_name(
+            saved_habit_category.name
+        )
+
+    assert fetched_habit_category == saved_habit_category
+    assert fetched_habit_category.color == saved_habit_category.color
+    assert mock_mongo_habit_repository.category_cache_stats.hits == stats.hits + 1
+
+
+def test_get_habit_category_by_name_cache_miss(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit_category: HabitCategory,
+) -> None:
+    # Insert the category without the repository, so it is not cached
+    mock_mongo_habit_repository.habit_category_collection.insert_one(
+        {"name": "Test Category", "description": None, "color_hex": "#FF5733"}
+    )
+
+    fetched_habit_category = mock_mongo_habit_repository.get_habit_category_by_name(
+        "Test Category"
+    )
+    stats = mock_mongo_habit_repository.category_cache_stats
+    assert fetched_habit_category.name == "Test Category"
+    assert stats.misses == 1
+    assert stats.hits == 0
+
+    # The second lookup is served by the cache
+    mock_mongo_habit_repository.get_habit_category_by_name("Test Category")
+    assert mock_mongo_habit_repository.category_cache_stats.hits == 1
+
+
+def test_get_habit_uses_category_cache(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit: Habit,
+    generic_habit_category: HabitCategory,
+) -> None:
+    generic_habit.category = mock_mongo_habit_repository.save_habit_category(
+        generic_habit_category
+    )
+    mock_mongo_habit_repository.save_habit(generic_habit)
+
+    with patch.object(
+        mock_mongo_habit_repository.habit_category_collection,
+        "find_one",
+        side_effect=AssertionError("habit category fetched from the database"),
+    ):
+        fetched_habit = mock_mongo_habit_repository.get_habit_by_id(generic_habit.id)
+        fetched_habits = mock_mongo_habit_repository.get_habits_by_ids(
+            {generic_habit.id}
+        )
+
+    assert fetched_habit.category == generic_habit.category
+    assert next(iter(fetched_habits)).category == generic_habit.category
+
+
 def test_save_habit_collection(
     mock_mongo_habit_repository: MongoHabitRepository,
     generic_habit_collection: HabitCollection,
@@ -351,6 +459,329 @@ def test_get_habit_collection_by_id(
     )
 
 
+def test_get_habit_collection_by_id_loads_graph_in_batch(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit_collection: HabitCollection,
+    generic_habit_category: HabitCategory,
+) -> None:
+    # Save two habits sharing the same category
+    habit_category = mock_mongo_habit_repository.save_habit_category(
+        generic_habit_category
+    )
+    habits = [
+        Habit(
+            name=f"Habit {index}",
+            recurrence=Daily(),
+            category=habit_category,
+            color=Color(hex="#FF5733"),
+        )
+        for index in range(2)
+    ]
+    for habit in habits:
+        mock_mongo_habit_repository.save_habit(habit)
+        generic_habit_collection.add_habit(habit)
+
+    # Save a history of habit instances for both habits
+    for day in range(1, 11):
+        for habit in habits:
+            habit_instance = HabitInstance(
+                habit=habit,
+                date=datetime.date(2023, 10, day),
+                completed=True,
+            )
+            mock_mongo_habit_repository.save_habit_instance(habit_instance)
+            generic_habit_collection.habits_instance.add(habit_instance)
+
+    saved_habit_collection = mock_mongo_habit_repository.save_habit_collection(
+        generic_habit_collection
+    )
+
+    # No per-document lookup must happen while hydrating the collection
+    with (
+        patch.object(
+            mock_mongo_habit_repository.habits_collection,
+            "find_one",
+            side_effect=AssertionError("habit fetched one by one"),
+        ),
+        patch.object(
+            mock_mongo_habit_repository.habit_category_collection,
+            "find_one",
+            side_effect=AssertionError("category fetched one by one"),
+        ),
+        patch.object(
+            mock_mongo_habit_repository.habit_instances_collection,
+            "find_one",
+            side_effect=AssertionError("habit instance fetched one by one"),
+        ),
+    ):
+        fetched_habit_collection = (
+            mock_mongo_habit_repository.get_habit_collection_by_id(
+                saved_habit_collection.id
+            )
+        )
+
+    assert fetched_habit_collection.habits == set(habits)
+    assert len(fetched_habit_collection.habits_instance) == 20
+    # The habit instances of each habit are loaded sorted by date
+    timeline = fetched_habit_collection.habits_instance
+    for habit in habits:
+        assert [
+            habit_instance.date.day
+            for habit_instance in timeline.habit_instances(habit)
+        ] == list(range(1, 11))
+    assert (
+        fetched_habit_collection.habits_instance
+        == saved_habit_collection.habits_instance
+    )
+
+    # The instances are linked to the habits of the collection
+    habits_by_id = {habit.id: habit for habit in fetched_habit_collection.habits}
+    for habit_instance in fetched_habit_collection.habits_instance:
+        assert habit_instance.habit is habits_by_id[habit_instance.habit.id]
+        assert habit_instance.habit.category == habit_category
+
+
+def test_open_habit_collection_does_not_read_the_history(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit_collection: HabitCollection,
+    generic_habit: Habit,
+) -> None:
+    saved_habit = mock_mongo_habit_repository.save_habit(generic_habit)
+    generic_habit_collection.add_habit(saved_habit)
+    for day in range(1, 11):
+        habit_instance = mock_mongo_habit_repository.save_habit_instance(
+            HabitInstance(
+                habit=saved_habit, date=datetime.date(2023, 10, day), completed=True
+            )
+        )
+        generic_habit_collection.habits_instance.add(habit_instance)
+    mock_mongo_habit_repository.save_habit_collection(generic_habit_collection)
+
+    # Opening the collection reads neither the habits nor the habit instances
+    with (
+        patch.object(
+            mock_mongo_habit_repository.habits_collection,
+            "find",
+            side_effect=AssertionError("habits read on open"),
+        ),
+        patch.object(
+            mock_mongo_habit_repository.habit_instances_collection,
+            "find",
+            side_effect=AssertionError("habit instances read on open"),
+        ),
+    ):
+        habit_collection = mock_mongo_habit_repository.open_habit_collection(
+            generic_habit_collection.id
+        )
+
+    assert isinstance(habit_collection, LazyHabitCollection)
+    assert habit_collection.name == generic_habit_collection.name
+    assert habit_collection.habits_ids == {saved_habit.id}
+    assert not habit_collection.habits_loaded
+
+    # The habits are loaded on first access, the history is read by range or page
+    assert habit_collection.habits == {saved_habit}
+    assert [
+        habit_instance.date.day
+        for habit_instance in habit_collection.history.between(
+            datetime.date(2023, 10, 3), datetime.date(2023, 10, 5)
+        )
+    ] == [3, 4, 5]
+    first_page = habit_collection.history.page(4)
+    last_page = habit_collection.history.page(
+        4, after=(first_page[-1].date, first_page[-1].id)
+    )
+    assert [habit_instance.date.day for habit_instance in first_page] == [1, 2, 3, 4]
+    assert [habit_instance.date.day for habit_instance in last_page] == [5, 6, 7, 8]
+
+    assert habit_collection == mock_mongo_habit_repository.get_habit_collection_by_id(
+        generic_habit_collection.id
+    )
+    assert mock_mongo_habit_repository.open_habit_collection(str(ObjectId())) is None
+
+
+def test_identity_map_returns_same_objects(
+    mock_mongo_client: mongomock.MongoClient,
+    generic_habit_collection: HabitCollection,
+    generic_habit: Habit,
+) -> None:
+    # Store a collection with a habit and its instances
+    mock_mongo_habit_repository = MongoHabitRepository(mock_mongo_client)
+    saved_habit = mock_mongo_habit_repository.save_habit(generic_habit)
+    generic_habit_collection.add_habit(saved_habit)
+    for day in range(1, 4):
+        habit_instance = HabitInstance(
+            habit=saved_habit, date=datetime.date(2023, 10, day), completed=True
+        )
+        mock_mongo_habit_repository.save_habit_instance(habit_instance)
+        generic_habit_collection.habits_instance.add(habit_instance)
+    mock_mongo_habit_repository.save_habit_collection(generic_habit_collection)
+
+    # A new repository, for a new request, shares an identity map
+    repository = MongoHabitRepository(mock_mongo_client, identity_map=IdentityMap())
+
+    fetched_habit = repository.get_habit_by_id(saved_habit.id)
+    fetched_habit_collection = repository.get_habit_collection_by_id(
+        generic_habit_collection.id
+    )
+
+    # Every instance references the single habit object
+    assert fetched_habit_collection.habits == {fetched_habit}
+    assert next(iter(fetched_habit_collection.habits)) is fetched_habit
+    for habit_instance in fetched_habit_collection.habits_instance:
+        assert habit_instance.habit is fetched_habit
+        assert habit_instance.habit.category is fetched_habit.category
+
+    # Repeated lookups do not reach the database
+    with (
+        patch.object(
+            repository.habits_collection,
+            "find_one",
+            side_effect=AssertionError("habit fetched again"),
+        ),
+        patch.object(
+            repository.habit_collections_collection,
+            "find_one",
+            side_effect=AssertionError("habit collection fetched again"),
+        ),
+    ):
+        assert repository.get_habit_by_id(saved_habit.id) is fetched_habit
+        assert (
+            repository.get_habit_collection_by_id(generic_habit_collection.id)
+            is fetched_habit_collection
+        )
+
+
+def test_identity_map_shared_by_use_case(
+    identity_map_habit_repository: MongoHabitRepository,
+    generic_habit_collection: HabitCollection,
+    generic_habit: Habit,
+) -> None:
+    saved_habit = identity_map_habit_repository.save_habit(generic_habit)
+    generic_habit_collection.add_habit(saved_habit)
+    identity_map_habit_repository.save_habit_collection(generic_habit_collection)
+
+    habit_instance = CreateHabitInstance(identity_map_habit_repository).execute(
+        CreateHabitInstanceDTO(
+            habit_id=saved_habit.id,
+            habit_collection_id=generic_habit_collection.id,
+            date=datetime.date(2023, 10, 1),
+            completed=True,
+        )
+    )
+
+    # The use case works on the objects held by the identity map
+    assert habit_instance.habit is saved_habit
+    assert (
+        identity_map_habit_repository.get_habit_instance_by_id(habit_instance.id)
+        is habit_instance
+    )
+
+
+def test_save_habits(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    habits = [
+        Habit(name=f"Habit {index}", recurrence=Daily(), color=Color(hex="#FF5733"))
+        for index in range(5)
+    ]
+
+    result = mock_mongo_habit_repository.save_habits(habits)
+
+    assert result.failed == []
+    assert result.saved == habits
+    assert all(habit.id is not None for habit in habits)
+    assert mock_mongo_habit_repository.habits_collection.count_documents({}) == 5
+    assert mock_mongo_habit_repository.get_habits_by_ids(
+        {habit.id for habit in habits}
+    ) == set(habits)
+
+
+def test_save_habits_reports_failures(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    # The habit is already saved, it cannot be saved a second time
+    mock_mongo_habit_repository.save_habits([generic_habit])
+    habits = [
+        Habit(name="Habit 1", recurrence=Daily(), color=Color(hex="#FF5733")),
+        generic_habit,
+        Habit(name="Habit 2", recurrence=Daily(), color=Color(hex="#FF5733")),
+    ]
+
+    result = mock_mongo_habit_repository.save_habits(habits)
+
+    # The failure does not abort the rest of the batch
+    assert result.saved == [habits[0], habits[2]]
+    assert len(result.failed) == 1
+    assert result.failed[0].entity is generic_habit
+    assert result.failed[0].error
+    assert mock_mongo_habit_repository.habits_collection.count_documents({}) == 3
+
+
+def test_save_habit_categories(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit_category: HabitCategory,
+) -> None:
+    mock_mongo_habit_repository.save_habit_category(generic_habit_category)
+    habit_categories = [
+        HabitCategory(name="Category 1", color=Color(hex="#FF5733")),
+        HabitCategory(name=generic_habit_category.name, color=Color(hex="#FF5733")),
+        HabitCategory(name="Category 2", color=Color(hex="#FF5733")),
+        HabitCategory(name="Category 1", color=Color(hex="#FF5733")),
+    ]
+
+    result = mock_mongo_habit_repository.save_habit_categories(habit_categories)
+
+    assert result.saved == [habit_categories[0], habit_categories[2]]
+    assert [failure.entity for failure in result.failed] == [
+        habit_categories[1],
+        habit_categories[3],
+    ]
+    assert habit_categories[1].id is None
+    assert habit_categories[3].id is None
+    assert (
+        mock_mongo_habit_repository.habit_category_collection.count_documents({}) == 3
+    )
+
+    # The saved categories are written to the cache
+    with patch.object(
+        mock_mongo_habit_repository.habit_category_collection,
+        "find_one",
+        side_effect=AssertionError("habit category fetched from the database"),
+    ):
+        assert (
+            mock_mongo_habit_repository.get_habit_category_by_name("Category 2")
+            == habit_categories[2]
+        )
+
+
+def test_save_habit_instances(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    saved_habit = mock_mongo_habit_repository.save_habit(generic_habit)
+    habit_instances = [
+        HabitInstance(
+            habit=saved_habit, date=datetime.date(2023, 10, day), completed=True
+        )
+        for day in range(1, 31)
+    ]
+    # An invalid identifier is reported without aborting the batch
+    habit_instances[3].id = "invalid"
+
+    result = mock_mongo_habit_repository.save_habit_instances(habit_instances)
+
+    assert len(result.saved) == 29
+    assert len(result.failed) == 1
+    assert result.failed[0].entity is habit_instances[3]
+
+    fetched_habit_instance = mock_mongo_habit_repository.get_habit_instance_by_id(
+        habit_instances[10].id
+    )
+    assert fetched_habit_instance.date == datetime.date(2023, 10, 11)
+
+
 def test_save_habit_with_existing_id_raises_error(
     mock_mongo_habit_repository: MongoHabitRepository,
     generic_habit: Habit,
@@ -390,6 +821,26 @@ def test_save_habit_instance_with_existing_id_raises_error(
         mock_mongo_habit_repository.save_habit_instance(habit_instance)
 
 
+def test_save_habit_instance_same_day_raises_error(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    saved_habit = mock_mongo_habit_repository.save_habit(generic_habit)
+    mock_mongo_habit_repository.save_habit_instance(
+        HabitInstance(
+            habit=saved_habit, date=datetime.date(2023, 10, 1), completed=True
+        )
+    )
+
+    # a new habit instance of the same habit on the same date
+    with pytest.raises(MongoHabitExistsError):
+        mock_mongo_habit_repository.save_habit_instance(
+            HabitInstance(
+                habit=saved_habit, date=datetime.date(2023, 10, 1), completed=False
+            )
+        )
+
+
 def test_get_habit_instance_by_id_not_found(
     mock_mongo_habit_repository: MongoHabitRepository,
 ) -> None:
@@ -443,11 +894,16 @@ def test_update_habit_collection(
         generic_habit_collection
     )
 
-    # Update the habit collection
+    # Update the habit collection, it is not loaded to check that it exists
     saved_habit_collection.name = "Updated Collection"
-    updated_collection = mock_mongo_habit_repository.update_habit_collection(
-        saved_habit_collection
-    )
+    with patch.object(
+        mock_mongo_habit_repository,
+        "get_habit_collection_by_id",
+        side_effect=AssertionError("the habit collection must not be loaded"),
+    ):
+        updated_collection = mock_mongo_habit_repository.update_habit_collection(
+            saved_habit_collection
+        )
 
     # Assert the collection was updated successfully
     assert updated_collection.name == "Updated Collection"
@@ -476,3 +932,670 @@ def test_update_habit_collection_raises_value_error_when_no_id(
         ValueError, match="Habit collection must have an ID to be updated."
     ):
         mock_mongo_habit_repository.update_habit_collection(generic_habit_collection)
+
+
+def test_habit_collection_exists(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit_collection: HabitCollection,
+) -> None:
+    mock_mongo_habit_repository.save_habit_collection(generic_habit_collection)
+
+    assert mock_mongo_habit_repository.habit_collection_exists(
+        generic_habit_collection.id
+    )
+    assert not mock_mongo_habit_repository.habit_collection_exists(str(ObjectId()))
+
+
+def test_add_habit_instance_to_collection(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit_collection: HabitCollection,
+    generic_habit: Habit,
+) -> None:
+    saved_habit = mock_mongo_habit_repository.save_habit(generic_habit)
+    generic_habit_collection.add_habit(saved_habit)
+    mock_mongo_habit_repository.save_habit_collection(generic_habit_collection)
+    habit_instance = mock_mongo_habit_repository.save_habit_instance(
+        HabitInstance(
+            habit=saved_habit, date=datetime.date(2023, 10, 1), completed=True
+        )
+    )
+
+    # adding the same habit instance twice has no effect
+    for _ in range(2):
+        mock_mongo_habit_repository.add_habit_instance_to_collection(
+            generic_habit_collection.id, habit_instance
+        )
+
+    habit_collection_data = (
+        mock_mongo_habit_repository.habit_collections_collection.find_one(
+            {"_id": ObjectId(generic_habit_collection.id)}
+        )
+    )
+    assert habit_collection_data["habits_instances"] == [habit_instance.id]
+    assert mock_mongo_habit_repository.get_habit_collection_by_id(
+        generic_habit_collection.id
+    ).habits_instance == {habit_instance}
+
+
+def test_add_habit_instance_to_collection_not_found(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    saved_habit = mock_mongo_habit_repository.save_habit(generic_habit)
+    habit_instance = mock_mongo_habit_repository.save_habit_instance(
+        HabitInstance(
+            habit=saved_habit, date=datetime.date(2023, 10, 1), completed=True
+        )
+    )
+
+    with pytest.raises(MongoHabitCollectionNotFoundError):
+        mock_mongo_habit_repository.add_habit_instance_to_collection(
+            str(ObjectId()), habit_instance
+        )
+
+
+def test_add_habit_instance_to_collection_without_id(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit_collection: HabitCollection,
+    generic_habit: Habit,
+) -> None:
+    mock_mongo_habit_repository.save_habit_collection(generic_habit_collection)
+
+    with pytest.raises(ValueError):
+        mock_mongo_habit_repository.add_habit_instance_to_collection(
+            generic_habit_collection.id,
+            HabitInstance(
+                habit=generic_habit, date=datetime.date(2023, 10, 1), completed=True
+            ),
+        )
+
+
+def test_create_habit_instance_does_not_load_collection(
+    identity_map_habit_repository: MongoHabitRepository,
+    generic_habit_collection: HabitCollection,
+    generic_habit: Habit,
+) -> None:
+    saved_habit = identity_map_habit_repository.save_habit(generic_habit)
+    generic_habit_collection.add_habit(saved_habit)
+    identity_map_habit_repository.save_habit_collection(generic_habit_collection)
+
+    # the check-in never loads nor rewrites the habit collection
+    with (
+        patch.object(
+            identity_map_habit_repository,
+            "get_habit_collection_by_id",
+            side_effect=AssertionError,
+        ),
+        patch.object(
+            identity_map_habit_repository,
+            "update_habit_collection",
+            side_effect=AssertionError,
+        ),
+    ):
+        habit_instance = CreateHabitInstance(identity_map_habit_repository).execute(
+            CreateHabitInstanceDTO(
+                habit_id=saved_habit.id,
+                habit_collection_id=generic_habit_collection.id,
+                date=datetime.date(2023, 10, 1),
+                completed=True,
+            )
+        )
+
+    # the habit collection held by the identity map is kept in sync
+    assert generic_habit_collection.habits_instance == {habit_instance}
+
+
+def test_get_habit_instances(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    generic_habit: Habit,
+) -> None:
+    saved_habit = mock_mongo_habit_repository.save_habit(generic_habit)
+    mock_mongo_habit_repository.save_habit_instances(
+        [
+            HabitInstance(
+                habit=saved_habit,
+                date=datetime.date(2023, 10, day),
+                completed=True,
+            )
+            for day in (12, 3, 25, 7)
+        ]
+    )
+
+    habit_instances = mock_mongo_habit_repository.get_habit_instances(
+        saved_habit.id, datetime.date(2023, 10, 5), datetime.date(2023, 10, 25)
+    )
+
+    assert [habit_instance.date.day for habit_instance in habit_instances] == [
+        7,
+        12,
+        25,
+    ]
+    assert (
+        mock_mongo_habit_repository.get_habit_instances(
+            str(ObjectId()), datetime.date(2023, 10, 5), datetime.date(2023, 10, 25)
+        )
+        == []
+    )
+
+
+def test_iter_habit_instances_keyset_pagination(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    habits = mock_mongo_habit_repository.save_habits(
+        [
+            Habit(name=name, recurrence=Daily(), color=Color(hex="#FF5733"))
+            for name in ("Read", "Run")
+        ]
+    ).saved
+    mock_mongo_habit_repository.save_habit_instances(
+        [
+            HabitInstance(
+                habit=habit, date=datetime.date(2023, 10, day), completed=True
+            )
+            for habit in habits
+            for day in range(1, 11)
+        ]
+    )
+    habits_ids = {habit.id for habit in habits}
+    start_date, end_date = datetime.date(2023, 10, 3), datetime.date(2023, 10, 8)
+
+    # read the date range by pages of 4 habit instances
+    pages = []
+    after = None
+    while True:
+        page = list(
+            itertools.islice(
+                mock_mongo_habit_repository.iter_habit_instances(
+                    habits_ids, start_date, end_date, batch_size=2, after=after
+                ),
+                4,
+            )
+        )
+        if not page:
+            break
+        pages.append(page)
+        after = (page[-1].date, page[-1].id)
+
+    habit_instances = [habit_instance for page in pages for habit_instance in page]
+
+    assert [len(page) for page in pages] == [4, 4, 4]
+    assert habit_instances == sorted(
+        habit_instances,
+        key=lambda habit_instance: (habit_instance.date, habit_instance.id),
+    )
+    assert {habit_instance.date for habit_instance in habit_instances} == {
+        datetime.date(2023, 10, day) for day in range(3, 9)
+    }
+    assert len(set(habit_instance.id for habit_instance in habit_instances)) == 12
+
+
+def test_record_check_in(
+    identity_map_habit_repository: MongoHabitRepository,
+) -> None:
+    habit = identity_map_habit_repository.save_habit(
+        Habit(name="Read", recurrence=Daily(), color=Color(hex="#FF5733"))
+    )
+
+    habit_instance = identity_map_habit_repository.record_check_in(
+        HabitInstance(habit=habit, date=datetime.date(2023, 10, 1), completed=False)
+    )
+    # the check-in is retried, then its completion changes
+    retried_habit_instance = identity_map_habit_repository.record_check_in(
+        HabitInstance(habit=habit, date=datetime.date(2023, 10, 1), completed=False)
+    )
+    updated_habit_instance = identity_map_habit_repository.record_check_in(
+        HabitInstance(
+            habit=habit, date=datetime.date(2023, 10, 1), completed=True, note="Done"
+        )
+    )
+
+    assert habit_instance.id is not None
+    assert retried_habit_instance is habit_instance
+    assert updated_habit_instance is habit_instance
+    assert habit_instance.completed is True
+    assert habit_instance.note == "Done"
+    assert (
+        identity_map_habit_repository.habit_instances_collection.count_documents({})
+        == 1
+    )
+
+    identity_map_habit_repository.identity_map.clear()
+    assert identity_map_habit_repository.get_habit_instance_by_id(
+        habit_instance.id
+    ) == HabitInstance(
+        id=habit_instance.id,
+        habit=habit,
+        date=datetime.date(2023, 10, 1),
+        completed=True,
+        note="Done",
+    )
+
+
+def test_record_check_in_unsaved_habit(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    with pytest.raises(ValueError):
+        mock_mongo_habit_repository.record_check_in(
+            HabitInstance(
+                habit=Habit(name="Read", recurrence=Daily()),
+                date=datetime.date(2023, 10, 1),
+                completed=True,
+            )
+        )
+
+
+def test_deduplicate_habit_instances(mock_mongo_client: mongomock.MongoClient) -> None:
+    # the unique index is not built yet, the duplicates were written before it
+    mongo_habit_repository = MongoHabitRepository(mock_mongo_client)
+    habit_instances_ids = [ObjectId() for _ in range(3)]
+    other_habit_instance_id = ObjectId()
+    mongo_habit_repository.habit_instances_collection.insert_many(
+        [
+            {
+                "_id": habit_instance_id,
+                "habit_id": "habit1",
+                "date": datetime.datetime(2023, 10, 1),
+                "completed": True,
+            }
+            for habit_instance_id in habit_instances_ids
+        ]
+        + [
+            {
+                "_id": other_habit_instance_id,
+                "habit_id": "habit1",
+                "date": datetime.datetime(2023, 10, 2),
+                "completed": True,
+            }
+        ]
+    )
+    mongo_habit_repository.habit_collections_collection.insert_one(
+        {
+            "name": "Morning",
+            "habits": ["habit1"],
+            "habits_instances": [
+                str(habit_instance_id)
+                for habit_instance_id in habit_instances_ids + [other_habit_instance_id]
+            ],
+        }
+    )
+
+    # a dry run lists the duplicates without removing them
+    report = mongo_habit_repository.deduplicate_habit_instances(dry_run=True)
+    assert report.removed_count == 2
+    assert report.duplicates[0].kept["_id"] == habit_instances_ids[-1]
+    assert not report.duplicates[0].conflicting
+    assert mongo_habit_repository.habit_instances_collection.count_documents({}) == 4
+
+    assert mongo_habit_repository.deduplicate_habit_instances().removed_count == 2
+
+    # the habit instance written last is kept
+    assert sorted(
+        data["_id"] for data in mongo_habit_repository.habit_instances_collection.find()
+    ) == [habit_instances_ids[-1], other_habit_instance_id]
+    assert mongo_habit_repository.habit_collections_collection.find_one()[
+        "habits_instances"
+    ] == [str(habit_instances_ids[-1]), str(other_habit_instance_id)]
+
+    mongo_habit_repository.ensure_indexes()
+
+    assert "habit_id_date_unique" in (
+        mongo_habit_repository.habit_instances_collection.index_information()
+    )
+    assert mongo_habit_repository.deduplicate_habit_instances().removed_count == 0
+
+
+def test_deduplicate_habit_instances_reports_conflicts(
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    mongo_habit_repository = MongoHabitRepository(mock_mongo_client)
+    mongo_habit_repository.habit_instances_collection.insert_many(
+        [
+            {
+                "habit_id": "habit1",
+                "date": datetime.datetime(2023, 10, 1),
+                "completed": completed,
+                "note": note,
+            }
+            for completed, note in ((True, "Ran 5 km"), (False, ""))
+        ]
+    )
+
+    report = mongo_habit_repository.deduplicate_habit_instances(dry_run=True)
+
+    # the removed habit instance was completed, unlike the kept one
+    assert report.duplicates[0].conflicting
+    assert report.duplicates[0].removed[0]["note"] == "Ran 5 km"
+
+
+def test_migrate_habit_instance_dates(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    habit = mock_mongo_habit_repository.save_habit(
+        Habit(name="Read", recurrence=Daily(), color=Color(hex="#FF5733"))
+    )
+    mock_mongo_habit_repository.save_habit_instance(
+        HabitInstance(habit=habit, date=datetime.date(2023, 10, 3), completed=True)
+    )
+    # habit instances written with their date as an ISO string
+    mock_mongo_habit_repository.habit_instances_collection.insert_many(
+        [
+            {"habit_id": habit.id, "date": f"2023-10-0{day}", "completed": False}
+            for day in (1, 2)
+        ]
+    )
+
+    assert (
+        len(
+            mock_mongo_habit_repository.get_habit_instances(
+                habit.id, datetime.date(2023, 10, 1), datetime.date(2023, 10, 31)
+            )
+        )
+        == 1
+    )
+
+    assert mock_mongo_habit_repository.migrate_habit_instance_dates() == 2
+    assert mock_mongo_habit_repository.migrate_habit_instance_dates() == 0
+
+    habit_instances = mock_mongo_habit_repository.get_habit_instances(
+        habit.id, datetime.date(2023, 10, 1), datetime.date(2023, 10, 31)
+    )
+
+    assert [habit_instance.date.day for habit_instance in habit_instances] == [
+        1,
+        2,
+        3,
+    ]
+    assert all(
+        isinstance(data["date"], datetime.datetime)
+        for data in mock_mongo_habit_repository.habit_instances_collection.find()
+    )
+
+
+def test_migrate_habit_instance_dates_collision(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    habit = mock_mongo_habit_repository.save_habit(
+        Habit(name="Read", recurrence=Daily(), color=Color(hex="#FF5733"))
+    )
+    habit_instance = mock_mongo_habit_repository.save_habit_instance(
+        HabitInstance(habit=habit, date=datetime.date(2023, 10, 1), completed=True)
+    )
+    # the same day written with its date as an ISO string by an older version
+    legacy_ids = mock_mongo_habit_repository.habit_instances_collection.insert_many(
+        [
+            {"habit_id": habit.id, "date": f"2023-10-0{day}", "completed": False}
+            for day in (1, 2)
+        ]
+    ).inserted_ids
+    mock_mongo_habit_repository.habit_collections_collection.insert_one(
+        {
+            "name": "Morning",
+            "habits": [habit.id],
+            "habits_instances": [habit_instance.id, str(legacy_ids[0])],
+        }
+    )
+
+    assert mock_mongo_habit_repository.migrate_habit_instance_dates() == 1
+
+    # the habit instance written by the current version is kept
+    habit_instances = mock_mongo_habit_repository.get_habit_instances(
+        habit.id, datetime.date(2023, 10, 1), datetime.date(2023, 10, 31)
+    )
+    assert [
+        (habit_instance.date.day, habit_instance.completed)
+        for habit_instance in habit_instances
+    ] == [(1, True), (2, False)]
+    assert mock_mongo_habit_repository.habit_collections_collection.find_one()[
+        "habits_instances"
+    ] == [habit_instance.id]
+
+
+def test_iter_habit_instances_invalid_batch_size(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    with pytest.raises(ValueError):
+        next(
+            mock_mongo_habit_repository.iter_habit_instances(
+                {str(ObjectId())},
+                datetime.date(2023, 10, 1),
+                datetime.date(2023, 10, 31),
+                batch_size=0,
+            )
+        )
+
+
+def test_ensure_indexes(
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    mock_mongo_habit_repository = MongoHabitRepository(mock_mongo_client)
+    report = mock_mongo_habit_repository.ensure_indexes()
+
+    assert report.created == {
+        MongoHabitRepository.HABITS_COLLECTION_NAME: ["recurrence_days"],
+        MongoHabitRepository.HABIT_CATEGORIES_COLLECTION_NAME: ["name_unique"],
+        MongoHabitRepository.HABIT_INSTANCE_COLLECTION_NAME: ["habit_id_date_unique"],
+    }
+    assert report.extra == {}
+    assert (
+        "habit_id_date_unique"
+        in mock_mongo_habit_repository.habit_instances_collection.index_information()
+    )
+
+    # The indexes are only created once
+    assert mock_mongo_habit_repository.ensure_indexes().up_to_date
+
+
+def test_ensure_indexes_reports_extra_indexes(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    mock_mongo_habit_repository.habits_collection.create_index("name", name="name")
+
+    report = mock_mongo_habit_repository.ensure_indexes()
+
+    assert report.extra == {MongoHabitRepository.HABITS_COLLECTION_NAME: ["name"]}
+    # Extra indexes are never dropped
+    assert "name" in mock_mongo_habit_repository.habits_collection.index_information()
+
+
+def test_save_habit_streak(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    assert mock_mongo_habit_repository.get_habit_streak("habit1") is None
+
+    for current in (1, 2):
+        mock_mongo_habit_repository.save_habit_streak(
+            HabitStreak(
+                habit_id="habit1",
+                current=current,
+                longest=2,
+                last_completed_date=datetime.date(2025, 1, current),
+            )
+        )
+
+    # the streak of a habit is replaced, not added
+    assert mock_mongo_client["pebble"]["habit_streaks"].count_documents({}) == 1
+    assert mock_mongo_habit_repository.get_habit_streak("habit1") == HabitStreak(
+        habit_id="habit1",
+        current=2,
+        longest=2,
+        last_completed_date=datetime.date(2025, 1, 2),
+    )
+
+
+def test_save_habit_streak_if_unchanged(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    first_habit_streak = HabitStreak(
+        habit_id="habit1",
+        current=1,
+        longest=1,
+        last_completed_date=datetime.date(2025, 1, 1),
+    )
+    second_habit_streak = HabitStreak(
+        habit_id="habit1",
+        current=2,
+        longest=2,
+        last_completed_date=datetime.date(2025, 1, 2),
+    )
+
+    assert mock_mongo_habit_repository.save_habit_streak_if_unchanged(
+        first_habit_streak, None
+    )
+    # the first streak of the habit was already inserted
+    assert not mock_mongo_habit_repository.save_habit_streak_if_unchanged(
+        second_habit_streak, None
+    )
+    assert mock_mongo_habit_repository.save_habit_streak_if_unchanged(
+        second_habit_streak, first_habit_streak
+    )
+    # the streak was replaced since the first streak was read
+    assert not mock_mongo_habit_repository.save_habit_streak_if_unchanged(
+        HabitStreak(habit_id="habit1"), first_habit_streak
+    )
+
+    assert mock_mongo_habit_repository.get_habit_streak("habit1") == (
+        second_habit_streak
+    )
+
+
+def test_save_completion_calendar(
+    mock_mongo_habit_repository: MongoHabitRepository,
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    assert mock_mongo_habit_repository.get_completion_calendar("habit1", 2025) is None
+
+    completion_calendar = CompletionCalendar(habit_id="habit1", year=2025)
+    for day in (1, 2):
+        completion_calendar.set_completed(datetime.date(2025, 1, day), True, "Done")
+        mock_mongo_habit_repository.save_completion_calendar(completion_calendar)
+    mock_mongo_habit_repository.save_completion_calendar(
+        CompletionCalendar(habit_id="habit1", year=2024)
+    )
+
+    # the calendar of a habit for a year is replaced, not added
+    completion_calendars = mock_mongo_client["pebble"]["completion_calendars"]
+    assert completion_calendars.count_documents({}) == 2
+    assert (
+        mock_mongo_habit_repository.get_completion_calendar("habit1", 2025)
+        == completion_calendar
+    )
+
+
+def test_save_completion_calendar_if_absent(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    completion_calendar = CompletionCalendar(habit_id="habit1", year=2025)
+    completion_calendar.set_completed(datetime.date(2025, 1, 1), True)
+
+    assert mock_mongo_habit_repository.save_completion_calendar_if_absent(
+        completion_calendar
+    )
+
+    # the calendar saved first is kept
+    assert not mock_mongo_habit_repository.save_completion_calendar_if_absent(
+        CompletionCalendar(habit_id="habit1", year=2025)
+    )
+    assert (
+        mock_mongo_habit_repository.get_completion_calendar("habit1", 2025)
+        == completion_calendar
+    )
+
+
+def test_record_completion_concurrent_check_in(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    habit = mock_mongo_habit_repository.save_habit(
+        Habit(name="Read", recurrence=Daily(), color=Color(hex="#FF5733"))
+    )
+    assert (
+        mock_mongo_habit_repository.record_completion(
+            HabitInstance(habit=habit, date=datetime.date(2025, 1, 1), completed=True)
+        )
+        is None
+    )
+    mock_mongo_habit_repository.save_completion_calendar(
+        CompletionCalendar(habit_id=habit.id, year=2025)
+    )
+    completion_calendars = mock_mongo_habit_repository.completion_calendars_collection
+    update_one = completion_calendars.update_one
+
+    def update_one_after_concurrent_check_in(*args: object, **kwargs: object) -> object:
+        # another check-in is recorded between the read and the write
+        completion_calendars.update_one = update_one
+        mock_mongo_habit_repository.record_completion(
+            HabitInstance(habit=habit, date=datetime.date(2025, 1, 2), completed=True)
+        )
+        return update_one(*args, **kwargs)
+
+    completion_calendars.update_one = update_one_after_concurrent_check_in
+
+    completion_calendar = mock_mongo_habit_repository.record_completion(
+        HabitInstance(
+            habit=habit, date=datetime.date(2025, 1, 1), completed=True, note="Done"
+        )
+    )
+
+    assert completion_calendar.completed_dates() == [
+        datetime.date(2025, 1, 1),
+        datetime.date(2025, 1, 2),
+    ]
+    assert (
+        mock_mongo_habit_repository.get_completion_calendar(habit.id, 2025)
+        == completion_calendar
+    )
+    assert completion_calendars.find_one()["version"] == 3
+
+
+def test_get_habits_by_weekdays(
+    mock_mongo_habit_repository: MongoHabitRepository,
+) -> None:
+    color = Color(hex="#FF5733")
+    daily_habit, tuesday_habit, weekly_habit = mock_mongo_habit_repository.save_habits(
+        [
+            Habit(name="Read", recurrence=Daily(), color=color),
+            Habit(name="Run", recurrence=Weekly({WeekDays.TUESDAY}), color=color),
+            Habit(name="Swim", recurrence=Weekly(), color=color),
+        ]
+    ).saved
+
+    assert mock_mongo_habit_repository.get_habits_by_weekdays(WeekDayMask.TUESDAY) == {
+        daily_habit,
+        tuesday_habit,
+    }
+    assert mock_mongo_habit_repository.get_habits_by_weekdays(
+        WeekDayMask.SATURDAY | WeekDayMask.SUNDAY
+    ) == {daily_habit}
+    assert (
+        mock_mongo_habit_repository.get_habit_by_id(weekly_habit.id).recurrence
+        == Weekly()
+    )
+
+
+def test_migrate_habit_recurrence_days(
+    mock_mongo_client: mongomock.MongoClient,
+) -> None:
+    # habits written with their days of the week as a list of names
+    mock_mongo_client["pebble"]["habits"].insert_many(
+        [
+            {
+                "name": name,
+                "recurrence": "Weekly",
+                "recurrence_days": ["Tuesday"],
+                "description": None,
+                "category_id": None,
+                "color_hex": "#FF5733",
+            }
+            for name in ("Read", "Run")
+        ]
+    )
+    mongo_habit_repository = MongoHabitRepository(mock_mongo_client)
+
+    assert mongo_habit_repository.get_habits_by_weekdays(WeekDayMask.TUESDAY) == set()
+
+    assert mongo_habit_repository.migrate_habit_recurrence_days() == 2
+    assert mongo_habit_repository.migrate_habit_recurrence_days() == 0
+
+    habits = mongo_habit_repository.get_habits_by_weekdays(WeekDayMask.TUESDAY)
+    assert {habit.name for habit in habits} == {"Read", "Run"}
+    assert all(habit.recurrence == Weekly({WeekDays.TUESDAY}) for habit in habits)
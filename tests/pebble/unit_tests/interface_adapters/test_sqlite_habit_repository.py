@@ -0,0 +1,557 @@
+import datetime
+import itertools
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from pebble.application.repositories import LazyHabitCollection
+from pebble.domain.entities import (
+    CompletionCalendar,
+    Habit,
+    HabitCategory,
+    HabitCollection,
+    HabitInstance,
+    HabitStreak,
+)
+from pebble.domain.entities.recurrences import BiWeekly, Daily, Weekly
+from pebble.domain.value_objects import Color, WeekDayMask, WeekDays
+from pebble.interface_adapters.repositories.sqlite import (
+    SqliteError,
+    SqliteHabitCategoryExistsError,
+    SqliteHabitCollectionExistsError,
+    SqliteHabitCollectionNotFoundError,
+    SqliteHabitExistsError,
+    SqliteHabitRepository,
+)
+
+
+@pytest.fixture
+def sqlite_habit_repository() -> SqliteHabitRepository:
+    sqlite_habit_repository = SqliteHabitRepository()
+    yield sqlite_habit_repository
+    sqlite_habit_repository.close()
+
+
+@pytest.fixture
+def generic_habit(sqlite_habit_repository: SqliteHabitRepository) -> Habit:
+    return Habit(
+        name="Test Habit",
+        recurrence=BiWeekly({WeekDays.MONDAY, WeekDays.FRIDAY}),
+        description="This is a test habit",
+        category=sqlite_habit_repository.save_habit_category(
+            HabitCategory(
+                name="Test Category",
+                description="This is a test category",
+                color=Color(hex="#00FF00"),
+            )
+        ),
+        color=Color(hex="#FF5733"),
+    )
+
+
+def test_save_habit(
+    sqlite_habit_repository: SqliteHabitRepository, generic_habit: Habit
+) -> None:
+    saved_habit = sqlite_habit_repository.save_habit(generic_habit)
+
+    retrieved_habit = sqlite_habit_repository.get_habit_by_id(saved_habit.id)
+
+    assert retrieved_habit == saved_habit
+    assert retrieved_habit.recurrence == generic_habit.recurrence
+    assert retrieved_habit.category == generic_habit.category
+    assert retrieved_habit.color == generic_habit.color
+    assert sqlite_habit_repository.get_habit_by_id("unknown") is None
+
+    with pytest.raises(SqliteHabitExistsError):
+        sqlite_habit_repository.save_habit(saved_habit)
+
+
+def test_save_habits_reports_failures(
+    sqlite_habit_repository: SqliteHabitRepository, generic_habit: Habit
+) -> None:
+    saved_habit = sqlite_habit_repository.save_habit(generic_habit)
+    new_habits = [Habit(name=name, recurrence=Daily()) for name in ("Read", "Run")]
+
+    result = sqlite_habit_repository.save_habits(
+        [new_habits[0], saved_habit, new_habits[1]]
+    )
+
+    assert result.saved == new_habits
+    assert [failure.entity for failure in result.failed] == [saved_habit]
+    assert sqlite_habit_repository.get_habits_by_ids(
+        {habit.id for habit in new_habits}
+    ) == set(new_habits)
+
+    # a bulk save without failures inserts all the habits at once
+    result = sqlite_habit_repository.save_habits(
+        [Habit(name=name, recurrence=Daily()) for name in ("Swim", "Walk")]
+    )
+    assert len(result.saved) == 2
+    assert not result.failed
+
+
+def test_save_habit_category(
+    sqlite_habit_repository: SqliteHabitRepository,
+) -> None:
+    habit_category = sqlite_habit_repository.save_habit_category(
+        HabitCategory(name="Health", color=Color(hex="#FF5733"))
+    )
+
+    assert sqlite_habit_repository.get_habit_category_by_name("Health") == (
+        habit_category
+    )
+    assert sqlite_habit_repository.get_habit_category_by_name("Work") is None
+
+    # the name of a habit category is unique
+    new_habit_category = HabitCategory(name="Health")
+    with pytest.raises(SqliteHabitCategoryExistsError):
+        sqlite_habit_repository.save_habit_category(new_habit_category)
+    assert new_habit_category.id is None
+
+    result = sqlite_habit_repository.save_habit_categories(
+        [HabitCategory(name="Health"), HabitCategory(name="Work")]
+    )
+    assert [habit_category.name for habit_category in result.saved] == ["Work"]
+    assert len(result.failed) == 1
+
+
+def test_habit_collections(
+    sqlite_habit_repository: SqliteHabitRepository, generic_habit: Habit
+) -> None:
+    habit = sqlite_habit_repository.save_habit(generic_habit)
+    other_habit = sqlite_habit_repository.save_habit(
+        Habit(name="Read", recurrence=Daily())
+    )
+    habit_instance = sqlite_habit_repository.save_habit_instance(
+        HabitInstance(habit=other_habit, date=datetime.date(2025, 1, 1), completed=True)
+    )
+
+    habit_collection = sqlite_habit_repository.save_habit_collection(
+        HabitCollection(
+            name="Morning",
+            description="The morning routine",
+            habits={habit},
+            habits_instance={habit_instance},
+        )
+    )
+    retrieved_habit_collection = sqlite_habit_repository.get_habit_collection_by_id(
+        habit_collection.id
+    )
+
+    assert retrieved_habit_collection == habit_collection
+    assert retrieved_habit_collection.habits == {habit}
+    assert retrieved_habit_collection.habits_instance == {habit_instance}
+    assert sqlite_habit_repository.get_habit_collection_by_id("unknown") is None
+    assert sqlite_habit_repository.habit_collection_exists(habit_collection.id)
+    assert not sqlite_habit_repository.habit_collection_exists("unknown")
+
+    with pytest.raises(SqliteHabitCollectionExistsError):
+        sqlite_habit_repository.save_habit_collection(habit_collection)
+
+
+def test_open_habit_collection(
+    sqlite_habit_repository: SqliteHabitRepository, generic_habit: Habit
+) -> None:
+    habit = sqlite_habit_repository.save_habit(generic_habit)
+    habit_instances = [
+        sqlite_habit_repository.save_habit_instance(
+            HabitInstance(habit=habit, date=datetime.date(2025, 1, day), completed=True)
+        )
+        for day in range(1, 6)
+    ]
+    habit_collection = sqlite_habit_repository.save_habit_collection(
+        HabitCollection(
+            name="Morning",
+            description="The morning routine",
+            habits={habit},
+            habits_instance=habit_instances,
+        )
+    )
+
+    opened_habit_collection = sqlite_habit_repository.open_habit_collection(
+        habit_collection.id
+    )
+
+    assert isinstance(opened_habit_collection, LazyHabitCollection)
+    assert opened_habit_collection.description == "The morning routine"
+    assert not opened_habit_collection.habits_loaded
+    assert opened_habit_collection.habits == {habit}
+    assert opened_habit_collection.history.page(2) == habit_instances[:2]
+    assert (
+        list(
+            opened_habit_collection.history.between(
+                datetime.date(2025, 1, 4), datetime.date(2025, 1, 31)
+            )
+        )
+        == habit_instances[3:]
+    )
+    assert opened_habit_collection == habit_collection
+    assert sqlite_habit_repository.open_habit_collection("unknown") is None
+
+
+def test_open_habit_collection_pages_after(
+    sqlite_habit_repository: SqliteHabitRepository, generic_habit: Habit
+) -> None:
+    habits = [
+        sqlite_habit_repository.save_habit(generic_habit),
+        sqlite_habit_repository.save_habit(Habit(name="Run", recurrence=Daily())),
+    ]
+    habit_instances = [
+        sqlite_habit_repository.save_habit_instance(
+            HabitInstance(habit=habit, date=datetime.date(2025, 1, day), completed=True)
+        )
+        for day in range(1, 5)
+        for habit in habits
+    ]
+    habit_collection = sqlite_habit_repository.save_habit_collection(
+        HabitCollection(
+            name="Morning", habits=set(habits), habits_instance=habit_instances
+        )
+    )
+    history = sqlite_habit_repository.open_habit_collection(habit_collection.id).history
+
+    # each page continues after the date and identifier of the previous one
+    pages = [history.page(3)]
+    while len(pages[-1]) == 3:
+        last_habit_instance = pages[-1][-1]
+        pages.append(
+            history.page(3, after=(last_habit_instance.date, last_habit_instance.id))
+        )
+
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert list(itertools.chain.from_iterable(pages)) == list(history)
+    assert {
+        habit_instance.id for habit_instance in itertools.chain.from_iterable(pages)
+    } == {habit_instance.id for habit_instance in habit_instances}
+    assert [
+        habit_instance.date for habit_instance in itertools.chain.from_iterable(pages)
+    ] == sorted(habit_instance.date for habit_instance in habit_instances)
+    assert (
+        history.page(
+            3,
+            after=(pages[0][-1].date, pages[0][-1].id),
+            end_date=datetime.date(2025, 1, 2),
+        )
+        == pages[1][:1]
+    )
+
+
+def test_update_habit_collection(
+    sqlite_habit_repository: SqliteHabitRepository, generic_habit: Habit
+) -> None:
+    habit = sqlite_habit_repository.save_habit(generic_habit)
+    habit_collection = sqlite_habit_repository.save_habit_collection(
+        HabitCollection(name="Morning", habits={habit})
+    )
+
+    habit_collection.name = "Evening"
+    habit_collection.habits = set()
+    sqlite_habit_repository.update_habit_collection(habit_collection)
+
+    retrieved_habit_collection = sqlite_habit_repository.get_habit_collection_by_id(
+        habit_collection.id
+    )
+    assert retrieved_habit_collection.name == "Evening"
+    assert retrieved_habit_collection.habits == set()
+
+    with pytest.raises(ValueError):
+        sqlite_habit_repository.update_habit_collection(HabitCollection(name="Night"))
+
+    with pytest.raises(SqliteHabitCollectionNotFoundError):
+        sqlite_habit_repository.update_habit_collection(
+            HabitCollection(name="Night", id="unknown")
+        )
+
+
+def test_add_habit_instance_to_collection(
+    sqlite_habit_repository: SqliteHabitRepository, generic_habit: Habit
+) -> None:
+    habit = sqlite_habit_repository.save_habit(generic_habit)
+    habit_collection = sqlite_habit_repository.save_habit_collection(
+        HabitCollection(name="Morning", habits={habit})
+    )
+    habit_instance = sqlite_habit_repository.save_habit_instance(
+        HabitInstance(habit=habit, date=datetime.date(2025, 1, 1), completed=True)
+    )
+
+    # adding the same habit instance twice has no effect
+    for _ in range(2):
+        sqlite_habit_repository.add_habit_instance_to_collection(
+            habit_collection.id, habit_instance
+        )
+
+    assert sqlite_habit_repository.get_habit_collection_by_id(
+        habit_collection.id
+    ).habits_instance == {habit_instance}
+
+    with pytest.raises(SqliteHabitCollectionNotFoundError):
+        sqlite_habit_repository.add_habit_instance_to_collection(
+            "unknown", habit_instance
+        )
+
+    with pytest.raises(ValueError):
+        sqlite_habit_repository.add_habit_instance_to_collection(
+            habit_collection.id,
+            HabitInstance(habit=habit, date=datetime.date(2025, 1, 2), completed=True),
+        )
+
+
+def test_save_habit_instance(
+    sqlite_habit_repository: SqliteHabitRepository, generic_habit: Habit
+) -> None:
+    habit = sqlite_habit_repository.save_habit(generic_habit)
+    habit_instance = sqlite_habit_repository.save_habit_instance(
+        HabitInstance(
+            habit=habit, date=datetime.date(2025, 1, 1), completed=True, note="Done"
+        )
+    )
+
+    assert (
+        sqlite_habit_repository.get_habit_instance_by_id(habit_instance.id)
+        == habit_instance
+    )
+    assert sqlite_habit_repository.get_habit_instance_by_id("unknown") is None
+
+    with pytest.raises(SqliteHabitExistsError):
+        sqlite_habit_repository.save_habit_instance(habit_instance)
+
+    # a habit has at most one habit instance per day
+    with pytest.raises(SqliteHabitExistsError):
+        sqlite_habit_repository.save_habit_instance(
+            HabitInstance(habit=habit, date=datetime.date(2025, 1, 1), completed=False)
+        )
+
+
+def test_record_check_in(
+    sqlite_habit_repository: SqliteHabitRepository, generic_habit: Habit
+) -> None:
+    habit = sqlite_habit_repository.save_habit(generic_habit)
+
+    habit_instances = [
+        sqlite_habit_repository.record_check_in(
+            HabitInstance(
+                habit=habit, date=datetime.date(2025, 1, 1), completed=completed
+            )
+        )
+        for completed in (False, False, True)
+    ]
+
+    assert len({habit_instance.id for habit_instance in habit_instances}) == 1
+    assert sqlite_habit_repository.get_habit_instances(
+        habit.id, datetime.date(2025, 1, 1), datetime.date(2025, 1, 1)
+    ) == [habit_instances[-1]]
+    assert (
+        sqlite_habit_repository.get_habit_instance_by_id(
+            habit_instances[0].id
+        ).completed
+        is True
+    )
+
+
+def test_iter_habit_instances_keyset_pagination(
+    sqlite_habit_repository: SqliteHabitRepository,
+) -> None:
+    habits = sqlite_habit_repository.save_habits(
+        [Habit(name=name, recurrence=Daily()) for name in ("Read", "Run")]
+    ).saved
+    result = sqlite_habit_repository.save_habit_instances(
+        [
+            HabitInstance(habit=habit, date=datetime.date(2025, 2, day), completed=True)
+            for habit in habits
+            for day in range(1, 11)
+        ]
+    )
+    assert len(result.saved) == 20
+
+    habits_ids = {habit.id for habit in habits}
+    start_date, end_date = datetime.date(2025, 2, 3), datetime.date(2025, 2, 8)
+
+    # read the date range by pages of 4 habit instances
+    pages = []
+    after = None
+    while True:
+        page = list(
+            itertools.islice(
+                sqlite_habit_repository.iter_habit_instances(
+                    habits_ids, start_date, end_date, batch_size=3, after=after
+                ),
+                4,
+            )
+        )
+        if not page:
+            break
+        pages.append(page)
+        after = (page[-1].date, page[-1].id)
+
+    habit_instances = [habit_instance for page in pages for habit_instance in page]
+
+    assert [len(page) for page in pages] == [4, 4, 4]
+    assert habit_instances == sorted(
+        habit_instances,
+        key=lambda habit_instance: (habit_instance.date, habit_instance.id),
+    )
+    assert [habit_instance.date for habit_instance in habit_instances[::2]] == [
+        start_date + datetime.timedelta(days=day) for day in range(6)
+    ]
+    assert (
+        list(
+            sqlite_habit_repository.iter_habit_instances(
+                {"unknown"}, start_date, end_date
+            )
+        )
+        == []
+    )
+
+    with pytest.raises(ValueError):
+        next(
+            sqlite_habit_repository.iter_habit_instances(
+                habits_ids, start_date, end_date, batch_size=0
+            )
+        )
+
+
+def test_wal_database_file(tmp_path: Path) -> None:
+    database_path = tmp_path / "pebble.db"
+    sqlite_habit_repository = SqliteHabitRepository(database_path)
+    habit = sqlite_habit_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+
+    assert sqlite_habit_repository.journal_mode == "wal"
+
+    # the indexes are declared in the schema
+    with sqlite3.connect(database_path) as connection:
+        index_names = {
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+    assert {
+        "habit_categories_name_unique",
+        "habit_instances_habit_id_date_unique",
+    } <= index_names
+
+    sqlite_habit_repository.close()
+
+    # the schema is only created once, the data is kept
+    reopened_habit_repository = SqliteHabitRepository(database_path)
+    assert reopened_habit_repository.get_habit_by_id(habit.id) == habit
+    reopened_habit_repository.close()
+
+
+def test_save_habit_streak(sqlite_habit_repository: SqliteHabitRepository) -> None:
+    habit = sqlite_habit_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+
+    assert sqlite_habit_repository.get_habit_streak(habit.id) is None
+
+    for current in (1, 2):
+        sqlite_habit_repository.save_habit_streak(
+            HabitStreak(
+                habit_id=habit.id,
+                current=current,
+                longest=2,
+                last_completed_date=datetime.date(2025, 1, current),
+            )
+        )
+
+    assert sqlite_habit_repository.get_habit_streak(habit.id) == HabitStreak(
+        habit_id=habit.id,
+        current=2,
+        longest=2,
+        last_completed_date=datetime.date(2025, 1, 2),
+    )
+
+    # the habit of a streak must exist
+    with pytest.raises(SqliteError):
+        sqlite_habit_repository.save_habit_streak(HabitStreak(habit_id="unknown"))
+
+
+def test_save_completion_calendar(
+    sqlite_habit_repository: SqliteHabitRepository,
+) -> None:
+    habit = sqlite_habit_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+
+    assert sqlite_habit_repository.get_completion_calendar(habit.id, 2025) is None
+
+    completion_calendar = CompletionCalendar(habit_id=habit.id, year=2025)
+    for day in (1, 2):
+        completion_calendar.set_completed(datetime.date(2025, 1, day), True, "Done")
+        sqlite_habit_repository.save_completion_calendar(completion_calendar)
+
+    assert (
+        sqlite_habit_repository.get_completion_calendar(habit.id, 2025)
+        == completion_calendar
+    )
+
+    # the habit of a calendar must exist
+    with pytest.raises(SqliteError):
+        sqlite_habit_repository.save_completion_calendar(
+            CompletionCalendar(habit_id="unknown", year=2025)
+        )
+
+
+def test_save_completion_calendar_if_absent(
+    sqlite_habit_repository: SqliteHabitRepository,
+) -> None:
+    habit = sqlite_habit_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+    completion_calendar = CompletionCalendar(habit_id=habit.id, year=2025)
+    completion_calendar.set_completed(datetime.date(2025, 1, 1), True)
+
+    assert sqlite_habit_repository.save_completion_calendar_if_absent(
+        completion_calendar
+    )
+
+    # the calendar saved first is kept
+    assert not sqlite_habit_repository.save_completion_calendar_if_absent(
+        CompletionCalendar(habit_id=habit.id, year=2025)
+    )
+    assert (
+        sqlite_habit_repository.get_completion_calendar(habit.id, 2025)
+        == completion_calendar
+    )
+
+
+def test_record_completion(
+    sqlite_habit_repository: SqliteHabitRepository,
+) -> None:
+    habit = sqlite_habit_repository.save_habit(Habit(name="Read", recurrence=Daily()))
+    habit_instances = [
+        HabitInstance(habit=habit, date=datetime.date(2025, 1, day), completed=True)
+        for day in (1, 2)
+    ]
+
+    assert sqlite_habit_repository.record_completion(habit_instances[0]) is None
+
+    sqlite_habit_repository.save_completion_calendar(
+        CompletionCalendar(habit_id=habit.id, year=2025)
+    )
+    for habit_instance in habit_instances:
+        sqlite_habit_repository.record_completion(habit_instance)
+
+    assert sqlite_habit_repository.get_completion_calendar(
+        habit.id, 2025
+    ).completed_dates() == [datetime.date(2025, 1, 1), datetime.date(2025, 1, 2)]
+
+
+def test_get_habits_by_weekdays(
+    sqlite_habit_repository: SqliteHabitRepository,
+) -> None:
+    daily_habit, tuesday_habit, _ = sqlite_habit_repository.save_habits(
+        [
+            Habit(name="Read", recurrence=Daily()),
+            Habit(name="Run", recurrence=BiWeekly({WeekDays.TUESDAY, WeekDays.FRIDAY})),
+            Habit(name="Swim", recurrence=Weekly()),
+        ]
+    ).saved
+
+    assert sqlite_habit_repository.get_habits_by_weekdays(WeekDayMask.TUESDAY) == {
+        daily_habit,
+        tuesday_habit,
+    }
+    assert sqlite_habit_repository.get_habits_by_weekdays(WeekDayMask.MONDAY) == {
+        daily_habit
+    }
+    # the days of the week that are not set are read back as not set
+    assert sqlite_habit_repository.get_habit_by_id(
+        tuesday_habit.id
+    ).recurrence == BiWeekly({WeekDays.TUESDAY, WeekDays.FRIDAY})